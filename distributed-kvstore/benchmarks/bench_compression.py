@@ -0,0 +1,100 @@
+"""
+Benchmark: value compression - bộ nhớ & bytes mạng tiết kiệm vs CPU
+
+Sinh JSON documents (nhỏ ~200 bytes và lớn ~4 KB), encode bằng từng cấu
+hình ValueCodec rồi đo:
+- memory: tổng sys.getsizeof của value đã lưu (dạng nằm trong storage)
+- wire: tổng ReplicateRequest.ByteSize() (bytes gửi đi mỗi replica)
+- encode/decode: µs mỗi value (chi phí CPU ở owner / khi Get)
+
+Usage:
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --values 5000
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.proto import kvstore_pb2
+from src.storage.compression import ValueCodec, build_dictionary, to_wire
+
+
+def make_document(i: int, rng: random.Random, events: int) -> str:
+    """JSON document với field lặp lại và giá trị ngẫu nhiên."""
+    return json.dumps({
+        "id": i,
+        "name": f"user-{i}",
+        "email": f"user{i}@example.com",
+        "plan": rng.choice(["free", "pro", "enterprise"]),
+        "events": [
+            {"type": rng.choice(["login", "logout", "purchase"]), "ts": 1700000000 + rng.randrange(10 ** 7),
+             "ip": f"10.0.{rng.randrange(256)}.{rng.randrange(256)}"}
+            for _ in range(events)
+        ],
+    })
+
+
+def measure(codec: ValueCodec, values):
+    """Trả về (memory bytes, wire bytes, encode µs/value, decode µs/value)."""
+    start = time.perf_counter()
+    stored = [codec.encode(value) for value in values]
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for value in stored:
+        codec.decode(value)
+    decode_seconds = time.perf_counter() - start
+
+    memory = sum(sys.getsizeof(value) for value in stored)
+    wire = 0
+    for i, value in enumerate(stored):
+        wire_value, compressed_value = to_wire(value)
+        wire += kvstore_pb2.ReplicateRequest(
+            key=f"doc:{i}", value=wire_value, compressed_value=compressed_value
+        ).ByteSize()
+    return memory, wire, encode_seconds / len(values) * 1e6, decode_seconds / len(values) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Value compression: memory/network saved vs CPU")
+    parser.add_argument("--values", type=int, default=2000, help="Số values mỗi loại")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    dictionary = build_dictionary(make_document(-i, rng, 2) for i in range(100))
+    workloads = [
+        ("small (~200B)", [make_document(i, rng, 2) for i in range(args.values)]),
+        ("large (~4KB)", [make_document(i, rng, 40) for i in range(args.values)]),
+    ]
+    codecs = [
+        ("none", ValueCodec(algorithm="none")),
+        ("zlib-1", ValueCodec(algorithm="zlib", level=1, threshold_bytes=256)),
+        ("zlib-6", ValueCodec(algorithm="zlib", level=6, threshold_bytes=256)),
+        ("lzma-6", ValueCodec(algorithm="lzma", level=6, threshold_bytes=256)),
+        ("zlib-6+dict", ValueCodec(algorithm="zlib", level=6, dictionary=dictionary)),
+    ]
+
+    print(f"{'workload':<15} {'codec':<12} {'memory MB':>10} {'saved':>7} {'wire MB':>9} "
+          f"{'saved':>7} {'encode µs':>10} {'decode µs':>10}")
+    print("-" * 88)
+    for workload, values in workloads:
+        base_memory = base_wire = None
+        for name, codec in codecs:
+            memory, wire, encode_us, decode_us = measure(codec, values)
+            if base_memory is None:
+                base_memory, base_wire = memory, wire
+            print(f"{workload:<15} {name:<12} {memory / 1024 / 1024:>10.2f} "
+                  f"{1 - memory / base_memory:>7.0%} {wire / 1024 / 1024:>9.2f} "
+                  f"{1 - wire / base_wire:>7.0%} {encode_us:>10.1f} {decode_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark: ConsistentHash lookup rate theo hash function
+
+So sánh get_node() / get_nodes() với hash cũ (MD5 hexdigest → int(..., 16))
+và các hash function của ring: md5 (compat, digest bytes), blake2b (64-bit),
+xxhash (64-bit, chỉ khi package xxhash đã cài). Kiểm tra luôn md5 compat
+cho cùng placement với hash cũ, và đo thời gian add_node / remove_node
+(membership churn) trên ring lớn cùng thời gian build lại preference lists
+(trả một lần ở get_nodes() đầu tiên sau khi topology đổi), và route_many()
+(gom cả batch theo owner, numpy.searchsorted nếu có numpy) so với gọi
+get_node() từng key.
+
+Usage:
+    python benchmarks/bench_consistent_hash.py
+    python benchmarks/bench_consistent_hash.py --lookups 500000 --nodes 10 --repeat 9
+"""
+
+import sys
+import os
+import time
+import hashlib
+import argparse
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import src.consistent_hash as consistent_hash
+from src.consistent_hash import ConsistentHash, xxhash
+
+
+def legacy_hash(key: str) -> int:
+    """Hash của các version trước: format hexdigest rồi parse 8 hex chars."""
+    return int(hashlib.md5(key.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def build_ring(hash_function: str, nodes, virtual_nodes: int) -> ConsistentHash:
+    if hash_function == "legacy":
+        ring = ConsistentHash(virtual_nodes=virtual_nodes)
+        ring._hash = legacy_hash
+        for node in nodes:
+            ring.add_node(node)
+        return ring
+    return ConsistentHash(nodes=nodes, virtual_nodes=virtual_nodes, hash_function=hash_function)
+
+
+def measure(func, keys) -> float:
+    """Lookups/s của func trên toàn bộ keys."""
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return len(keys) / (time.perf_counter() - start)
+
+
+def measure_churn(total_nodes: int, virtual_nodes: int, replicas: int, rounds: int = 20):
+    """
+    Thời gian trung bình (ms) của một add_node / remove_node trên ring
+    `total_nodes` nodes, và của một lần build lại preference lists.
+    """
+    ring = ConsistentHash(nodes=[f"node{i}" for i in range(total_nodes)],
+                          virtual_nodes=virtual_nodes, preference_length=replicas)
+    start = time.perf_counter()
+    for i in range(rounds):
+        ring.add_node(f"extra{i}")
+    for i in range(rounds):
+        ring.remove_node(f"extra{i}")
+    churn_ms = (time.perf_counter() - start) / (2 * rounds) * 1000
+    
+    start = time.perf_counter()
+    ring.get_nodes("user:1", replicas)
+    return churn_ms, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consistent hash lookup benchmark")
+    parser.add_argument("--lookups", type=int, default=200000, help="Lookups per run")
+    parser.add_argument("--nodes", type=int, default=5, help="Physical nodes")
+    parser.add_argument("--vnodes", type=int, default=150, help="Virtual nodes per node")
+    parser.add_argument("--repeat", type=int, default=5, help="Rounds per hash (best rate is reported)")
+    parser.add_argument("--replicas", type=int, default=2, help="count for get_nodes()")
+    parser.add_argument("--churn-nodes", type=str, default="100,500,1000",
+                        help="Comma-separated ring sizes for the add/remove benchmark")
+    args = parser.parse_args()
+
+    nodes = [f"node{i}" for i in range(1, args.nodes + 1)]
+    keys = [f"user:{i}" for i in range(args.lookups)]
+    hash_functions = ["legacy", "md5", "blake2b"] + (["xxhash"] if xxhash is not None else [])
+
+    print("=" * 70)
+    print(f"  ConsistentHash lookups: {args.lookups} keys, {args.nodes} nodes x {args.vnodes} vnodes")
+    print("=" * 70)
+    print(f"{'hash':<10}{'hash()':>11}{'get_node':>11}{'get_nodes':>11}{'speedup':>10}{'range':>15}")
+    print("-" * 70)
+
+    # Các hash chạy xen kẽ trong mỗi round → nhiễu của máy ảnh hưởng đều
+    rings = {name: build_ring(name, nodes, args.vnodes) for name in hash_functions}
+    rates = {name: [] for name in hash_functions}
+    for _ in range(max(args.repeat, 1)):
+        for name, ring in rings.items():
+            rates[name].append((
+                measure(ring._hash, keys),
+                measure(ring.get_node, keys),
+                measure(lambda key: ring.get_nodes(key, args.replicas), keys),
+            ))
+
+    baseline = max(rate[1] for rate in rates["legacy"])
+    for name in hash_functions:
+        hash_rate, node_rate, nodes_rate = (max(column) for column in zip(*rates[name]))
+        ratios = [rate[1] / legacy[1] for rate, legacy in zip(rates[name], rates["legacy"])]
+        spread = f"{min(ratios):.2f}-{max(ratios):.2f}x"
+        print(f"{name:<10}{hash_rate / 1000:>10.0f}k{node_rate / 1000:>10.0f}k"
+              f"{nodes_rate / 1000:>10.0f}k{node_rate / baseline:>9.2f}x{spread:>15}")
+
+    print("-" * 70)
+    print(f"(lookups/s, best of {max(args.repeat, 1)} rounds, higher is better;")
+    print(" speedup = best get_node vs legacy, range = get_node vs legacy in each round)")
+    if xxhash is None:
+        print("xxhash not installed: pip install xxhash to benchmark the C hash")
+
+    walk_ring = ConsistentHash(nodes=nodes, virtual_nodes=args.vnodes, preference_length=1)
+    pref_ring = ConsistentHash(nodes=nodes, virtual_nodes=args.vnodes, preference_length=args.replicas)
+    walk_rate = measure(lambda key: walk_ring.get_nodes(key, args.replicas), keys)
+    pref_rate = measure(lambda key: pref_ring.get_nodes(key, args.replicas), keys)
+    print(f"get_nodes(count={args.replicas}): precomputed {pref_rate / 1000:.0f}k/s "
+          f"vs ring walk {walk_rate / 1000:.0f}k/s ({pref_rate / walk_rate:.2f}x)")
+
+    def group_one_by_one(batch):
+        groups = {}
+        for key in batch:
+            groups.setdefault(pref_ring.get_node(key), []).append(key)
+        return groups
+    
+    numpy_module = consistent_hash.np
+    routes = [("get_node loop", group_one_by_one), ("route_many (bisect)", pref_ring.route_many)]
+    if numpy_module is not None:
+        routes.append(("route_many (numpy)", pref_ring.route_many))
+    for label, route in routes:
+        consistent_hash.np = numpy_module if label.endswith("(numpy)") else None
+        start = time.perf_counter()
+        route(keys)
+        print(f"{label:<22}{len(keys) / (time.perf_counter() - start) / 1000:>10.0f}k keys/s")
+    consistent_hash.np = numpy_module
+    if numpy_module is None:
+        print("numpy not installed: pip install numpy to benchmark the vectorized route_many()")
+    
+    legacy = build_ring("legacy", nodes, args.vnodes)
+    compat = build_ring("md5", nodes, args.vnodes)
+    moved = sum(legacy.get_node(key) != compat.get_node(key) for key in keys)
+    print(f"md5 compat vs legacy: {moved} of {len(keys)} keys placed differently")
+
+    print()
+    print(f"{'ring nodes':<12}{'tokens':>10}{'add/remove':>16}{'pref rebuild':>16}")
+    print("-" * 54)
+    for total in (int(n) for n in args.churn_nodes.split(",")):
+        churn_ms, rebuild_ms = measure_churn(total, args.vnodes, args.replicas)
+        print(f"{total:<12}{total * args.vnodes:>10}{churn_ms:>13.2f} ms{rebuild_ms:>13.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: bộ nhớ mỗi key của StorageEngine (dict) vs CompactStorageEngine (arena)
+
+Dùng tracemalloc đo bộ nhớ Python được cấp phát sau khi nạp N keys
+(key "user:<i>", value 16-48 bytes), kèm throughput PUT/GET.
+
+Lưu ý: tracemalloc làm chậm mọi allocation (2-3x), nên throughput in ra
+chỉ dùng để so sánh tương đối giữa 2 engine. 10M keys với dict engine
+cần vài GB RAM.
+
+Usage:
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --keys 1000000 10000000
+"""
+
+import sys
+import os
+import gc
+import time
+import random
+import argparse
+import tracemalloc
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.storage_engine import StorageEngine
+from src.storage.compact_engine import CompactStorageEngine
+
+
+def measure(engine_factory, num_keys: int, seed: int = 42):
+    """
+    Nạp num_keys keys vào engine mới, trả về (bytes/key, put ops/s, get ops/s).
+
+    Keys/values được sinh trong vòng lặp nên chỉ những gì engine giữ lại
+    mới được tính vào bộ nhớ.
+    """
+    rng = random.Random(seed)
+    value_lengths = [rng.randint(16, 48) for _ in range(1024)]
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    storage = engine_factory()
+    start = time.perf_counter()
+    for i in range(num_keys):
+        storage.put(f"user:{i}", "v" * value_lengths[i & 1023])
+    put_seconds = time.perf_counter() - start
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    lookups = min(num_keys, 200000)
+    start = time.perf_counter()
+    for i in range(lookups):
+        storage.get(f"user:{rng.randrange(num_keys)}")
+    get_seconds = time.perf_counter() - start
+
+    del storage
+    gc.collect()
+    return used / num_keys, num_keys / put_seconds, lookups / get_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per key: dict vs compact arena engine")
+    parser.add_argument("--keys", type=int, nargs="+", default=[1000000],
+                        help="Số keys cần đo (có thể truyền nhiều giá trị)")
+    args = parser.parse_args()
+
+    engines = [
+        ("dict (StorageEngine)", StorageEngine),
+        ("compact (arena)", CompactStorageEngine),
+    ]
+
+    print(f"{'keys':>12} {'engine':<22} {'bytes/key':>10} {'total MB':>10} "
+          f"{'put ops/s':>12} {'get ops/s':>12}")
+    print("-" * 84)
+    for num_keys in args.keys:
+        for name, factory in engines:
+            bytes_per_key, put_rate, get_rate = measure(factory, num_keys)
+            print(f"{num_keys:>12,} {name:<22} {bytes_per_key:>10.1f} "
+                  f"{bytes_per_key * num_keys / 1024 / 1024:>10.1f} "
+                  f"{put_rate:>12,.0f} {get_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: so sánh các placement strategies (ring, jump, rendezvous, slots)
+
+Với mỗi strategy in ra:
+- lookup throughput của get_node() và get_nodes(key, replicas)
+- bộ nhớ của state (đo bằng tracemalloc khi build)
+- tỉ lệ keys đổi owner khi thêm 1 node / xóa 1 node ở giữa (lý tưởng ~ 1/(N+1) và 1/N)
+- độ lệch tải: node nhiều keys nhất so với trung bình
+
+Usage:
+    python benchmarks/bench_placement.py
+    python benchmarks/bench_placement.py --nodes 20 --keys 200000
+"""
+
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+from collections import Counter
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.consistent_hash import create_placement_strategy, PLACEMENT_STRATEGIES
+
+
+def build(name: str, nodes, args):
+    """Build strategy `name` với `nodes`, trả về (strategy, bytes allocated)."""
+    options = {"hash_function": args.hash}
+    if name == "ring":
+        options.update(virtual_nodes=args.vnodes, preference_length=args.replicas)
+    elif name == "slots":
+        options.update(num_slots=args.slots, hash_function="crc16")
+    tracemalloc.start()
+    strategy = create_placement_strategy(name, **options)
+    for node in nodes:
+        strategy.add_node(node)
+    strategy.get_nodes("warmup", args.replicas)  # Build lazy state (preference lists)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return strategy, size
+
+
+def measure(func, keys) -> float:
+    """Lookups/s của func trên toàn bộ keys."""
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return len(keys) / (time.perf_counter() - start)
+
+
+def moved_fraction(strategy, keys, before) -> float:
+    """Tỉ lệ keys có owner khác `before`."""
+    return sum(strategy.get_node(key) != owner for key, owner in zip(keys, before)) / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Placement strategy benchmark")
+    parser.add_argument("--nodes", type=int, default=10, help="Physical nodes")
+    parser.add_argument("--keys", type=int, default=100000, help="Keys looked up")
+    parser.add_argument("--replicas", type=int, default=2, help="count for get_nodes()")
+    parser.add_argument("--vnodes", type=int, default=150, help="Virtual nodes per node (ring)")
+    parser.add_argument("--slots", type=int, default=16384, help="Slots (slots)")
+    parser.add_argument("--hash", type=str, default="md5", help="Hash function (except slots: crc16)")
+    args = parser.parse_args()
+
+    nodes = [f"node{i}" for i in range(1, args.nodes + 1)]
+    keys = [f"user:{i}" for i in range(args.keys)]
+    ideal = 1 / (args.nodes + 1)
+
+    print("=" * 86)
+    print(f"  Placement strategies: {args.nodes} nodes, {args.keys} keys, "
+          f"get_nodes count={args.replicas} (ideal move on resize {ideal:.1%})")
+    print("=" * 86)
+    print(f"{'strategy':<12}{'get_node':>11}{'get_nodes':>11}{'memory':>11}"
+          f"{'add moved':>12}{'remove moved':>14}{'max/avg':>10}")
+    print("-" * 86)
+
+    for name in PLACEMENT_STRATEGIES:
+        strategy, memory = build(name, nodes, args)
+        node_rate = measure(strategy.get_node, keys)
+        nodes_rate = measure(lambda key: strategy.get_nodes(key, args.replicas), keys)
+
+        before = [strategy.get_node(key) for key in keys]
+        load = Counter(before)
+        imbalance = max(load.values()) / (len(keys) / args.nodes)
+
+        strategy.add_node("extra")
+        added = moved_fraction(strategy, keys, before)
+        strategy.remove_node("extra")
+        before = [strategy.get_node(key) for key in keys]
+        # Xóa một node ở giữa (jump hash: node cuối chuyển vào bucket của nó)
+        strategy.remove_node(nodes[len(nodes) // 2])
+        removed = moved_fraction(strategy, keys, before)
+
+        print(f"{name:<12}{node_rate / 1000:>10.0f}k{nodes_rate / 1000:>10.0f}k"
+              f"{memory / 1024:>9.0f}KB{added:>12.1%}{removed:>14.1%}{imbalance:>10.2f}")
+
+    print("-" * 86)
+    print("(lookups/s, higher is better; moved = keys whose owner changed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: StorageEngine (1 global RLock) vs ShardedStorageEngine (lock stripes)
+
+Chạy mixed read/write workload (mặc định 80% GET / 20% PUT) với số worker
+threads tăng dần, in throughput (ops/s) cho từng engine.
+
+Lưu ý: trong CPython, GIL giới hạn throughput tổng; lợi ích của lock
+striping thể hiện chủ yếu ở việc giảm lock convoy khi thread đang giữ
+lock bị GIL preempt (throughput ổn định hơn khi tăng số workers).
+
+Usage:
+    python benchmarks/bench_storage_engine.py
+    python benchmarks/bench_storage_engine.py --ops 200000 --shards 32
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import threading
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.storage_engine import StorageEngine
+from src.storage.sharded_engine import ShardedStorageEngine
+
+
+def run_workload(storage, workers: int, total_ops: int, key_space: int,
+                 read_ratio: float) -> float:
+    """
+    Chạy workload trên `workers` threads, trả về throughput (ops/s).
+
+    Mỗi thread thực hiện total_ops / workers operations trên key ngẫu nhiên.
+    """
+    ops_per_worker = total_ops // workers
+    timing = {}
+    # Start time được ghi trong barrier action (trước khi release workers),
+    # nếu không main thread có thể bị trễ và đo thiếu thời gian
+    barrier = threading.Barrier(
+        workers, action=lambda: timing.setdefault("start", time.perf_counter())
+    )
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        keys = [f"user:{rng.randrange(key_space)}" for _ in range(ops_per_worker)]
+        reads = [rng.random() < read_ratio for _ in range(ops_per_worker)]
+        barrier.wait()
+        for key, is_read in zip(keys, reads):
+            if is_read:
+                storage.get(key)
+            else:
+                storage.put(key, "value")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for t in threads:
+        t.start()
+
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - timing["start"]
+
+    return (ops_per_worker * workers) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StorageEngine lock striping benchmark")
+    parser.add_argument("--ops", type=int, default=100000, help="Total operations per run")
+    parser.add_argument("--keys", type=int, default=10000, help="Key space size")
+    parser.add_argument("--read-ratio", type=float, default=0.8, help="Fraction of GETs")
+    parser.add_argument("--shards", type=int, default=16, help="Stripes for ShardedStorageEngine")
+    parser.add_argument("--workers", type=str, default="1,2,4,8,16",
+                        help="Comma-separated worker counts")
+    args = parser.parse_args()
+
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    engines = [
+        ("StorageEngine", lambda: StorageEngine()),
+        (f"ShardedStorageEngine({args.shards})", lambda: ShardedStorageEngine(args.shards)),
+    ]
+
+    print("=" * 70)
+    print(f"  Storage engine throughput: {args.ops} ops, {args.keys} keys, "
+          f"{int(args.read_ratio * 100)}% reads")
+    print("=" * 70)
+    print(f"{'engine':<28}" + "".join(f"{w:>8}w" for w in worker_counts))
+    print("-" * 70)
+
+    for name, factory in engines:
+        row = []
+        for workers in worker_counts:
+            storage = factory()
+            for i in range(args.keys):
+                storage.put(f"user:{i}", "value")
+            row.append(run_workload(storage, workers, args.ops, args.keys, args.read_ratio))
+        print(f"{name:<28}" + "".join(f"{ops / 1000:>8.0f}k" for ops in row))
+
+    print("-" * 70)
+    print("(ops/s, higher is better)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """
 gRPC Client cho Distributed Key-Value Store.
-Test các operations: PUT, GET, DELETE, LISTKEYS
+Test các operations: PUT, GET, DELETE, LISTKEYS, SCAN, WATCH
 """
 
 import sys  # Để command line arguments
@@ -41,7 +41,7 @@ def print_info(message):
 # PHẦN 2: Hàm Test Operations
 # ============================================================================
 
-def test_put(stub, key, value):
+def test_put(stub, key, value, ttl_ms=0):
     """
     Test PUT operation.
     
@@ -49,13 +49,15 @@ def test_put(stub, key, value):
         stub: KeyValueStore stub
         key: Key để lưu
         value: Value tương ứng
+        ttl_ms: Thời gian sống (ms), 0 = không hết hạn
     """
-    print_header(f"Testing PUT: {key} = {value}")
+    print_header(f"Testing PUT: {key} = {value}" + (f" (ttl {ttl_ms}ms)" if ttl_ms else ""))
     
     try:
         request = kvstore_pb2.PutRequest(
             key=key,
-            value=value
+            value=value,
+            ttl_ms=ttl_ms
         )
         response = stub.Put(request)
         
@@ -88,7 +90,7 @@ def test_get(stub, key):
             print_success(f"Key found!")
             print_info(f"Value: {response.value}")
             print_info(f"Node: {response.node_id}")
-            print_info(f"Timestamp: {response.timestamp}")
+            print_info(f"Version: {response.timestamp} ({response.version_node or 'n/a'})")
         else:
             print_error(f"Key not found: {key}")
             
@@ -144,6 +146,74 @@ def test_list_keys(stub):
         print_error(f"RPC Error: {e.code()}")
         print_error(f"Details: {e.details()}")
 
+def test_scan(stub, prefix="", start="", end="", limit=0):
+    """
+    Test SCAN operation (duyệt hết các trang bằng cursor).
+    
+    Args:
+        stub: KeyValueStore stub
+        prefix: Prefix cần scan (empty = không lọc)
+        start: Cận dưới (inclusive)
+        end: Cận trên (exclusive)
+        limit: Số keys mỗi trang (0 = mặc định của server)
+    """
+    print_header(f"Testing SCAN: prefix={prefix!r} start={start!r} end={end!r}")
+    
+    try:
+        cursor = ""
+        total = 0
+        while True:
+            request = kvstore_pb2.ScanRequest(
+                prefix=prefix, start=start, end=end, limit=limit, cursor=cursor
+            )
+            response = stub.Scan(request)
+            for item in response.items:
+                print_info(f"  - {item.key} = {item.value}")
+            total += len(response.items)
+            if not response.has_more:
+                break
+            cursor = response.next_cursor
+        print_success(f"Scanned {total} keys")
+            
+    except grpc.RpcError as e:
+        print_error(f"RPC Error: {e.code()}")
+        print_error(f"Details: {e.details()}")
+
+def test_watch(stub, prefix="", from_seq=0, max_events=10, timeout=60):
+    """
+    Test WATCH operation: in các PUT/DELETE áp dụng trên node đang kết nối.
+    
+    Args:
+        stub: KeyValueStore stub
+        prefix: Chỉ nhận keys bắt đầu bằng prefix (empty = tất cả)
+        from_seq: Resume từ sequence này (0 = chỉ events mới)
+        max_events: Dừng sau bấy nhiêu events
+        timeout: Dừng sau bấy nhiêu giây
+    """
+    print_header(f"Testing WATCH: prefix={prefix!r} from_seq={from_seq}")
+    
+    stream = stub.Watch(kvstore_pb2.WatchRequest(prefix=prefix, from_seq=from_seq), timeout=timeout)
+    received = 0
+    try:
+        for event in stream:
+            if event.lagged:
+                print_error(f"Lagged: events before seq {event.seq} were lost")
+            op = "PUT" if event.operation == kvstore_pb2.PUT else "DELETE"
+            print_info(f"  #{event.seq} {op} {event.key}" + (f" = {event.value}" if op == "PUT" else ""))
+            received += 1
+            if received >= max_events:
+                break
+        print_success(f"Received {received} events")
+            
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+            print_success(f"Received {received} events")
+        else:
+            print_error(f"RPC Error: {e.code()}")
+            print_error(f"Details: {e.details()}")
+    finally:
+        stream.cancel()
+
 # ============================================================================
 # PHẦN 3: Interactive Mode
 # ============================================================================
@@ -153,11 +223,12 @@ def interactive_mode(stub):
     Interactive command line interface để test client.
     """
     print_header("Interactive Mode")
-    print_info("Commands: put key value | get key | delete key | list | quit")
+    print_info("Commands: put key value | putex key ttl_ms value | get key | delete key | list | scan prefix | range start end | watch [prefix] [count] | quit")
     
     while True:
         try:
-            command = input("\n>>> ").strip().split(maxsplit=2)
+            line = input("\n>>> ").strip()
+            command = line.split(maxsplit=2)
             
             if not command:
                 continue
@@ -175,6 +246,14 @@ def interactive_mode(stub):
                 key, value = command[1], command[2]
                 test_put(stub, key, value)
             
+            elif cmd == "putex":
+                command = line.split(maxsplit=3)
+                if len(command) < 4 or not command[2].isdigit():
+                    print_error("Usage: putex <key> <ttl_ms> <value>")
+                    continue
+                key, ttl_ms, value = command[1], int(command[2]), command[3]
+                test_put(stub, key, value, ttl_ms)
+            
             elif cmd == "get":
                 if len(command) < 2:
                     print_error("Usage: get <key>")
@@ -192,6 +271,23 @@ def interactive_mode(stub):
             elif cmd == "list":
                 test_list_keys(stub)
             
+            elif cmd == "scan":
+                if len(command) < 2:
+                    print_error("Usage: scan <prefix>")
+                    continue
+                test_scan(stub, prefix=command[1])
+            
+            elif cmd == "range":
+                if len(command) < 3:
+                    print_error("Usage: range <start> <end>")
+                    continue
+                test_scan(stub, start=command[1], end=command[2])
+            
+            elif cmd == "watch":
+                command = line.split()
+                count = int(command[2]) if len(command) > 2 and command[2].isdigit() else 10
+                test_watch(stub, prefix=command[1] if len(command) > 1 else "", max_events=count)
+            
             else:
                 print_error(f"Unknown command: {cmd}")
                 
@@ -219,6 +315,9 @@ def demo_mode(stub):
     # Test LISTKEYS
     test_list_keys(stub)
     
+    # Test SCAN theo prefix
+    test_scan(stub, prefix="user:")
+    
     # Test GET
     test_get(stub, "user:1")
     test_get(stub, "user:2")
@@ -1,14 +1,192 @@
 """
 Consistent Hashing Implementation
-Sử dụng MD5 hash và virtual nodes để phân chia data đều trên các nodes
+Sử dụng MD5 hash (hoặc blake2b / xxhash, ring 64-bit) và virtual nodes để
+phân chia data đều trên các nodes.
+
+Placement strategies (chọn bằng consistent_hashing.strategy trong cluster.json):
+- ring: hash ring + virtual nodes (ConsistentHash, default), số vnodes theo weight
+- jump: jump consistent hash (Lamping & Veach), không tốn bộ nhớ theo số vnodes
+- rendezvous: weighted rendezvous hashing (HRW), O(nodes) mỗi lookup
+- slots: bảng slot cố định kiểu Redis Cluster (16384 slots -> node)
 """
 
 import hashlib
-from typing import List, Dict, Optional
+import binascii
+import heapq
+import math
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
+from array import array
 import bisect
 
+try:
+    import xxhash
+except ImportError:  # Optional dependency (chỉ cần cho hash_function = "xxhash")
+    xxhash = None
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency (route_many() vectorized; không có thì dùng bisect)
+    np = None
+
+
+def _md5_hash(key: str, _md5=hashlib.md5, _from_bytes=int.from_bytes) -> int:
+    """32 bit đầu của MD5 (= int(hexdigest()[:8], 16), giữ nguyên placement cũ)."""
+    return _from_bytes(_md5(key.encode('utf-8')).digest(), 'big') >> 96
+
+
+def _blake2b_hash(key: str, _blake2b=hashlib.blake2b, _from_bytes=int.from_bytes) -> int:
+    """BLAKE2b với digest 8 bytes (ring 64-bit)."""
+    return _from_bytes(_blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _xxhash_hash(key: str) -> int:
+    """XXH3 64-bit (C extension, nhanh nhất)."""
+    return xxhash.xxh3_64_intdigest(key)
+
+
+def _crc16_hash(key: str, _crc=binascii.crc_hqx) -> int:
+    """CRC16-XMODEM như Redis Cluster (slot = crc16(key) % 16384)."""
+    return _crc(key.encode('utf-8'), 0)
+
+
+# hash_function name -> (function, ring bits)
+HASH_FUNCTIONS: Dict[str, tuple] = {
+    "md5": (_md5_hash, 32),
+    "blake2b": (_blake2b_hash, 64),
+    "xxhash": (_xxhash_hash, 64),
+    "crc16": (_crc16_hash, 16),
+}
+
+_MASK64 = (1 << 64) - 1
 
-class ConsistentHash:
+
+def _mix64(x: int) -> int:
+    """SplitMix64 finalizer: trộn 64 bits (rendezvous score, jump hash seed)."""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def get_hash_function(name: str) -> Callable[[str], int]:
+    """
+    Lấy hash function của ring theo tên ("md5", "blake2b", "xxhash", "crc16").
+    
+    Raises:
+        ValueError: Tên không hợp lệ hoặc xxhash chưa được cài
+    """
+    if name not in HASH_FUNCTIONS:
+        raise ValueError(f"Unknown hash function: {name} (available: {', '.join(HASH_FUNCTIONS)})")
+    if name == "xxhash" and xxhash is None:
+        raise ValueError("hash_function 'xxhash' requires the xxhash package (pip install xxhash)")
+    return HASH_FUNCTIONS[name][0]
+
+
+class PlacementStrategy(ABC):
+    """
+    Interface chung của các placement strategies: map key -> node(s).
+    
+    Mọi node trong cluster phải build strategy từ cùng config (cùng thứ tự
+    add_node, cùng weights) để cùng tính ra một owner cho mỗi key. Lookup
+    không lock: add_node / remove_node build state mới rồi gán một lần.
+    
+    Subclass giữ `nodes` (set) và `weights` (node -> weight đang dùng).
+    """
+    
+    name = ""
+    
+    @abstractmethod
+    def add_node(self, node: str, weight: float = 1.0) -> None:
+        """
+        Thêm node (weight = capacity tương đối; strategy không hỗ trợ thì bỏ qua).
+        Node đã có với weight khác → đổi weight của node đó.
+        """
+    
+    @abstractmethod
+    def remove_node(self, node: str) -> None:
+        """Xóa node (không có thì bỏ qua)."""
+    
+    @abstractmethod
+    def get_node(self, key: str) -> Optional[str]:
+        """Owner của key (None nếu chưa có node)."""
+    
+    @abstractmethod
+    def get_nodes(self, key: str, count: int = 1) -> List[str]:
+        """`count` nodes khác nhau cho key, owner đầu tiên."""
+    
+    def get_all_nodes(self) -> List[str]:
+        """Lấy tất cả physical nodes."""
+        return sorted(list(self.nodes))
+    
+    def route_many(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Gom keys theo owner node.
+        
+        Args:
+            keys: Keys cần route
+        
+        Returns:
+            Dict {node: keys node đó own} (giữ thứ tự keys trong input)
+        """
+        groups: Dict[str, List[str]] = {}
+        get_node = self.get_node
+        for key in keys:
+            node = get_node(key)
+            if node is not None:
+                groups.setdefault(node, []).append(key)
+        return groups
+    
+    def get_distribution(self) -> Dict[str, int]:
+        """Số phần state mỗi node giữ (ring: vnodes, slots: slots; mặc định 1)."""
+        return {node: 1 for node in self.nodes}
+    
+    def get_ownership(self) -> Dict[str, float]:
+        """
+        Phần key space mỗi node sở hữu (tổng = 1).
+        
+        Mặc định = weight / tổng weights (đúng cho strategy phân theo
+        weight không sai số, như rendezvous); ring và slots tính từ state.
+        """
+        total = sum(self.weights.values())
+        return {node: weight / total for node, weight in self.weights.items()}
+    
+    def get_distribution_report(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        So sánh key share mong muốn (theo weight) với thực tế của mỗi node.
+        
+        Args:
+            keys: Keys mẫu; nếu có thì actual = tỉ lệ keys node đó own,
+                  nếu không thì actual = get_ownership()
+        
+        Returns:
+            Dict {node: {"weight", "expected", "actual", "ratio"}}
+            (ratio = actual / expected, > 1 là node nhận nhiều hơn phần của nó)
+        """
+        if not self.nodes:
+            return {}
+        if keys is None:
+            actual = self.get_ownership()
+        else:
+            counts = {node: 0 for node in self.nodes}
+            total_keys = 0
+            for key in keys:
+                counts[self.get_node(key)] += 1
+                total_keys += 1
+            actual = {node: count / max(total_keys, 1) for node, count in counts.items()}
+        total_weight = sum(self.weights.values())
+        report = {}
+        for node in sorted(self.nodes):
+            expected = self.weights[node] / total_weight
+            report[node] = {
+                "weight": self.weights[node],
+                "expected": expected,
+                "actual": actual.get(node, 0.0),
+                "ratio": actual.get(node, 0.0) / expected,
+            }
+        return report
+
+
+class ConsistentHash(PlacementStrategy):
     """
     Consistent Hashing algorithm with virtual nodes.
     
@@ -17,63 +195,168 @@ class ConsistentHash:
     - Map key đến node trên ring
     - Hỗ trợ virtual nodes để balance tốt hơn
     - Tự động thêm/xóa nodes mà không shuffle toàn bộ data
+    
+    Hash function (mọi node trong cluster phải dùng cùng một hàm):
+    - "md5" (default): ring 32-bit, giữ nguyên placement của các version
+      trước (tính từ digest bytes thay vì format/parse hexdigest)
+    - "blake2b": ring 64-bit
+    - "xxhash": ring 64-bit, C extension (cần package xxhash)
+    
+    Ring lưu dạng compact: array('Q') các token (hash của virtual nodes)
+    đã sort + array('I') song song chứa index của owner node, cùng reverse
+    index node -> tokens. add_node / remove_node là sorted merge / delete
+    bằng slice copy (O(tokens) memcpy + O(vnodes log tokens)), không sort
+    lại cả ring. Ring mới được build riêng rồi gán một lần (tuple
+    `_ring`), nên get_node() chạy song song với membership change luôn
+    thấy ring nhất quán.
+    
+    Preference lists: với mỗi segment giữa 2 tokens liền kề, ring tính
+    sẵn tuple `preference_length` nodes khác nhau đầu tiên theo chiều kim
+    đồng hồ, nên get_nodes(key, count <= preference_length) chỉ là một
+    bisect + một index. Các lists được build lại (một lượt quét O(tokens))
+    ở lần get_nodes() đầu tiên sau khi topology đổi, nên nhiều add_node
+    liên tiếp (vd lúc khởi động) chỉ tốn một lần build.
+    
+    Weights: node có weight w được round(virtual_nodes * w) vnodes (ít nhất
+    1), tokens "node:0", "node:1", ... nên weight 1 giữ nguyên ring cũ và
+    tăng weight chỉ thêm tokens.
     """
     
-    def __init__(self, nodes: List[str] = None, virtual_nodes: int = 150):
+    name = "ring"
+    VECTORIZE_MIN_KEYS = 64  # Batch nhỏ hơn: overhead của numpy lớn hơn phần tiết kiệm
+    
+    def __init__(self, nodes: List[str] = None, virtual_nodes: int = 150,
+                 hash_function: str = "md5", preference_length: int = 3):
         """
         Initialize ConsistentHash.
         
         Args:
             nodes: List node names (e.g., ["node1", "node2", "node3"])
-            virtual_nodes: Số virtual nodes per physical node (default 150)
+            virtual_nodes: Số virtual nodes của node weight 1 (default 150)
+            hash_function: "md5" (compat), "blake2b" hoặc "xxhash"
+            preference_length: Số nodes tính sẵn cho mỗi segment (thường
+                               = replication factor; count lớn hơn thì
+                               get_nodes() đi vòng ring như cũ)
         """
-        self.virtual_nodes = virtual_nodes  # Virtual nodes per physical node
-        self.hash_ring = {}  # hash_value -> node_name mapping
-        self.sorted_keys = []  # Sorted list of hash values cho binary search
+        # Instance attribute: get_node() gọi thẳng function, không qua method lookup
+        self._hash = get_hash_function(hash_function)
+        self.hash_function = hash_function
+        self.ring_bits = HASH_FUNCTIONS[hash_function][1]  # Hash values trong [0, 2^ring_bits)
+        self.virtual_nodes = virtual_nodes  # Virtual nodes của node weight 1
+        self.weights: Dict[str, float] = {}  # node -> weight
+        self._ring: Tuple[array, array] = (array('Q'), array('I'))  # (sorted tokens, owner indexes)
+        self._node_names: List[Optional[str]] = []  # owner index -> node name
+        self._node_index: Dict[str, int] = {}  # node name -> owner index
+        self._free_indexes: List[int] = []  # Index của nodes đã bị xóa (dùng lại)
+        self._node_tokens: Dict[str, List[int]] = {}  # node -> sorted tokens của node (reverse index)
+        self.preference_length = max(preference_length, 1)
+        # (tokens array lúc build, preference tuple cho từng position của ring)
+        self._preference: Optional[Tuple[array, List[Tuple[str, ...]]]] = None
+        self.preference_builds = 0
         self.nodes = set()  # Set of node names
         
         if nodes:
             for node in nodes:
                 self.add_node(node)
     
-    def _hash(self, key: str) -> int:
-        """
-        Tính hash value của key.
-        
-        Args:
-            key: Key để hash
-        
-        Returns:
-            Hash value (0 to 2^32-1)
-        """
-        # Sử dụng MD5 hash function
-        md5 = hashlib.md5(key.encode('utf-8'))
-        # Lấy 8 bytes đầu (64 bits) và convert thành int
-        return int(md5.hexdigest()[:8], 16)
+    @property
+    def sorted_keys(self) -> array:
+        """Sorted tokens của ring (array('Q'))."""
+        return self._ring[0]
+    
+    @property
+    def hash_ring(self) -> Dict[int, str]:
+        """Mapping token -> node name (build mỗi lần gọi, để debug)."""
+        tokens, owners = self._ring
+        names = self._node_names
+        return {token: names[owner] for token, owner in zip(tokens, owners)}
     
-    def add_node(self, node: str) -> None:
+    def add_node(self, node: str, weight: float = 1.0) -> None:
         """
         Thêm node vào hash ring.
-        Tạo `virtual_nodes` virtual nodes cho physical node này.
+        Tạo round(virtual_nodes * weight) virtual nodes cho physical node này.
+        
+        Token trùng với token đã có trên ring (hash collision) được chuyển
+        cho node mới, như khi ring là dict token -> node.
+        
+        Node đã có với weight khác: build lại vnodes của node đó (tokens
+        "node:i" giữ nguyên, chỉ thêm/bớt tokens cuối), các node khác không
+        đổi tokens.
         
         Args:
             node: Node name (e.g., "node1")
+            weight: Capacity tương đối (default 1.0)
         """
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        if node in self.nodes:
+            if weight != self.weights[node]:
+                self._reweight(node, weight)
+            return
         self.nodes.add(node)
+        self.weights[node] = weight
+        owner = self._free_indexes.pop() if self._free_indexes else len(self._node_names)
+        if owner == len(self._node_names):
+            self._node_names.append(node)
+        else:
+            self._node_names[owner] = node
+        self._node_index[node] = owner
         
         # Tạo virtual nodes
-        for i in range(self.virtual_nodes):
-            virtual_key = f"{node}:{i}"
-            hash_value = self._hash(virtual_key)
-            self.hash_ring[hash_value] = node
-        
-        # Sort hash keys cho binary search
-        self.sorted_keys = sorted(self.hash_ring.keys())
+        node_tokens = sorted({self._hash(f"{node}:{i}") for i in range(self.vnode_count(weight))})
+        self._node_tokens[node] = node_tokens
+        self._ring = self._insert_tokens(self._ring, node_tokens, owner)
+    
+    def _reweight(self, node: str, weight: float) -> None:
+        """Thay vnodes của `node` theo weight mới, gán ring mới một lần."""
+        self.weights[node] = weight
+        node_tokens = sorted({self._hash(f"{node}:{i}") for i in range(self.vnode_count(weight))})
+        ring = self._remove_tokens(self._ring, self._node_tokens[node])
+        self._node_tokens[node] = node_tokens
+        self._ring = self._insert_tokens(ring, node_tokens, self._node_index[node])
+    
+    def _insert_tokens(self, ring: Tuple[array, array], node_tokens: List[int],
+                       owner: int) -> Tuple[array, array]:
+        """Ring mới = `ring` + sorted `node_tokens` của `owner` (merge một lượt)."""
+        tokens, owners = ring
+        new_tokens = array('Q')
+        new_owners = array('I')
+        prev = 0
+        for token in node_tokens:
+            pos = bisect.bisect_left(tokens, token, prev)
+            new_tokens += tokens[prev:pos]
+            new_owners += owners[prev:pos]
+            new_tokens.append(token)
+            new_owners.append(owner)
+            prev = pos
+            if pos < len(tokens) and tokens[pos] == token:
+                # Collision: token thuộc về node mới
+                self._node_tokens[self._node_names[owners[pos]]].remove(token)
+                prev = pos + 1
+        new_tokens += tokens[prev:]
+        new_owners += owners[prev:]
+        return new_tokens, new_owners
+    
+    def _remove_tokens(self, ring: Tuple[array, array], node_tokens: List[int]) -> Tuple[array, array]:
+        """Ring mới = `ring` bỏ sorted `node_tokens` (chỉ bisect các tokens đó)."""
+        tokens, owners = ring
+        new_tokens = array('Q')
+        new_owners = array('I')
+        prev = 0
+        for token in node_tokens:
+            pos = bisect.bisect_left(tokens, token, prev)
+            new_tokens += tokens[prev:pos]
+            new_owners += owners[prev:pos]
+            prev = pos + 1
+        new_tokens += tokens[prev:]
+        new_owners += owners[prev:]
+        return new_tokens, new_owners
     
     def remove_node(self, node: str) -> None:
         """
         Xóa node khỏi hash ring.
-        Xóa tất cả virtual nodes của node này.
+        Xóa tất cả virtual nodes của node này (chỉ tìm các tokens của node
+        trong reverse index, không scan cả ring).
         
         Args:
             node: Node name
@@ -82,18 +365,15 @@ class ConsistentHash:
             return
         
         self.nodes.discard(node)
-        
-        # Xóa tất cả virtual nodes của node này
-        keys_to_remove = []
-        for hash_value, node_name in self.hash_ring.items():
-            if node_name == node:
-                keys_to_remove.append(hash_value)
-        
-        for hash_value in keys_to_remove:
-            del self.hash_ring[hash_value]
-        
-        # Re-sort hash keys
-        self.sorted_keys = sorted(self.hash_ring.keys())
+        del self.weights[node]
+        owner = self._node_index.pop(node)
+        self._node_names[owner] = None
+        self._free_indexes.append(owner)
+        self._ring = self._remove_tokens(self._ring, self._node_tokens.pop(node))
+    
+    def vnode_count(self, weight: float) -> int:
+        """Số virtual nodes của node có `weight`."""
+        return max(1, round(self.virtual_nodes * weight))
     
     def get_node(self, key: str) -> Optional[str]:
         """
@@ -110,20 +390,105 @@ class ConsistentHash:
         Returns:
             Node name hoặc None nếu ring trống
         """
-        if not self.hash_ring:
+        tokens, owners = self._ring
+        if not tokens:
             return None
         
         hash_value = self._hash(key)
         
         # Binary search để tìm position trên sorted ring
-        idx = bisect.bisect_right(self.sorted_keys, hash_value)
+        idx = bisect.bisect_right(tokens, hash_value)
         
         # Nếu không tìm thấy trên phần bên phải, wrap around về đầu
-        if idx == len(self.sorted_keys):
+        if idx == len(tokens):
             idx = 0
         
-        hash_key = self.sorted_keys[idx]
-        return self.hash_ring[hash_key]
+        return self._node_names[owners[idx]]
+    
+    def route_many(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Gom keys theo owner node, resolve owners của cả batch một lần.
+        
+        Keys vẫn được hash từng cái (Python), nhưng tìm position trên ring
+        là một numpy.searchsorted trên tokens array (không copy) khi có
+        numpy và batch >= VECTORIZE_MIN_KEYS; nếu không thì bisect từng key
+        với locals, không qua get_node().
+        
+        Args:
+            keys: Keys cần route
+        
+        Returns:
+            Dict {node: keys node đó own} (giữ thứ tự keys trong input)
+        """
+        keys = keys if isinstance(keys, list) else list(keys)
+        tokens, owners = self._ring
+        if not tokens or not keys:
+            return {}
+        hash_fn = self._hash
+        hashes = [hash_fn(key) for key in keys]
+        names = self._node_names
+        
+        if np is not None and len(keys) >= self.VECTORIZE_MIN_KEYS:
+            positions = np.searchsorted(np.frombuffer(tokens, dtype=np.uint64),
+                                        np.array(hashes, dtype=np.uint64), side='right')
+            positions[positions == len(tokens)] = 0  # Wrap around
+            owner_indexes = np.frombuffer(owners, dtype=np.uintc)[positions]
+            order = np.argsort(owner_indexes, kind='stable')
+            sorted_owners = owner_indexes[order]
+            bounds = np.flatnonzero(np.diff(sorted_owners)) + 1
+            order = order.tolist()
+            groups = {}
+            start = 0
+            for end in bounds.tolist() + [len(order)]:
+                groups[names[int(sorted_owners[start])]] = [keys[i] for i in order[start:end]]
+                start = end
+            return groups
+        
+        by_owner: Dict[int, List[str]] = {}
+        bisect_right = bisect.bisect_right
+        size = len(tokens)
+        for key, hash_value in zip(keys, hashes):
+            idx = bisect_right(tokens, hash_value)
+            owner = owners[idx if idx < size else 0]
+            group = by_owner.get(owner)
+            if group is None:
+                by_owner[owner] = [key]
+            else:
+                group.append(key)
+        return {names[owner]: group for owner, group in by_owner.items()}
+    
+    def _build_preference(self, tokens: array, owners: array) -> List[Tuple[str, ...]]:
+        """
+        Tính preference tuple cho mọi position của ring.
+        
+        Position cuối được tính bằng cách đi vòng ring; các position còn
+        lại quét ngược một lượt: pref(i) = owner(i) + pref(i+1) bỏ owner(i),
+        cắt còn preference_length (O(tokens) tổng cộng).
+        """
+        size = len(tokens)
+        length = min(self.preference_length, len(self.nodes))
+        ring_names = [self._node_names[owner] for owner in owners]
+        
+        # Position cuối: wrap around về đầu ring
+        current: Tuple[str, ...] = (ring_names[-1],)
+        for name in ring_names:
+            if len(current) == length:
+                break
+            if name not in current:
+                current += (name,)
+        
+        preference: List[Tuple[str, ...]] = [current] * size
+        for pos in range(size - 2, -1, -1):
+            name = ring_names[pos]
+            if name != current[0]:
+                if name in current:
+                    current = (name,) + tuple(n for n in current if n != name)
+                else:
+                    current = (name,) + current[:length - 1]
+            preference[pos] = current
+        self._preference = (tokens, preference)
+        self.preference_builds += 1
+        return preference
     
     def get_nodes(self, key: str, count: int = 1) -> List[str]:
         """
@@ -137,7 +502,8 @@ class ConsistentHash:
         Returns:
             List of node names
         """
-        if not self.hash_ring or count <= 0:
+        tokens, owners = self._ring
+        if not tokens or count <= 0:
             return []
         
         # Số unique nodes không thể vượt quá tổng số nodes
@@ -146,36 +512,37 @@ class ConsistentHash:
         hash_value = self._hash(key)
         
         # Tìm position trên sorted ring
-        idx = bisect.bisect_right(self.sorted_keys, hash_value)
+        idx = bisect.bisect_right(tokens, hash_value)
+        
+        if count <= self.preference_length:
+            preference = self._preference
+            if preference is None or preference[0] is not tokens:
+                preference = (tokens, self._build_preference(tokens, owners))
+            return list(preference[1][idx if idx < len(tokens) else 0][:count])
         
         result = []
         seen = set()
+        names = self._node_names
         
         # Iterate qua ring từ position đó đến khi có đủ unique nodes
-        for i in range(len(self.sorted_keys)):
-            current_idx = (idx + i) % len(self.sorted_keys)
-            hash_key = self.sorted_keys[current_idx]
-            node = self.hash_ring[hash_key]
+        for i in range(len(tokens)):
+            owner = owners[(idx + i) % len(tokens)]
             
-            if node not in seen:
-                result.append(node)
-                seen.add(node)
+            if owner not in seen:
+                result.append(names[owner])
+                seen.add(owner)
                 
                 if len(result) == count:
                     break
         
         return result
     
-    def get_all_nodes(self) -> List[str]:
-        """Lấy tất cả physical nodes trên ring."""
-        return sorted(list(self.nodes))
-    
     def get_node_key_count(self, node: str) -> int:
         """
         Tính số virtual nodes của 1 node trên ring.
         (Để debug, verify distribution)
         """
-        return sum(1 for n in self.hash_ring.values() if n == node)
+        return len(self._node_tokens.get(node, ()))
     
     def get_distribution(self) -> Dict[str, int]:
         """
@@ -185,7 +552,337 @@ class ConsistentHash:
         Returns:
             Dict {node_name: virtual_node_count}
         """
-        distribution = {node: 0 for node in self.nodes}
-        for node in self.hash_ring.values():
-            distribution[node] += 1
-        return distribution
+        return {node: len(self._node_tokens[node]) for node in self.nodes}
+    
+    def get_ownership(self) -> Dict[str, float]:
+        """
+        Phần hash space mỗi node sở hữu: tổng độ dài các segments kết thúc
+        ở tokens của node (key space thực tế, không phải số vnodes).
+        """
+        tokens, owners = self._ring
+        if not tokens:
+            return {}
+        space = 1 << self.ring_bits
+        names = self._node_names
+        owned = dict.fromkeys(self.nodes, 0)
+        # Segment [tokens[i-1], tokens[i]) thuộc token i; token đầu nhận phần wrap around
+        owned[names[owners[0]]] += space - tokens[-1] + tokens[0]
+        for i in range(1, len(tokens)):
+            owned[names[owners[i]]] += tokens[i] - tokens[i - 1]
+        return {node: length / space for node, length in owned.items()}
+
+
+def jump_hash(key: int, num_buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach 2014): bucket trong [0, num_buckets).
+    
+    Khi num_buckets tăng từ n lên n+1 chỉ ~1/(n+1) keys chuyển sang bucket
+    mới; O(log n) bước, không cần bộ nhớ.
+    """
+    bucket, jump = -1, 0
+    while jump < num_buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & _MASK64
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+class JumpHash(PlacementStrategy):
+    """
+    Placement bằng jump consistent hash: node thứ i (theo thứ tự add) là
+    bucket i, replicas là các bucket kế tiếp.
+    
+    Jump hash chỉ thêm/bớt được bucket cuối: remove_node một node ở giữa
+    chuyển node cuối vào bucket của nó (keys của 2 nodes đó bị di chuyển).
+    Không hỗ trợ weight.
+    """
+    
+    name = "jump"
+    
+    def __init__(self, nodes: List[str] = None, hash_function: str = "md5"):
+        """
+        Initialize JumpHash.
+        
+        Args:
+            nodes: List node names (thứ tự = thứ tự bucket)
+            hash_function: Hash của key trước khi jump
+        """
+        self._hash = get_hash_function(hash_function)
+        self.hash_function = hash_function
+        self.buckets: List[str] = []  # bucket -> node name
+        self.weights: Dict[str, float] = {}  # Luôn 1.0: jump hash chia đều
+        self.nodes = set()
+        
+        for node in nodes or ():
+            self.add_node(node)
+    
+    def add_node(self, node: str, weight: float = 1.0) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        self.weights[node] = 1.0
+        self.buckets = self.buckets + [node]
+    
+    def remove_node(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        del self.weights[node]
+        buckets = list(self.buckets)
+        idx = buckets.index(node)
+        last = buckets.pop()
+        if idx < len(buckets):
+            buckets[idx] = last
+        self.buckets = buckets
+    
+    def get_node(self, key: str) -> Optional[str]:
+        buckets = self.buckets
+        if not buckets:
+            return None
+        return buckets[jump_hash(self._hash(key), len(buckets))]
+    
+    def get_nodes(self, key: str, count: int = 1) -> List[str]:
+        buckets = self.buckets
+        if not buckets or count <= 0:
+            return []
+        bucket = jump_hash(self._hash(key), len(buckets))
+        return [buckets[(bucket + i) % len(buckets)] for i in range(min(count, len(buckets)))]
+
+
+class RendezvousHash(PlacementStrategy):
+    """
+    Weighted rendezvous (highest random weight) hashing.
+    
+    Mỗi node có seed 64-bit; score(node, key) = weight / -ln(u) với u đều
+    trong (0, 1) tính từ hash(key) trộn với seed. Owner = node có score
+    cao nhất, replicas = các score kế tiếp. Thêm/xóa node chỉ di chuyển
+    keys của node đó (tỉ lệ theo weight); mỗi lookup O(nodes).
+    """
+    
+    name = "rendezvous"
+    
+    def __init__(self, nodes: List[str] = None, hash_function: str = "md5"):
+        """
+        Initialize RendezvousHash.
+        
+        Args:
+            nodes: List node names (weight 1)
+            hash_function: Hash của key và node name
+        """
+        self._hash = get_hash_function(hash_function)
+        self.hash_function = hash_function
+        self.weights: Dict[str, float] = {}
+        # (node, seed, weight) của mọi node; gán lại cả tuple khi thay đổi
+        self._entries: Tuple[Tuple[str, int, float], ...] = ()
+        self._weighted = False  # False: mọi weight bằng nhau -> so sánh hash, không cần log
+        self.nodes = set()
+        
+        for node in nodes or ():
+            self.add_node(node)
+    
+    def _rebuild(self) -> None:
+        self._entries = tuple(
+            (node, _mix64(self._hash(node)), weight) for node, weight in sorted(self.weights.items())
+        )
+        self._weighted = len(set(self.weights.values())) > 1
+    
+    def add_node(self, node: str, weight: float = 1.0) -> None:
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        self.nodes.add(node)
+        self.weights[node] = weight
+        self._rebuild()
+    
+    def remove_node(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        del self.weights[node]
+        self._rebuild()
+    
+    def _scores(self, key: str):
+        key_hash = self._hash(key)
+        if not self._weighted:
+            return ((_mix64(key_hash ^ seed), node) for node, seed, _ in self._entries)
+        log = math.log
+        return (
+            (weight / -log((_mix64(key_hash ^ seed) + 0.5) / 18446744073709551616.0), node)
+            for node, seed, weight in self._entries
+        )
+    
+    def get_node(self, key: str) -> Optional[str]:
+        if not self._entries:
+            return None
+        return max(self._scores(key))[1]
+    
+    def get_nodes(self, key: str, count: int = 1) -> List[str]:
+        if not self._entries or count <= 0:
+            return []
+        return [node for _, node in heapq.nlargest(count, self._scores(key))]
+
+
+class SlotMap(PlacementStrategy):
+    """
+    Bảng slot cố định kiểu Redis Cluster: slot = hash(key) % num_slots,
+    array slot -> node. Lookup = một hash + một index.
+    
+    Node mới lấy slots từ các node đang giữ nhiều hơn phần của mình (theo
+    weight), node bị xóa chia slots cho các node thiếu nhiều nhất: chỉ
+    slots đổi chủ bị di chuyển. Replicas = các node kế tiếp owner theo
+    thứ tự tên. Với hash_function "crc16" (default) slot của key giống
+    Redis Cluster (không xử lý hash tags).
+    """
+    
+    name = "slots"
+    
+    def __init__(self, nodes: List[str] = None, num_slots: int = 16384,
+                 hash_function: str = "crc16"):
+        """
+        Initialize SlotMap.
+        
+        Args:
+            nodes: List node names (weight 1, thứ tự add quyết định slots)
+            num_slots: Số slots (tối đa 65536)
+            hash_function: Hash của key ("crc16" = Redis Cluster)
+        """
+        if not 0 < num_slots <= 65536:
+            raise ValueError("num_slots must be in 1..65536")
+        self._hash = get_hash_function(hash_function)
+        self.hash_function = hash_function
+        self.num_slots = num_slots
+        self.weights: Dict[str, float] = {}
+        self.owned: Dict[str, List[int]] = {}  # node -> slots (source of truth)
+        # (node names đã sort, array slot -> index trong names); gán lại cả tuple
+        self._table: Tuple[Tuple[str, ...], array] = ((), array('H'))
+        self.nodes = set()
+        
+        for node in nodes or ():
+            self.add_node(node)
+    
+    def _ideal(self, node: str, total_weight: float) -> float:
+        return self.num_slots * self.weights[node] / total_weight
+    
+    def _rebuild(self) -> None:
+        names = tuple(sorted(self.owned))
+        table = array('H', bytes(2 * self.num_slots)) if names else array('H')
+        for index, node in enumerate(names):
+            for slot in self.owned[node]:
+                table[slot] = index
+        self._table = (names, table)
+    
+    def add_node(self, node: str, weight: float = 1.0) -> None:
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        if node in self.nodes:
+            if weight != self.weights[node]:
+                self.weights[node] = weight
+                self._rebalance(node)
+            return
+        self.nodes.add(node)
+        self.weights[node] = weight
+        total = sum(self.weights.values())
+        if not self.owned:
+            self.owned[node] = list(range(self.num_slots))
+        else:
+            # Lấy từng slot từ node đang thừa nhiều nhất
+            heap = [(-(len(slots) - self._ideal(other, total)), other) for other, slots in self.owned.items()]
+            heapq.heapify(heap)
+            taken = []
+            for _ in range(round(self._ideal(node, total))):
+                surplus, other = heapq.heappop(heap)
+                taken.append(self.owned[other].pop())
+                heapq.heappush(heap, (surplus + 1, other))
+            self.owned[node] = taken
+        self._rebuild()
+    
+    def _rebalance(self, node: str) -> None:
+        """Đưa số slots của `node` về phần theo weight mới; chỉ slots đổi chủ bị di chuyển."""
+        total = sum(self.weights.values())
+        slots = self.owned[node]
+        target = round(self._ideal(node, total))
+        others = [(other, owned) for other, owned in self.owned.items() if other != node]
+        if not others:
+            return
+        if len(slots) < target:
+            # Lấy từ node đang thừa nhiều nhất
+            heap = [(-(len(owned) - self._ideal(other, total)), other) for other, owned in others]
+            heapq.heapify(heap)
+            for _ in range(target - len(slots)):
+                surplus, other = heapq.heappop(heap)
+                slots.append(self.owned[other].pop())
+                heapq.heappush(heap, (surplus + 1, other))
+        else:
+            # Chia cho node đang thiếu nhiều nhất
+            heap = [(len(owned) - self._ideal(other, total), other) for other, owned in others]
+            heapq.heapify(heap)
+            for _ in range(len(slots) - target):
+                deficit, other = heapq.heappop(heap)
+                self.owned[other].append(slots.pop())
+                heapq.heappush(heap, (deficit + 1, other))
+        self._rebuild()
+    
+    def remove_node(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        del self.weights[node]
+        freed = self.owned.pop(node)
+        if self.owned:
+            # Chia slots cho node đang thiếu nhiều nhất
+            total = sum(self.weights.values())
+            heap = [(len(slots) - self._ideal(other, total), other) for other, slots in self.owned.items()]
+            heapq.heapify(heap)
+            for slot in freed:
+                deficit, other = heapq.heappop(heap)
+                self.owned[other].append(slot)
+                heapq.heappush(heap, (deficit + 1, other))
+        self._rebuild()
+    
+    def slot_of(self, key: str) -> int:
+        """Slot của key."""
+        return self._hash(key) % self.num_slots
+    
+    def get_node(self, key: str) -> Optional[str]:
+        names, table = self._table
+        if not names:
+            return None
+        return names[table[self._hash(key) % self.num_slots]]
+    
+    def get_nodes(self, key: str, count: int = 1) -> List[str]:
+        names, table = self._table
+        if not names or count <= 0:
+            return []
+        owner = table[self._hash(key) % self.num_slots]
+        return [names[(owner + i) % len(names)] for i in range(min(count, len(names)))]
+    
+    def get_distribution(self) -> Dict[str, int]:
+        """Số slots mỗi node."""
+        return {node: len(slots) for node, slots in self.owned.items()}
+    
+    def get_ownership(self) -> Dict[str, float]:
+        """Tỉ lệ slots mỗi node giữ."""
+        return {node: len(slots) / self.num_slots for node, slots in self.owned.items()}
+
+
+PLACEMENT_STRATEGIES = {
+    ConsistentHash.name: ConsistentHash,
+    JumpHash.name: JumpHash,
+    RendezvousHash.name: RendezvousHash,
+    SlotMap.name: SlotMap,
+}
+
+
+def create_placement_strategy(name: str, **options) -> PlacementStrategy:
+    """
+    Build a placement strategy by name ("ring", "jump", "rendezvous", "slots").
+    
+    Args:
+        name: Strategy name
+        **options: Strategy-specific options (e.g. virtual_nodes for "ring")
+    
+    Returns:
+        PlacementStrategy instance (chưa có node)
+    """
+    if name not in PLACEMENT_STRATEGIES:
+        raise ValueError(f"Unknown placement strategy: {name} (available: {', '.join(PLACEMENT_STRATEGIES)})")
+    return PLACEMENT_STRATEGIES[name](**options)
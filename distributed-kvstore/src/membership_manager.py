@@ -4,10 +4,10 @@ Load cluster config, track node status, manage node list
 """
 
 import json
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import logging
 
-from src.consistent_hash import ConsistentHash
+from src.consistent_hash import PlacementStrategy, create_placement_strategy
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +16,7 @@ class Node:
     """Đại diện cho 1 node trong cluster."""
     
     def __init__(self, node_id: str, host: str, port: int, 
-                 redis_host: str = None, redis_port: int = None):
+                 redis_host: str = None, redis_port: int = None, weight: float = 1.0):
         """
         Initialize Node.
         
@@ -26,13 +26,16 @@ class Node:
             port: gRPC port
             redis_host: Redis host
             redis_port: Redis port
+            weight: Capacity tương đối của node (placement strategy có weight)
         """
         self.node_id = node_id
         self.host = host
         self.port = port
         self.redis_host = redis_host or host
         self.redis_port = redis_port or 6379
+        self.weight = weight
         self.is_alive = True  # Status của node
+        self.supports_ttl = True  # Storage engine của node hết hạn được key (serve() đặt theo config)
     
     def get_address(self) -> str:
         """Trả về address dạng host:port cho gRPC connection."""
@@ -70,9 +73,12 @@ class MembershipManager:
             config_path: Đường dẫn đến cluster.json
         """
         self.nodes: Dict[str, Node] = {}  # node_id -> Node mapping
-        self.consistent_hash: Optional[ConsistentHash] = None
+        self.consistent_hash: Optional[PlacementStrategy] = None  # ring / jump / rendezvous / slots
         self.replication_factor = 2  # Default: primary + 1 replica
+        self.placement_strategy = "ring"  # Placement strategy (consistent_hashing.strategy)
         self.virtual_nodes = 150  # Virtual nodes per physical node
+        self.hash_function = "md5"  # Hash function của ring (md5 = placement cũ)
+        self.num_slots = 16384  # Số slots cho strategy "slots"
         
         if config_path:
             self.load_config(config_path)
@@ -84,11 +90,12 @@ class MembershipManager:
         Config format:
         {
             "nodes": [
-                {"id": "node1", "host": "localhost", "port": 8001, ...},
+                {"id": "node1", "host": "localhost", "port": 8001, "weight": 1, ...},
                 ...
             ],
             "replication": {"replication_factor": 2},
-            "consistent_hashing": {"virtual_nodes": 150}
+            "consistent_hashing": {"strategy": "ring", "virtual_nodes": 150,
+                                   "hash_function": "md5", "num_slots": 16384}
         }
         
         Args:
@@ -104,15 +111,16 @@ class MembershipManager:
                     'replication_factor', 2
                 )
             
-            # Load virtual nodes count
+            # Load placement strategy + virtual nodes count
             if 'consistent_hashing' in config:
-                self.virtual_nodes = config['consistent_hashing'].get(
-                    'virtual_nodes', 150
-                )
+                hashing_config = config['consistent_hashing']
+                self.placement_strategy = hashing_config.get('strategy', 'ring')
+                self.virtual_nodes = hashing_config.get('virtual_nodes', 150)
+                self.hash_function = hashing_config.get('hash_function', 'md5')
+                self.num_slots = hashing_config.get('num_slots', 16384)
             
             # Load nodes
             self.nodes = {}
-            node_ids = []
             
             for node_config in config.get('nodes', []):
                 node_id = node_config['id']
@@ -121,20 +129,24 @@ class MembershipManager:
                     host=node_config['host'],
                     port=node_config['port'],
                     redis_host=node_config.get('redis_host', node_config['host']),
-                    redis_port=node_config.get('redis_port', 6379)
+                    redis_port=node_config.get('redis_port', 6379),
+                    weight=node_config.get('weight', 1.0)
                 )
                 self.nodes[node_id] = node
-                node_ids.append(node_id)
             
-            # Initialize consistent hash ring
-            self.consistent_hash = ConsistentHash(
-                nodes=node_ids,
-                virtual_nodes=self.virtual_nodes
-            )
+            # Initialize placement (thứ tự add = thứ tự trong config, giống nhau trên mọi node)
+            self.consistent_hash = self._create_placement()
+            for node in self.nodes.values():
+                self.consistent_hash.add_node(node.node_id, node.weight)
             
             logger.info(f"Loaded cluster config: {len(self.nodes)} nodes")
             logger.info(f"Replication factor: {self.replication_factor}")
-            logger.info(f"Virtual nodes per physical node: {self.virtual_nodes}")
+            logger.info(f"Placement strategy: {self.placement_strategy} (hash: {self.hash_function})")
+            if self.placement_strategy == 'ring':
+                logger.info(f"Virtual nodes per physical node: {self.virtual_nodes} (x weight)")
+            for node_id, share in self.get_distribution_report().items():
+                logger.info(f"  {node_id}: weight {share['weight']:g}, "
+                            f"expected {share['expected']:.1%}, actual {share['actual']:.1%}")
             
         except FileNotFoundError:
             logger.error(f"Config file not found: {config_path}")
@@ -143,6 +155,15 @@ class MembershipManager:
             logger.error(f"Invalid JSON in config file: {e}")
             raise
     
+    def _create_placement(self) -> PlacementStrategy:
+        """Tạo placement strategy rỗng theo config (options riêng của từng strategy)."""
+        options = {'hash_function': self.hash_function}
+        if self.placement_strategy == 'ring':
+            options.update(virtual_nodes=self.virtual_nodes, preference_length=self.replication_factor)
+        elif self.placement_strategy == 'slots':
+            options['num_slots'] = self.num_slots
+        return create_placement_strategy(self.placement_strategy, **options)
+    
     def get_node_by_id(self, node_id: str) -> Optional[Node]:
         """Lấy Node object theo node ID."""
         return self.nodes.get(node_id)
@@ -171,6 +192,21 @@ class MembershipManager:
         node_id = self.consistent_hash.get_node(key)
         return self.get_node_by_id(node_id) if node_id else None
     
+    def group_by_owner(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Gom keys theo owner node (primary) bằng một lần route cả batch.
+        (Cho multi-key RPCs, lọc keys node này own, rebalancing scans)
+        
+        Args:
+            keys: Keys cần route
+        
+        Returns:
+            Dict {node_id: keys node đó own} (giữ thứ tự keys trong input)
+        """
+        if not self.consistent_hash:
+            return {}
+        return self.consistent_hash.route_many(keys)
+    
     def get_replica_nodes(self, key: str) -> List[Node]:
         """
         Tìm replica nodes cho key (theo replication_factor).
@@ -222,7 +258,7 @@ class MembershipManager:
             logger.warning(f"Node {node_id} marked as dead")
     
     def add_node(self, node_id: str, host: str, port: int,
-                 redis_host: str = None, redis_port: int = None) -> None:
+                 redis_host: str = None, redis_port: int = None, weight: float = 1.0) -> None:
         """
         Thêm node mới vào cluster (dynamic).
         Tự động update hash ring.
@@ -233,12 +269,13 @@ class MembershipManager:
             port: Port
             redis_host: Redis host
             redis_port: Redis port
+            weight: Capacity tương đối của node (2 = nhận ~gấp đôi keys)
         """
-        node = Node(node_id, host, port, redis_host, redis_port)
+        node = Node(node_id, host, port, redis_host, redis_port, weight)
         self.nodes[node_id] = node
         
         if self.consistent_hash:
-            self.consistent_hash.add_node(node_id)
+            self.consistent_hash.add_node(node_id, weight)
         
         logger.info(f"Added node: {node}")
     
@@ -269,3 +306,18 @@ class MembershipManager:
         if not self.consistent_hash:
             return {}
         return self.consistent_hash.get_distribution()
+    
+    def get_distribution_report(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Key share mong muốn (theo weight) so với thực tế của mỗi node.
+        (Để kiểm tra cluster nhiều loại hardware không có hot spot)
+        
+        Args:
+            keys: Keys mẫu (None = tính từ state của placement strategy)
+        
+        Returns:
+            Dict {node_id: {"weight", "expected", "actual", "ratio"}}
+        """
+        if not self.consistent_hash:
+            return {}
+        return self.consistent_hash.get_distribution_report(keys)
@@ -14,7 +14,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17src/proto/kvstore.proto\x12\x07kvstore\";\n\nPutRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\"X\n\x0bPutResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0f\n\x07node_id\x18\x03 \x01(\t\x12\x16\n\x0ereplicas_count\x18\x04 \x01(\x05\"4\n\nGetRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x19\n\x11read_from_replica\x18\x02 \x01(\x08\"`\n\x0bGetResponse\x12\r\n\x05\x66ound\x18\x01 \x01(\x08\x12\r\n\x05value\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x0f\n\x07node_id\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\x03\"\x1c\n\rDeleteRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\"J\n\x0e\x44\x65leteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x16\n\x0ereplicas_count\x18\x03 \x01(\x05\"\x11\n\x0fListKeysRequest\"@\n\x10ListKeysResponse\x12\x0c\n\x04keys\x18\x01 \x03(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\x12\x0f\n\x07node_id\x18\x03 \x01(\t\"f\n\x10HeartbeatRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0c\n\x04host\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\x12\x11\n\ttimestamp\x18\x04 \x01(\x03\x12\x12\n\nkeys_count\x18\x05 \x01(\x05\"Q\n\x11HeartbeatResponse\x12\x14\n\x0c\x61\x63knowledged\x18\x01 \x01(\x08\x12\x13\n\x0breceiver_id\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\"Z\n\x11\x46orwardPutRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\x12\x16\n\x0eorigin_node_id\x18\x04 \x01(\t\"O\n\x12\x46orwardPutResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x17\n\x0fhandler_node_id\x18\x03 \x01(\t\"8\n\x11\x46orwardGetRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x16\n\x0eorigin_node_id\x18\x02 \x01(\t\"V\n\x12\x46orwardGetResponse\x12\r\n\x05\x66ound\x18\x01 \x01(\x08\x12\r\n\x05value\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x11\n\ttimestamp\x18\x04 \x01(\x03\";\n\x14\x46orwardDeleteRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x16\n\x0eorigin_node_id\x18\x02 \x01(\t\"9\n\x15\x46orwardDeleteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x87\x01\n\x10ReplicateRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\x12\x14\n\x0cprimary_node\x18\x04 \x01(\t\x12.\n\toperation\x18\x05 \x01(\x0e\x32\x1b.kvstore.ReplicateOperation\"N\n\x11ReplicateResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x17\n\x0freplica_node_id\x18\x03 \x01(\t\"-\n\x0fSnapshotRequest\x12\x1a\n\x12requesting_node_id\x18\x01 \x01(\t\"\x81\x01\n\x10SnapshotResponse\x12#\n\x04\x64\x61ta\x18\x01 \x03(\x0b\x32\x15.kvstore.KeyValuePair\x12\x12\n\ntotal_keys\x18\x02 \x01(\x05\x12\x18\n\x10provider_node_id\x18\x03 \x01(\t\x12\x1a\n\x12snapshot_timestamp\x18\x04 \x01(\x03\"=\n\x0cKeyValuePair\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\":\n\x0bJoinRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0c\n\x04host\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\"\\\n\x0cJoinResponse\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12)\n\x0e\x65xisting_nodes\x18\x03 \x03(\x0b\x32\x11.kvstore.NodeInfo\"/\n\x11MembershipRequest\x12\x1a\n\x12requesting_node_id\x18\x01 \x01(\t\"L\n\x12MembershipResponse\x12 \n\x05nodes\x18\x01 \x03(\x0b\x32\x11.kvstore.NodeInfo\x12\x14\n\x0c\x63luster_size\x18\x02 \x01(\x05\"t\n\x08NodeInfo\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0c\n\x04host\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\x12#\n\x06status\x18\x04 \x01(\x0e\x32\x13.kvstore.NodeStatus\x12\x16\n\x0elast_heartbeat\x18\x05 \x01(\x03*)\n\x12ReplicateOperation\x12\x07\n\x03PUT\x10\x00\x12\n\n\x06\x44\x45LETE\x10\x01*M\n\nNodeStatus\x12\n\n\x06\x41\x43TIVE\x10\x00\x12\r\n\tSUSPECTED\x10\x01\x12\n\n\x06\x46\x41ILED\x10\x02\x12\x0b\n\x07JOINING\x10\x03\x12\x0b\n\x07LEAVING\x10\x04\x32\xef\x01\n\rKeyValueStore\x12\x30\n\x03Put\x12\x13.kvstore.PutRequest\x1a\x14.kvstore.PutResponse\x12\x30\n\x03Get\x12\x13.kvstore.GetRequest\x1a\x14.kvstore.GetResponse\x12\x39\n\x06\x44\x65lete\x12\x16.kvstore.DeleteRequest\x1a\x17.kvstore.DeleteResponse\x12?\n\x08ListKeys\x12\x18.kvstore.ListKeysRequest\x1a\x19.kvstore.ListKeysResponse2\xbd\x04\n\x0bNodeService\x12\x42\n\tHeartbeat\x12\x19.kvstore.HeartbeatRequest\x1a\x1a.kvstore.HeartbeatResponse\x12\x45\n\nForwardPut\x12\x1a.kvstore.ForwardPutRequest\x1a\x1b.kvstore.ForwardPutResponse\x12\x45\n\nForwardGet\x12\x1a.kvstore.ForwardGetRequest\x1a\x1b.kvstore.ForwardGetResponse\x12N\n\rForwardDelete\x12\x1d.kvstore.ForwardDeleteRequest\x1a\x1e.kvstore.ForwardDeleteResponse\x12\x42\n\tReplicate\x12\x19.kvstore.ReplicateRequest\x1a\x1a.kvstore.ReplicateResponse\x12\x42\n\x0bGetSnapshot\x12\x18.kvstore.SnapshotRequest\x1a\x19.kvstore.SnapshotResponse\x12:\n\x0bJoinCluster\x12\x14.kvstore.JoinRequest\x1a\x15.kvstore.JoinResponse\x12H\n\rGetMembership\x12\x1a.kvstore.MembershipRequest\x1a\x1b.kvstore.MembershipResponseB.\n\x1c\x63om.distributed.kvstore.grpcB\x0cKVStoreProtoP\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17src/proto/kvstore.proto\x12\x07kvstore\"K\n\nPutRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\x12\x0e\n\x06ttl_ms\x18\x04 \x01(\x03\"X\n\x0bPutResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0f\n\x07node_id\x18\x03 \x01(\t\x12\x16\n\x0ereplicas_count\x18\x04 \x01(\x05\"4\n\nGetRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x19\n\x11read_from_replica\x18\x02 \x01(\x08\"v\n\x0bGetResponse\x12\r\n\x05\x66ound\x18\x01 \x01(\x08\x12\r\n\x05value\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x0f\n\x07node_id\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\x03\x12\x14\n\x0cversion_node\x18\x06 \x01(\t\"\x1c\n\rDeleteRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\"J\n\x0e\x44\x65leteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x16\n\x0ereplicas_count\x18\x03 \x01(\x05\"\x11\n\x0fListKeysRequest\"@\n\x10ListKeysResponse\x12\x0c\n\x04keys\x18\x01 \x03(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\x12\x0f\n\x07node_id\x18\x03 \x01(\t\"X\n\x0bScanRequest\x12\x0e\n\x06prefix\x18\x01 \x01(\t\x12\r\n\x05start\x18\x02 \x01(\t\x12\x0b\n\x03\x65nd\x18\x03 \x01(\t\x12\r\n\x05limit\x18\x04 \x01(\x05\x12\x0e\n\x06\x63ursor\x18\x05 \x01(\t\"l\n\x0cScanResponse\x12$\n\x05items\x18\x01 \x03(\x0b\x32\x15.kvstore.KeyValuePair\x12\x13\n\x0bnext_cursor\x18\x02 \x01(\t\x12\x10\n\x08has_more\x18\x03 \x01(\x08\x12\x0f\n\x07node_id\x18\x04 \x01(\t\"0\n\x0cWatchRequest\x12\x0e\n\x06prefix\x18\x01 \x01(\t\x12\x10\n\x08\x66rom_seq\x18\x02 \x01(\x03\"\xaf\x01\n\nWatchEvent\x12\x0b\n\x03seq\x18\x01 \x01(\x03\x12.\n\toperation\x18\x02 \x01(\x0e\x32\x1b.kvstore.ReplicateOperation\x12\x0b\n\x03key\x18\x03 \x01(\t\x12\r\n\x05value\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\x03\x12\x14\n\x0cversion_node\x18\x06 \x01(\t\x12\x0e\n\x06lagged\x18\x07 \x01(\x08\x12\x0f\n\x07node_id\x18\x08 \x01(\t\"f\n\x10HeartbeatRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0c\n\x04host\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\x12\x11\n\ttimestamp\x18\x04 \x01(\x03\x12\x12\n\nkeys_count\x18\x05 \x01(\x05\"Q\n\x11HeartbeatResponse\x12\x14\n\x0c\x61\x63knowledged\x18\x01 \x01(\x08\x12\x13\n\x0breceiver_id\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\"j\n\x11\x46orwardPutRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\x12\x16\n\x0eorigin_node_id\x18\x04 \x01(\t\x12\x0e\n\x06ttl_ms\x18\x05 \x01(\x03\"O\n\x12\x46orwardPutResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x17\n\x0fhandler_node_id\x18\x03 \x01(\t\"8\n\x11\x46orwardGetRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x16\n\x0eorigin_node_id\x18\x02 \x01(\t\"V\n\x12\x46orwardGetResponse\x12\r\n\x05\x66ound\x18\x01 \x01(\x08\x12\r\n\x05value\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x11\n\ttimestamp\x18\x04 \x01(\x03\";\n\x14\x46orwardDeleteRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x16\n\x0eorigin_node_id\x18\x02 \x01(\t\"9\n\x15\x46orwardDeleteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"\xcd\x01\n\x10ReplicateRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\x12\x14\n\x0cprimary_node\x18\x04 \x01(\t\x12.\n\toperation\x18\x05 \x01(\x0e\x32\x1b.kvstore.ReplicateOperation\x12\x14\n\x0c\x65xpire_at_ms\x18\x06 \x01(\x03\x12\x18\n\x10\x63ompressed_value\x18\x07 \x01(\x0c\x12\x14\n\x0cversion_node\x18\x08 \x01(\t\"U\n\x15ReplicateBatchRequest\x12&\n\x03ops\x18\x01 \x03(\x0b\x32\x19.kvstore.ReplicateRequest\x12\x14\n\x0cprimary_node\x18\x02 \x01(\t\"d\n\x16ReplicateBatchResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07\x61pplied\x18\x02 \x01(\x05\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x17\n\x0freplica_node_id\x18\x04 \x01(\t\"N\n\x11ReplicateResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x17\n\x0freplica_node_id\x18\x03 \x01(\t\"-\n\x0fSnapshotRequest\x12\x1a\n\x12requesting_node_id\x18\x01 \x01(\t\"\x81\x01\n\x10SnapshotResponse\x12#\n\x04\x64\x61ta\x18\x01 \x03(\x0b\x32\x15.kvstore.KeyValuePair\x12\x12\n\ntotal_keys\x18\x02 \x01(\x05\x12\x18\n\x10provider_node_id\x18\x03 \x01(\t\x12\x1a\n\x12snapshot_timestamp\x18\x04 \x01(\x03\"\x84\x01\n\x0cKeyValuePair\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\x12\x18\n\x10\x63ompressed_value\x18\x04 \x01(\x0c\x12\x15\n\rdeleted_at_ms\x18\x05 \x01(\x03\x12\x14\n\x0cversion_node\x18\x06 \x01(\t\":\n\x0bJoinRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0c\n\x04host\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\"\\\n\x0cJoinResponse\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12)\n\x0e\x65xisting_nodes\x18\x03 \x03(\x0b\x32\x11.kvstore.NodeInfo\"/\n\x11MembershipRequest\x12\x1a\n\x12requesting_node_id\x18\x01 \x01(\t\"L\n\x12MembershipResponse\x12 \n\x05nodes\x18\x01 \x03(\x0b\x32\x11.kvstore.NodeInfo\x12\x14\n\x0c\x63luster_size\x18\x02 \x01(\x05\"t\n\x08NodeInfo\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0c\n\x04host\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\x12#\n\x06status\x18\x04 \x01(\x0e\x32\x13.kvstore.NodeStatus\x12\x16\n\x0elast_heartbeat\x18\x05 \x01(\x03*)\n\x12ReplicateOperation\x12\x07\n\x03PUT\x10\x00\x12\n\n\x06\x44\x45LETE\x10\x01*M\n\nNodeStatus\x12\n\n\x06\x41\x43TIVE\x10\x00\x12\r\n\tSUSPECTED\x10\x01\x12\n\n\x06\x46\x41ILED\x10\x02\x12\x0b\n\x07JOINING\x10\x03\x12\x0b\n\x07LEAVING\x10\x04\x32\xdb\x02\n\rKeyValueStore\x12\x30\n\x03Put\x12\x13.kvstore.PutRequest\x1a\x14.kvstore.PutResponse\x12\x30\n\x03Get\x12\x13.kvstore.GetRequest\x1a\x14.kvstore.GetResponse\x12\x39\n\x06\x44\x65lete\x12\x16.kvstore.DeleteRequest\x1a\x17.kvstore.DeleteResponse\x12?\n\x08ListKeys\x12\x18.kvstore.ListKeysRequest\x1a\x19.kvstore.ListKeysResponse\x12\x33\n\x04Scan\x12\x14.kvstore.ScanRequest\x1a\x15.kvstore.ScanResponse\x12\x35\n\x05Watch\x12\x15.kvstore.WatchRequest\x1a\x13.kvstore.WatchEvent0\x01\x32\xca\x05\n\x0bNodeService\x12\x42\n\tHeartbeat\x12\x19.kvstore.HeartbeatRequest\x1a\x1a.kvstore.HeartbeatResponse\x12\x45\n\nForwardPut\x12\x1a.kvstore.ForwardPutRequest\x1a\x1b.kvstore.ForwardPutResponse\x12\x45\n\nForwardGet\x12\x1a.kvstore.ForwardGetRequest\x1a\x1b.kvstore.ForwardGetResponse\x12N\n\rForwardDelete\x12\x1d.kvstore.ForwardDeleteRequest\x1a\x1e.kvstore.ForwardDeleteResponse\x12\x38\n\tScanLocal\x12\x14.kvstore.ScanRequest\x1a\x15.kvstore.ScanResponse\x12\x42\n\tReplicate\x12\x19.kvstore.ReplicateRequest\x1a\x1a.kvstore.ReplicateResponse\x12Q\n\x0eReplicateBatch\x12\x1e.kvstore.ReplicateBatchRequest\x1a\x1f.kvstore.ReplicateBatchResponse\x12\x42\n\x0bGetSnapshot\x12\x18.kvstore.SnapshotRequest\x1a\x19.kvstore.SnapshotResponse\x12:\n\x0bJoinCluster\x12\x14.kvstore.JoinRequest\x1a\x15.kvstore.JoinResponse\x12H\n\rGetMembership\x12\x1a.kvstore.MembershipRequest\x1a\x1b.kvstore.MembershipResponseB.\n\x1c\x63om.distributed.kvstore.grpcB\x0cKVStoreProtoP\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -22,64 +22,76 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'src.proto.kvstore_pb2', _gl
 if _descriptor._USE_C_DESCRIPTORS == False:
   _globals['DESCRIPTOR']._options = None
   _globals['DESCRIPTOR']._serialized_options = b'\n\034com.distributed.kvstore.grpcB\014KVStoreProtoP\001'
-  _globals['_REPLICATEOPERATION']._serialized_start=2015
-  _globals['_REPLICATEOPERATION']._serialized_end=2056
-  _globals['_NODESTATUS']._serialized_start=2058
-  _globals['_NODESTATUS']._serialized_end=2135
+  _globals['_REPLICATEOPERATION']._serialized_start=2828
+  _globals['_REPLICATEOPERATION']._serialized_end=2869
+  _globals['_NODESTATUS']._serialized_start=2871
+  _globals['_NODESTATUS']._serialized_end=2948
   _globals['_PUTREQUEST']._serialized_start=36
-  _globals['_PUTREQUEST']._serialized_end=95
-  _globals['_PUTRESPONSE']._serialized_start=97
-  _globals['_PUTRESPONSE']._serialized_end=185
-  _globals['_GETREQUEST']._serialized_start=187
-  _globals['_GETREQUEST']._serialized_end=239
-  _globals['_GETRESPONSE']._serialized_start=241
-  _globals['_GETRESPONSE']._serialized_end=337
-  _globals['_DELETEREQUEST']._serialized_start=339
-  _globals['_DELETEREQUEST']._serialized_end=367
-  _globals['_DELETERESPONSE']._serialized_start=369
-  _globals['_DELETERESPONSE']._serialized_end=443
-  _globals['_LISTKEYSREQUEST']._serialized_start=445
-  _globals['_LISTKEYSREQUEST']._serialized_end=462
-  _globals['_LISTKEYSRESPONSE']._serialized_start=464
-  _globals['_LISTKEYSRESPONSE']._serialized_end=528
-  _globals['_HEARTBEATREQUEST']._serialized_start=530
-  _globals['_HEARTBEATREQUEST']._serialized_end=632
-  _globals['_HEARTBEATRESPONSE']._serialized_start=634
-  _globals['_HEARTBEATRESPONSE']._serialized_end=715
-  _globals['_FORWARDPUTREQUEST']._serialized_start=717
-  _globals['_FORWARDPUTREQUEST']._serialized_end=807
-  _globals['_FORWARDPUTRESPONSE']._serialized_start=809
-  _globals['_FORWARDPUTRESPONSE']._serialized_end=888
-  _globals['_FORWARDGETREQUEST']._serialized_start=890
-  _globals['_FORWARDGETREQUEST']._serialized_end=946
-  _globals['_FORWARDGETRESPONSE']._serialized_start=948
-  _globals['_FORWARDGETRESPONSE']._serialized_end=1034
-  _globals['_FORWARDDELETEREQUEST']._serialized_start=1036
-  _globals['_FORWARDDELETEREQUEST']._serialized_end=1095
-  _globals['_FORWARDDELETERESPONSE']._serialized_start=1097
-  _globals['_FORWARDDELETERESPONSE']._serialized_end=1154
-  _globals['_REPLICATEREQUEST']._serialized_start=1157
-  _globals['_REPLICATEREQUEST']._serialized_end=1292
-  _globals['_REPLICATERESPONSE']._serialized_start=1294
-  _globals['_REPLICATERESPONSE']._serialized_end=1372
-  _globals['_SNAPSHOTREQUEST']._serialized_start=1374
-  _globals['_SNAPSHOTREQUEST']._serialized_end=1419
-  _globals['_SNAPSHOTRESPONSE']._serialized_start=1422
-  _globals['_SNAPSHOTRESPONSE']._serialized_end=1551
-  _globals['_KEYVALUEPAIR']._serialized_start=1553
-  _globals['_KEYVALUEPAIR']._serialized_end=1614
-  _globals['_JOINREQUEST']._serialized_start=1616
-  _globals['_JOINREQUEST']._serialized_end=1674
-  _globals['_JOINRESPONSE']._serialized_start=1676
-  _globals['_JOINRESPONSE']._serialized_end=1768
-  _globals['_MEMBERSHIPREQUEST']._serialized_start=1770
-  _globals['_MEMBERSHIPREQUEST']._serialized_end=1817
-  _globals['_MEMBERSHIPRESPONSE']._serialized_start=1819
-  _globals['_MEMBERSHIPRESPONSE']._serialized_end=1895
-  _globals['_NODEINFO']._serialized_start=1897
-  _globals['_NODEINFO']._serialized_end=2013
-  _globals['_KEYVALUESTORE']._serialized_start=2138
-  _globals['_KEYVALUESTORE']._serialized_end=2377
-  _globals['_NODESERVICE']._serialized_start=2380
-  _globals['_NODESERVICE']._serialized_end=2953
+  _globals['_PUTREQUEST']._serialized_end=111
+  _globals['_PUTRESPONSE']._serialized_start=113
+  _globals['_PUTRESPONSE']._serialized_end=201
+  _globals['_GETREQUEST']._serialized_start=203
+  _globals['_GETREQUEST']._serialized_end=255
+  _globals['_GETRESPONSE']._serialized_start=257
+  _globals['_GETRESPONSE']._serialized_end=375
+  _globals['_DELETEREQUEST']._serialized_start=377
+  _globals['_DELETEREQUEST']._serialized_end=405
+  _globals['_DELETERESPONSE']._serialized_start=407
+  _globals['_DELETERESPONSE']._serialized_end=481
+  _globals['_LISTKEYSREQUEST']._serialized_start=483
+  _globals['_LISTKEYSREQUEST']._serialized_end=500
+  _globals['_LISTKEYSRESPONSE']._serialized_start=502
+  _globals['_LISTKEYSRESPONSE']._serialized_end=566
+  _globals['_SCANREQUEST']._serialized_start=568
+  _globals['_SCANREQUEST']._serialized_end=656
+  _globals['_SCANRESPONSE']._serialized_start=658
+  _globals['_SCANRESPONSE']._serialized_end=766
+  _globals['_WATCHREQUEST']._serialized_start=768
+  _globals['_WATCHREQUEST']._serialized_end=816
+  _globals['_WATCHEVENT']._serialized_start=819
+  _globals['_WATCHEVENT']._serialized_end=994
+  _globals['_HEARTBEATREQUEST']._serialized_start=996
+  _globals['_HEARTBEATREQUEST']._serialized_end=1098
+  _globals['_HEARTBEATRESPONSE']._serialized_start=1100
+  _globals['_HEARTBEATRESPONSE']._serialized_end=1181
+  _globals['_FORWARDPUTREQUEST']._serialized_start=1183
+  _globals['_FORWARDPUTREQUEST']._serialized_end=1289
+  _globals['_FORWARDPUTRESPONSE']._serialized_start=1291
+  _globals['_FORWARDPUTRESPONSE']._serialized_end=1370
+  _globals['_FORWARDGETREQUEST']._serialized_start=1372
+  _globals['_FORWARDGETREQUEST']._serialized_end=1428
+  _globals['_FORWARDGETRESPONSE']._serialized_start=1430
+  _globals['_FORWARDGETRESPONSE']._serialized_end=1516
+  _globals['_FORWARDDELETEREQUEST']._serialized_start=1518
+  _globals['_FORWARDDELETEREQUEST']._serialized_end=1577
+  _globals['_FORWARDDELETERESPONSE']._serialized_start=1579
+  _globals['_FORWARDDELETERESPONSE']._serialized_end=1636
+  _globals['_REPLICATEREQUEST']._serialized_start=1639
+  _globals['_REPLICATEREQUEST']._serialized_end=1844
+  _globals['_REPLICATEBATCHREQUEST']._serialized_start=1846
+  _globals['_REPLICATEBATCHREQUEST']._serialized_end=1931
+  _globals['_REPLICATEBATCHRESPONSE']._serialized_start=1933
+  _globals['_REPLICATEBATCHRESPONSE']._serialized_end=2033
+  _globals['_REPLICATERESPONSE']._serialized_start=2035
+  _globals['_REPLICATERESPONSE']._serialized_end=2113
+  _globals['_SNAPSHOTREQUEST']._serialized_start=2115
+  _globals['_SNAPSHOTREQUEST']._serialized_end=2160
+  _globals['_SNAPSHOTRESPONSE']._serialized_start=2163
+  _globals['_SNAPSHOTRESPONSE']._serialized_end=2292
+  _globals['_KEYVALUEPAIR']._serialized_start=2295
+  _globals['_KEYVALUEPAIR']._serialized_end=2427
+  _globals['_JOINREQUEST']._serialized_start=2429
+  _globals['_JOINREQUEST']._serialized_end=2487
+  _globals['_JOINRESPONSE']._serialized_start=2489
+  _globals['_JOINRESPONSE']._serialized_end=2581
+  _globals['_MEMBERSHIPREQUEST']._serialized_start=2583
+  _globals['_MEMBERSHIPREQUEST']._serialized_end=2630
+  _globals['_MEMBERSHIPRESPONSE']._serialized_start=2632
+  _globals['_MEMBERSHIPRESPONSE']._serialized_end=2708
+  _globals['_NODEINFO']._serialized_start=2710
+  _globals['_NODEINFO']._serialized_end=2826
+  _globals['_KEYVALUESTORE']._serialized_start=2951
+  _globals['_KEYVALUESTORE']._serialized_end=3298
+  _globals['_NODESERVICE']._serialized_start=3301
+  _globals['_NODESERVICE']._serialized_end=4015
 # @@protoc_insertion_point(module_scope)
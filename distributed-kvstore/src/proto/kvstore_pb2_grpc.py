@@ -37,6 +37,16 @@ class KeyValueStoreStub(object):
                 request_serializer=src_dot_proto_dot_kvstore__pb2.ListKeysRequest.SerializeToString,
                 response_deserializer=src_dot_proto_dot_kvstore__pb2.ListKeysResponse.FromString,
                 )
+        self.Scan = channel.unary_unary(
+                '/kvstore.KeyValueStore/Scan',
+                request_serializer=src_dot_proto_dot_kvstore__pb2.ScanRequest.SerializeToString,
+                response_deserializer=src_dot_proto_dot_kvstore__pb2.ScanResponse.FromString,
+                )
+        self.Watch = channel.unary_stream(
+                '/kvstore.KeyValueStore/Watch',
+                request_serializer=src_dot_proto_dot_kvstore__pb2.WatchRequest.SerializeToString,
+                response_deserializer=src_dot_proto_dot_kvstore__pb2.WatchEvent.FromString,
+                )
 
 
 class KeyValueStoreServicer(object):
@@ -77,6 +87,22 @@ class KeyValueStoreServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def Scan(self, request, context):
+        """Scan keys theo prefix hoặc range [start, end) trên toàn cluster
+        Kết quả sắp xếp theo key, phân trang bằng cursor
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Watch(self, request, context):
+        """Stream mọi PUT/DELETE được áp dụng trên node này (change-data-capture)
+        Lọc theo prefix, resume từ sequence number; consumer chậm bị đánh dấu lagged
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_KeyValueStoreServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -100,6 +126,16 @@ def add_KeyValueStoreServicer_to_server(servicer, server):
                     request_deserializer=src_dot_proto_dot_kvstore__pb2.ListKeysRequest.FromString,
                     response_serializer=src_dot_proto_dot_kvstore__pb2.ListKeysResponse.SerializeToString,
             ),
+            'Scan': grpc.unary_unary_rpc_method_handler(
+                    servicer.Scan,
+                    request_deserializer=src_dot_proto_dot_kvstore__pb2.ScanRequest.FromString,
+                    response_serializer=src_dot_proto_dot_kvstore__pb2.ScanResponse.SerializeToString,
+            ),
+            'Watch': grpc.unary_stream_rpc_method_handler(
+                    servicer.Watch,
+                    request_deserializer=src_dot_proto_dot_kvstore__pb2.WatchRequest.FromString,
+                    response_serializer=src_dot_proto_dot_kvstore__pb2.WatchEvent.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'kvstore.KeyValueStore', rpc_method_handlers)
@@ -181,6 +217,40 @@ class KeyValueStore(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def Scan(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/kvstore.KeyValueStore/Scan',
+            src_dot_proto_dot_kvstore__pb2.ScanRequest.SerializeToString,
+            src_dot_proto_dot_kvstore__pb2.ScanResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Watch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/kvstore.KeyValueStore/Watch',
+            src_dot_proto_dot_kvstore__pb2.WatchRequest.SerializeToString,
+            src_dot_proto_dot_kvstore__pb2.WatchEvent.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
 
 class NodeServiceStub(object):
     """*
@@ -214,11 +284,21 @@ class NodeServiceStub(object):
                 request_serializer=src_dot_proto_dot_kvstore__pb2.ForwardDeleteRequest.SerializeToString,
                 response_deserializer=src_dot_proto_dot_kvstore__pb2.ForwardDeleteResponse.FromString,
                 )
+        self.ScanLocal = channel.unary_unary(
+                '/kvstore.NodeService/ScanLocal',
+                request_serializer=src_dot_proto_dot_kvstore__pb2.ScanRequest.SerializeToString,
+                response_deserializer=src_dot_proto_dot_kvstore__pb2.ScanResponse.FromString,
+                )
         self.Replicate = channel.unary_unary(
                 '/kvstore.NodeService/Replicate',
                 request_serializer=src_dot_proto_dot_kvstore__pb2.ReplicateRequest.SerializeToString,
                 response_deserializer=src_dot_proto_dot_kvstore__pb2.ReplicateResponse.FromString,
                 )
+        self.ReplicateBatch = channel.unary_unary(
+                '/kvstore.NodeService/ReplicateBatch',
+                request_serializer=src_dot_proto_dot_kvstore__pb2.ReplicateBatchRequest.SerializeToString,
+                response_deserializer=src_dot_proto_dot_kvstore__pb2.ReplicateBatchResponse.FromString,
+                )
         self.GetSnapshot = channel.unary_unary(
                 '/kvstore.NodeService/GetSnapshot',
                 request_serializer=src_dot_proto_dot_kvstore__pb2.SnapshotRequest.SerializeToString,
@@ -270,6 +350,13 @@ class NodeServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ScanLocal(self, request, context):
+        """Scan storage local của node (node nhận Scan gọi đến mọi node rồi merge)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Replicate(self, request, context):
         """Replicate data từ primary node sang replica
         Đảm bảo mỗi key có ít nhất 2 copies
@@ -278,6 +365,14 @@ class NodeServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ReplicateBatch(self, request, context):
+        """Replicate nhiều operations trong 1 RPC (replica áp dụng bằng batch API,
+        1 lần lấy lock cho mỗi nhóm PUT/DELETE liên tiếp)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetSnapshot(self, request, context):
         """Lấy snapshot toàn bộ data từ node khác
         Dùng khi node restart và cần khôi phục dữ liệu
@@ -323,11 +418,21 @@ def add_NodeServiceServicer_to_server(servicer, server):
                     request_deserializer=src_dot_proto_dot_kvstore__pb2.ForwardDeleteRequest.FromString,
                     response_serializer=src_dot_proto_dot_kvstore__pb2.ForwardDeleteResponse.SerializeToString,
             ),
+            'ScanLocal': grpc.unary_unary_rpc_method_handler(
+                    servicer.ScanLocal,
+                    request_deserializer=src_dot_proto_dot_kvstore__pb2.ScanRequest.FromString,
+                    response_serializer=src_dot_proto_dot_kvstore__pb2.ScanResponse.SerializeToString,
+            ),
             'Replicate': grpc.unary_unary_rpc_method_handler(
                     servicer.Replicate,
                     request_deserializer=src_dot_proto_dot_kvstore__pb2.ReplicateRequest.FromString,
                     response_serializer=src_dot_proto_dot_kvstore__pb2.ReplicateResponse.SerializeToString,
             ),
+            'ReplicateBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReplicateBatch,
+                    request_deserializer=src_dot_proto_dot_kvstore__pb2.ReplicateBatchRequest.FromString,
+                    response_serializer=src_dot_proto_dot_kvstore__pb2.ReplicateBatchResponse.SerializeToString,
+            ),
             'GetSnapshot': grpc.unary_unary_rpc_method_handler(
                     servicer.GetSnapshot,
                     request_deserializer=src_dot_proto_dot_kvstore__pb2.SnapshotRequest.FromString,
@@ -424,6 +529,23 @@ class NodeService(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def ScanLocal(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/kvstore.NodeService/ScanLocal',
+            src_dot_proto_dot_kvstore__pb2.ScanRequest.SerializeToString,
+            src_dot_proto_dot_kvstore__pb2.ScanResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def Replicate(request,
             target,
@@ -441,6 +563,23 @@ class NodeService(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def ReplicateBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/kvstore.NodeService/ReplicateBatch',
+            src_dot_proto_dot_kvstore__pb2.ReplicateBatchRequest.SerializeToString,
+            src_dot_proto_dot_kvstore__pb2.ReplicateBatchResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def GetSnapshot(request,
             target,
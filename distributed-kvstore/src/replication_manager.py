@@ -7,12 +7,15 @@ Replication Manager - Quản lý replication logic
 
 import logging
 import grpc
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 from src.membership_manager import MembershipManager, Node
 from src.proto import kvstore_pb2_grpc, kvstore_pb2
+from src.storage.compression import to_wire, from_wire
+from src.storage.versioning import Version, version_fields, version_from_fields
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,7 @@ class ReplicationManager:
     Xử lý:
     - Xác định replica nodes cho key (successor nodes trên hash ring)
     - Gửi ReplicateRequest đến replica nodes sau PUT/DELETE
+    - Gửi ReplicateBatchRequest (1 RPC mỗi replica) cho nhiều keys cùng lúc
     - Xử lý replicate responses
     - Retry logic nếu replication fail
     - Async replication để không block client
@@ -43,6 +47,7 @@ class ReplicationManager:
         self.node_id = node_id
         self.max_retries = max_retries
         self.executor = ThreadPoolExecutor(max_workers=10)  # Thread pool cho async replication
+        self.ttl_dropped = 0  # Replicated writes có TTL lưu không hết hạn (engine không hỗ trợ TTL)
     
     def get_replica_nodes(self, key: str) -> List[Node]:
         """
@@ -79,15 +84,17 @@ class ReplicationManager:
         """
         return self.membership.get_owner_node(key)
     
-    def replicate_put(self, key: str, value: str, timestamp: int) -> int:
+    def replicate_put(self, key: str, value: str, version: Optional[Version],
+                      expire_at_ms: int = 0) -> int:
         """
         Gửi replicate PUT request đến tất cả replica nodes.
         Chạy async (không block).
         
         Args:
             key: Key để replicate
-            value: Value để replicate
-            timestamp: Timestamp của operation
+            value: Value để replicate (dạng đã lưu, có thể đã nén)
+            version: (timestamp_ms, node_id) do owner đặt
+            expire_at_ms: Thời điểm hết hạn tuyệt đối (ms), 0 = không hết hạn
         
         Returns:
             Số lượng replicas đã replicate thành công
@@ -106,8 +113,9 @@ class ReplicationManager:
                 replica_node=replica_node,
                 key=key,
                 value=value,
-                timestamp=timestamp,
-                operation=kvstore_pb2.PUT
+                version=version,
+                operation=kvstore_pb2.PUT,
+                expire_at_ms=expire_at_ms
             )
             futures.append(future)
         
@@ -125,14 +133,14 @@ class ReplicationManager:
         logger.info(f"PUT replicated to {success_count}/{len(replicas)} replicas for key '{key}'")
         return success_count
     
-    def replicate_delete(self, key: str, timestamp: int) -> int:
+    def replicate_delete(self, key: str, version: Optional[Version]) -> int:
         """
         Gửi replicate DELETE request đến tất cả replica nodes.
         Chạy async (không block).
         
         Args:
             key: Key để delete từ replicas
-            timestamp: Timestamp của operation
+            version: (timestamp_ms, node_id) do owner đặt
         
         Returns:
             Số lượng replicas đã delete thành công
@@ -151,7 +159,7 @@ class ReplicationManager:
                 replica_node=replica_node,
                 key=key,
                 value="",  # Empty for DELETE
-                timestamp=timestamp,
+                version=version,
                 operation=kvstore_pb2.DELETE
             )
             futures.append(future)
@@ -169,8 +177,113 @@ class ReplicationManager:
         logger.info(f"DELETE replicated to {success_count}/{len(replicas)} replicas for key '{key}'")
         return success_count
     
+    def replicate_put_many(self, items: List[Tuple[str, str, int]],
+                           version: Optional[Version] = None) -> int:
+        """
+        Replicate nhiều PUT: gom theo replica node, mỗi node 1 ReplicateBatch RPC.
+        
+        Args:
+            items: List (key, value đã lưu, expire_at_ms)
+            version: Version chung của batch (None = replica ghi không điều kiện)
+        
+        Returns:
+            Số replica nodes đã nhận batch thành công
+        """
+        timestamp, version_node = version_fields(version)
+        ops = []
+        for key, value, expire_at_ms in items:
+            wire_value, compressed_value = to_wire(value)
+            ops.append(kvstore_pb2.ReplicateRequest(
+                key=key, value=wire_value, timestamp=timestamp, primary_node=self.node_id,
+                operation=kvstore_pb2.PUT, expire_at_ms=expire_at_ms,
+                compressed_value=compressed_value, version_node=version_node
+            ))
+        return self._replicate_batch(ops)
+    
+    def replicate_delete_many(self, keys: List[str], version: Optional[Version] = None) -> int:
+        """
+        Replicate nhiều DELETE: gom theo replica node, mỗi node 1 ReplicateBatch RPC.
+        
+        Args:
+            keys: Keys cần xóa trên replicas
+            version: Version chung của batch (None = replica xóa không điều kiện)
+        
+        Returns:
+            Số replica nodes đã nhận batch thành công
+        """
+        timestamp, version_node = version_fields(version)
+        ops = [
+            kvstore_pb2.ReplicateRequest(
+                key=key, timestamp=timestamp, primary_node=self.node_id,
+                operation=kvstore_pb2.DELETE, version_node=version_node
+            )
+            for key in keys
+        ]
+        return self._replicate_batch(ops)
+    
+    def _replicate_batch(self, ops: List[kvstore_pb2.ReplicateRequest]) -> int:
+        """Gom ops theo replica node (giữ thứ tự) và gửi song song."""
+        ops_by_node: Dict[str, List[kvstore_pb2.ReplicateRequest]] = {}
+        nodes: Dict[str, Node] = {}
+        for op in ops:
+            for replica_node in self.get_replica_nodes(op.key):
+                nodes[replica_node.node_id] = replica_node
+                ops_by_node.setdefault(replica_node.node_id, []).append(op)
+        
+        if not ops_by_node:
+            return 0
+        
+        futures = [
+            self.executor.submit(self._send_replicate_batch, nodes[node_id], node_ops)
+            for node_id, node_ops in ops_by_node.items()
+        ]
+        success_count = 0
+        for future in futures:
+            try:
+                if future.result(timeout=30):
+                    success_count += 1
+            except Exception as e:
+                logger.warning(f"Batch replication failed: {e}")
+        
+        logger.info(f"Batch of {len(ops)} ops replicated to {success_count}/{len(futures)} replicas")
+        return success_count
+    
+    def _send_replicate_batch(self, replica_node: Node,
+                              ops: List[kvstore_pb2.ReplicateRequest]) -> bool:
+        """
+        Gửi ReplicateBatchRequest tới 1 replica node (retry như _send_replicate_request).
+        
+        Returns:
+            True nếu replica áp dụng toàn bộ batch
+        """
+        request = kvstore_pb2.ReplicateBatchRequest(ops=ops, primary_node=self.node_id)
+        for attempt in range(1, self.max_retries + 1):
+            channel = grpc.insecure_channel(replica_node.get_address(), options=[
+                ('grpc.max_receive_message_length', -1),
+                ('grpc.max_send_message_length', -1),
+            ])
+            try:
+                stub = kvstore_pb2_grpc.NodeServiceStub(channel)
+                response = stub.ReplicateBatch(request, timeout=10)
+                if not response.success:
+                    logger.warning(f"Replicate batch failed on {replica_node.node_id}: {response.message}")
+                return response.success
+            except grpc.RpcError as e:
+                logger.warning(
+                    f"Replicate batch RPC error on {replica_node.node_id} "
+                    f"(attempt {attempt}/{self.max_retries}): {e.details()}"
+                )
+                if attempt < self.max_retries:
+                    time.sleep(0.1)
+            finally:
+                channel.close()
+        
+        logger.error(f"Replicate batch of {len(ops)} ops failed on {replica_node.node_id}")
+        return False
+    
     def _send_replicate_request(self, replica_node: Node, key: str, value: str,
-                                timestamp: int, operation: int) -> bool:
+                                version: Optional[Version], operation: int,
+                                expire_at_ms: int = 0) -> bool:
         """
         Gửi ReplicateRequest tới 1 replica node.
         Có retry logic nếu fail.
@@ -179,8 +292,9 @@ class ReplicationManager:
             replica_node: Node nhận replicate request
             key: Key
             value: Value
-            timestamp: Timestamp
+            version: (timestamp_ms, node_id) của write (None = không có version)
             operation: ReplicateOperation.PUT hoặc DELETE
+            expire_at_ms: Thời điểm hết hạn (chỉ dùng cho PUT)
         
         Returns:
             True nếu replicate thành công, False nếu fail
@@ -199,13 +313,18 @@ class ReplicationManager:
                 # Tạo stub
                 stub = kvstore_pb2_grpc.NodeServiceStub(channel)
                 
-                # Tạo request
+                # Tạo request (value đã nén gửi dạng bytes, không giải nén)
+                wire_value, compressed_value = to_wire(value)
+                timestamp, version_node = version_fields(version)
                 request = kvstore_pb2.ReplicateRequest(
                     key=key,
-                    value=value,
+                    value=wire_value,
                     timestamp=timestamp,
                     primary_node=self.node_id,
-                    operation=operation
+                    operation=operation,
+                    expire_at_ms=expire_at_ms,
+                    compressed_value=compressed_value,
+                    version_node=version_node
                 )
                 
                 # Gửi request (với timeout)
@@ -265,10 +384,25 @@ class ReplicationManager:
         """
         try:
             key = request.key
+            version = version_from_fields(request.timestamp, request.version_node)
+            versioned = version is not None and storage.supports_versions
             
             if request.operation == kvstore_pb2.PUT:
-                # Lưu vào storage
-                storage.put(key, request.value)
+                # Lưu vào storage (giữ nguyên thời điểm hết hạn, dạng nén và version của primary;
+                # write cũ hơn version đang lưu bị bỏ qua)
+                value = from_wire(request.value, request.compressed_value)
+                if versioned:
+                    storage.put(key, value, expire_at_ms=request.expire_at_ms or None, version=version)
+                elif request.expire_at_ms and storage.supports_ttl:
+                    storage.put(key, value, expire_at_ms=request.expire_at_ms)
+                else:
+                    if request.expire_at_ms:
+                        self.ttl_dropped += 1
+                        logger.warning(
+                            f"Replicated PUT stored without TTL (engine has no TTL): "
+                            f"key='{key}', total={self.ttl_dropped}"
+                        )
+                    storage.put(key, value)
                 logger.info(
                     f"Replicated PUT from {request.primary_node}: "
                     f"key='{key}', value='{request.value}'"
@@ -276,8 +410,11 @@ class ReplicationManager:
                 return True
                 
             elif request.operation == kvstore_pb2.DELETE:
-                # Xóa khỏi storage
-                storage.delete(key)
+                # Xóa khỏi storage (bỏ qua nếu đã có write mới hơn)
+                if versioned:
+                    storage.delete(key, version=version)
+                else:
+                    storage.delete(key)
                 logger.info(
                     f"Replicated DELETE from {request.primary_node}: key='{key}'"
                 )
@@ -5,11 +5,15 @@ Implement KeyValueStore service và Node service.
 
 import sys  # Để lấy command line arguments
 import os  # Để làm việc với đường dẫn
+import json  # Để đọc storage config
 import logging  # Để logging
 import grpc  # gRPC library
 from concurrent import futures  # ThreadPoolExecutor
 import time  # Để sleep
 import threading  # For background threads
+import queue  # Queue cho eviction propagation
+import heapq  # Merge kết quả Scan từ nhiều nodes
+import itertools  # Gom operations liên tiếp trong ReplicateBatch
 
 # Fix import path - add project root to sys.path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -18,7 +22,18 @@ sys.path.insert(0, project_root)
 # Import generated gRPC code
 from src.proto import kvstore_pb2  # Generated message classes
 from src.proto import kvstore_pb2_grpc  # Generated service stubs
-from src.storage.storage_engine import StorageEngine  # Storage engine
+from src.storage.sharded_engine import ShardedStorageEngine  # Lock-striped storage engine
+from src.storage.wal import WriteAheadLog, OP_PUT  # Write-ahead log (durability)
+from src.storage.bitcask_engine import BitcaskStorageEngine  # Disk-backed log-structured engine
+from src.storage.lsm_engine import LSMStorageEngine  # LSM-tree engine (write-heavy, ordered)
+from src.storage.redis_engine import RedisStorageEngine  # Redis-backed engine (shared pool, pipelining)
+from src.storage.compact_engine import CompactStorageEngine  # Arena-backed engine (low per-key memory)
+from src.storage.tiered_engine import TieredStorageEngine  # Hot keys in memory, cold keys on disk
+from src.storage.checkpoint import CheckpointStore  # Point-in-time checkpoint files
+from src.storage.changefeed import ChangeFeed  # Ring buffer of applied writes (Watch RPC)
+from src.storage.backend import register_backend, get_backend, capabilities, backend_capabilities  # Storage backend registry
+from src.storage.compression import ValueCodec, to_wire, from_wire  # Value compression
+from src.storage.versioning import VersionClock, version_fields, version_from_fields  # Per-key versions (LWW)
 from src.membership_manager import MembershipManager  # Cluster membership
 from src.replication_manager import ReplicationManager  # Replication management
 
@@ -42,13 +57,201 @@ logger = logging.getLogger(__name__)
 # PHẦN 2: Implement KeyValueStore Service
 # ============================================================================
 
+# Lý do trả cho client khi PUT có TTL mà storage engine không hỗ trợ
+TTL_UNSUPPORTED = "TTL not supported by this node's storage engine"
+
+
+def put_local(storage, key: str, value: str, ttl_ms: int = 0, version=None):
+    """
+    Lưu key vào storage của node này, kèm TTL và version nếu có. Engine
+    không hỗ trợ TTL (supports_ttl = False, vd bitcask / lsm) thì từ chối
+    write có TTL thay vì lưu key không bao giờ hết hạn.
+    
+    Args:
+        storage: Storage engine
+        key: Key
+        value: Value
+        ttl_ms: Thời gian sống (ms), 0 = không hết hạn
+        version: (timestamp_ms, node_id) của write (engine không lưu version thì bỏ qua)
+    
+    Returns:
+        Thời điểm hết hạn tuyệt đối (ms) để replicate, 0 nếu không có TTL,
+        None nếu write bị bỏ qua vì cũ hơn version đang lưu
+    
+    Raises:
+        ValueError: ttl_ms > 0 trên engine không hỗ trợ TTL
+    """
+    expire_at_ms = 0
+    if ttl_ms > 0:
+        if not storage.supports_ttl:
+            raise ValueError(TTL_UNSUPPORTED)
+        expire_at_ms = int(time.time() * 1000) + ttl_ms
+    if not store_local(storage, key, value, expire_at_ms, version):
+        return None
+    return expire_at_ms
+
+
+def ttl_refusal(storage, replication, key: str):
+    """
+    Lý do từ chối PUT có TTL, None nếu mọi node giữ key đều hết hạn được key.
+    
+    Owner kiểm tra cả replicas (Node.supports_ttl, theo engine trong config):
+    replica có engine không hỗ trợ TTL sẽ giữ key không hết hạn, chỉ mất khi
+    DELETE hết hạn của owner đến được, nên cả write bị từ chối.
+    
+    Args:
+        storage: Storage engine của owner
+        replication: ReplicationManager (None = không có replicas)
+        key: Key
+    
+    Returns:
+        Message cho PutResponse, hoặc None
+    """
+    if not storage.supports_ttl:
+        return TTL_UNSUPPORTED
+    if replication is not None:
+        for replica in replication.get_replica_nodes(key):
+            if not replica.supports_ttl:
+                return f"TTL not supported by the storage engine of replica {replica.node_id}"
+    return None
+
+
+def store_local(storage, key: str, value: str, expire_at_ms: int = 0, version=None) -> bool:
+    """
+    Ghi key với thời điểm hết hạn tuyệt đối và version đã có sẵn
+    (write của chính node này hoặc nhận từ primary). Engine không hỗ trợ
+    TTL thì lưu không hết hạn.
+    
+    Returns:
+        False nếu write bị bỏ qua vì cũ hơn version đang lưu
+    """
+    if version is not None and storage.supports_versions:
+        return storage.put(key, value, expire_at_ms=expire_at_ms or None, version=version)
+    if expire_at_ms and storage.supports_ttl:
+        storage.put(key, value, expire_at_ms=expire_at_ms)
+    else:
+        storage.put(key, value)
+    return True
+
+
+def get_local(storage, key: str) -> tuple:
+    """
+    Đọc key từ storage của node này kèm version.
+    
+    Returns:
+        Tuple (value, found, version); version = None nếu engine không lưu version
+    """
+    if storage.supports_versions:
+        return storage.get_with_version(key)
+    value, found = storage.get(key)
+    return value, found, None
+
+
+def delete_local(storage, key: str, version=None) -> bool:
+    """
+    Xóa key khỏi storage của node này; delete cũ hơn version đang lưu bị bỏ qua.
+    
+    Returns:
+        True nếu key tồn tại và đã bị xóa
+    """
+    if version is not None and storage.supports_versions:
+        return storage.delete(key, version=version)
+    return storage.delete(key)
+
+
+def scan_local(storage, request, limit: int) -> list:
+    """
+    Scan storage của node này theo ScanRequest.
+    
+    cursor là key cuối của trang trước → trang sau bắt đầu từ key ngay sau
+    cursor (cursor + "\0" là string nhỏ nhất lớn hơn cursor).
+    Engine không hỗ trợ scan (supports_scan = False: bitcask, redis, compact)
+    thì sort toàn bộ keys.
+    
+    Args:
+        storage: Storage engine
+        request: ScanRequest (prefix, start, end, cursor)
+        limit: Số cặp tối đa
+    
+    Returns:
+        List (key, value) theo thứ tự key
+    """
+    prefix = request.prefix or None
+    start = request.start or None
+    end = request.end or None
+    if request.cursor:
+        after = request.cursor + "\0"
+        start = max(start, after) if start is not None else after
+    
+    if storage.supports_scan:
+        return storage.scan(prefix=prefix, start=start, end=end, limit=limit)
+    
+    result = []
+    for key in sorted(storage.list_keys()):
+        if (prefix and not key.startswith(prefix)) or (start is not None and key < start):
+            continue
+        if end is not None and key >= end:
+            break
+        value, found = storage.get(key)
+        if found:
+            result.append((key, value))
+            if len(result) >= limit:
+                break
+    return result
+
+
+def apply_replicate_ops(storage, ops) -> int:
+    """
+    Áp dụng list ReplicateRequest theo đúng thứ tự bằng batch API.
+    
+    Mỗi nhóm PUT (hoặc DELETE) liên tiếp là 1 lời gọi put_many/delete_many
+    → 1 lần lấy lock và 1 lần chờ WAL cho cả nhóm. Op có version cũ hơn
+    version đang lưu bị engine bỏ qua (last-write-wins).
+    
+    Returns:
+        Số operations đã áp dụng (kể cả op bị bỏ qua vì cũ)
+    """
+    applied = 0
+    versioned = storage.supports_versions
+    for operation, group in itertools.groupby(ops, key=lambda op: op.operation):
+        group = list(group)
+        applied += len(group)
+        versions = None
+        if versioned and any(op.version_node for op in group):
+            # Cùng 1 key nhiều lần trong nhóm → chỉ op có version mới nhất có hiệu lực
+            latest = {}
+            for op in group:
+                current = latest.get(op.key)
+                if current is None or (op.timestamp, op.version_node) > (current.timestamp, current.version_node):
+                    latest[op.key] = op
+            group = list(latest.values())
+            versions = {op.key: (op.timestamp, op.version_node) for op in group if op.version_node}
+        if operation == kvstore_pb2.PUT:
+            pairs = [(op.key, from_wire(op.value, op.compressed_value)) for op in group]
+            expiry = ({op.key: op.expire_at_ms for op in group if op.expire_at_ms}
+                      if storage.supports_ttl else None)
+            if versions:
+                storage.put_many(pairs, expiry or None, versions)
+            elif expiry:
+                storage.put_many(pairs, expiry)
+            else:
+                storage.put_many(pairs)
+        elif versions:
+            storage.delete_many([op.key for op in group], versions)
+        else:
+            storage.delete_many([op.key for op in group])
+    return applied
+
+
 class KeyValueStoreServicer(kvstore_pb2_grpc.KeyValueStoreServicer):
     """
     Implement KeyValueStore gRPC service.
-    Methods: Put, Get, Delete, ListKeys
+    Methods: Put, Get, Delete, ListKeys, Scan, Watch
     """
 
-    def __init__(self, node_id: str, port: int, storage, membership_manager, replication_manager):
+    def __init__(self, node_id: str, port: int, storage, membership_manager, replication_manager,
+                 scan_config: dict = None, codec: ValueCodec = None, clock: VersionClock = None,
+                 watch_config: dict = None):
         """
         Initialize servicer.
         
@@ -58,12 +261,28 @@ class KeyValueStoreServicer(kvstore_pb2_grpc.KeyValueStoreServicer):
             storage: StorageEngine instance
             membership_manager: MembershipManager instance
             replication_manager: ReplicationManager instance
+            scan_config: Section "scan" của storage config (default_limit, max_limit)
+            codec: ValueCodec nén value ở owner (None = không nén)
+            clock: VersionClock đặt version cho write (dùng chung với NodeServicer)
+            watch_config: Section "watch" của storage config (batch, max_watchers)
         """
         self.node_id = node_id
         self.port = port
         self.storage = storage
         self.membership = membership_manager
         self.replication = replication_manager
+        scan_config = scan_config or {}
+        self.scan_default_limit = scan_config.get('default_limit', 1000)
+        self.scan_max_limit = scan_config.get('max_limit', 10000)
+        self.scan_executor = futures.ThreadPoolExecutor(max_workers=8)
+        self.codec = codec or ValueCodec(algorithm="none")
+        self.clock = clock or VersionClock(node_id)
+        watch_config = watch_config or {}
+        self.watch_batch = watch_config.get('batch', 256)
+        self.max_watchers = watch_config.get('max_watchers', 4)
+        self.watch_poll_sec = watch_config.get('poll_ms', 1000) / 1000
+        self.active_watchers = 0
+        self.watch_lock = threading.Lock()
         logger.info(f"KeyValueStoreServicer initialized for {node_id}:{port}")
 
     def Put(self, request, context):
@@ -95,14 +314,33 @@ class KeyValueStoreServicer(kvstore_pb2_grpc.KeyValueStoreServicer):
             if owner_node.node_id == self.node_id:
                 # We're the owner - handle locally
                 logger.info(f"[LOCAL] This node owns key={request.key}")
-                self.storage.put(request.key, request.value)
+                refusal = ttl_refusal(self.storage, self.replication, request.key) if request.ttl_ms > 0 else None
+                if refusal is not None:
+                    logger.warning(f"PUT rejected ({refusal}): key={request.key}")
+                    return kvstore_pb2.PutResponse(
+                        success=False,
+                        message=refusal,
+                        node_id=self.node_id
+                    )
+                # Nén 1 lần ở owner; storage và replicas giữ dạng đã nén
+                stored_value = self.codec.encode(request.value)
+                # Owner đặt version (client có thể gửi timestamp riêng)
+                version = self.clock.next(request.timestamp)
+                expire_at_ms = put_local(self.storage, request.key, stored_value, request.ttl_ms, version)
+                if expire_at_ms is None:
+                    logger.info(f"PUT rejected (stale version): key={request.key}")
+                    return kvstore_pb2.PutResponse(
+                        success=False,
+                        message="Stale write: key already has a newer version",
+                        node_id=self.node_id
+                    )
                 
                 # Task 4.3: Replicate PUT to replica nodes (async, non-blocking)
-                timestamp = int(time.time())
                 replicas_count = self.replication.replicate_put(
                     request.key, 
-                    request.value, 
-                    timestamp
+                    stored_value, 
+                    version,
+                    expire_at_ms
                 )
                 
                 response = kvstore_pb2.PutResponse(
@@ -121,12 +359,24 @@ class KeyValueStoreServicer(kvstore_pb2_grpc.KeyValueStoreServicer):
                 channel = grpc.insecure_channel(owner_address)
                 stub = kvstore_pb2_grpc.NodeServiceStub(channel)
                 
-                # Call ForwardPut on owner node
-                forward_response = stub.ForwardPut(request, timeout=5.0)
+                # Call ForwardPut on owner node (ForwardPutRequest: ttl_ms là field 5,
+                # không gửi thẳng PutRequest)
+                forward_request = kvstore_pb2.ForwardPutRequest(
+                    key=request.key,
+                    value=request.value,
+                    timestamp=request.timestamp,
+                    origin_node_id=self.node_id,
+                    ttl_ms=request.ttl_ms
+                )
+                forward_response = stub.ForwardPut(forward_request, timeout=5.0)
                 channel.close()
                 
                 logger.info(f"PUT forwarded to {owner_node.node_id}: success={forward_response.success}")
-                return forward_response
+                return kvstore_pb2.PutResponse(
+                    success=forward_response.success,
+                    message=forward_response.message,
+                    node_id=forward_response.handler_node_id
+                )
             
         except grpc.RpcError as e:
             logger.error(f"Forward PUT failed (gRPC error): {str(e)}")
@@ -168,13 +418,15 @@ class KeyValueStoreServicer(kvstore_pb2_grpc.KeyValueStoreServicer):
             if owner_node.node_id == self.node_id:
                 # We're the owner - handle locally
                 logger.info(f"[LOCAL] This node owns key={request.key}")
-                value, found = self.storage.get(request.key)
+                value, found, version = get_local(self.storage, request.key)
+                timestamp, version_node = version_fields(version)
                 
                 response = kvstore_pb2.GetResponse(
                     found=found,
-                    value=value if found else "",
+                    value=self.codec.decode(value) if found else "",
                     node_id=self.node_id,
-                    timestamp=int(time.time())
+                    timestamp=timestamp,
+                    version_node=version_node
                 )
                 logger.info(f"GET (local): key={request.key}, found={found}")
                 return response
@@ -234,12 +486,12 @@ class KeyValueStoreServicer(kvstore_pb2_grpc.KeyValueStoreServicer):
             if owner_node.node_id == self.node_id:
                 # We're the owner - handle locally
                 logger.info(f"[LOCAL] This node owns key={request.key}")
-                deleted = self.storage.delete(request.key)
+                version = self.clock.next()
+                deleted = delete_local(self.storage, request.key, version)
                 
                 # Task 4.3: Replicate DELETE to replica nodes (async, non-blocking)
                 if deleted:
-                    timestamp = int(time.time())
-                    replicas_count = self.replication.replicate_delete(request.key, timestamp)
+                    replicas_count = self.replication.replicate_delete(request.key, version)
                 else:
                     replicas_count = 0
                 
@@ -311,6 +563,144 @@ class KeyValueStoreServicer(kvstore_pb2_grpc.KeyValueStoreServicer):
             context.set_code(grpc.StatusCode.INTERNAL)
             return kvstore_pb2.ListKeysResponse(keys=[])
 
+    def _scan_node(self, node, request, limit: int):
+        """Scan một node (local hoặc qua ScanLocal RPC). Trả về (node_id, items)."""
+        if node.node_id == self.node_id:
+            return node.node_id, scan_local(self.storage, request, limit)
+        
+        channel = grpc.insecure_channel(node.get_address())
+        try:
+            stub = kvstore_pb2_grpc.NodeServiceStub(channel)
+            local_request = kvstore_pb2.ScanRequest(
+                prefix=request.prefix, start=request.start, end=request.end,
+                limit=limit, cursor=request.cursor
+            )
+            response = stub.ScanLocal(local_request, timeout=10.0)
+            return node.node_id, [(item.key, from_wire(item.value, item.compressed_value))
+                                  for item in response.items]
+        finally:
+            channel.close()
+
+    def Scan(self, request, context):
+        """
+        Handle SCAN request từ client (prefix hoặc range [start, end)).
+        
+        Gửi scan song song đến mọi node còn sống, mỗi node trả về tối đa
+        `limit` keys đầu tiên sau cursor; merge các danh sách đã sort
+        (heapq.merge), bỏ key trùng (replicas) - ưu tiên bản của owner,
+        rồi cắt còn `limit` keys. Key thứ `limit` trên toàn cluster chắc
+        chắn nằm trong top `limit` của node chứa nó, nên phân trang đúng.
+        
+        Args:
+            request: ScanRequest (prefix, start, end, limit, cursor)
+            context: gRPC context
+        
+        Returns:
+            ScanResponse (items, next_cursor, has_more)
+        """
+        limit = min(request.limit or self.scan_default_limit, self.scan_max_limit)
+        logger.info(f"SCAN request: prefix={request.prefix!r}, start={request.start!r}, "
+                    f"end={request.end!r}, limit={limit}, cursor={request.cursor!r}")
+        
+        try:
+            nodes = self.membership.get_alive_nodes()
+            pending = [self.scan_executor.submit(self._scan_node, node, request, limit) for node in nodes]
+            
+            runs = []
+            has_more = False
+            for future in pending:
+                try:
+                    node_id, items = future.result()
+                except Exception as e:
+                    logger.warning(f"SCAN: node scan failed: {e}")
+                    continue
+                has_more = has_more or len(items) >= limit
+                runs.append([(key, node_id, value) for key, value in items])
+            
+            merged = []
+            for key, node_id, value in heapq.merge(*runs):
+                if merged and merged[-1][0] == key:
+                    owner = self.membership.get_owner_node(key)
+                    if owner is not None and owner.node_id == node_id:
+                        merged[-1] = (key, value)
+                    continue
+                if len(merged) >= limit:
+                    has_more = True
+                    break
+                merged.append((key, value))
+            
+            response = kvstore_pb2.ScanResponse(
+                items=[kvstore_pb2.KeyValuePair(key=key, value=self.codec.decode(value))
+                       for key, value in merged],
+                next_cursor=merged[-1][0] if merged and has_more else "",
+                has_more=has_more and bool(merged),
+                node_id=self.node_id
+            )
+            logger.info(f"SCAN: returned {len(merged)} keys from {len(runs)} nodes, has_more={has_more}")
+            return response
+            
+        except Exception as e:
+            logger.error(f"SCAN failed: {str(e)}")
+            context.set_details(f"SCAN failed: {str(e)}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return kvstore_pb2.ScanResponse()
+
+    def Watch(self, request, context):
+        """
+        Handle WATCH request: stream mọi PUT/DELETE được áp dụng trên node này.
+        
+        Events đọc theo batch từ ChangeFeed (ring buffer) của storage nên
+        writer không bao giờ phải chờ watcher. Watcher chậm hơn capacity
+        events nhận event kế tiếp với lagged=true (nên đọc lại dữ liệu) rồi
+        tiếp tục từ event cũ nhất còn giữ. Mỗi stream chiếm 1 thread của gRPC
+        server nên số watcher đồng thời bị giới hạn bởi max_watchers.
+        
+        Args:
+            request: WatchRequest (prefix, from_seq)
+            context: gRPC context
+        
+        Yields:
+            WatchEvent theo thứ tự seq
+        """
+        feed = self.storage.change_feed
+        if feed is None:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, "Change feed is disabled on this node")
+        with self.watch_lock:
+            if self.active_watchers >= self.max_watchers:
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                              f"Too many watchers (max {self.max_watchers})")
+            self.active_watchers += 1
+        
+        prefix = request.prefix
+        seq = request.from_seq or feed.last_seq + 1
+        logger.info(f"WATCH started: prefix={prefix!r}, from_seq={seq}")
+        lag_pending = False
+        try:
+            while context.is_active():
+                events, seq, lagged = feed.read(seq, self.watch_batch, timeout=self.watch_poll_sec)
+                if lagged:
+                    logger.warning(f"WATCH: watcher lagged, resuming at seq {seq - len(events)}")
+                    lag_pending = True
+                for event in events:
+                    if prefix and not event.key.startswith(prefix):
+                        continue
+                    timestamp, version_node = version_fields(event.version)
+                    yield kvstore_pb2.WatchEvent(
+                        seq=event.seq,
+                        operation=kvstore_pb2.PUT if event.op == OP_PUT else kvstore_pb2.DELETE,
+                        key=event.key,
+                        value=self.codec.decode(event.value),
+                        timestamp=timestamp,
+                        version_node=version_node,
+                        lagged=lag_pending,
+                        node_id=self.node_id
+                    )
+                    lag_pending = False
+        finally:
+            with self.watch_lock:
+                self.active_watchers -= 1
+            logger.info(f"WATCH ended at seq {seq}")
+
 
 # ============================================================================
 # PHẦN 3: Implement Node Service
@@ -322,7 +712,8 @@ class NodeServicer(kvstore_pb2_grpc.NodeServiceServicer):
     Dùng cho inter-node communication: replication, heartbeat, forwarding.
     """
 
-    def __init__(self, node_id: str, port: int, storage, replication_manager=None):
+    def __init__(self, node_id: str, port: int, storage, replication_manager=None,
+                 codec: ValueCodec = None, clock: VersionClock = None):
         """
         Initialize Node service.
         
@@ -331,11 +722,18 @@ class NodeServicer(kvstore_pb2_grpc.NodeServiceServicer):
             port: Port
             storage: StorageEngine instance (for handling forwarded requests)
             replication_manager: ReplicationManager instance (optional)
+            codec: ValueCodec nén value ở owner (None = không nén)
+            clock: VersionClock đặt version cho write (dùng chung với KeyValueStoreServicer)
         """
         self.node_id = node_id
         self.port = port
         self.storage = storage
         self.replication = replication_manager
+        self.codec = codec or ValueCodec(algorithm="none")
+        self.clock = clock or VersionClock(node_id)
+        # Replicated writes có TTL mà engine của node này lưu không hết hạn
+        self.ttl_dropped = 0
+        self.ttl_dropped_lock = threading.Lock()
         logger.info(f"NodeServicer initialized for {node_id}:{port}")
 
     def Heartbeat(self, request, context):
@@ -365,8 +763,25 @@ class NodeServicer(kvstore_pb2_grpc.NodeServiceServicer):
         logger.info(f"[FORWARDED] ForwardPut: key={request.key}, value={request.value}")
         
         try:
-            # Save to local storage (we are the owner)
-            self.storage.put(request.key, request.value)
+            refusal = ttl_refusal(self.storage, self.replication, request.key) if request.ttl_ms > 0 else None
+            if refusal is not None:
+                logger.warning(f"ForwardPut rejected ({refusal}): key={request.key}")
+                return kvstore_pb2.PutResponse(
+                    success=False,
+                    message=refusal,
+                    node_id=self.node_id
+                )
+            
+            # Save to local storage (we are the owner → nén và đặt version ở đây)
+            version = self.clock.next(request.timestamp)
+            expire_at_ms = put_local(self.storage, request.key, self.codec.encode(request.value),
+                                     request.ttl_ms, version)
+            if expire_at_ms is None:
+                return kvstore_pb2.PutResponse(
+                    success=False,
+                    message="Stale write: key already has a newer version",
+                    node_id=self.node_id
+                )
             
             response = kvstore_pb2.PutResponse(
                 success=True,
@@ -391,13 +806,15 @@ class NodeServicer(kvstore_pb2_grpc.NodeServiceServicer):
         
         try:
             # Get from local storage (we are the owner)
-            value, found = self.storage.get(request.key)
+            value, found, version = get_local(self.storage, request.key)
+            timestamp, version_node = version_fields(version)
             
             response = kvstore_pb2.GetResponse(
                 found=found,
-                value=value if found else "",
+                value=self.codec.decode(value) if found else "",
                 node_id=self.node_id,
-                timestamp=int(time.time())
+                timestamp=timestamp,
+                version_node=version_node
             )
             logger.info(f"ForwardGet: key={request.key}, found={found}")
             return response
@@ -417,7 +834,7 @@ class NodeServicer(kvstore_pb2_grpc.NodeServiceServicer):
         
         try:
             # Delete from local storage (we are the owner)
-            deleted = self.storage.delete(request.key)
+            deleted = delete_local(self.storage, request.key, self.clock.next())
             
             response = kvstore_pb2.DeleteResponse(
                 success=deleted,
@@ -431,6 +848,39 @@ class NodeServicer(kvstore_pb2_grpc.NodeServiceServicer):
             context.set_code(grpc.StatusCode.INTERNAL)
             return kvstore_pb2.DeleteResponse(success=False)
 
+    def ScanLocal(self, request, context):
+        """
+        Handle ScanLocal request từ node điều phối Scan.
+        Chỉ scan storage của node này.
+        """
+        try:
+            items = scan_local(self.storage, request, request.limit or 1000)
+            pairs = []
+            for key, value in items:
+                wire_value, compressed_value = to_wire(value)
+                pairs.append(kvstore_pb2.KeyValuePair(key=key, value=wire_value,
+                                                      compressed_value=compressed_value))
+            return kvstore_pb2.ScanResponse(
+                items=pairs,
+                has_more=bool(request.limit) and len(items) >= request.limit,
+                node_id=self.node_id
+            )
+        except Exception as e:
+            logger.error(f"ScanLocal failed: {str(e)}")
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return kvstore_pb2.ScanResponse()
+
+    def _count_ttl_dropped(self, keys) -> None:
+        """Log + đếm replicated writes có TTL mà storage engine không hết hạn được."""
+        if not keys or self.storage.supports_ttl:
+            return
+        with self.ttl_dropped_lock:
+            self.ttl_dropped += len(keys)
+            total = self.ttl_dropped
+        for key in keys:
+            logger.warning(f"Replicated PUT stored without TTL (engine has no TTL): key={key}, total={total}")
+
     def Replicate(self, request, context):
         """
         Handle Replicate request từ primary node.
@@ -444,14 +894,21 @@ class NodeServicer(kvstore_pb2_grpc.NodeServiceServicer):
         try:
             # Handle based on operation type
             success = False
+            version = version_from_fields(request.timestamp, request.version_node)
+            self.clock.observe(version)
             
             if request.operation == kvstore_pb2.PUT:
-                self.storage.put(request.key, request.value)
+                # Giữ nguyên dạng nén, thời điểm hết hạn và version của primary;
+                # write cũ hơn version đang lưu bị bỏ qua (vẫn coi là thành công)
+                value = from_wire(request.value, request.compressed_value)
+                applied = store_local(self.storage, request.key, value, request.expire_at_ms, version)
+                if request.expire_at_ms:
+                    self._count_ttl_dropped([request.key])
                 success = True
-                logger.info(f"Replicated PUT: key={request.key}, value={request.value}")
+                logger.info(f"Replicated PUT: key={request.key}, value={request.value}, applied={applied}")
                 
             elif request.operation == kvstore_pb2.DELETE:
-                deleted = self.storage.delete(request.key)
+                deleted = delete_local(self.storage, request.key, version)
                 success = deleted
                 logger.info(f"Replicated DELETE: key={request.key}, deleted={deleted}")
             
@@ -467,6 +924,42 @@ class NodeServicer(kvstore_pb2_grpc.NodeServiceServicer):
             context.set_code(grpc.StatusCode.INTERNAL)
             return kvstore_pb2.ReplicateResponse(success=False)
 
+    def ReplicateBatch(self, request, context):
+        """
+        Handle ReplicateBatch request từ primary node.
+        Áp dụng cả batch bằng put_many/delete_many thay vì từng key.
+        """
+        logger.info(f"[REPLICATE] batch of {len(request.ops)} ops from {request.primary_node}")
+        
+        try:
+            self.clock.observe(max((version_from_fields(op.timestamp, op.version_node)
+                                    for op in request.ops if op.version_node), default=None))
+            applied = apply_replicate_ops(self.storage, request.ops)
+            self._count_ttl_dropped([op.key for op in request.ops
+                                     if op.operation == kvstore_pb2.PUT and op.expire_at_ms])
+            return kvstore_pb2.ReplicateBatchResponse(
+                success=True,
+                applied=applied,
+                replica_node_id=self.node_id
+            )
+        except Exception as e:
+            logger.error(f"ReplicateBatch handler failed: {str(e)}")
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return kvstore_pb2.ReplicateBatchResponse(success=False, message=str(e))
+
+    def _snapshot_pair(self, key, value, version):
+        """Build KeyValuePair cho snapshot (value đã nén gửi nguyên dạng nén)."""
+        wire_value, compressed_value = to_wire(value)
+        timestamp, version_node = version_fields(version)
+        return kvstore_pb2.KeyValuePair(
+            key=key,
+            value=wire_value,
+            timestamp=timestamp,
+            compressed_value=compressed_value,
+            version_node=version_node
+        )
+
     def GetSnapshot(self, request, context):
         """
         Handle GetSnapshot request.
@@ -478,23 +971,33 @@ class NodeServicer(kvstore_pb2_grpc.NodeServiceServicer):
         logger.info("GetSnapshot request")
         
         try:
-            # Get all keys and values from storage
-            keys = self.storage.list_keys()
             snapshot_data = []
+            if self.storage.supports_snapshot:
+                # Snapshot O(1): duyệt dict đã đóng băng không cần lock, writer không phải chờ
+                with self.storage.snapshot() as snapshot:
+                    for key, value in snapshot.items():
+                        snapshot_data.append(self._snapshot_pair(key, value, snapshot.get_version(key)))
+            else:
+                # Engine không có snapshot: 1 lần get_many thay vì get từng key
+                for key, value in self.storage.get_many(self.storage.list_keys()).items():
+                    snapshot_data.append(self._snapshot_pair(key, value, None))
+            total_keys = len(snapshot_data)
             
-            for key in keys:
-                value, found = self.storage.get(key)
-                if found:
-                    kv_pair = kvstore_pb2.KeyValuePair(
-                        key=key, 
-                        value=value,
-                        timestamp=int(time.time())
-                    )
-                    snapshot_data.append(kv_pair)
+            # Tombstones đi kèm để node recover không "hồi sinh" key đã xóa
+            # (version hiện tại của tombstone: delete sau snapshot vẫn thắng)
+            if self.storage.supports_tombstones:
+                tombstones = self.storage.copy_tombstones()
+                versions = self.storage.get_versions(key for key, _ in tombstones)
+                for key, deleted_at_ms in tombstones:
+                    timestamp, version_node = version_fields(versions.get(key))
+                    snapshot_data.append(kvstore_pb2.KeyValuePair(
+                        key=key, deleted_at_ms=deleted_at_ms,
+                        timestamp=timestamp, version_node=version_node
+                    ))
             
             response = kvstore_pb2.SnapshotResponse(
                 data=snapshot_data,
-                total_keys=len(snapshot_data),
+                total_keys=total_keys,
                 provider_node_id=self.node_id,
                 snapshot_timestamp=int(time.time())
             )
@@ -633,10 +1136,619 @@ class HeartbeatManager:
             time.sleep(3)  # Check every 3 seconds
 
 
+class CheckpointManager:
+    """
+    Checkpoint định kỳ cho in-memory storage.
+    - Mỗi interval giây ghi 1 checkpoint (consistent copy, không block writers
+      trong lúc serialize/ghi file)
+    - Sau khi ghi xong thì purge các WAL segments đã nằm trong checkpoint
+    """
+    
+    def __init__(self, storage, checkpoint_store: CheckpointStore, interval: float = 300):
+        self.storage = storage
+        self.checkpoint_store = checkpoint_store
+        self.interval = interval  # seconds
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()  # 1 checkpoint tại 1 thời điểm
+    
+    def start(self):
+        """Start checkpoint thread."""
+        checkpoint_thread = threading.Thread(target=self._checkpoint_loop, daemon=True)
+        checkpoint_thread.start()
+        logger.info(f"Checkpoint manager started (every {self.interval}s)")
+    
+    def stop(self):
+        """Stop checkpoint thread."""
+        self._stop_event.set()
+    
+    def checkpoint_now(self):
+        """Ghi 1 checkpoint ngay và log size / thời gian ghi."""
+        with self._lock:
+            info = self.checkpoint_store.checkpoint(self.storage)
+        logger.info(
+            f"Checkpoint written: {info.num_keys} keys, {info.size_bytes / 1024:.1f} KB "
+            f"in {info.seconds:.2f}s (lsn={info.lsn})"
+        )
+        return info
+    
+    def _checkpoint_loop(self):
+        """Write a checkpoint every `interval` seconds."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.checkpoint_now()
+            except Exception as e:
+                logger.error(f"Checkpoint failed: {e}")
+
+
+class ExpiryManager:
+    """
+    Xóa các key hết hạn (TTL) định kỳ.
+    - Mỗi tick gọi storage.expire_keys() (timer wheel → chi phí O(số key hết hạn))
+    - Key mà node này là owner thì replicate DELETE sang replicas
+    """
+    
+    def __init__(self, node_id: str, storage, membership: MembershipManager,
+                 replication: ReplicationManager, interval: float = 0.1):
+        self.node_id = node_id
+        self.storage = storage
+        self.membership = membership
+        self.replication = replication
+        self.interval = interval  # seconds
+        self._stop_event = threading.Event()
+    
+    def start(self):
+        """Start expiry thread."""
+        expiry_thread = threading.Thread(target=self._expiry_loop, daemon=True)
+        expiry_thread.start()
+        logger.info(f"Expiry manager started (tick {self.interval * 1000:.0f}ms)")
+    
+    def stop(self):
+        """Stop expiry thread."""
+        self._stop_event.set()
+    
+    def expire_now(self) -> int:
+        """Expire due keys and replicate deletes for keys we own."""
+        expired = self.storage.expire_keys()
+        owned = self.membership.group_by_owner(expired).get(self.node_id, [])
+        if owned:
+            self.replication.replicate_delete_many(owned)
+        if expired:
+            logger.info(f"Expired {len(expired)} keys")
+        return len(expired)
+    
+    def _expiry_loop(self):
+        """Expire keys every `interval` seconds."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.expire_now()
+            except Exception as e:
+                logger.error(f"Expiry failed: {e}")
+
+
+class EvictionManager:
+    """
+    Xử lý các key bị evict khi storage vượt memory budget.
+    - Storage gọi on_evict() (ngoài lock) → đưa vào queue, không block PUT
+    - Thread nền replicate DELETE cho key mà node này là owner (nếu bật)
+    - Log định kỳ số key đã evict và số bytes đã giải phóng
+    """
+    
+    def __init__(self, node_id: str, storage, membership: MembershipManager,
+                 replication: ReplicationManager, propagate: bool = False,
+                 stats_interval: float = 60):
+        self.node_id = node_id
+        self.storage = storage
+        self.membership = membership
+        self.replication = replication
+        self.propagate = propagate
+        self.stats_interval = stats_interval  # seconds
+        self._queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._logged_evictions = 0
+    
+    def start(self):
+        """Register as eviction listener and start the worker thread."""
+        self.storage.set_eviction_listener(self.on_evict)
+        eviction_thread = threading.Thread(target=self._eviction_loop, daemon=True)
+        eviction_thread.start()
+        logger.info(
+            f"Eviction manager started (budget {self.storage.max_memory_bytes / 1024 / 1024:.0f}MB, "
+            f"propagate_to_replicas={self.propagate})"
+        )
+    
+    def stop(self):
+        """Stop worker thread."""
+        self._stop_event.set()
+    
+    def on_evict(self, keys):
+        """Listener gọi bởi storage engine sau mỗi lần evict."""
+        if self.propagate:
+            self._queue.put(keys)
+    
+    def _log_stats(self):
+        evictions = self.storage.evictions
+        if evictions != self._logged_evictions:
+            self._logged_evictions = evictions
+            logger.info(
+                f"Eviction stats: {evictions} keys evicted, "
+                f"{self.storage.bytes_freed / 1024 / 1024:.1f}MB freed, "
+                f"{self.storage.used_bytes / 1024 / 1024:.1f}MB used"
+            )
+    
+    def _eviction_loop(self):
+        """Replicate evictions of owned keys and log stats."""
+        last_stats = time.time()
+        while not self._stop_event.is_set():
+            try:
+                keys = self._queue.get(timeout=1.0)
+                owned = self.membership.group_by_owner(keys).get(self.node_id, [])
+                if owned:
+                    self.replication.replicate_delete_many(owned)
+            except queue.Empty:
+                pass
+            except Exception as e:
+                logger.error(f"Eviction propagation failed: {e}")
+            
+            if time.time() - last_stats >= self.stats_interval:
+                last_stats = time.time()
+                self._log_stats()
+
+
+class TombstoneGCManager:
+    """
+    Dọn tombstones quá grace period định kỳ.
+    - Mỗi interval giây gọi storage.gc_tombstones() theo từng batch nhỏ
+      (mỗi batch chỉ giữ lock của 1 stripe trong thời gian ngắn), nhả lock
+      giữa các batch để PUT/GET không bị stall
+    - Grace period phải dài hơn thời gian 1 replica có thể bị tách khỏi
+      cluster, nếu không DELETE bị lỡ có thể làm key sống lại khi recover
+    """
+    
+    def __init__(self, storage, grace_period: float = 3600, interval: float = 10,
+                 batch_size: int = 1000):
+        self.storage = storage
+        self.grace_ms = int(grace_period * 1000)
+        self.interval = interval  # seconds
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+    
+    def start(self):
+        """Start GC thread."""
+        gc_thread = threading.Thread(target=self._gc_loop, daemon=True)
+        gc_thread.start()
+        logger.info(
+            f"Tombstone GC started (grace {self.grace_ms / 1000:.0f}s, every {self.interval}s, "
+            f"batch {self.batch_size})"
+        )
+    
+    def stop(self):
+        """Stop GC thread."""
+        self._stop_event.set()
+    
+    def collect_now(self) -> int:
+        """Purge expired tombstones batch by batch until none are left."""
+        total = 0
+        while not self._stop_event.is_set():
+            purged = self.storage.gc_tombstones(self.grace_ms, self.batch_size)
+            total += purged
+            if purged < self.batch_size:
+                break
+            time.sleep(0)  # Nhường GIL cho request handlers giữa các batch
+        if total:
+            logger.info(f"Tombstone GC: purged {total}, {self.storage.tombstone_count} remaining")
+        return total
+    
+    def _gc_loop(self):
+        """Collect tombstones every `interval` seconds."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.collect_now()
+            except Exception as e:
+                logger.error(f"Tombstone GC failed: {e}")
+
+
 # ============================================================================
 # PHẦN 5: Hàm Start Server
 # ============================================================================
 
+def _merge_config(base: dict, override: dict) -> dict:
+    """Merge override vào base (đệ quy cho các section con như "wal", "lsm")."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_storage_config(config_path: str, node_id: str = None) -> dict:
+    """
+    Đọc section "storage" trong cluster.json.
+    
+    Nếu node_id có field "storage" trong node config (vd {"engine": "redis"})
+    thì override lên storage config chung → mỗi node chọn engine riêng.
+    
+    Returns:
+        Dict storage config ({} nếu không có)
+    """
+    try:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.warning(f"Cannot read storage config, using defaults: {e}")
+        return {}
+    
+    storage_config = config.get('storage', {})
+    for node_config in config.get('nodes', []):
+        if node_config.get('id') == node_id and 'storage' in node_config:
+            storage_config = _merge_config(storage_config, node_config['storage'])
+    return storage_config
+
+
+def _node_data_dir(node_id: str, storage_config: dict) -> str:
+    """Thư mục data của node: <data_dir>/<node_id>/."""
+    return os.path.join(project_root, storage_config.get('data_dir', 'data'), node_id)
+
+
+def _create_wal(node_id: str, storage_config: dict):
+    """Tạo WriteAheadLog tại <data_dir>/<node_id>/wal nếu WAL bật, ngược lại None."""
+    wal_config = storage_config.get('wal', {})
+    if not wal_config.get('enabled', False):
+        return None
+    return WriteAheadLog(
+        os.path.join(_node_data_dir(node_id, storage_config), 'wal'),
+        fsync_policy=wal_config.get('fsync_policy', WriteAheadLog.FSYNC_INTERVAL),
+        fsync_interval_ms=wal_config.get('fsync_interval_ms', 10),
+        max_segment_bytes=wal_config.get('max_segment_mb', 64) * 1024 * 1024
+    )
+
+
+@register_backend('memory', ShardedStorageEngine)
+def create_memory_storage(node_id: str, storage_config: dict, node=None, checkpoint_store=None):
+    """
+    ShardedStorageEngine; nếu checkpoint bật thì load checkpoint mới nhất tại
+    <data_dir>/<node_id>/checkpoints, sau đó nếu WAL bật thì replay phần WAL
+    sau checkpoint (<data_dir>/<node_id>/wal).
+    
+    checkpoint_store: CheckpointStore dùng chung với CheckpointManager của
+    serve() (None = tạo theo config).
+    """
+    wal = _create_wal(node_id, storage_config)
+    eviction_config = storage_config.get('eviction', {})
+    eviction_policy = eviction_config.get('policy', 'lru')
+    eviction_options = {}
+    if eviction_policy == 'lfu':
+        eviction_options = {
+            'samples': eviction_config.get('samples', 5),
+            'log_factor': eviction_config.get('lfu_log_factor', 10),
+            'decay_minutes': eviction_config.get('lfu_decay_minutes', 1)
+        }
+    
+    watch_config = storage_config.get('watch', {})
+    storage = ShardedStorageEngine(
+        num_shards=storage_config.get('num_shards', 16),
+        wal=wal,
+        expiry_tick_ms=storage_config.get('expiry', {}).get('tick_ms', 100),
+        max_memory_bytes=int(eviction_config.get('max_memory_mb', 0) * 1024 * 1024),
+        eviction_policy=eviction_policy,
+        eviction_options=eviction_options,
+        ordered_index=storage_config.get('scan', {}).get('ordered_index', True),
+        keep_tombstones=storage_config.get('tombstones', {}).get('enabled', False),
+        change_feed=(ChangeFeed(capacity=watch_config.get('capacity', 65536))
+                     if watch_config.get('enabled', False) else None)
+    )
+    
+    checkpoint_lsn = 0
+    if checkpoint_store is None:
+        checkpoint_store = create_checkpoint_store(node_id, storage_config)
+    if checkpoint_store is not None:
+        info = checkpoint_store.restore(storage)
+        if info is not None:
+            checkpoint_lsn = info.lsn
+            logger.info(
+                f"Checkpoint restored: {info.num_keys} keys, {info.size_bytes / 1024:.1f} KB "
+                f"in {info.seconds:.2f}s (lsn={info.lsn})"
+            )
+    
+    if wal is not None:
+        start = time.time()
+        replayed = storage.replay_wal(from_lsn=checkpoint_lsn)
+        logger.info(
+            f"WAL replay: {replayed} records, {storage.size()} keys restored "
+            f"in {time.time() - start:.2f}s (fsync_policy={wal.fsync_policy})"
+        )
+    
+    return storage
+
+
+@register_backend('bitcask', BitcaskStorageEngine)
+def create_bitcask_storage(node_id: str, storage_config: dict, node=None):
+    """BitcaskStorageEngine tại <data_dir>/<node_id>/bitcask (keydir rebuild từ hint files)."""
+    bitcask_config = storage_config.get('bitcask', {})
+    start = time.time()
+    storage = BitcaskStorageEngine(
+        os.path.join(_node_data_dir(node_id, storage_config), 'bitcask'),
+        max_segment_bytes=bitcask_config.get('max_segment_mb', 64) * 1024 * 1024,
+        sync_writes=bitcask_config.get('sync_writes', False)
+    )
+    logger.info(f"Bitcask engine opened: {storage.size()} keys in {time.time() - start:.2f}s")
+    return storage
+
+
+@register_backend('lsm', LSMStorageEngine)
+def create_lsm_storage(node_id: str, storage_config: dict, node=None):
+    """LSMStorageEngine tại <data_dir>/<node_id>/lsm (write-heavy, prefix + range scan)."""
+    lsm_config = storage_config.get('lsm', {})
+    start = time.time()
+    storage = LSMStorageEngine(
+        os.path.join(_node_data_dir(node_id, storage_config), 'lsm'),
+        memtable_bytes=lsm_config.get('memtable_mb', 4) * 1024 * 1024,
+        block_size=lsm_config.get('block_size', 4096),
+        compaction_min_tables=lsm_config.get('compaction_min_tables', 4),
+        compaction_size_ratio=lsm_config.get('compaction_size_ratio', 4.0),
+        compaction_max_bytes_per_sec=lsm_config.get('compaction_max_mb_per_sec', 0) * 1024 * 1024,
+        bloom_false_positive_rate=lsm_config.get('bloom_false_positive_rate', 0.01),
+        wal_fsync_policy=storage_config.get('wal', {}).get('fsync_policy', WriteAheadLog.FSYNC_INTERVAL)
+    )
+    logger.info(f"LSM engine opened: {len(storage.tables)} SSTables in {time.time() - start:.2f}s")
+    return storage
+
+
+@register_backend('redis', RedisStorageEngine)
+def create_redis_storage(node_id: str, storage_config: dict, node=None):
+    """RedisStorageEngine tới redis_host/redis_port của node (connection pool dùng chung)."""
+    redis_config = storage_config.get('redis', {})
+    storage = RedisStorageEngine(
+        host=node.redis_host if node else redis_config.get('host', 'localhost'),
+        port=node.redis_port if node else redis_config.get('port', 6379),
+        db=redis_config.get('db', 0),
+        key_prefix=redis_config.get('key_prefix', 'kv:'),
+        max_connections=redis_config.get('max_connections', 32),
+        scan_count=redis_config.get('scan_count', 1000),
+        batch_size=redis_config.get('batch_size', 1000)
+    )
+    logger.info(f"Redis engine connected to {storage.host}:{storage.port}/{storage.db}")
+    return storage
+
+
+@register_backend('compact', CompactStorageEngine)
+def create_compact_storage(node_id: str, storage_config: dict, node=None, checkpoint_store=None):
+    """
+    CompactStorageEngine (keys/values dạng bytes trong arena, không TTL/eviction) + WAL.
+    
+    Giống engine "memory": load checkpoint mới nhất (nếu bật) rồi replay phần
+    WAL sau checkpoint; CheckpointManager truncate WAL sau mỗi checkpoint.
+    """
+    wal = _create_wal(node_id, storage_config)
+    compact_config = storage_config.get('compact', {})
+    storage = CompactStorageEngine(
+        wal=wal,
+        segment_bytes=int(compact_config.get('segment_mb', 4) * 1024 * 1024),
+        compact_ratio=compact_config.get('compact_ratio', 0.5)
+    )
+    
+    checkpoint_lsn = 0
+    if checkpoint_store is None:
+        checkpoint_store = create_checkpoint_store(node_id, storage_config)
+    if checkpoint_store is not None:
+        info = checkpoint_store.restore(storage)
+        if info is not None:
+            checkpoint_lsn = info.lsn
+            logger.info(
+                f"Checkpoint restored: {info.num_keys} keys, {info.size_bytes / 1024:.1f} KB "
+                f"in {info.seconds:.2f}s (lsn={info.lsn})"
+            )
+    
+    if wal is not None:
+        start = time.time()
+        replayed = storage.replay_wal(from_lsn=checkpoint_lsn)
+        logger.info(
+            f"WAL replay: {replayed} records, {storage.size()} keys restored "
+            f"in {time.time() - start:.2f}s (compact engine, "
+            f"{storage.memory_usage() / 1024 / 1024:.1f} MB)"
+        )
+    return storage
+
+
+@register_backend('tiered', TieredStorageEngine)
+def create_tiered_storage(node_id: str, storage_config: dict, node=None):
+    """TieredStorageEngine: hot keys trong RAM (max_memory_mb), cold keys tại <data_dir>/<node_id>/tiered."""
+    tiered_config = storage_config.get('tiered', {})
+    storage = TieredStorageEngine(
+        os.path.join(_node_data_dir(node_id, storage_config), 'tiered'),
+        hot_memory_bytes=int(tiered_config.get('max_memory_mb', 256) * 1024 * 1024),
+        eviction_policy=tiered_config.get('policy', 'lru'),
+        demote_target_ratio=tiered_config.get('demote_target_ratio', 0.9),
+        demote_batch=tiered_config.get('demote_batch', 256),
+        max_segment_bytes=tiered_config.get('max_segment_mb', 64) * 1024 * 1024,
+        sync_writes=tiered_config.get('sync_writes', False)
+    )
+    logger.info(
+        f"Tiered engine opened: {storage.size()} keys on disk, "
+        f"hot budget {storage.hot_memory_bytes / 1024 / 1024:.0f} MB"
+    )
+    return storage
+
+
+def create_storage(node_id: str, storage_config: dict, node=None, checkpoint_store=None):
+    """
+    Tạo storage engine cho node theo storage config.
+    
+    Engine ("engine" trong storage config, default "memory") được tra trong
+    backend registry (src/storage/backend.py); mỗi backend đăng ký bằng
+    @register_backend một factory đọc tuning parameters trong section riêng
+    của nó ("lsm", "bitcask", "redis", "compact", ...). Node override được
+    engine và tuning parameters bằng field "storage" trong node config.
+    
+    Engines có sẵn: memory, bitcask, lsm, redis, compact, tiered (xem các factory
+    create_*_storage ở trên).
+    
+    Args:
+        node_id: ID của node
+        storage_config: Section "storage" của cluster.json (đã merge override của node)
+        node: Node trong MembershipManager (lấy redis_host/redis_port)
+        checkpoint_store: CheckpointStore đã tạo (chỉ engine "memory" và
+                          "compact" dùng, xem create_checkpoint_store)
+    
+    Returns:
+        Storage engine đã recover xong
+    """
+    engine = storage_config.get('engine', 'memory')
+    options = {'checkpoint_store': checkpoint_store} if checkpoint_store is not None else {}
+    storage = get_backend(engine)(node_id, storage_config, node, **options)
+    enabled = [flag[len('supports_'):] for flag, on in capabilities(storage).items() if on]
+    logger.info(f"Storage engine {engine!r}: capabilities={enabled or ['basic']}")
+    return storage
+
+
+# Engines in-memory + WAL: checkpoint định kỳ để WAL không tăng vô hạn
+CHECKPOINT_ENGINES = ('memory', 'compact')
+
+
+def create_checkpoint_store(node_id: str, storage_config: dict):
+    """
+    Tạo CheckpointStore tại <data_dir>/<node_id>/checkpoints nếu checkpoint bật
+    (chỉ dùng cho engine "memory" và "compact"; các engine khác tự persist).
+    
+    Returns:
+        CheckpointStore hoặc None
+    """
+    checkpoint_config = storage_config.get('checkpoint', {})
+    if (storage_config.get('engine', 'memory') not in CHECKPOINT_ENGINES
+            or not checkpoint_config.get('enabled', False)):
+        return None
+    
+    data_dir = os.path.join(project_root, storage_config.get('data_dir', 'data'), node_id)
+    return CheckpointStore(
+        os.path.join(data_dir, 'checkpoints'),
+        compress_level=checkpoint_config.get('compress_level', 1),
+        keep=checkpoint_config.get('keep', 2),
+        workers=checkpoint_config.get('workers', 4)
+    )
+
+
+def create_value_codec(storage_config: dict) -> ValueCodec:
+    """
+    Tạo ValueCodec theo section "compression" của storage config.
+    
+    dictionary_file (đường dẫn tương đối với project root) là zlib preset
+    dictionary cho value nhỏ có cấu trúc giống nhau; các node replicate cho
+    nhau phải dùng cùng một dictionary.
+    
+    Returns:
+        ValueCodec (algorithm "none" nếu compression tắt)
+    """
+    compression_config = storage_config.get('compression', {})
+    if not compression_config.get('enabled', False):
+        return ValueCodec(algorithm="none")
+    
+    dictionary = None
+    dictionary_file = compression_config.get('dictionary_file')
+    if dictionary_file:
+        with open(os.path.join(project_root, dictionary_file), 'rb') as f:
+            dictionary = f.read()
+    
+    codec = ValueCodec(
+        algorithm=compression_config.get('algorithm', 'zlib'),
+        level=compression_config.get('level', 6),
+        threshold_bytes=compression_config.get('threshold_bytes', 1024),
+        dictionary=dictionary,
+        dictionary_min_bytes=compression_config.get('dictionary_min_bytes', 64)
+    )
+    logger.info(
+        f"Value compression: {codec.algorithm} level={codec.level} "
+        f"threshold={codec.threshold_bytes}B dictionary={len(dictionary) if dictionary else 0}B"
+    )
+    return codec
+
+
+def recover_from_peers(node_id: str, storage, membership: MembershipManager,
+                       batch_size: int = 1000, clock: VersionClock = None) -> int:
+    """
+    Khôi phục data từ snapshot của các node khác (node khởi động với storage rỗng).
+    
+    Lấy GetSnapshot từ từng node, chỉ giữ keys mà node này là owner hoặc
+    replica, rồi nạp bằng put_many theo batch thay vì put từng key.
+    
+    Chọn bản nào khi nhiều node cùng giữ 1 key:
+    - Cả 2 bản có version → version mới hơn thắng (value hoặc tombstone)
+    - Không có version → bản của owner thắng; giữa các replica thì tombstone
+      thắng value (replica chưa nhận DELETE không làm key đã xóa sống lại)
+    
+    Args:
+        clock: VersionClock của node này (được đẩy qua mọi version nhận được)
+    
+    Returns:
+        Số keys đã khôi phục
+    """
+    items = {}
+    tombstones = {}
+    versions = {}
+    from_owner = set()
+    for node in membership.get_all_nodes():
+        if node.node_id == node_id:
+            continue
+        channel = grpc.insecure_channel(node.get_address(), options=[
+            ('grpc.max_receive_message_length', -1),
+        ])
+        try:
+            stub = kvstore_pb2_grpc.NodeServiceStub(channel)
+            response = stub.GetSnapshot(kvstore_pb2.SnapshotRequest(requesting_node_id=node_id), timeout=30)
+        except grpc.RpcError as e:
+            logger.warning(f"Snapshot from {node.node_id} unavailable: {e.code()}")
+            continue
+        finally:
+            channel.close()
+        
+        for pair in response.data:
+            if pair.key in from_owner:
+                continue
+            replicas = membership.get_all_replicas(pair.key)
+            if not any(replica.node_id == node_id for replica in replicas):
+                continue
+            is_owner = bool(replicas) and replicas[0].node_id == node.node_id
+            version = version_from_fields(pair.timestamp, pair.version_node)
+            if pair.key in items or pair.key in tombstones:
+                current = versions.get(pair.key)
+                if version is not None and current is not None:
+                    if version <= current:
+                        continue
+                elif pair.key in from_owner:
+                    continue
+                elif not is_owner and not pair.deleted_at_ms and pair.key in tombstones:
+                    continue
+            
+            if pair.deleted_at_ms:
+                tombstones[pair.key] = pair.deleted_at_ms
+                items.pop(pair.key, None)
+            else:
+                tombstones.pop(pair.key, None)
+                items[pair.key] = from_wire(pair.value, pair.compressed_value)
+            if version is not None:
+                versions[pair.key] = version
+            else:
+                versions.pop(pair.key, None)
+            if is_owner:
+                from_owner.add(pair.key)
+        logger.info(f"Snapshot from {node.node_id}: {response.total_keys} keys")
+    
+    pairs = list(items.items())
+    versioned = bool(versions) and storage.supports_versions
+    for i in range(0, len(pairs), batch_size):
+        if versioned:
+            storage.put_many(pairs[i:i + batch_size], versions=versions)
+        else:
+            storage.put_many(pairs[i:i + batch_size])
+    if tombstones and storage.supports_tombstones:
+        storage.load_tombstones(sorted(tombstones.items(), key=lambda item: item[1]))
+        if versioned:
+            storage.load_versions((key, versions[key]) for key in tombstones if key in versions)
+    if clock is not None and versions:
+        clock.observe(max(versions.values()))
+    return len(pairs)
+
+
 def serve(node_id: str = "node1", port: int = 8001):
     """
     Start gRPC server.
@@ -648,20 +1760,58 @@ def serve(node_id: str = "node1", port: int = 8001):
     executor = futures.ThreadPoolExecutor(max_workers=10)
     server = grpc.server(executor)
     
-    # Create storage engine
-    storage = StorageEngine()
+    config_path = os.path.join(project_root, "config", "cluster.json")
     
     # Load cluster membership (Phase 3)
-    config_path = os.path.join(project_root, "config", "cluster.json")
     membership = MembershipManager(config_path)
     logger.info(f"Loaded cluster config: {len(membership.get_all_nodes())} nodes")
+    # Engine của từng node → owner từ chối PUT có TTL nếu 1 replica không hết hạn được key
+    for node in membership.get_all_nodes():
+        node_engine = load_storage_config(config_path, node.node_id).get('engine', 'memory')
+        node.supports_ttl = backend_capabilities(node_engine)['supports_ttl']
+    
+    # Create storage engine (lock-striped để gRPC workers và replication
+    # workers không tranh chấp 1 global lock), replay WAL nếu có
+    storage_config = load_storage_config(config_path, node_id)
+    # 1 CheckpointStore cho cả restore lúc khởi động và checkpoint định kỳ
+    checkpoint_store = create_checkpoint_store(node_id, storage_config)
+    storage = create_storage(node_id, storage_config, membership.get_node_by_id(node_id),
+                             checkpoint_store=checkpoint_store)
+    
+    # 1 clock cho mọi write mà node này là owner; không lùi về sau các
+    # version đã khôi phục từ checkpoint/WAL (đồng hồ máy có thể bị lệch)
+    clock = VersionClock(node_id)
+    if storage.supports_versions:
+        clock.observe(max(storage.copy_versions().values(), default=None))
+    
+    # Storage rỗng (mất data / node mới) → lấy snapshot từ các node khác
+    recovery_config = storage_config.get('recovery', {})
+    if recovery_config.get('snapshot_on_start', False) and storage.size() == 0:
+        start = time.time()
+        recovered = recover_from_peers(node_id, storage, membership,
+                                       batch_size=recovery_config.get('batch_size', 1000),
+                                       clock=clock)
+        logger.info(f"Snapshot recovery: {recovered} keys in {time.time() - start:.2f}s")
+    
+    # Checkpoint định kỳ → restart chỉ cần load checkpoint + replay WAL tail
+    checkpoint_mgr = None
+    if checkpoint_store is not None:
+        checkpoint_mgr = CheckpointManager(
+            storage,
+            checkpoint_store,
+            interval=storage_config['checkpoint'].get('interval_sec', 300)
+        )
+        checkpoint_mgr.start()
     
     # Create replication manager (Phase 4)
     replication = ReplicationManager(membership, node_id)
     logger.info(f"Initialized ReplicationManager for {node_id}")
     
-    kv_servicer = KeyValueStoreServicer(node_id, port, storage, membership, replication)
-    node_servicer = NodeServicer(node_id, port, storage, replication)
+    codec = create_value_codec(storage_config)
+    kv_servicer = KeyValueStoreServicer(node_id, port, storage, membership, replication,
+                                        scan_config=storage_config.get('scan', {}), codec=codec,
+                                        clock=clock, watch_config=storage_config.get('watch', {}))
+    node_servicer = NodeServicer(node_id, port, storage, replication, codec=codec, clock=clock)
     
     kvstore_pb2_grpc.add_KeyValueStoreServicer_to_server(
         kv_servicer, server
@@ -677,6 +1827,37 @@ def serve(node_id: str = "node1", port: int = 8001):
     logger.info(f"Server started on {address}")
     logger.info(f"Node ID: {node_id}")
     
+    # Xóa key hết hạn (Redis tự hết hạn key, expire_keys() của nó không làm gì)
+    expiry_mgr = None
+    if storage.supports_ttl:
+        expiry_mgr = ExpiryManager(
+            node_id, storage, membership, replication,
+            interval=storage_config.get('expiry', {}).get('tick_ms', 100) / 1000
+        )
+        expiry_mgr.start()
+    
+    # Memory budget: replicate evictions + log eviction stats
+    eviction_mgr = None
+    if storage.max_memory_bytes:
+        eviction_mgr = EvictionManager(
+            node_id, storage, membership, replication,
+            propagate=storage_config.get('eviction', {}).get('propagate_to_replicas', False)
+        )
+        eviction_mgr.start()
+    
+    # Tombstones: GC nền theo batch nhỏ (tắt tombstones thì vẫn chạy để dọn
+    # version watermarks của các DELETE có version)
+    tombstone_mgr = None
+    tombstone_config = storage_config.get('tombstones', {})
+    if storage.supports_tombstones:
+        tombstone_mgr = TombstoneGCManager(
+            storage,
+            grace_period=tombstone_config.get('grace_period_sec', 3600),
+            interval=tombstone_config.get('gc_interval_sec', 10),
+            batch_size=tombstone_config.get('gc_batch', 1000)
+        )
+        tombstone_mgr.start()
+    
     # Phase 5: Start heartbeat manager
     heartbeat_mgr = HeartbeatManager(node_id, membership)
     heartbeat_mgr.start()
@@ -687,8 +1868,18 @@ def serve(node_id: str = "node1", port: int = 8001):
     except KeyboardInterrupt:
         logger.info("Shutting down server...")
         heartbeat_mgr.stop()
+        if expiry_mgr is not None:
+            expiry_mgr.stop()
+        if eviction_mgr is not None:
+            eviction_mgr.stop()
+        if tombstone_mgr is not None:
+            tombstone_mgr.stop()
         replication.shutdown()
-        server.stop(grace=5)
+        server.stop(grace=5).wait()  # Đợi in-flight requests xong trước khi đóng storage
+        if checkpoint_mgr is not None:
+            checkpoint_mgr.stop()
+            checkpoint_mgr.checkpoint_now()  # Restart kế tiếp không cần replay WAL
+        storage.close()  # Flush WAL / đóng data files
         logger.info("Server stopped")
 
 
@@ -0,0 +1,162 @@
+"""
+Storage Backend - Common engine interface, capability flags and backend registry
+"""
+
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+
+class StorageBackend(ABC):
+    """
+    Interface implemented by every storage engine.
+
+    Core operations (put / get / delete / list_keys / size / clear) are
+    required. Batch operations have per-key fallbacks here so a new
+    engine works before it gets a native batch path; every built-in
+    engine overrides them.
+
+    Optional features are advertised by class-level capability flags so
+    callers (server, replication, recovery, checkpoints) branch on what the
+    engine declares instead of probing for methods:
+
+    - supports_ttl: put(..., expire_at_ms=) and put_many(..., expiry=);
+      expire_keys() removes due keys unless the engine expires them itself
+    - supports_scan: ordered scan(prefix, start, end, limit)
+    - supports_snapshot: O(1) point-in-time snapshot()
+    - supports_versions: put/delete accept version=, get_with_version(),
+      copy_versions / load_versions and copy_watermarks / load_watermarks
+    - supports_tombstones: delete tombstones (copy_tombstones / load_tombstones);
+      whether they are recorded is the instance's keep_tombstones
+
+    Optional components are attributes with an "absent" default:
+    wal (None = not logged), change_feed (None = Watch disabled) and
+    max_memory_bytes (0 = no memory budget / eviction).
+    """
+
+    supports_ttl = False
+    supports_scan = False
+    supports_snapshot = False
+    supports_versions = False
+    supports_tombstones = False
+
+    wal = None
+    change_feed = None
+    max_memory_bytes = 0
+
+    @abstractmethod
+    def put(self, key: str, value: str) -> bool:
+        """Save key-value pair."""
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[Optional[str], bool]:
+        """Return (value, found)."""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete key; True if it existed."""
+
+    @abstractmethod
+    def list_keys(self) -> List[str]:
+        """All live keys."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Number of live keys."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove everything (for testing)."""
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> int:
+        """Save a batch of pairs; returns the number written."""
+        written = 0
+        for key, value in (items.items() if isinstance(items, dict) else items):
+            written += bool(self.put(key, value))
+        return written
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Look up a batch of keys (missing keys are skipped)."""
+        result = {}
+        for key in keys:
+            value, found = self.get(key)
+            if found:
+                result[key] = value
+        return result
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete a batch of keys; returns the number that existed."""
+        return sum(1 for key in keys if self.delete(key))
+
+    def expire_keys(self, now: Optional[int] = None) -> List[str]:
+        """Remove keys whose TTL has passed; nothing to do by default."""
+        return []
+
+    def close(self) -> None:
+        """Release files on shutdown (default: close the WAL, if any)."""
+        if self.wal is not None:
+            self.wal.close()
+
+
+CAPABILITY_FLAGS = ('supports_ttl', 'supports_scan', 'supports_snapshot',
+                    'supports_versions', 'supports_tombstones')
+
+
+def capabilities(storage) -> Dict[str, bool]:
+    """Capability flags of an engine instance or class (for logging / benchmarks)."""
+    return {flag: bool(getattr(storage, flag)) for flag in CAPABILITY_FLAGS}
+
+
+# Backend name (storage.engine in cluster.json) -> factory(node_id, storage_config, node)
+BackendFactory = Callable[..., StorageBackend]
+_BACKENDS: Dict[str, BackendFactory] = {}
+# Backend name -> engine class its factory builds (when registered with one)
+_BACKEND_CLASSES: Dict[str, Type[StorageBackend]] = {}
+
+
+def register_backend(name: str, engine: Optional[Type[StorageBackend]] = None
+                     ) -> Callable[[BackendFactory], BackendFactory]:
+    """
+    Register a factory building an engine from a node's storage config.
+
+    Args:
+        name: Engine name (storage.engine in cluster.json)
+        engine: Class the factory builds, so backend_capabilities() knows
+                the flags of nodes whose engine is not built in this process
+
+    Usage:
+        @register_backend("memory", ShardedStorageEngine)
+        def create_memory_storage(node_id, storage_config, node=None): ...
+    """
+    def decorator(factory: BackendFactory) -> BackendFactory:
+        if name in _BACKENDS:
+            raise ValueError(f"Storage engine already registered: {name}")
+        _BACKENDS[name] = factory
+        if engine is not None:
+            _BACKEND_CLASSES[name] = engine
+        return factory
+    return decorator
+
+
+def backend_capabilities(name: str) -> Dict[str, bool]:
+    """
+    Capability flags of a registered backend without building it (e.g. a
+    remote node's engine). All False if it was registered without a class.
+    """
+    get_backend(name)  # ValueError if unknown
+    engine = _BACKEND_CLASSES.get(name)
+    if engine is None:
+        return dict.fromkeys(CAPABILITY_FLAGS, False)
+    return capabilities(engine)
+
+
+def get_backend(name: str) -> BackendFactory:
+    """Factory registered under `name` (ValueError if unknown)."""
+    try:
+        return _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage engine: {name} (available: {', '.join(backend_names())})") from None
+
+
+def backend_names() -> List[str]:
+    """Names of all registered backends, sorted."""
+    return sorted(_BACKENDS)
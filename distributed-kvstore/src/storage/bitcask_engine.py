@@ -0,0 +1,508 @@
+"""
+Bitcask Storage Engine - Log-structured disk-backed key-value store
+"""
+
+import os
+import mmap
+import struct
+import threading
+import logging
+import zlib
+from typing import Dict, Iterable, Tuple, List, Optional
+
+from src.storage.backend import StorageBackend
+from src.storage.compression import to_disk, from_disk
+
+logger = logging.getLogger(__name__)
+
+# Data record: [crc32 u32][seq u64][key_len u32][value_len i32][key][value]
+# value_len == -1 marks a tombstone (DELETE). crc32 covers everything after it.
+_RECORD_HEAD = struct.Struct('<IQIi')
+_CRC = struct.Struct('<I')
+_RECORD_BODY_HEAD = struct.Struct('<QIi')
+
+# Hint record: [seq u64][key_len u32][value_len i32][value_offset u64][key]
+_HINT_HEAD = struct.Struct('<QIiQ')
+
+TOMBSTONE = -1
+DATA_SUFFIX = ".data"
+HINT_SUFFIX = ".hint"
+
+
+class BitcaskStorageEngine(StorageBackend):
+    """
+    Disk-backed storage following the Bitcask design.
+
+    - Every PUT/DELETE is appended to the active segment file; segments
+      roll over at `max_segment_bytes` and are immutable afterwards.
+    - An in-memory keydir maps key -> (segment_id, value_offset, value_len),
+      so a GET is one dict lookup plus one read from the segment.
+    - Segments are read through mmap; values are decoded straight from a
+      memoryview slice of the mapping (no intermediate bytes copy).
+    - Each immutable segment gets a hint file (keys + offsets, no values),
+      so startup rebuilds the keydir without rescanning the data.
+    - merge() rewrites live values of immutable segments into fresh
+      segments and deletes the old ones to reclaim space.
+
+    Every record carries a sequence number; on load the highest sequence
+    number wins, so merged segments can be written in any file order.
+
+    Exposes the same API as StorageEngine.
+    """
+
+    def __init__(self, data_dir: str, max_segment_bytes: int = 64 * 1024 * 1024,
+                 sync_writes: bool = False):
+        """
+        Open (or create) a Bitcask store in `data_dir`.
+
+        Args:
+            data_dir: Directory holding segment and hint files
+            max_segment_bytes: Roll over to a new segment past this size
+            sync_writes: fsync after every write (slower, crash-safe)
+        """
+        self.data_dir = data_dir
+        self.max_segment_bytes = max_segment_bytes
+        self.sync_writes = sync_writes
+
+        self.lock = threading.RLock()
+        self._merge_lock = threading.Lock()  # Only one merge at a time
+        self.keydir: Dict[str, Tuple[int, int, int]] = {}  # key -> (segment, offset, length)
+        self._key_seq: Dict[str, int] = {}  # key -> seq of its live record
+        self._mmaps: Dict[int, mmap.mmap] = {}  # segment_id -> mapping
+        self._next_seq = 1
+        self._next_segment_id = 1
+
+        os.makedirs(data_dir, exist_ok=True)
+        self._load()
+        self._open_active(self._allocate_segment_id())
+
+    # ------------------------------------------------------------------
+    # File helpers
+    # ------------------------------------------------------------------
+
+    def _data_path(self, segment_id: int) -> str:
+        return os.path.join(self.data_dir, f"{segment_id:06d}{DATA_SUFFIX}")
+
+    def _hint_path(self, segment_id: int) -> str:
+        return os.path.join(self.data_dir, f"{segment_id:06d}{HINT_SUFFIX}")
+
+    def _list_segments(self) -> List[int]:
+        return sorted(
+            int(name[:-len(DATA_SUFFIX)])
+            for name in os.listdir(self.data_dir) if name.endswith(DATA_SUFFIX)
+        )
+
+    def _allocate_segment_id(self) -> int:
+        segment_id = self._next_segment_id
+        self._next_segment_id += 1
+        return segment_id
+
+    def _open_active(self, segment_id: int) -> None:
+        self.active_id = segment_id
+        self._active_file = open(self._data_path(segment_id), 'ab', buffering=0)
+        self._active_size = os.path.getsize(self._data_path(segment_id))
+
+    @staticmethod
+    def _encode(seq: int, key_bytes: bytes, value_bytes: Optional[bytes]) -> bytes:
+        value_len = TOMBSTONE if value_bytes is None else len(value_bytes)
+        body = _RECORD_BODY_HEAD.pack(seq, len(key_bytes), value_len) + key_bytes + (value_bytes or b"")
+        return _CRC.pack(zlib.crc32(body)) + body
+
+    @staticmethod
+    def _scan_segment(path: str):
+        """
+        Yield (seq, key, value_offset, value_len, record_end) for each valid
+        record in a data file. Stops at the first torn/corrupt record.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        offset = 0
+        while offset + _RECORD_HEAD.size <= len(data):
+            crc, seq, key_len, value_len = _RECORD_HEAD.unpack_from(data, offset)
+            key_start = offset + _RECORD_HEAD.size
+            value_start = key_start + key_len
+            end = value_start + max(value_len, 0)
+            if end > len(data) or zlib.crc32(data[offset + 4:end]) != crc:
+                return
+            key = data[key_start:value_start].decode('utf-8')
+            yield seq, key, value_start, value_len, end
+            offset = end
+
+    # ------------------------------------------------------------------
+    # Startup
+    # ------------------------------------------------------------------
+
+    def _apply_loaded(self, tombstones: Dict[str, int], segment_id: int, seq: int,
+                      key: str, value_offset: int, value_len: int) -> None:
+        """Merge one record into the keydir being rebuilt (highest seq wins)."""
+        if seq <= max(self._key_seq.get(key, 0), tombstones.get(key, 0)):
+            return
+        if value_len == TOMBSTONE:
+            tombstones[key] = seq
+            self.keydir.pop(key, None)
+            self._key_seq.pop(key, None)
+        else:
+            tombstones.pop(key, None)
+            self.keydir[key] = (segment_id, value_offset, value_len)
+            self._key_seq[key] = seq
+        self._next_seq = max(self._next_seq, seq + 1)
+
+    def _load(self) -> None:
+        """Rebuild the keydir from hint files (or data files without a hint)."""
+        tombstones: Dict[str, int] = {}
+        from_hints = 0
+        scanned = 0
+
+        for segment_id in self._list_segments():
+            self._next_segment_id = max(self._next_segment_id, segment_id + 1)
+            hint_path = self._hint_path(segment_id)
+
+            if os.path.exists(hint_path):
+                for seq, key, value_len, value_offset in self._read_hint(hint_path):
+                    self._apply_loaded(tombstones, segment_id, seq, key, value_offset, value_len)
+                from_hints += 1
+                continue
+
+            # No hint file: segment was active at shutdown (or crashed) - scan it
+            path = self._data_path(segment_id)
+            valid_end = 0
+            for seq, key, value_offset, value_len, end in self._scan_segment(path):
+                self._apply_loaded(tombstones, segment_id, seq, key, value_offset, value_len)
+                valid_end = end
+            if valid_end < os.path.getsize(path):
+                logger.warning(f"Bitcask: truncating torn tail of segment {segment_id}")
+                with open(path, 'r+b') as f:
+                    f.truncate(valid_end)
+            self._write_hint(segment_id)
+            scanned += 1
+
+        if from_hints or scanned:
+            logger.info(
+                f"Bitcask loaded {len(self.keydir)} keys "
+                f"({from_hints} segments from hints, {scanned} scanned)"
+            )
+
+    # ------------------------------------------------------------------
+    # Hint files
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _read_hint(path: str):
+        with open(path, 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset + _HINT_HEAD.size <= len(data):
+            seq, key_len, value_len, value_offset = _HINT_HEAD.unpack_from(data, offset)
+            key_start = offset + _HINT_HEAD.size
+            key = data[key_start:key_start + key_len].decode('utf-8')
+            yield seq, key, value_len, value_offset
+            offset = key_start + key_len
+
+    def _write_hint(self, segment_id: int) -> None:
+        """Write the hint file for an immutable segment (atomic rename)."""
+        entries = []
+        for seq, key, value_offset, value_len, _ in self._scan_segment(self._data_path(segment_id)):
+            key_bytes = key.encode('utf-8')
+            entries.append(_HINT_HEAD.pack(seq, len(key_bytes), value_len, value_offset) + key_bytes)
+
+        tmp_path = self._hint_path(segment_id) + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b"".join(entries))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._hint_path(segment_id))
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def _append(self, key: str, value: Optional[str]) -> Tuple[int, int, int]:
+        """Append a record to the active segment. Caller holds self.lock."""
+        key_bytes = key.encode('utf-8')
+        value_bytes = None if value is None else to_disk(value)
+        seq = self._next_seq
+        self._next_seq += 1
+
+        record = self._encode(seq, key_bytes, value_bytes)
+        offset = self._active_size
+        self._active_file.write(record)
+        if self.sync_writes:
+            os.fsync(self._active_file.fileno())
+        self._active_size += len(record)
+
+        location = (self.active_id, offset + _RECORD_HEAD.size + len(key_bytes),
+                    len(value_bytes) if value_bytes is not None else TOMBSTONE)
+        self._key_seq[key] = seq
+
+        if self._active_size >= self.max_segment_bytes:
+            self._roll_active()
+        return location
+
+    def _roll_active(self) -> None:
+        """Seal the active segment (fsync + hint file) and open a new one."""
+        os.fsync(self._active_file.fileno())
+        self._active_file.close()
+        self._write_hint(self.active_id)
+        self._open_active(self._allocate_segment_id())
+
+    def put(self, key: str, value: str) -> bool:
+        """
+        Append key-value pair to the active segment.
+
+        Args:
+            key: Key to save
+            value: Value to save
+
+        Returns:
+            True if saved successfully
+        """
+        try:
+            with self.lock:
+                self.keydir[key] = self._append(key, value)
+            return True
+        except Exception as e:
+            raise Exception(f"PUT failed: {str(e)}")
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete key by appending a tombstone (idempotent).
+
+        Args:
+            key: Key to delete
+
+        Returns:
+            True if key was found and deleted, False if key didn't exist
+        """
+        try:
+            with self.lock:
+                if key not in self.keydir:
+                    return False
+                self._append(key, None)
+                del self.keydir[key]
+                del self._key_seq[key]
+            return True
+        except Exception as e:
+            raise Exception(f"DELETE failed: {str(e)}")
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> int:
+        """
+        Append many key-value pairs under one lock acquisition.
+
+        Args:
+            items: Iterable of (key, value) pairs (or a dict)
+
+        Returns:
+            Number of pairs written
+        """
+        try:
+            pairs = list(items.items()) if isinstance(items, dict) else list(items)
+            with self.lock:
+                for key, value in pairs:
+                    self.keydir[key] = self._append(key, value)
+            return len(pairs)
+        except Exception as e:
+            raise Exception(f"PUT_MANY failed: {str(e)}")
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Append tombstones for many keys under one lock acquisition.
+
+        Args:
+            keys: Keys to delete
+
+        Returns:
+            Number of keys that existed and were deleted
+        """
+        try:
+            deleted = 0
+            with self.lock:
+                for key in keys:
+                    if key not in self.keydir:
+                        continue
+                    self._append(key, None)
+                    del self.keydir[key]
+                    del self._key_seq[key]
+                    deleted += 1
+            return deleted
+        except Exception as e:
+            raise Exception(f"DELETE_MANY failed: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def _mapping(self, segment_id: int, needed_end: int) -> mmap.mmap:
+        """
+        Return an mmap covering at least `needed_end` bytes of a segment.
+        Caller holds self.lock. The active segment is remapped when it has
+        grown past the current mapping.
+        """
+        mapping = self._mmaps.get(segment_id)
+        if mapping is None or len(mapping) < needed_end:
+            if mapping is not None:
+                mapping.close()
+            with open(self._data_path(segment_id), 'rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmaps[segment_id] = mapping
+        return mapping
+
+    def get(self, key: str) -> Tuple[Optional[str], bool]:
+        """
+        Retrieve value by key (one keydir lookup + one mmap slice).
+
+        Args:
+            key: Key to retrieve
+
+        Returns:
+            Tuple of (value, found)
+        """
+        try:
+            with self.lock:
+                location = self.keydir.get(key)
+                if location is None:
+                    return None, False
+                segment_id, offset, length = location
+                mapping = self._mapping(segment_id, offset + length)
+                view = memoryview(mapping)[offset:offset + length]
+                try:
+                    return from_disk(view), True
+                finally:
+                    view.release()
+        except Exception as e:
+            raise Exception(f"GET failed: {str(e)}")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Retrieve many keys under one lock acquisition.
+
+        Args:
+            keys: Keys to retrieve
+
+        Returns:
+            Dict {key: value} for the keys that exist
+        """
+        try:
+            result = {}
+            with self.lock:
+                for key in keys:
+                    value, found = self.get(key)
+                    if found:
+                        result[key] = value
+            return result
+        except Exception as e:
+            raise Exception(f"GET_MANY failed: {str(e)}")
+
+    def list_keys(self) -> List[str]:
+        """
+        Get list of all keys (from the keydir, no disk access).
+
+        Returns:
+            List of all keys
+        """
+        try:
+            with self.lock:
+                return list(self.keydir.keys())
+        except Exception as e:
+            raise Exception(f"LISTKEYS failed: {str(e)}")
+
+    def size(self) -> int:
+        """Get total number of keys."""
+        with self.lock:
+            return len(self.keydir)
+
+    # ------------------------------------------------------------------
+    # Merge (compaction)
+    # ------------------------------------------------------------------
+
+    def merge(self) -> int:
+        """
+        Rewrite live values from immutable segments and delete the old files.
+
+        Writers keep appending to the active segment while the merge runs;
+        a value is only moved if the keydir still points at the old copy.
+
+        Returns:
+            Number of segments reclaimed
+        """
+        with self._merge_lock:
+            with self.lock:
+                if self._active_size > 0:
+                    self._roll_active()
+                old_segments = [s for s in self._list_segments() if s != self.active_id]
+            if not old_segments:
+                return 0
+
+            output_id = None
+            output_file = None
+            output_size = 0
+
+            for segment_id in old_segments:
+                for seq, key, value_offset, value_len, _ in self._scan_segment(self._data_path(segment_id)):
+                    if value_len == TOMBSTONE:
+                        continue
+                    with self.lock:
+                        if self.keydir.get(key) != (segment_id, value_offset, value_len):
+                            continue  # Overwritten or deleted since
+                        if output_file is None or output_size >= self.max_segment_bytes:
+                            if output_file is not None:
+                                self._seal_merge_output(output_id, output_file)
+                            output_id = self._allocate_segment_id()
+                            output_file = open(self._data_path(output_id), 'ab', buffering=0)
+                            output_size = 0
+                        mapping = self._mapping(segment_id, value_offset + value_len)
+                        key_bytes = key.encode('utf-8')
+                        record = self._encode(seq, key_bytes, mapping[value_offset:value_offset + value_len])
+                        output_file.write(record)
+                        self.keydir[key] = (output_id, output_size + _RECORD_HEAD.size + len(key_bytes), value_len)
+                        output_size += len(record)
+
+            with self.lock:
+                if output_file is not None:
+                    self._seal_merge_output(output_id, output_file)
+                for segment_id in old_segments:
+                    mapping = self._mmaps.pop(segment_id, None)
+                    if mapping is not None:
+                        mapping.close()
+                    os.remove(self._data_path(segment_id))
+                    if os.path.exists(self._hint_path(segment_id)):
+                        os.remove(self._hint_path(segment_id))
+
+            logger.info(f"Bitcask merge: reclaimed {len(old_segments)} segments")
+            return len(old_segments)
+
+    def _seal_merge_output(self, segment_id: int, output_file) -> None:
+        os.fsync(output_file.fileno())
+        output_file.close()
+        self._write_hint(segment_id)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def clear(self) -> None:
+        """Delete all data (for testing)."""
+        with self.lock:
+            self._close_files()
+            for name in os.listdir(self.data_dir):
+                if name.endswith(DATA_SUFFIX) or name.endswith(HINT_SUFFIX):
+                    os.remove(os.path.join(self.data_dir, name))
+            self.keydir.clear()
+            self._key_seq.clear()
+            self._open_active(self._allocate_segment_id())
+
+    def _close_files(self) -> None:
+        for mapping in self._mmaps.values():
+            mapping.close()
+        self._mmaps.clear()
+        os.fsync(self._active_file.fileno())
+        self._active_file.close()
+
+    def close(self) -> None:
+        """Flush and close all files. The active segment is sealed with a hint."""
+        with self.lock:
+            self._close_files()
+            if self._active_size > 0:
+                self._write_hint(self.active_id)
+            else:
+                os.remove(self._data_path(self.active_id))
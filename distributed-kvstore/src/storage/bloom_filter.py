@@ -0,0 +1,98 @@
+"""
+Bloom Filter - Probabilistic set membership for fast negative lookups
+"""
+
+import math
+import struct
+import hashlib
+from typing import Tuple
+
+# Serialized header: [num_bits u64][num_hashes u32]
+_HEADER = struct.Struct('<QI')
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys.
+
+    Uses double hashing (h1 + i*h2) derived from one 16-byte BLAKE2b digest,
+    so each add/lookup costs a single hash computation regardless of the
+    number of probes. The digest does not depend on the filter size, so a
+    caller checking one key against many filters (e.g. every SSTable)
+    computes hash_key() once and passes it to might_contain_hashed().
+    False positives are possible, false negatives are not.
+    """
+
+    def __init__(self, capacity: int = 1000, false_positive_rate: float = 0.01,
+                 num_bits: int = None, num_hashes: int = None):
+        """
+        Size the filter for `capacity` keys at the target false positive rate.
+
+        Args:
+            capacity: Expected number of keys
+            false_positive_rate: Target false positive probability
+            num_bits: Explicit bit count (overrides sizing; used by from_bytes)
+            num_hashes: Explicit probe count (overrides sizing)
+        """
+        capacity = max(capacity, 1)
+        if num_bits is None:
+            num_bits = int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+        self.num_bits = max(num_bits, 8)
+        if num_hashes is None:
+            num_hashes = int(round(self.num_bits / capacity * math.log(2)))
+        self.num_hashes = max(num_hashes, 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    @staticmethod
+    def hash_key(key: str) -> Tuple[int, int]:
+        """Double-hashing pair (h1, h2) of `key`, valid for any filter."""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def _probes(self, key: str):
+        h1, h2 = self.hash_key(key)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        """Add a key to the filter."""
+        for bit in self._probes(key):
+            self.bits[bit >> 3] |= 1 << (bit & 7)
+
+    def might_contain(self, key: str) -> bool:
+        """
+        Check membership.
+
+        Returns:
+            False if the key was definitely never added, True if it may have been
+        """
+        bits = self.bits
+        for bit in self._probes(key):
+            if not bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    __contains__ = might_contain
+
+    def might_contain_hashed(self, hashes: Tuple[int, int]) -> bool:
+        """might_contain() for a key already hashed with hash_key()."""
+        h1, h2 = hashes
+        bits = self.bits
+        num_bits = self.num_bits
+        for i in range(self.num_hashes):
+            bit = (h1 + i * h2) % num_bits
+            if not bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def to_bytes(self) -> bytes:
+        """Serialize the filter (header + bit array)."""
+        return _HEADER.pack(self.num_bits, self.num_hashes) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BloomFilter':
+        """Deserialize a filter produced by to_bytes()."""
+        num_bits, num_hashes = _HEADER.unpack_from(data, 0)
+        bloom = cls(num_bits=num_bits, num_hashes=num_hashes)
+        bloom.bits = bytearray(data[_HEADER.size:_HEADER.size + len(bloom.bits)])
+        return bloom
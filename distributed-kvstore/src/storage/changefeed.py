@@ -0,0 +1,99 @@
+"""
+Change Feed - Bounded ring buffer of applied puts/deletes (change-data-capture)
+"""
+
+import threading
+from typing import List, NamedTuple, Optional, Tuple
+
+from src.storage.versioning import Version
+
+
+class ChangeEvent(NamedTuple):
+    """One applied write."""
+    seq: int
+    op: int  # OP_PUT or OP_DELETE
+    key: str
+    value: str  # Empty for deletes
+    version: Optional[Version]
+
+
+class ChangeFeed:
+    """
+    Fixed-size ring of the most recent writes, numbered by a sequence.
+
+    Writers append under their engine lock in O(1) and never wait for
+    readers: once the ring is full the oldest event is overwritten. A
+    reader that falls more than `capacity` events behind is told it
+    lagged (and continues from the oldest event still retained) instead
+    of slowing writers down. May be shared by several engines (e.g. the
+    stripes of a ShardedStorageEngine) to get one ordered stream.
+
+    Sequence numbers start at 1 and are not persisted: after a restart
+    they start again, and a reader resuming from a larger sequence is
+    reported as lagged.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        """
+        Initialize an empty feed.
+
+        Args:
+            capacity: Number of events retained
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._ring: List[Optional[ChangeEvent]] = [None] * capacity
+        self._next_seq = 1
+        self._cond = threading.Condition(threading.Lock())
+
+    def append(self, op: int, key: str, value: str = "", version: Optional[Version] = None) -> int:
+        """
+        Record an applied write and wake up waiting readers.
+
+        Returns:
+            Sequence number of the event
+        """
+        with self._cond:
+            seq = self._next_seq
+            self._ring[seq % self.capacity] = ChangeEvent(seq, op, key, value, version)
+            self._next_seq = seq + 1
+            self._cond.notify_all()
+        return seq
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the newest event (0 if none yet)."""
+        return self._next_seq - 1
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest event still retained."""
+        return max(1, self._next_seq - self.capacity)
+
+    def read(self, from_seq: int, max_events: int = 1000,
+             timeout: Optional[float] = None) -> Tuple[List[ChangeEvent], int, bool]:
+        """
+        Read events starting at `from_seq`.
+
+        Args:
+            from_seq: First sequence number wanted
+            max_events: Maximum events returned
+            timeout: Seconds to wait if no event is available yet (None = don't wait)
+
+        Returns:
+            Tuple of (events, sequence to read next, lagged); lagged is True
+            if events at or after `from_seq` were lost (overwritten, or the
+            sequence belongs to a previous run)
+        """
+        with self._cond:
+            if timeout and from_seq == self._next_seq:
+                self._cond.wait(timeout)
+            first = max(1, self._next_seq - self.capacity)
+            lagged = from_seq < first or from_seq > self._next_seq
+            start = first if from_seq < first else min(from_seq, self._next_seq)
+            end = min(self._next_seq, start + max_events)
+            ring = self._ring
+            capacity = self.capacity
+            events = [ring[seq % capacity] for seq in range(start, end)]
+        return events, end, lagged
@@ -0,0 +1,309 @@
+"""
+Checkpoint Store - Point-in-time snapshot files for fast restart
+"""
+
+import os
+import time
+import zlib
+import struct
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.storage.compression import to_disk, from_disk
+from src.storage.versioning import Version, encode_version, decode_version
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint file layout:
+#   [header][section]*
+# Header:  [magic u32][version u16][flags u16][lsn u64][num_sections u32][num_keys u64][crc32 u32]
+# Section: [crc32 u32][stored_len u32][count u32][payload]   (payload zlib-compressed if FLAG_ZLIB)
+# Payload: ([key_len u32][value_len u32][key][value])*
+# If FLAG_EXPIRY is set, one extra section after the data sections holds
+# (key, expire_at_ms as decimal string) records. If FLAG_TOMBSTONES is set,
+# one more section after it holds (key, deleted_at_ms) records, oldest first.
+# If FLAG_VERSIONS is set, a section after those holds (key, "<ms>:<node_id>")
+# records. If FLAG_WATERMARKS is set, a last section holds the version
+# watermarks of deleted keys as (key, deleted_at_ms) records, oldest first.
+_HEADER = struct.Struct('<IHHQIQ')
+_HEADER_CRC = struct.Struct('<I')
+_SECTION_HEAD = struct.Struct('<III')
+_RECORD_HEAD = struct.Struct('<II')
+CHECKPOINT_MAGIC = 0x4B56434B  # "KVCK"
+CHECKPOINT_VERSION = 1
+FLAG_ZLIB = 0x1
+FLAG_EXPIRY = 0x2
+FLAG_TOMBSTONES = 0x4
+FLAG_VERSIONS = 0x8
+FLAG_WATERMARKS = 0x10
+
+CHECKPOINT_PREFIX = "checkpoint-"
+CHECKPOINT_SUFFIX = ".ckpt"
+
+
+class CheckpointInfo(NamedTuple):
+    """Result of writing or restoring a checkpoint."""
+    path: str
+    lsn: int
+    num_keys: int
+    size_bytes: int
+    seconds: float
+
+
+def _encode_section(data: Dict[str, str], compress_level: int) -> bytes:
+    """Serialize one section (length-prefixed records, optionally zlib)."""
+    pack = _RECORD_HEAD.pack
+    parts = []
+    for key, value in data.items():
+        key_bytes = key.encode('utf-8')
+        value_bytes = to_disk(value)
+        parts.append(pack(len(key_bytes), len(value_bytes)))
+        parts.append(key_bytes)
+        parts.append(value_bytes)
+    payload = b"".join(parts)
+    if compress_level:
+        payload = zlib.compress(payload, compress_level)
+    return _SECTION_HEAD.pack(zlib.crc32(payload), len(payload), len(data)) + payload
+
+
+def _decode_section(stored: memoryview, count: int, compressed: bool) -> List[Tuple[str, str]]:
+    """Decode one section's payload back into (key, value) pairs."""
+    payload = zlib.decompress(stored) if compressed else stored
+    unpack = _RECORD_HEAD.unpack_from
+    head_size = _RECORD_HEAD.size
+    items = []
+    offset = 0
+    for _ in range(count):
+        key_len, value_len = unpack(payload, offset)
+        offset += head_size
+        key = bytes(payload[offset:offset + key_len]).decode('utf-8')
+        offset += key_len
+        value = from_disk(payload[offset:offset + value_len])
+        offset += value_len
+        items.append((key, value))
+    return items
+
+
+class CheckpointStore:
+    """
+    Writes and restores checkpoints of an in-memory storage engine.
+
+    A checkpoint is taken from engine.copy_state(): the engine holds its
+    locks only for the dict copy, then the copy is serialized and written
+    here without blocking writers. Each stripe becomes an independently
+    checksummed (and optionally compressed) section, so restore can
+    decompress and decode sections in parallel (zlib releases the GIL).
+
+    Files are named checkpoint-<lsn>.ckpt and written to a temp file first,
+    so a crash mid-write never leaves a half checkpoint behind. The newest
+    `keep` checkpoints are kept; if the newest turns out to be corrupt,
+    restore falls back to the previous one, and the WAL is only purged up
+    to the oldest kept checkpoint so that fallback can still replay.
+    """
+
+    def __init__(self, checkpoint_dir: str, compress_level: int = 1, keep: int = 2,
+                 workers: int = 4):
+        """
+        Open (or create) the checkpoint directory.
+
+        Args:
+            checkpoint_dir: Directory holding checkpoint files
+            compress_level: zlib level 1-9, 0 = no compression
+            keep: Number of checkpoints to keep (>= 1)
+            workers: Threads encoding / decoding sections
+        """
+        self.checkpoint_dir = checkpoint_dir
+        self.compress_level = compress_level
+        self.keep = max(keep, 1)
+        self.workers = max(workers, 1)
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        # Leftovers of a checkpoint interrupted by a crash
+        for name in os.listdir(checkpoint_dir):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(checkpoint_dir, name))
+
+    def _path(self, lsn: int) -> str:
+        return os.path.join(self.checkpoint_dir, f"{CHECKPOINT_PREFIX}{lsn:020d}{CHECKPOINT_SUFFIX}")
+
+    def list_checkpoints(self) -> List[Tuple[int, str]]:
+        """Return (lsn, path) of every checkpoint, newest first."""
+        checkpoints = []
+        for name in os.listdir(self.checkpoint_dir):
+            if name.startswith(CHECKPOINT_PREFIX) and name.endswith(CHECKPOINT_SUFFIX):
+                lsn = int(name[len(CHECKPOINT_PREFIX):-len(CHECKPOINT_SUFFIX)])
+                checkpoints.append((lsn, os.path.join(self.checkpoint_dir, name)))
+        return sorted(checkpoints, reverse=True)
+
+    def write(self, sections: List[Dict[str, str]], lsn: int,
+              expiry: Optional[Dict[str, int]] = None,
+              tombstones: Optional[List[Tuple[str, int]]] = None,
+              versions: Optional[Dict[str, Version]] = None,
+              watermarks: Optional[List[Tuple[str, int]]] = None) -> CheckpointInfo:
+        """
+        Write a checkpoint file from an already-copied state.
+
+        Args:
+            sections: Data split into sections (e.g. one dict per stripe)
+            lsn: Last WAL LSN included in the data
+            expiry: Optional {key: expire_at_ms} for keys with a TTL
+            tombstones: Optional (key, deleted_at_ms) pairs, oldest first
+            versions: Optional {key: (timestamp_ms, node_id)}
+            watermarks: Optional (key, deleted_at_ms) version watermarks, oldest first
+
+        Returns:
+            CheckpointInfo of the new file
+        """
+        start = time.time()
+        path = self._path(lsn)
+        tmp_path = path + ".tmp"
+        num_keys = sum(len(section) for section in sections)
+        flags = FLAG_ZLIB if self.compress_level else 0
+        all_sections = list(sections)
+        if expiry:
+            flags |= FLAG_EXPIRY
+            all_sections.append({key: str(expire_at_ms) for key, expire_at_ms in expiry.items()})
+        if tombstones:
+            flags |= FLAG_TOMBSTONES
+            all_sections.append({key: str(deleted_at_ms) for key, deleted_at_ms in tombstones})
+        if versions:
+            flags |= FLAG_VERSIONS
+            all_sections.append({key: encode_version(version) for key, version in versions.items()})
+        if watermarks:
+            flags |= FLAG_WATERMARKS
+            all_sections.append({key: str(deleted_at_ms) for key, deleted_at_ms in watermarks})
+
+        header = _HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, flags,
+                              lsn, len(sections), num_keys)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            encoded = executor.map(lambda section: _encode_section(section, self.compress_level),
+                                   all_sections)
+            with open(tmp_path, 'wb') as f:
+                f.write(header + _HEADER_CRC.pack(zlib.crc32(header)))
+                for chunk in encoded:
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        return CheckpointInfo(path, lsn, num_keys, os.path.getsize(path), time.time() - start)
+
+    def checkpoint(self, storage) -> CheckpointInfo:
+        """
+        Checkpoint a storage engine, prune old checkpoints and truncate its WAL.
+
+        Args:
+            storage: Engine exposing copy_state() (and optionally .wal)
+
+        Returns:
+            CheckpointInfo of the new file
+        """
+        sections, lsn, expiry = storage.copy_state()
+        # Copied after the data: a tombstone or version that changed in
+        # between is re-established by replaying the WAL from `lsn`
+        tombstones = storage.copy_tombstones() if storage.supports_tombstones else None
+        versions = watermarks = None
+        if storage.supports_versions:
+            versions = storage.copy_versions()
+            watermarks = storage.copy_watermarks()
+        info = self.write(sections, lsn, expiry, tombstones, versions, watermarks)
+
+        checkpoints = self.list_checkpoints()
+        for _, old_path in checkpoints[self.keep:]:
+            os.remove(old_path)
+
+        wal = storage.wal
+        if wal is not None:
+            # Seal the active segment so the next checkpoint can purge it
+            wal.rotate()
+            oldest_kept_lsn = checkpoints[:self.keep][-1][0]
+            wal.purge(oldest_kept_lsn)
+
+        return info
+
+    def _load(self, path: str) -> Tuple[int, List[Tuple[memoryview, int]], int]:
+        """Read and validate a checkpoint file; return (lsn, sections, flags)."""
+        with open(path, 'rb') as f:
+            data = memoryview(f.read())
+
+        if len(data) < _HEADER.size + _HEADER_CRC.size:
+            raise ValueError("truncated header")
+        magic, version, flags, lsn, num_sections, _ = _HEADER.unpack_from(data, 0)
+        (header_crc,) = _HEADER_CRC.unpack_from(data, _HEADER.size)
+        if magic != CHECKPOINT_MAGIC or header_crc != zlib.crc32(data[:_HEADER.size]):
+            raise ValueError("bad header")
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f"unsupported version {version}")
+
+        sections = []
+        offset = _HEADER.size + _HEADER_CRC.size
+        extra_sections = sum(1 for flag in (FLAG_EXPIRY, FLAG_TOMBSTONES, FLAG_VERSIONS, FLAG_WATERMARKS)
+                             if flags & flag)
+        for _ in range(num_sections + extra_sections):
+            if offset + _SECTION_HEAD.size > len(data):
+                raise ValueError("truncated section header")
+            crc, stored_len, count = _SECTION_HEAD.unpack_from(data, offset)
+            offset += _SECTION_HEAD.size
+            stored = data[offset:offset + stored_len]
+            offset += stored_len
+            if len(stored) != stored_len or zlib.crc32(stored) != crc:
+                raise ValueError("section checksum mismatch")
+            sections.append((stored, count))
+        return lsn, sections, flags
+
+    def restore(self, storage) -> Optional[CheckpointInfo]:
+        """
+        Load the newest valid checkpoint into an empty storage engine.
+
+        Sections are decoded in parallel and bulk-loaded with
+        storage.load_items() (expiry times with storage.load_expiry(),
+        tombstones with storage.load_tombstones(), version watermarks with
+        storage.load_watermarks(), versions with storage.load_versions()).
+        The caller then replays the WAL from the returned LSN.
+
+        Args:
+            storage: Engine exposing load_items() / load_expiry()
+
+        Returns:
+            CheckpointInfo of the restored file, or None if there is none
+        """
+        for _, path in self.list_checkpoints():
+            start = time.time()
+            try:
+                file_lsn, sections, flags = self._load(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping corrupt checkpoint {path}: {e}")
+                continue
+
+            compressed = bool(flags & FLAG_ZLIB)
+            watermark_section = sections.pop() if flags & FLAG_WATERMARKS else None
+            version_section = sections.pop() if flags & FLAG_VERSIONS else None
+            tombstone_section = sections.pop() if flags & FLAG_TOMBSTONES else None
+            expiry_section = sections.pop() if flags & FLAG_EXPIRY else None
+            num_keys = 0
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                decoded = executor.map(lambda section: _decode_section(section[0], section[1], compressed),
+                                       sections)
+                for items in decoded:
+                    storage.load_items(items)
+                    num_keys += len(items)
+
+            if expiry_section is not None:
+                expiry_items = _decode_section(expiry_section[0], expiry_section[1], compressed)
+                storage.load_expiry((key, int(value)) for key, value in expiry_items)
+
+            if tombstone_section is not None and storage.supports_tombstones:
+                tombstone_items = _decode_section(tombstone_section[0], tombstone_section[1], compressed)
+                storage.load_tombstones((key, int(value)) for key, value in tombstone_items)
+
+            if watermark_section is not None and storage.supports_versions:
+                watermark_items = _decode_section(watermark_section[0], watermark_section[1], compressed)
+                storage.load_watermarks((key, int(value)) for key, value in watermark_items)
+
+            if version_section is not None and storage.supports_versions:
+                version_items = _decode_section(version_section[0], version_section[1], compressed)
+                storage.load_versions((key, decode_version(value)) for key, value in version_items)
+
+            return CheckpointInfo(path, file_lsn, num_keys, os.path.getsize(path), time.time() - start)
+        return None
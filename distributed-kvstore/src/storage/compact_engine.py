@@ -0,0 +1,445 @@
+"""
+Compact Storage Engine - Arena-backed key-value store with low per-key overhead
+"""
+
+import struct
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.storage.wal import WriteAheadLog, OP_PUT, OP_DELETE
+from src.storage.backend import StorageBackend
+from src.storage.compression import to_disk, from_disk
+
+# Arena record: [key_len u32][value_len u32][key utf-8][value to_disk()]
+_RECORD_HEAD = struct.Struct('<II')
+_HEAD_SIZE = _RECORD_HEAD.size
+
+# Slot states in the index (otherwise: (segment << 32) | offset)
+EMPTY = -1
+DELETED = -2
+
+_MAX_LOAD = 0.66
+
+
+class CompactStorageEngine(StorageBackend):
+    """
+    Memory-compact storage: no Python object per key or value.
+
+    - Keys (UTF-8) and values (to_disk(): compressed envelopes at one byte
+      per byte) are stored as records appended to an arena of
+      bytearray segments.
+    - The index is an open-addressing hash table made of two array('q')
+      columns (record location and key hash), i.e. ~24 bytes per key at
+      the maximum load factor instead of a dict entry plus two str objects.
+    - Overwrites and deletes leave dead records behind; compact() (run
+      automatically once dead bytes exceed `compact_ratio` of the arena)
+      copies live records into fresh segments and releases the old ones.
+
+    Exposes the same API as StorageEngine (put/get/delete/list_keys/size,
+    WAL logging and replay, copy_state()/load_items() for CheckpointStore,
+    which truncates the WAL after each checkpoint). Lookups pay for a
+    Python-level probe, so it trades some throughput for memory.
+    """
+
+    def __init__(self, wal: Optional[WriteAheadLog] = None, segment_bytes: int = 4 * 1024 * 1024,
+                 initial_capacity: int = 1024, compact_ratio: float = 0.5):
+        """
+        Initialize an empty arena and index.
+
+        Args:
+            wal: Optional WriteAheadLog for durability
+            segment_bytes: Arena segment size
+            initial_capacity: Initial index slots (rounded up to a power of two)
+            compact_ratio: Compact when dead bytes exceed this share of the arena
+        """
+        self.lock = threading.RLock()
+        self.wal = wal
+        self.segment_bytes = segment_bytes
+        self.compact_ratio = compact_ratio
+
+        capacity = 8
+        while capacity < initial_capacity:
+            capacity *= 2
+        self._init_index(capacity)
+        self._segments: List[bytearray] = [bytearray()]
+        self._count = 0
+        self._arena_bytes = 0
+        self._dead_bytes = 0
+        self.compaction_count = 0
+
+    def _init_index(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._locs = array('q', [EMPTY]) * capacity
+        self._hashes = array('q', [0]) * capacity
+        self._filled = 0  # Live + DELETED slots (drives resizing)
+
+    # ------------------------------------------------------------------
+    # Arena
+    # ------------------------------------------------------------------
+
+    def _append(self, record: bytes) -> int:
+        """Append a record to the arena; return its location."""
+        segment = self._segments[-1]
+        if segment and len(segment) + len(record) > self.segment_bytes:
+            segment = bytearray()
+            self._segments.append(segment)
+        offset = len(segment)
+        segment += record
+        self._arena_bytes += len(record)
+        return ((len(self._segments) - 1) << 32) | offset
+
+    def _record_at(self, loc: int) -> Tuple[bytearray, int, int, int]:
+        """Return (segment, offset, key_len, value_len) of the record at `loc`."""
+        segment = self._segments[loc >> 32]
+        offset = loc & 0xFFFFFFFF
+        key_len, value_len = _RECORD_HEAD.unpack_from(segment, offset)
+        return segment, offset, key_len, value_len
+
+    def _key_at(self, loc: int) -> bytes:
+        segment, offset, key_len, _ = self._record_at(loc)
+        return bytes(segment[offset + _HEAD_SIZE:offset + _HEAD_SIZE + key_len])
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _find(self, key_bytes: bytes, key_hash: int) -> Tuple[int, int]:
+        """
+        Probe for `key_bytes`.
+
+        Returns:
+            Tuple of (slot holding the key or -1, slot to insert into)
+        """
+        locs = self._locs
+        hashes = self._hashes
+        mask = self._mask
+        slot = key_hash & mask
+        insert_slot = -1
+        while True:
+            loc = locs[slot]
+            if loc == EMPTY:
+                return -1, slot if insert_slot < 0 else insert_slot
+            if loc == DELETED:
+                if insert_slot < 0:
+                    insert_slot = slot
+            elif hashes[slot] == key_hash and self._key_at(loc) == key_bytes:
+                return slot, slot
+            slot = (slot + 1) & mask
+
+    def _resize(self, capacity: int) -> None:
+        """Rehash every live slot into a table of `capacity` slots."""
+        old_locs, old_hashes = self._locs, self._hashes
+        self._init_index(capacity)
+        locs, hashes, mask = self._locs, self._hashes, self._mask
+        for loc, key_hash in zip(old_locs, old_hashes):
+            if loc >= 0:
+                slot = key_hash & mask
+                while locs[slot] != EMPTY:
+                    slot = (slot + 1) & mask
+                locs[slot] = loc
+                hashes[slot] = key_hash
+                self._filled += 1
+
+    def _maybe_compact(self) -> None:
+        if (self._dead_bytes > self.segment_bytes
+                and self._dead_bytes > self.compact_ratio * self._arena_bytes):
+            self.compact()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def _put_locked(self, key: str, value: str) -> None:
+        key_bytes = key.encode('utf-8')
+        value_bytes = to_disk(value)
+        key_hash = hash(key)
+        slot, insert_slot = self._find(key_bytes, key_hash)
+        loc = self._append(_RECORD_HEAD.pack(len(key_bytes), len(value_bytes)) + key_bytes + value_bytes)
+
+        if slot >= 0:
+            _, _, old_key_len, old_value_len = self._record_at(self._locs[slot])
+            self._dead_bytes += _HEAD_SIZE + old_key_len + old_value_len
+            self._locs[slot] = loc
+            self._maybe_compact()
+            return
+
+        if self._locs[insert_slot] == EMPTY:
+            self._filled += 1
+        self._locs[insert_slot] = loc
+        self._hashes[insert_slot] = key_hash
+        self._count += 1
+        if self._filled > self._capacity * _MAX_LOAD:
+            # Grow if mostly live, otherwise just purge DELETED slots
+            grow = self._count > self._capacity * _MAX_LOAD / 2
+            self._resize(self._capacity * 2 if grow else self._capacity)
+
+    def _delete_locked(self, key: str) -> bool:
+        slot, _ = self._find(key.encode('utf-8'), hash(key))
+        if slot < 0:
+            return False
+        _, _, key_len, value_len = self._record_at(self._locs[slot])
+        self._dead_bytes += _HEAD_SIZE + key_len + value_len
+        self._locs[slot] = DELETED
+        self._count -= 1
+        self._maybe_compact()
+        return True
+
+    def put(self, key: str, value: str) -> bool:
+        """
+        Save key-value pair to the arena.
+
+        Args:
+            key: Key to save
+            value: Value to save
+
+        Returns:
+            True if saved successfully
+        """
+        try:
+            lsn = 0
+            with self.lock:
+                if self.wal is not None:
+                    lsn = self.wal.append(OP_PUT, key, value)
+                self._put_locked(key, value)
+            if lsn:
+                self.wal.wait_durable(lsn)
+            return True
+        except Exception as e:
+            raise Exception(f"PUT failed: {str(e)}")
+
+    def get(self, key: str) -> Tuple[Optional[str], bool]:
+        """
+        Retrieve value by key.
+
+        Args:
+            key: Key to retrieve
+
+        Returns:
+            Tuple of (value, found)
+        """
+        try:
+            with self.lock:
+                slot, _ = self._find(key.encode('utf-8'), hash(key))
+                if slot < 0:
+                    return None, False
+                segment, offset, key_len, value_len = self._record_at(self._locs[slot])
+                start = offset + _HEAD_SIZE + key_len
+                return from_disk(segment[start:start + value_len]), True
+        except Exception as e:
+            raise Exception(f"GET failed: {str(e)}")
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete key (idempotent).
+
+        Args:
+            key: Key to delete
+
+        Returns:
+            True if key was found and deleted, False if key didn't exist
+        """
+        try:
+            lsn = 0
+            with self.lock:
+                slot, _ = self._find(key.encode('utf-8'), hash(key))
+                if slot < 0:
+                    return False
+                if self.wal is not None:
+                    lsn = self.wal.append(OP_DELETE, key)
+                self._delete_locked(key)
+            if lsn:
+                self.wal.wait_durable(lsn)
+            return True
+        except Exception as e:
+            raise Exception(f"DELETE failed: {str(e)}")
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> int:
+        """
+        Save many key-value pairs under one lock acquisition.
+
+        Args:
+            items: Iterable of (key, value) pairs (or a dict)
+
+        Returns:
+            Number of pairs written
+        """
+        try:
+            pairs = list(items.items()) if isinstance(items, dict) else list(items)
+            lsn = 0
+            with self.lock:
+                for key, value in pairs:
+                    if self.wal is not None:
+                        lsn = self.wal.append(OP_PUT, key, value)
+                    self._put_locked(key, value)
+            if lsn:
+                self.wal.wait_durable(lsn)
+            return len(pairs)
+        except Exception as e:
+            raise Exception(f"PUT_MANY failed: {str(e)}")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Retrieve many keys under one lock acquisition.
+
+        Args:
+            keys: Keys to retrieve
+
+        Returns:
+            Dict {key: value} for the keys that exist
+        """
+        try:
+            result = {}
+            with self.lock:
+                for key in keys:
+                    slot, _ = self._find(key.encode('utf-8'), hash(key))
+                    if slot >= 0:
+                        segment, offset, key_len, value_len = self._record_at(self._locs[slot])
+                        start = offset + _HEAD_SIZE + key_len
+                        result[key] = from_disk(segment[start:start + value_len])
+            return result
+        except Exception as e:
+            raise Exception(f"GET_MANY failed: {str(e)}")
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Delete many keys under one lock acquisition.
+
+        Args:
+            keys: Keys to delete
+
+        Returns:
+            Number of keys that existed and were deleted
+        """
+        try:
+            lsn = 0
+            deleted = 0
+            with self.lock:
+                for key in keys:
+                    slot, _ = self._find(key.encode('utf-8'), hash(key))
+                    if slot < 0:
+                        continue
+                    if self.wal is not None:
+                        lsn = self.wal.append(OP_DELETE, key)
+                    self._delete_locked(key)
+                    deleted += 1
+            if lsn:
+                self.wal.wait_durable(lsn)
+            return deleted
+        except Exception as e:
+            raise Exception(f"DELETE_MANY failed: {str(e)}")
+
+    def list_keys(self) -> List[str]:
+        """
+        Get list of all keys.
+
+        Returns:
+            List of all keys
+        """
+        try:
+            with self.lock:
+                return [self._key_at(loc).decode('utf-8') for loc in self._locs if loc >= 0]
+        except Exception as e:
+            raise Exception(f"LISTKEYS failed: {str(e)}")
+
+    def size(self) -> int:
+        """Get total number of keys."""
+        with self.lock:
+            return self._count
+
+    def compact(self) -> int:
+        """
+        Copy live records into fresh segments and drop the old arena.
+
+        Returns:
+            Number of arena bytes reclaimed
+        """
+        with self.lock:
+            old_segments = self._segments
+            old_bytes = self._arena_bytes
+            self._segments = [bytearray()]
+            self._arena_bytes = 0
+            locs = self._locs
+            for slot in range(self._capacity):
+                loc = locs[slot]
+                if loc >= 0:
+                    segment = old_segments[loc >> 32]
+                    offset = loc & 0xFFFFFFFF
+                    key_len, value_len = _RECORD_HEAD.unpack_from(segment, offset)
+                    locs[slot] = self._append(bytes(segment[offset:offset + _HEAD_SIZE + key_len + value_len]))
+            self._dead_bytes = 0
+            self.compaction_count += 1
+            return old_bytes - self._arena_bytes
+
+    def memory_usage(self) -> int:
+        """Bytes held by the arena and the index arrays."""
+        with self.lock:
+            return (sum(len(segment) for segment in self._segments)
+                    + self._locs.itemsize * len(self._locs)
+                    + self._hashes.itemsize * len(self._hashes))
+
+    def copy_state(self) -> Tuple[List[Dict[str, str]], int, Dict[str, int]]:
+        """
+        Take a consistent copy of the data for a checkpoint.
+
+        The lock is only held to copy the arena segments and live record
+        locations; records are decoded after it is released.
+
+        Returns:
+            Tuple of ([copy of the data], last WAL LSN included in the copy,
+            empty expiry map (no TTL support))
+        """
+        with self.lock:
+            lsn = self.wal.last_lsn if self.wal is not None else 0
+            segments = [bytes(segment) for segment in self._segments]
+            locs = [loc for loc in self._locs if loc >= 0]
+
+        data = {}
+        for loc in locs:
+            segment = segments[loc >> 32]
+            offset = loc & 0xFFFFFFFF
+            key_len, value_len = _RECORD_HEAD.unpack_from(segment, offset)
+            start = offset + _HEAD_SIZE
+            key = segment[start:start + key_len].decode('utf-8')
+            data[key] = from_disk(segment[start + key_len:start + key_len + value_len])
+        return [data], lsn, {}
+
+    def load_items(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Bulk-insert key-value pairs without logging them (checkpoint restore).
+
+        Args:
+            items: Iterable of (key, value) pairs
+        """
+        with self.lock:
+            for key, value in items:
+                self._put_locked(key, value)
+
+    def apply_logged(self, op: int, key: str, value: str) -> None:
+        """Apply a WAL record without logging it again (used by replay)."""
+        with self.lock:
+            if op == OP_PUT:
+                self._put_locked(key, value)
+            elif op == OP_DELETE:
+                self._delete_locked(key)
+
+    def replay_wal(self, from_lsn: int = 0) -> int:
+        """
+        Rebuild the arena from the WAL (call once at startup).
+
+        Returns:
+            Number of records replayed
+        """
+        if self.wal is None:
+            return 0
+        return self.wal.replay(self.apply_logged, from_lsn=from_lsn)
+
+    def clear(self) -> None:
+        """Clear all storage (for testing)."""
+        with self.lock:
+            self._init_index(8)
+            self._segments = [bytearray()]
+            self._count = 0
+            self._arena_bytes = 0
+            self._dead_bytes = 0
@@ -0,0 +1,196 @@
+"""
+Value Compression - Threshold-based zlib / lzma compression of stored values
+"""
+
+import lzma
+import struct
+import zlib
+from typing import Iterable, Optional, Tuple
+
+# Stored form of a value: either the raw string, or an envelope
+#   MARKER + tag + payload
+# where the payload bytes are kept as a latin-1 str (CPython stores it with
+# 1 byte per char, so a compressed value costs its compressed size in memory).
+MARKER = "\x00"
+TAG_RAW = "r"    # Raw value that itself starts with MARKER (escaped)
+TAG_ZLIB = "z"   # Raw deflate
+TAG_LZMA = "x"   # xz container without integrity check
+TAG_DICT = "d"   # Raw deflate with a preset dictionary (4-byte dictionary id first)
+
+_DICT_ID = struct.Struct('<I')
+
+# On-disk text: UTF-8, or this byte (never valid UTF-8) + latin-1 bytes
+_LATIN1_PREFIX = b"\xff"
+
+ALGORITHMS = ("none", "zlib", "lzma")
+
+
+def build_dictionary(samples: Iterable[str], max_bytes: int = 32 * 1024) -> bytes:
+    """
+    Build a zlib preset dictionary from sample values.
+
+    Deflate can only reference the last 32 KB of the dictionary and
+    favours the closest matches, so the most representative samples
+    should come last.
+
+    Args:
+        samples: Typical values (e.g. JSON documents of the same shape)
+        max_bytes: Dictionary size cap
+
+    Returns:
+        Dictionary bytes
+    """
+    return b"".join(sample.encode('utf-8') for sample in samples)[-max_bytes:]
+
+
+class ValueCodec:
+    """
+    Encodes values once at the owner node into their stored form.
+
+    - Values shorter than `threshold_bytes` are kept raw.
+    - Larger values are compressed with `algorithm` (zlib or lzma) when
+      that actually saves space.
+    - With a preset `dictionary`, values of at least `dictionary_min_bytes`
+      are deflated against it, which makes even small values that share
+      structure (similar JSON documents) compressible. Every node that
+      decodes such values must be configured with the same dictionary; the
+      envelope carries the dictionary id so a mismatch fails loudly.
+
+    The stored form is an ordinary str, so engines, replication and
+    snapshots carry it unchanged; decode() is only called when a value is
+    returned to a client. Files (WAL, checkpoints, Bitcask and SSTables)
+    write it with to_disk() so each compressed byte costs one byte on disk.
+    """
+
+    def __init__(self, algorithm: str = "zlib", level: int = 6, threshold_bytes: int = 1024,
+                 dictionary: Optional[bytes] = None, dictionary_min_bytes: int = 64):
+        """
+        Initialize the codec.
+
+        Args:
+            algorithm: "zlib", "lzma" or "none"
+            level: Compression level (zlib 1-9, lzma preset 0-9)
+            threshold_bytes: Minimum UTF-8 size before compressing
+            dictionary: Optional zlib preset dictionary
+            dictionary_min_bytes: Minimum size for dictionary compression
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown compression algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.level = level
+        self.threshold_bytes = threshold_bytes
+        self.dictionary = dictionary or None
+        self.dictionary_min_bytes = dictionary_min_bytes
+        self.dictionary_id = zlib.crc32(dictionary) if dictionary else 0
+
+    def _deflate(self, data: bytes, zdict: Optional[bytes] = None) -> bytes:
+        if zdict:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=zdict)
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush()
+
+    def encode(self, value: str) -> str:
+        """
+        Convert a client value to its stored form.
+
+        Args:
+            value: Value as sent by the client
+
+        Returns:
+            Raw value or compressed envelope
+        """
+        if self.algorithm == "none" and self.dictionary is None:
+            return MARKER + TAG_RAW + value if value.startswith(MARKER) else value
+        data = value.encode('utf-8')
+
+        if self.dictionary is not None and len(data) >= self.dictionary_min_bytes:
+            payload = _DICT_ID.pack(self.dictionary_id) + self._deflate(data, self.dictionary)
+            tag = TAG_DICT
+        elif self.algorithm != "none" and len(data) >= self.threshold_bytes:
+            if self.algorithm == "zlib":
+                payload = self._deflate(data)
+                tag = TAG_ZLIB
+            else:
+                payload = lzma.compress(data, check=lzma.CHECK_NONE, preset=self.level)
+                tag = TAG_LZMA
+        else:
+            payload = None
+
+        if payload is not None and len(payload) + 2 < len(data):
+            return MARKER + tag + payload.decode('latin-1')
+        return MARKER + TAG_RAW + value if value.startswith(MARKER) else value
+
+    def decode(self, stored: str) -> str:
+        """
+        Convert a stored value back to the client value.
+
+        Args:
+            stored: Raw value or compressed envelope
+
+        Returns:
+            Original value
+        """
+        if not stored.startswith(MARKER) or len(stored) < 2:
+            return stored
+        tag = stored[1]
+        if tag == TAG_RAW:
+            return stored[2:]
+        payload = stored[2:].encode('latin-1')
+        if tag == TAG_ZLIB:
+            return zlib.decompress(payload, -15).decode('utf-8')
+        if tag == TAG_LZMA:
+            return lzma.decompress(payload).decode('utf-8')
+        if tag == TAG_DICT:
+            (dictionary_id,) = _DICT_ID.unpack_from(payload)
+            if dictionary_id != self.dictionary_id:
+                raise ValueError(f"Value compressed with unknown dictionary {dictionary_id:#010x}")
+            decompressor = zlib.decompressobj(-15, zdict=self.dictionary)
+            return (decompressor.decompress(payload[_DICT_ID.size:]) + decompressor.flush()).decode('utf-8')
+        return stored
+
+
+def is_compressed(stored: str) -> bool:
+    """True if `stored` is a compressed envelope."""
+    return stored[:1] == MARKER and stored[1:2] in (TAG_ZLIB, TAG_LZMA, TAG_DICT)
+
+
+def to_wire(stored: str) -> Tuple[str, bytes]:
+    """
+    Split a stored value into (value, compressed_value) proto fields.
+
+    Compressed envelopes travel as bytes (a proto string would have to be
+    UTF-8 and would inflate every byte >= 0x80 to two bytes).
+    """
+    if is_compressed(stored):
+        return "", stored.encode('latin-1')
+    return stored, b""
+
+
+def from_wire(value: str, compressed_value: bytes) -> str:
+    """Inverse of to_wire(): rebuild the stored value from proto fields."""
+    return compressed_value.decode('latin-1') if compressed_value else value
+
+
+def to_disk(text: str) -> bytes:
+    """
+    Encode a key or value for a file.
+
+    UTF-8 would write every char in 0x80-0xFF (i.e. about half of a
+    compressed envelope) as two bytes, so text that fits latin-1 is
+    written as latin-1 behind a 0xFF prefix byte instead. ASCII and other
+    text stay plain UTF-8, which keeps files written before this readable.
+    """
+    if not text.isascii():
+        try:
+            return _LATIN1_PREFIX + text.encode('latin-1')
+        except UnicodeEncodeError:
+            pass
+    return text.encode('utf-8')
+
+
+def from_disk(data) -> str:
+    """Inverse of to_disk() (accepts bytes or a memoryview slice)."""
+    if data[:1] == _LATIN1_PREFIX:
+        return str(data[1:], 'latin-1')
+    return str(data, 'utf-8')
@@ -0,0 +1,251 @@
+"""
+Eviction Policies - Choose which key to drop when a memory budget is exceeded
+"""
+
+import sys
+import time
+import random
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def entry_size(key: str, value: str) -> int:
+    """Approximate memory held by one entry (key + value objects)."""
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class _KeySampler:
+    """Set of keys supporting O(1) add, remove and uniform random sampling."""
+
+    def __init__(self, rng: random.Random):
+        self._keys: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._rng = rng
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str) -> None:
+        if key not in self._index:
+            self._index[key] = len(self._keys)
+            self._keys.append(key)
+
+    def remove(self, key: str) -> None:
+        index = self._index.pop(key, None)
+        if index is None:
+            return
+        last = self._keys.pop()
+        if index < len(self._keys):
+            # Swap the last key into the hole
+            self._keys[index] = last
+            self._index[last] = index
+
+    def sample(self) -> str:
+        return self._keys[self._rng.randrange(len(self._keys))]
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._index.clear()
+
+
+class EvictionPolicy(ABC):
+    """
+    Base class: the engine reports writes, reads and removals (all O(1))
+    and asks for a victim when it is over budget.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def on_write(self, key: str) -> None:
+        """Key inserted or overwritten."""
+
+    @abstractmethod
+    def on_read(self, key: str) -> None:
+        """Key read (hit)."""
+
+    @abstractmethod
+    def on_remove(self, key: str) -> None:
+        """Key deleted, expired or evicted."""
+
+    @abstractmethod
+    def victim(self, exclude: Optional[str] = None) -> Optional[str]:
+        """
+        Pick the next key to evict.
+
+        Args:
+            exclude: Key that must not be chosen (the one being written)
+
+        Returns:
+            Key to evict, or None if no other key is tracked
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget every key."""
+
+
+class LRUPolicy(EvictionPolicy):
+    """Exact least-recently-used order (OrderedDict, O(1) per access)."""
+
+    name = "lru"
+
+    def __init__(self):
+        self._order: OrderedDict = OrderedDict()
+
+    def on_write(self, key: str) -> None:
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def on_read(self, key: str) -> None:
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def on_remove(self, key: str) -> None:
+        self._order.pop(key, None)
+
+    def victim(self, exclude: Optional[str] = None) -> Optional[str]:
+        for key in self._order:
+            if key != exclude:
+                return key
+        return None
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class LFUPolicy(EvictionPolicy):
+    """
+    Approximate least-frequently-used, modelled on Redis allkeys-lfu.
+
+    Each key keeps an 8-bit logarithmic (Morris) counter that is
+    incremented with probability 1 / ((counter - init) * log_factor + 1)
+    and decays by one every `decay_minutes` without access. The victim is
+    the lowest counter among `samples` randomly sampled keys, so both
+    access and eviction are O(1) (O(samples)).
+    """
+
+    name = "lfu"
+    INIT_COUNTER = 5  # New keys start above 0 so they are not evicted at once
+
+    def __init__(self, samples: int = 5, log_factor: int = 10, decay_minutes: float = 1.0,
+                 rng: Optional[random.Random] = None):
+        self.samples = max(samples, 1)
+        self.log_factor = log_factor
+        self.decay_minutes = decay_minutes
+        self._rng = rng or random.Random()
+        self._sampler = _KeySampler(self._rng)
+        self._counters: Dict[str, List[float]] = {}  # key -> [counter, last access minute]
+
+    def _now_minutes(self) -> float:
+        return time.monotonic() / 60.0
+
+    def _decayed(self, entry: List[float], now: float) -> int:
+        counter, last = entry
+        if self.decay_minutes > 0:
+            counter = max(0, counter - int((now - last) / self.decay_minutes))
+        return int(counter)
+
+    def _touch(self, key: str) -> None:
+        now = self._now_minutes()
+        entry = self._counters.get(key)
+        if entry is None:
+            self._counters[key] = [self.INIT_COUNTER, now]
+            self._sampler.add(key)
+            return
+        counter = self._decayed(entry, now)
+        if counter < 255:
+            baseline = max(counter - self.INIT_COUNTER, 0)
+            if self._rng.random() < 1.0 / (baseline * self.log_factor + 1):
+                counter += 1
+        entry[0] = counter
+        entry[1] = now
+
+    def on_write(self, key: str) -> None:
+        self._touch(key)
+
+    def on_read(self, key: str) -> None:
+        if key in self._counters:
+            self._touch(key)
+
+    def on_remove(self, key: str) -> None:
+        if self._counters.pop(key, None) is not None:
+            self._sampler.remove(key)
+
+    def counter(self, key: str) -> int:
+        """Current (decayed) frequency counter of `key` (0 if untracked)."""
+        entry = self._counters.get(key)
+        return self._decayed(entry, self._now_minutes()) if entry else 0
+
+    def victim(self, exclude: Optional[str] = None) -> Optional[str]:
+        if len(self._sampler) == 0 or (len(self._sampler) == 1 and exclude in self._counters):
+            return None
+        now = self._now_minutes()
+        best_key, best_counter = None, None
+        attempts = 0
+        while best_key is None or attempts < self.samples:
+            attempts += 1
+            key = self._sampler.sample()
+            if key == exclude:
+                continue
+            counter = self._decayed(self._counters[key], now)
+            if best_counter is None or counter < best_counter:
+                best_key, best_counter = key, counter
+        return best_key
+
+    def clear(self) -> None:
+        self._counters.clear()
+        self._sampler.clear()
+
+
+class RandomPolicy(EvictionPolicy):
+    """Evict a uniformly random key (Redis allkeys-random)."""
+
+    name = "random"
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self._sampler = _KeySampler(rng or random.Random())
+
+    def on_write(self, key: str) -> None:
+        self._sampler.add(key)
+
+    def on_read(self, key: str) -> None:
+        pass
+
+    def on_remove(self, key: str) -> None:
+        self._sampler.remove(key)
+
+    def victim(self, exclude: Optional[str] = None) -> Optional[str]:
+        if len(self._sampler) == 0 or (len(self._sampler) == 1 and self._sampler.sample() == exclude):
+            return None
+        while True:
+            key = self._sampler.sample()
+            if key != exclude:
+                return key
+
+    def clear(self) -> None:
+        self._sampler.clear()
+
+
+EVICTION_POLICIES = {
+    LRUPolicy.name: LRUPolicy,
+    LFUPolicy.name: LFUPolicy,
+    RandomPolicy.name: RandomPolicy,
+}
+
+
+def create_eviction_policy(name: str, **options) -> EvictionPolicy:
+    """
+    Build an eviction policy by name ("lru", "lfu", "random").
+
+    Args:
+        name: Policy name
+        **options: Policy-specific options (e.g. samples for "lfu")
+
+    Returns:
+        EvictionPolicy instance
+    """
+    if name not in EVICTION_POLICIES:
+        raise ValueError(f"Unknown eviction policy: {name}")
+    return EVICTION_POLICIES[name](**options)
@@ -0,0 +1,853 @@
+"""
+LSM Storage Engine - Log-structured merge tree with background compaction
+"""
+
+import os
+import json
+import time
+import heapq
+import bisect
+import struct
+import threading
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.storage.bloom_filter import BloomFilter
+from src.storage.compression import to_disk, from_disk
+from src.storage.wal import WriteAheadLog, OP_PUT, OP_DELETE
+from src.storage.backend import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+# SSTable layout:
+#   [data blocks][index block][bloom filter][footer]
+# Data block record: [key_len u32][value_len i32][key][value]  (value_len -1 = tombstone)
+# Index entry:       [key_len u32][first key][block_offset u64][block_len u32]
+# Footer:            [index_off u64][index_len u32][bloom_off u64][bloom_len u32][count u64][magic u32]
+_RECORD_HEAD = struct.Struct('<Ii')
+_INDEX_HEAD = struct.Struct('<I')
+_INDEX_TAIL = struct.Struct('<QI')
+_FOOTER = struct.Struct('<QIQIQI')
+SSTABLE_MAGIC = 0x4C534D31  # "LSM1"
+TOMBSTONE = -1
+
+SSTABLE_SUFFIX = ".sst"
+MANIFEST_NAME = "MANIFEST"
+
+
+class _RateLimiter:
+    """Token bucket limiting background I/O to `bytes_per_sec` (0 = unlimited)."""
+
+    def __init__(self, bytes_per_sec: int):
+        self.bytes_per_sec = bytes_per_sec
+        self._allowance = float(bytes_per_sec)
+        self._last = time.monotonic()
+
+    def consume(self, nbytes: int) -> None:
+        if self.bytes_per_sec <= 0:
+            return
+        now = time.monotonic()
+        self._allowance = min(self.bytes_per_sec,
+                              self._allowance + (now - self._last) * self.bytes_per_sec)
+        self._last = now
+        self._allowance -= nbytes
+        if self._allowance < 0:
+            time.sleep(-self._allowance / self.bytes_per_sec)
+
+
+def _tagged(source, priority: int):
+    """Tag (key, value) pairs with a source priority for heapq.merge (0 = newest)."""
+    for key, value in source:
+        yield key, priority, value
+
+
+class Memtable:
+    """
+    In-memory sorted write buffer.
+
+    Keeps a dict for point lookups plus a sorted key list (bisect) for
+    ordered iteration. A value of None is a tombstone.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Optional[str]] = {}
+        self.sorted_keys: List[str] = []
+        self.approximate_bytes = 0
+
+    def put(self, key: str, value: Optional[str]) -> None:
+        old = self.entries.get(key, -1)
+        if old == -1:
+            bisect.insort(self.sorted_keys, key)
+            self.approximate_bytes += len(key) + _RECORD_HEAD.size
+        elif old is not None:
+            self.approximate_bytes -= len(old)
+        self.entries[key] = value
+        if value is not None:
+            self.approximate_bytes += len(value)
+
+    def get(self, key: str) -> Tuple[bool, Optional[str]]:
+        """Return (present, value); present with value None means deleted."""
+        if key in self.entries:
+            return True, self.entries[key]
+        return False, None
+
+    def items_in_range(self, start: Optional[str], end: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+        """Materialize [start, end) in key order (caller holds the engine lock)."""
+        lo = bisect.bisect_left(self.sorted_keys, start) if start is not None else 0
+        hi = bisect.bisect_left(self.sorted_keys, end) if end is not None else len(self.sorted_keys)
+        return [(key, self.entries[key]) for key in self.sorted_keys[lo:hi]]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class SSTable:
+    """
+    Immutable sorted table on disk.
+
+    The block index, Bloom filter and key range are loaded into memory on
+    open, so a point lookup is: range + Bloom check (no I/O) -> bisect on
+    the index -> one block read.
+    Tables are reference counted; an obsolete table (replaced by
+    compaction) is closed and deleted once no reader holds it.
+    """
+
+    def __init__(self, path: str, table_id: int):
+        self.path = path
+        self.table_id = table_id
+        self.size_bytes = os.path.getsize(path)
+        self._file = open(path, 'rb')
+        self._io_lock = threading.Lock()  # Serializes seek+read where os.pread is unavailable
+        self._refs = 1  # Held by the engine's table list
+        self._ref_lock = threading.Lock()
+        self.obsolete = False
+
+        footer = self._pread(self.size_bytes - _FOOTER.size, _FOOTER.size)
+        index_off, index_len, bloom_off, bloom_len, self.count, magic = _FOOTER.unpack(footer)
+        if magic != SSTABLE_MAGIC:
+            raise IOError(f"Bad SSTable magic in {path}")
+
+        self.first_keys: List[str] = []
+        self.blocks: List[Tuple[int, int]] = []
+        index = self._pread(index_off, index_len)
+        offset = 0
+        while offset < len(index):
+            (key_len,) = _INDEX_HEAD.unpack_from(index, offset)
+            offset += _INDEX_HEAD.size
+            self.first_keys.append(index[offset:offset + key_len].decode('utf-8'))
+            offset += key_len
+            self.blocks.append(_INDEX_TAIL.unpack_from(index, offset))
+            offset += _INDEX_TAIL.size
+
+        self.bloom = BloomFilter.from_bytes(self._pread(bloom_off, bloom_len))
+        # Largest key (the footer has no max key; read once from the last block)
+        self.last_key = self._read_block(len(self.blocks) - 1)[-1][0] if self.blocks else None
+
+    def _pread(self, offset: int, length: int) -> bytes:
+        if hasattr(os, 'pread'):
+            return os.pread(self._file.fileno(), length, offset)
+        with self._io_lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    @classmethod
+    def write(cls, path: str, items: Iterator[Tuple[str, Optional[str]]], expected_count: int,
+              block_size: int = 4096, false_positive_rate: float = 0.01,
+              rate_limiter: Optional[_RateLimiter] = None) -> int:
+        """
+        Write sorted (key, value|None) items to a new table file.
+
+        Returns:
+            Number of records written
+        """
+        bloom = BloomFilter(expected_count, false_positive_rate)
+        index_entries = []
+        block = []
+        block_first_key = None
+        block_bytes = 0
+        offset = 0
+        count = 0
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, 'wb') as f:
+            def flush_block():
+                nonlocal offset, block, block_bytes, block_first_key
+                data = b"".join(block)
+                f.write(data)
+                if rate_limiter is not None:
+                    rate_limiter.consume(len(data))
+                key_bytes = block_first_key.encode('utf-8')
+                index_entries.append(_INDEX_HEAD.pack(len(key_bytes)) + key_bytes +
+                                     _INDEX_TAIL.pack(offset, len(data)))
+                offset += len(data)
+                block, block_bytes, block_first_key = [], 0, None
+
+            for key, value in items:
+                key_bytes = key.encode('utf-8')
+                value_bytes = b"" if value is None else to_disk(value)
+                record = _RECORD_HEAD.pack(len(key_bytes), TOMBSTONE if value is None else len(value_bytes)) \
+                    + key_bytes + value_bytes
+                if block_first_key is None:
+                    block_first_key = key
+                block.append(record)
+                block_bytes += len(record)
+                bloom.add(key)
+                count += 1
+                if block_bytes >= block_size:
+                    flush_block()
+            if block:
+                flush_block()
+
+            index_data = b"".join(index_entries)
+            bloom_data = bloom.to_bytes()
+            f.write(index_data)
+            f.write(bloom_data)
+            f.write(_FOOTER.pack(offset, len(index_data), offset + len(index_data),
+                                 len(bloom_data), count, SSTABLE_MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, path)
+        return count
+
+    def _read_block(self, block_idx: int) -> List[Tuple[str, Optional[str]]]:
+        block_off, block_len = self.blocks[block_idx]
+        data = self._pread(block_off, block_len)
+        records = []
+        offset = 0
+        while offset < len(data):
+            key_len, value_len = _RECORD_HEAD.unpack_from(data, offset)
+            offset += _RECORD_HEAD.size
+            key = data[offset:offset + key_len].decode('utf-8')
+            offset += key_len
+            if value_len == TOMBSTONE:
+                records.append((key, None))
+            else:
+                records.append((key, from_disk(data[offset:offset + value_len])))
+                offset += value_len
+        return records
+
+    def may_contain(self, key: str, hashes: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        In-memory check (key range + Bloom filter), no I/O.
+
+        Args:
+            key: Key to look up
+            hashes: BloomFilter.hash_key(key) if already computed
+
+        Returns:
+            False if the key is definitely not in this table
+        """
+        if not self.first_keys or key < self.first_keys[0] or key > self.last_key:
+            return False
+        return self.bloom.might_contain_hashed(hashes or BloomFilter.hash_key(key))
+
+    def get(self, key: str) -> Tuple[bool, Optional[str]]:
+        """Return (present, value); present with value None means deleted."""
+        if not self.may_contain(key):
+            return False, None
+        return self.lookup(key)
+
+    def lookup(self, key: str) -> Tuple[bool, Optional[str]]:
+        """get() without the in-memory pre-check (always reads a block)."""
+        block_idx = bisect.bisect_right(self.first_keys, key) - 1
+        if block_idx < 0:
+            return False, None
+        for record_key, value in self._read_block(block_idx):
+            if record_key == key:
+                return True, value
+            if record_key > key:
+                break
+        return False, None
+
+    def iterate(self, start: Optional[str] = None) -> Iterator[Tuple[str, Optional[str]]]:
+        """Yield (key, value|None) in key order, beginning at `start`."""
+        block_idx = 0
+        if start is not None and self.first_keys:
+            block_idx = max(bisect.bisect_right(self.first_keys, start) - 1, 0)
+        for idx in range(block_idx, len(self.blocks)):
+            for key, value in self._read_block(idx):
+                if start is None or key >= start:
+                    yield key, value
+
+    def acquire(self) -> None:
+        with self._ref_lock:
+            self._refs += 1
+
+    def release(self) -> None:
+        with self._ref_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        self._file.close()
+        if self.obsolete:
+            os.remove(self.path)
+
+
+class LSMStorageEngine(StorageBackend):
+    """
+    Write-optimized storage engine (log-structured merge tree).
+
+    - Writes go to the WAL and a sorted in-memory memtable.
+    - A full memtable becomes immutable and is flushed by a background
+      thread to an SSTable (sorted blocks + block index + Bloom filter).
+    - Reads check memtable -> immutable memtable -> SSTables newest first,
+      skipping tables whose key range or Bloom filter rules the key out
+      (the key is hashed once per lookup, not once per table). Skipped
+      tables are counted in bloom_skips (disk reads avoided), block reads
+      that still miss in bloom_false_positives.
+    - Size-tiered compaction (on the same background thread) merges runs
+      of adjacent, similarly sized tables into one, with an optional
+      bytes/sec throttle so it does not starve foreground I/O.
+    - The live table list is stored in a MANIFEST file (atomic rewrite).
+
+    Supports ordered iteration (iter_items) and prefix/range scans (scan)
+    in addition to the StorageEngine API.
+    """
+
+    supports_scan = True
+
+    def __init__(self, data_dir: str, memtable_bytes: int = 4 * 1024 * 1024,
+                 block_size: int = 4096, compaction_min_tables: int = 4,
+                 compaction_size_ratio: float = 4.0,
+                 compaction_max_bytes_per_sec: int = 0,
+                 bloom_false_positive_rate: float = 0.01,
+                 wal_fsync_policy: str = WriteAheadLog.FSYNC_INTERVAL):
+        """
+        Open (or create) an LSM store in `data_dir`.
+
+        Args:
+            data_dir: Directory for SSTables, MANIFEST and the WAL
+            memtable_bytes: Flush the memtable past this approximate size
+            block_size: Target SSTable data block size
+            compaction_min_tables: Minimum run length to compact
+            compaction_size_ratio: Max size ratio between tables of one run
+            compaction_max_bytes_per_sec: Compaction write throttle (0 = off)
+            bloom_false_positive_rate: Target FP rate of per-table filters
+            wal_fsync_policy: Fsync policy of the memtable WAL
+        """
+        self.data_dir = data_dir
+        self.memtable_bytes = memtable_bytes
+        self.block_size = block_size
+        self.compaction_min_tables = compaction_min_tables
+        self.compaction_size_ratio = compaction_size_ratio
+        self.compaction_max_bytes_per_sec = compaction_max_bytes_per_sec
+        self.bloom_false_positive_rate = bloom_false_positive_rate
+
+        self.lock = threading.RLock()
+        self._cond = threading.Condition(self.lock)
+        self.memtable = Memtable()
+        self.immutable: Optional[Memtable] = None  # Being flushed
+        self._immutable_lsn = 0  # WAL records up to here are in `immutable`
+        self.tables: List[SSTable] = []  # Newest first
+        self._next_table_id = 1
+        self._closed = False
+
+        # Stats
+        self.flush_count = 0
+        self.compaction_count = 0
+        self.bloom_skips = 0  # SSTable lookups answered without a disk read
+        self.bloom_false_positives = 0  # Block reads that did not find the key
+        self._stats_lock = threading.Lock()
+
+        os.makedirs(data_dir, exist_ok=True)
+        self._load_manifest()
+
+        self.wal = WriteAheadLog(os.path.join(data_dir, 'wal'), fsync_policy=wal_fsync_policy)
+        replayed = self.wal.replay(self._apply_wal_record)
+        if replayed:
+            logger.info(f"LSM: replayed {replayed} WAL records into memtable")
+
+        self._worker = threading.Thread(target=self._background_loop, daemon=True)
+        self._worker.start()
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    def _table_path(self, table_id: int) -> str:
+        return os.path.join(self.data_dir, f"{table_id:06d}{SSTABLE_SUFFIX}")
+
+    def _load_manifest(self) -> None:
+        manifest_path = os.path.join(self.data_dir, MANIFEST_NAME)
+        live_ids = []
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            live_ids = manifest['tables']
+            self._next_table_id = manifest['next_table_id']
+
+        # Remove tables left behind by an interrupted flush/compaction
+        for name in os.listdir(self.data_dir):
+            if name.endswith(SSTABLE_SUFFIX) or name.endswith(SSTABLE_SUFFIX + ".tmp"):
+                table_id = int(name.split('.')[0])
+                if table_id not in live_ids or name.endswith(".tmp"):
+                    os.remove(os.path.join(self.data_dir, name))
+
+        self.tables = [SSTable(self._table_path(table_id), table_id) for table_id in live_ids]
+        if self.tables:
+            logger.info(f"LSM: opened {len(self.tables)} SSTables")
+
+    def _save_manifest(self) -> None:
+        """Atomically persist the live table list. Caller holds self.lock."""
+        manifest_path = os.path.join(self.data_dir, MANIFEST_NAME)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'next_table_id': self._next_table_id,
+                'tables': [table.table_id for table in self.tables]
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, manifest_path)
+
+    def _allocate_table_id(self) -> int:
+        with self.lock:
+            table_id = self._next_table_id
+            self._next_table_id += 1
+            return table_id
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def _apply_wal_record(self, op: int, key: str, value: str) -> None:
+        self.memtable.put(key, value if op == OP_PUT else None)
+
+    def _write(self, key: str, value: Optional[str]) -> None:
+        self._write_many([(key, value)])
+
+    def _write_many(self, pairs: List[Tuple[str, Optional[str]]]) -> None:
+        """Log and apply PUTs (value None = tombstone) in one lock acquisition."""
+        if not pairs:
+            return
+        with self.lock:
+            # Backpressure: wait while the previous memtable is still flushing
+            while (self.memtable.approximate_bytes >= self.memtable_bytes
+                   and self.immutable is not None and not self._closed):
+                self._cond.wait()
+            if self._closed:
+                raise IOError("LSM engine is closed")
+
+            for key, value in pairs:
+                lsn = self.wal.append(OP_PUT if value is not None else OP_DELETE, key, value or "")
+                self.memtable.put(key, value)
+
+            if self.memtable.approximate_bytes >= self.memtable_bytes and self.immutable is None:
+                self._immutable_lsn = self.wal.rotate()
+                self.immutable = self.memtable
+                self.memtable = Memtable()
+                self._cond.notify_all()
+        self.wal.wait_durable(lsn)
+
+    def put(self, key: str, value: str) -> bool:
+        """
+        Save key-value pair (WAL + memtable).
+
+        Args:
+            key: Key to save
+            value: Value to save
+
+        Returns:
+            True if saved successfully
+        """
+        try:
+            self._write(key, value)
+            return True
+        except Exception as e:
+            raise Exception(f"PUT failed: {str(e)}")
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete key by writing a tombstone (idempotent).
+
+        Args:
+            key: Key to delete
+
+        Returns:
+            True if key was found and deleted, False if key didn't exist
+        """
+        try:
+            _, found = self.get(key)
+            if not found:
+                return False
+            self._write(key, None)
+            return True
+        except Exception as e:
+            raise Exception(f"DELETE failed: {str(e)}")
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> int:
+        """
+        Save many key-value pairs (one lock acquisition, one WAL durability wait).
+
+        Args:
+            items: Iterable of (key, value) pairs (or a dict)
+
+        Returns:
+            Number of pairs written
+        """
+        try:
+            pairs = list(items.items()) if isinstance(items, dict) else list(items)
+            self._write_many(pairs)
+            return len(pairs)
+        except Exception as e:
+            raise Exception(f"PUT_MANY failed: {str(e)}")
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Write tombstones for the keys that exist (one WAL durability wait).
+
+        Args:
+            keys: Keys to delete
+
+        Returns:
+            Number of keys that existed and were deleted
+        """
+        try:
+            existing = list(self.get_many(keys))
+            self._write_many([(key, None) for key in existing])
+            return len(existing)
+        except Exception as e:
+            raise Exception(f"DELETE_MANY failed: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def _acquire_tables(self) -> List[SSTable]:
+        """Snapshot and pin the current table list. Caller holds self.lock."""
+        tables = list(self.tables)
+        for table in tables:
+            table.acquire()
+        return tables
+
+    def get(self, key: str) -> Tuple[Optional[str], bool]:
+        """
+        Retrieve value by key (memtables first, then SSTables newest first).
+
+        Args:
+            key: Key to retrieve
+
+        Returns:
+            Tuple of (value, found)
+        """
+        try:
+            with self.lock:
+                for memtable in (self.memtable, self.immutable):
+                    if memtable is not None:
+                        present, value = memtable.get(key)
+                        if present:
+                            return (value, True) if value is not None else (None, False)
+                tables = self._acquire_tables()
+
+            try:
+                present, value = self._get_from_tables(tables, key)
+                return (value, True) if present and value is not None else (None, False)
+            finally:
+                for table in tables:
+                    table.release()
+        except Exception as e:
+            raise Exception(f"GET failed: {str(e)}")
+
+    def _get_from_tables(self, tables: List[SSTable], key: str) -> Tuple[bool, Optional[str]]:
+        """
+        Look `key` up in pinned SSTables, newest first.
+
+        The key is hashed once; tables ruled out by their key range or
+        Bloom filter cost no I/O.
+
+        Returns:
+            (present, value); present with value None means deleted
+        """
+        hashes = BloomFilter.hash_key(key)
+        skipped = 0
+        false_positives = 0
+        result = (False, None)
+        for table in tables:
+            if not table.may_contain(key, hashes):
+                skipped += 1
+                continue
+            present, value = table.lookup(key)
+            if present:
+                result = (True, value)
+                break
+            false_positives += 1
+        if skipped or false_positives:
+            with self._stats_lock:
+                self.bloom_skips += skipped
+                self.bloom_false_positives += false_positives
+        return result
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Retrieve many keys against one pinned set of SSTables.
+
+        Args:
+            keys: Keys to retrieve
+
+        Returns:
+            Dict {key: value} for the keys that exist
+        """
+        try:
+            result = {}
+            missing = []
+            with self.lock:
+                for key in keys:
+                    for memtable in (self.memtable, self.immutable):
+                        if memtable is not None:
+                            present, value = memtable.get(key)
+                            if present:
+                                if value is not None:
+                                    result[key] = value
+                                break
+                    else:
+                        missing.append(key)
+                tables = self._acquire_tables()
+
+            try:
+                for key in missing:
+                    present, value = self._get_from_tables(tables, key)
+                    if present and value is not None:
+                        result[key] = value
+                return result
+            finally:
+                for table in tables:
+                    table.release()
+        except Exception as e:
+            raise Exception(f"GET_MANY failed: {str(e)}")
+
+    def iter_items(self, start: Optional[str] = None,
+                   end: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+        """
+        Iterate live (key, value) pairs in key order over [start, end).
+
+        Merges memtables and SSTables; for duplicate keys the newest source
+        wins and tombstones hide older values.
+        """
+        with self.lock:
+            sources = [self.memtable.items_in_range(start, end)]
+            if self.immutable is not None:
+                sources.append(self.immutable.items_in_range(start, end))
+            tables = self._acquire_tables()
+
+        try:
+            sources.extend(table.iterate(start) for table in tables)
+            tagged = [_tagged(source, priority) for priority, source in enumerate(sources)]
+            last_key = None
+            for key, _, value in heapq.merge(*tagged):
+                if end is not None and key >= end:
+                    break
+                if key == last_key:
+                    continue  # Older version of a key already emitted/skipped
+                last_key = key
+                if value is not None:
+                    yield key, value
+        finally:
+            for table in tables:
+                table.release()
+
+    def scan(self, prefix: Optional[str] = None, start: Optional[str] = None,
+             end: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        Ordered range / prefix scan.
+
+        Args:
+            prefix: Only keys starting with this prefix
+            start: Inclusive lower bound
+            end: Exclusive upper bound
+            limit: Maximum number of pairs to return
+
+        Returns:
+            List of (key, value) in key order
+        """
+        if prefix:
+            start = max(start, prefix) if start is not None else prefix
+        result = []
+        for key, value in self.iter_items(start, end):
+            if prefix and not key.startswith(prefix):
+                break
+            result.append((key, value))
+            if limit and len(result) >= limit:
+                break
+        return result
+
+    def list_keys(self) -> List[str]:
+        """
+        Get list of all keys (full ordered scan).
+
+        Returns:
+            List of all keys in key order
+        """
+        try:
+            return [key for key, _ in self.iter_items()]
+        except Exception as e:
+            raise Exception(f"LISTKEYS failed: {str(e)}")
+
+    def size(self) -> int:
+        """Get total number of live keys (full scan)."""
+        return sum(1 for _ in self.iter_items())
+
+    # ------------------------------------------------------------------
+    # Background flush + compaction
+    # ------------------------------------------------------------------
+
+    def _background_loop(self) -> None:
+        while True:
+            with self.lock:
+                while not self._closed and self.immutable is None and not self._pick_compaction():
+                    self._cond.wait(timeout=1.0)
+                if self._closed:
+                    return
+                immutable = self.immutable
+                immutable_lsn = self._immutable_lsn
+
+            try:
+                if immutable is not None:
+                    self._flush_memtable(immutable, immutable_lsn)
+                else:
+                    self._compact()
+            except Exception as e:
+                logger.error(f"LSM background task failed: {e}")
+                time.sleep(1.0)
+
+    def _flush_memtable(self, immutable: Memtable, immutable_lsn: int) -> None:
+        """Write an immutable memtable to a new SSTable."""
+        table_id = self._allocate_table_id()
+        path = self._table_path(table_id)
+        start = time.time()
+        SSTable.write(path, iter(immutable.items_in_range(None, None)), len(immutable),
+                      self.block_size, self.bloom_false_positive_rate)
+        table = SSTable(path, table_id)
+
+        with self.lock:
+            self.tables.insert(0, table)
+            self.immutable = None
+            self._save_manifest()
+            self.flush_count += 1
+            self._cond.notify_all()
+
+        # Records up to immutable_lsn are now in the SSTable
+        self.wal.purge(immutable_lsn)
+        logger.info(
+            f"LSM flush: table {table_id} ({len(immutable)} keys, "
+            f"{table.size_bytes} bytes) in {time.time() - start:.2f}s"
+        )
+
+    def _pick_compaction(self) -> List[SSTable]:
+        """
+        Pick a run of adjacent (in age) tables of similar size to merge.
+        Caller holds self.lock.
+
+        Only adjacent tables are merged so the output can take their place
+        in the newest-first order without reordering versions of a key.
+        """
+        tables = self.tables
+        i = 0
+        while i <= len(tables) - self.compaction_min_tables:
+            j = i + 1
+            smallest = largest = tables[i].size_bytes
+            while j < len(tables):
+                size = tables[j].size_bytes
+                if max(largest, size) > self.compaction_size_ratio * max(min(smallest, size), 1):
+                    break
+                smallest, largest = min(smallest, size), max(largest, size)
+                j += 1
+            if j - i >= self.compaction_min_tables:
+                return tables[i:j]
+            i += 1
+        return []
+
+    def _compact(self) -> None:
+        """Merge one picked run of tables into a single table."""
+        with self.lock:
+            run = self._pick_compaction()
+            if not run:
+                return
+            for table in run:
+                table.acquire()
+            # Tombstones can be dropped only if nothing older lies below the run
+            drop_tombstones = run[-1] is self.tables[-1]
+
+        start = time.time()
+        try:
+            tagged = [_tagged(table.iterate(), priority) for priority, table in enumerate(run)]
+
+            def merged():
+                last_key = None
+                for key, _, value in heapq.merge(*tagged):
+                    if key == last_key:
+                        continue
+                    last_key = key
+                    if value is None and drop_tombstones:
+                        continue
+                    yield key, value
+
+            table_id = self._allocate_table_id()
+            path = self._table_path(table_id)
+            SSTable.write(path, merged(), sum(table.count for table in run),
+                          self.block_size, self.bloom_false_positive_rate,
+                          _RateLimiter(self.compaction_max_bytes_per_sec))
+            output = SSTable(path, table_id)
+
+            with self.lock:
+                # New flushes only prepend, so the run is still contiguous
+                idx = self.tables.index(run[0])
+                self.tables[idx:idx + len(run)] = [output]
+                self._save_manifest()
+                self.compaction_count += 1
+                for table in run:
+                    table.obsolete = True
+                    table.release()  # Drop the table list's reference
+        finally:
+            for table in run:
+                table.release()
+
+        logger.info(
+            f"LSM compaction: {len(run)} tables -> table {table_id} "
+            f"({output.size_bytes} bytes) in {time.time() - start:.2f}s"
+        )
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def flush(self) -> None:
+        """Force the current memtable to disk and wait for it (for testing/shutdown)."""
+        with self.lock:
+            while self.immutable is not None:
+                self._cond.wait()
+            if len(self.memtable) == 0:
+                return
+            self._immutable_lsn = self.wal.rotate()
+            self.immutable = self.memtable
+            self.memtable = Memtable()
+            self._cond.notify_all()
+            while self.immutable is not None:
+                self._cond.wait()
+
+    def clear(self) -> None:
+        """Delete all data (for testing)."""
+        with self.lock:
+            while self.immutable is not None:
+                self._cond.wait()
+            for table in self.tables:
+                table.obsolete = True
+                table.release()
+            self.tables = []
+            self.memtable = Memtable()
+            self._save_manifest()
+            self.wal.purge(self.wal.rotate())
+
+    def close(self) -> None:
+        """Stop the background thread and close the WAL and tables."""
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout=5.0)
+        self.wal.close()
+        with self.lock:
+            for table in self.tables:
+                table.release()
+            self.tables = []
@@ -0,0 +1,225 @@
+"""
+MVCC Snapshots - O(1) copy-on-write snapshots of in-memory engines
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+_MISSING = object()
+_DELETED = object()  # Marker in an overlay: key removed since the layer below was frozen
+
+
+class LayeredDict:
+    """
+    Mutable overlay on top of a frozen mapping (a dict or another LayeredDict).
+
+    Writes go to `top` (deletes of keys present below become _DELETED
+    markers); reads check `top` first and fall through to `base`. The base
+    is never mutated while any snapshot can see it, so a snapshot can
+    iterate it without a lock. Supports the subset of the dict API the
+    engines use, with an O(1) len().
+    """
+
+    __slots__ = ('top', 'base', '_len')
+
+    def __init__(self, base):
+        self.top = {}
+        self.base = base
+        self._len = len(base)
+
+    def get(self, key, default=None):
+        value = self.top.get(key, _MISSING)
+        if value is _MISSING:
+            return self.base.get(key, default)
+        return default if value is _DELETED else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __setitem__(self, key, value) -> None:
+        if self.get(key, _MISSING) is _MISSING:
+            self._len += 1
+        self.top[key] = value
+
+    def pop(self, key, default=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        if self.base.get(key, _MISSING) is _MISSING:
+            del self.top[key]
+        else:
+            self.top[key] = _DELETED
+        self._len -= 1
+        return value
+
+    def update(self, items) -> None:
+        for key, value in (items.items() if hasattr(items, 'items') else items):
+            self[key] = value
+
+    def clear(self) -> None:
+        # New objects: the old base may still be visible to a snapshot
+        self.top = {}
+        self.base = {}
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __iter__(self) -> Iterator:
+        top = self.top
+        for key, value in top.items():
+            if value is not _DELETED:
+                yield key
+        for key in self.base:
+            if key not in top:
+                yield key
+
+    def keys(self) -> Iterator:
+        return iter(self)
+
+    def items(self) -> Iterator[Tuple]:
+        top = self.top
+        for key, value in top.items():
+            if value is not _DELETED:
+                yield key, value
+        for key, value in self.base.items():
+            if key not in top:
+                yield key, value
+
+    def values(self) -> Iterator:
+        return (value for _, value in self.items())
+
+
+def collapse_step(mapping, budget: int):
+    """
+    Fold up to `budget` entries of the lowest overlay into the dict below it.
+
+    Only call when no snapshot can see any layer of `mapping`. The view of
+    every layer is unchanged after each step, so readers under the engine
+    lock never notice; once an overlay is empty it is unlinked.
+
+    Returns:
+        Tuple of (new root mapping, entries moved); the root is a plain
+        dict once everything has been folded
+    """
+    if not isinstance(mapping, LayeredDict):
+        return mapping, 0
+    parent = None
+    low = mapping
+    while isinstance(low.base, LayeredDict):
+        parent, low = low, low.base
+    base = low.base
+    top = low.top
+    moved = 0
+    while top and moved < budget:
+        key, value = top.popitem()
+        if value is _DELETED:
+            base.pop(key, None)
+        else:
+            base[key] = value
+        moved += 1
+    if not top:
+        if parent is None:
+            return base, moved
+        parent.base = base
+    return mapping, moved
+
+
+class StorageSnapshot:
+    """
+    Point-in-time, read-only view of one StorageEngine.
+
+    Created in O(1) by StorageEngine.snapshot(): the engine's dicts are
+    frozen and writers continue on fresh overlays, so iterating a snapshot
+    takes no lock and never blocks writers. Call close() (or use it as a
+    context manager) when done so the engine can fold its overlays back.
+    """
+
+    def __init__(self, engine, storage, expiry, versions, taken_at_ms: int, lsn: int = 0):
+        self._engine = engine
+        self._storage = storage
+        self._expiry = expiry
+        self._versions = versions
+        self.taken_at_ms = taken_at_ms
+        self.lsn = lsn
+        self._closed = False
+
+    def _is_live(self, key) -> bool:
+        expire_at_ms = self._expiry.get(key) if self._expiry else None
+        return expire_at_ms is None or expire_at_ms > self.taken_at_ms
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate (key, value) pairs live at snapshot time (no lock held)."""
+        for key, value in self._storage.items():
+            if self._is_live(key):
+                yield key, value
+
+    def get(self, key: str) -> Tuple[Optional[str], bool]:
+        """Value of `key` at snapshot time as (value, found)."""
+        value = self._storage.get(key)
+        if value is None or not self._is_live(key):
+            return None, False
+        return value, True
+
+    def get_version(self, key: str):
+        """Version of `key` at snapshot time (None if unversioned)."""
+        return self._versions.get(key)
+
+    def __len__(self) -> int:
+        """Number of keys at snapshot time (including expired, not yet swept keys)."""
+        return len(self._storage)
+
+    def close(self) -> None:
+        """Release the snapshot (idempotent)."""
+        if not self._closed:
+            self._closed = True
+            self._engine._release_snapshot()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardedSnapshot:
+    """Consistent snapshot of every stripe of a ShardedStorageEngine."""
+
+    def __init__(self, snapshots: List[StorageSnapshot], lsn: int = 0):
+        self.snapshots = snapshots
+        self.lsn = lsn
+
+    def _snapshot_for(self, key: str) -> StorageSnapshot:
+        return self.snapshots[hash(key) % len(self.snapshots)]
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate (key, value) pairs of every stripe (no lock held)."""
+        for snapshot in self.snapshots:
+            yield from snapshot.items()
+
+    def get(self, key: str) -> Tuple[Optional[str], bool]:
+        return self._snapshot_for(key).get(key)
+
+    def get_version(self, key: str):
+        return self._snapshot_for(key).get_version(key)
+
+    def __len__(self) -> int:
+        return sum(len(snapshot) for snapshot in self.snapshots)
+
+    def close(self) -> None:
+        for snapshot in self.snapshots:
+            snapshot.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,253 @@
+"""
+Redis Storage Engine - Key-value store backed by a Redis server
+"""
+
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # Optional dependency (only needed for engine = "redis")
+    redis = None
+
+from src.storage.backend import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class RedisStorageEngine(StorageBackend):
+    """
+    Storage backed by Redis (one Redis instance per node, see
+    config/redis-63*.conf and redis_host/redis_port in cluster.json).
+
+    - Connection pools are shared per (host, port, db) across engine
+      instances, so gRPC and replication workers reuse connections.
+    - Keys are namespaced with `key_prefix`, so several nodes (or other
+      applications) can share one Redis without seeing each other's keys.
+    - put_many / get_many / delete_many send one pipelined round-trip
+      (chunked MSET / MGET / DEL) instead of one per key.
+    - list_keys / size / clear iterate with SCAN, never KEYS, so they do
+      not block the Redis server on large datasets.
+
+    Exposes the same API as StorageEngine.
+    """
+
+    supports_ttl = True
+
+    _pools: Dict[Tuple[str, int, int], 'redis.ConnectionPool'] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 key_prefix: str = "kv:", max_connections: int = 32,
+                 scan_count: int = 1000, batch_size: int = 1000,
+                 socket_timeout: float = 5.0):
+        """
+        Connect to Redis through the shared pool for (host, port, db).
+
+        Args:
+            host: Redis host
+            port: Redis port
+            db: Redis database index
+            key_prefix: Namespace prepended to every key
+            max_connections: Pool size (shared by all engines on the pool)
+            scan_count: COUNT hint for SCAN
+            batch_size: Keys per MSET/MGET/DEL command in batch operations
+            socket_timeout: Socket timeout in seconds
+        """
+        if redis is None:
+            raise ImportError("RedisStorageEngine requires the 'redis' package (pip install redis)")
+
+        self.host = host
+        self.port = port
+        self.db = db
+        self.key_prefix = key_prefix
+        self.scan_count = scan_count
+        self.batch_size = batch_size
+
+        self.pool = self._get_pool(host, port, db, max_connections, socket_timeout)
+        self.client = redis.Redis(connection_pool=self.pool)
+
+    @classmethod
+    def _get_pool(cls, host: str, port: int, db: int, max_connections: int,
+                  socket_timeout: float) -> 'redis.ConnectionPool':
+        """Return the process-wide connection pool for (host, port, db)."""
+        with cls._pools_lock:
+            pool = cls._pools.get((host, port, db))
+            if pool is None:
+                pool = redis.ConnectionPool(
+                    host=host, port=port, db=db,
+                    max_connections=max_connections,
+                    socket_timeout=socket_timeout,
+                    decode_responses=True
+                )
+                cls._pools[(host, port, db)] = pool
+                logger.info(f"Redis connection pool created for {host}:{port}/{db}")
+            return pool
+
+    def _key(self, key: str) -> str:
+        return self.key_prefix + key
+
+    def _match_pattern(self) -> str:
+        """SCAN MATCH pattern for our namespace (glob chars in prefix escaped)."""
+        escaped = "".join("\\" + c if c in "*?[]\\" else c for c in self.key_prefix)
+        return escaped + "*"
+
+    def put(self, key: str, value: str, expire_at_ms: Optional[int] = None) -> bool:
+        """
+        Save key-value pair (SET, with PXAT if the key expires).
+
+        Args:
+            key: Key to save
+            value: Value to save
+            expire_at_ms: Absolute expiry time in ms (None = never expires)
+
+        Returns:
+            True if saved successfully
+        """
+        try:
+            return bool(self.client.set(self._key(key), value, pxat=expire_at_ms or None))
+        except Exception as e:
+            raise Exception(f"PUT failed: {str(e)}")
+
+    def get(self, key: str) -> Tuple[Optional[str], bool]:
+        """
+        Retrieve value by key (GET).
+
+        Args:
+            key: Key to retrieve
+
+        Returns:
+            Tuple of (value, found)
+        """
+        try:
+            value = self.client.get(self._key(key))
+            return value, value is not None
+        except Exception as e:
+            raise Exception(f"GET failed: {str(e)}")
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete key (DEL, idempotent).
+
+        Args:
+            key: Key to delete
+
+        Returns:
+            True if key was found and deleted, False if key didn't exist
+        """
+        try:
+            return self.client.delete(self._key(key)) == 1
+        except Exception as e:
+            raise Exception(f"DELETE failed: {str(e)}")
+
+    def _chunks(self, items: List) -> Iterable[List]:
+        for i in range(0, len(items), self.batch_size):
+            yield items[i:i + self.batch_size]
+
+    def put_many(self, items: Iterable[Tuple[str, str]],
+                 expiry: Optional[Dict[str, int]] = None) -> int:
+        """
+        Save many key-value pairs in one pipelined round-trip.
+
+        Args:
+            items: Iterable of (key, value) pairs (or a dict)
+            expiry: Optional {key: expire_at_ms}; those keys use SET PXAT
+
+        Returns:
+            Number of pairs written
+        """
+        try:
+            pairs = list(items.items()) if isinstance(items, dict) else list(items)
+            if not pairs:
+                return 0
+            pipe = self.client.pipeline(transaction=False)
+            if expiry:
+                for key, value in pairs:
+                    if key in expiry:
+                        pipe.set(self._key(key), value, pxat=expiry[key])
+                pairs_to_mset = [(key, value) for key, value in pairs if key not in expiry]
+            else:
+                pairs_to_mset = pairs
+            for chunk in self._chunks(pairs_to_mset):
+                pipe.mset({self._key(key): value for key, value in chunk})
+            pipe.execute()
+            return len(pairs)
+        except Exception as e:
+            raise Exception(f"PUT_MANY failed: {str(e)}")
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Retrieve many keys in one pipelined round-trip.
+
+        Args:
+            keys: Keys to retrieve
+
+        Returns:
+            Dict {key: value} for the keys that exist
+        """
+        try:
+            keys = list(keys)
+            if not keys:
+                return {}
+            pipe = self.client.pipeline(transaction=False)
+            for chunk in self._chunks(keys):
+                pipe.mget([self._key(key) for key in chunk])
+            values = [value for chunk_values in pipe.execute() for value in chunk_values]
+            return {key: value for key, value in zip(keys, values) if value is not None}
+        except Exception as e:
+            raise Exception(f"GET_MANY failed: {str(e)}")
+
+    def delete_many(self, keys: List[str]) -> int:
+        """
+        Delete many keys in one pipelined round-trip.
+
+        Args:
+            keys: Keys to delete
+
+        Returns:
+            Number of keys that existed and were deleted
+        """
+        try:
+            keys = list(keys)
+            if not keys:
+                return 0
+            pipe = self.client.pipeline(transaction=False)
+            for chunk in self._chunks(keys):
+                pipe.delete(*[self._key(key) for key in chunk])
+            return sum(pipe.execute())
+        except Exception as e:
+            raise Exception(f"DELETE_MANY failed: {str(e)}")
+
+    def _scan_raw_keys(self) -> Iterable[str]:
+        return self.client.scan_iter(match=self._match_pattern(), count=self.scan_count)
+
+    def list_keys(self) -> List[str]:
+        """
+        Get list of all keys in our namespace (SCAN, non-blocking for Redis).
+
+        Returns:
+            List of all keys
+        """
+        try:
+            prefix_len = len(self.key_prefix)
+            return [raw_key[prefix_len:] for raw_key in self._scan_raw_keys()]
+        except Exception as e:
+            raise Exception(f"LISTKEYS failed: {str(e)}")
+
+    def size(self) -> int:
+        """Get total number of keys in our namespace."""
+        if not self.key_prefix:
+            return self.client.dbsize()
+        return sum(1 for _ in self._scan_raw_keys())
+
+    def clear(self) -> None:
+        """Delete every key in our namespace (for testing)."""
+        batch = []
+        for raw_key in self._scan_raw_keys():
+            batch.append(raw_key)
+            if len(batch) >= self.batch_size:
+                self.client.delete(*batch)
+                batch = []
+        if batch:
+            self.client.delete(*batch)
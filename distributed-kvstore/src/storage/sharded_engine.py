@@ -0,0 +1,498 @@
+"""
+Sharded Storage Engine - Lock-striped in-memory key-value store
+"""
+
+import heapq
+from contextlib import ExitStack
+from itertools import islice
+from typing import Callable, Dict, Iterable, Tuple, List, Optional
+
+from src.storage.storage_engine import StorageEngine, now_ms
+from src.storage.wal import WriteAheadLog
+from src.storage.eviction import create_eviction_policy
+from src.storage.versioning import Version
+from src.storage.mvcc import ShardedSnapshot
+from src.storage.changefeed import ChangeFeed
+from src.storage.backend import StorageBackend
+
+
+class ShardedStorageEngine(StorageBackend):
+    """
+    In-memory storage split into N independent stripes (dict + RLock each).
+
+    A key is always routed to the same stripe (Python's cached str hash
+    modulo the stripe count; stripes are never persisted, so per-process
+    hash randomization does not matter), so operations on different
+    stripes never contend on the same lock. Single-key operations only take their stripe lock;
+    cross-stripe operations (list_keys, size, clear) take every stripe
+    lock in index order to return a consistent view. scan() merges the
+    ordered results of every stripe (heapq.merge). Batch operations
+    (put_many, get_many, delete_many) group keys by stripe and hold only
+    the stripes they touch, all at once, so a batch is applied atomically.
+
+    Exposes the same API as StorageEngine. All stripes share one
+    WriteAheadLog, so concurrent writers on different stripes are batched
+    into the same group commit. Likewise a ChangeFeed is shared, giving
+    watchers one stream of every stripe's writes.
+    """
+
+    supports_ttl = True
+    supports_scan = True
+    supports_snapshot = True
+    supports_versions = True
+    supports_tombstones = True
+
+    def __init__(self, num_shards: int = 16, wal: Optional[WriteAheadLog] = None,
+                 expiry_tick_ms: int = 100, max_memory_bytes: int = 0,
+                 eviction_policy: str = "lru", eviction_options: Optional[dict] = None,
+                 ordered_index: bool = False, keep_tombstones: bool = False,
+                 change_feed: Optional[ChangeFeed] = None):
+        """
+        Initialize storage with `num_shards` empty stripes.
+
+        Args:
+            num_shards: Number of independent stripes (default 16)
+            wal: Optional WriteAheadLog shared by all stripes
+            expiry_tick_ms: Resolution of each stripe's expiry timer wheel
+            max_memory_bytes: Total memory budget, split evenly between
+                              stripes (0 = unbounded)
+            eviction_policy: "lru", "lfu" or "random" (one instance per stripe)
+            eviction_options: Extra options for the policy (e.g. samples)
+            ordered_index: Maintain a sorted key index per stripe for scan()
+            keep_tombstones: Record a tombstone for every explicit delete
+            change_feed: Optional ChangeFeed shared by all stripes
+        """
+        if num_shards <= 0:
+            raise ValueError("num_shards must be positive")
+        self.num_shards = num_shards
+        self.wal = wal
+        self.max_memory_bytes = max_memory_bytes
+        self.keep_tombstones = keep_tombstones
+        self.change_feed = change_feed
+        stripe_budget = max_memory_bytes // num_shards if max_memory_bytes else 0
+        self.shards = [
+            StorageEngine(
+                wal=wal,
+                expiry_tick_ms=expiry_tick_ms,
+                max_memory_bytes=stripe_budget,
+                eviction_policy=(create_eviction_policy(eviction_policy, **(eviction_options or {}))
+                                 if stripe_budget else None),
+                ordered_index=ordered_index,
+                keep_tombstones=keep_tombstones,
+                change_feed=change_feed
+            )
+            for _ in range(num_shards)
+        ]
+
+    def _shard_for(self, key: str) -> StorageEngine:
+        """Return the stripe responsible for `key`."""
+        return self.shards[hash(key) % self.num_shards]
+
+    def _lock_all(self) -> ExitStack:
+        """
+        Acquire every stripe lock in index order.
+
+        Always locking in the same order means two concurrent cross-stripe
+        operations cannot deadlock each other.
+        """
+        return self._lock_shards(range(self.num_shards))
+
+    def _lock_shards(self, indices: Iterable[int]) -> ExitStack:
+        """Acquire the locks of the given stripes in index order."""
+        stack = ExitStack()
+        for index in sorted(indices):
+            stack.enter_context(self.shards[index].lock)
+        return stack
+
+    def _group_by_shard(self, keys: Iterable) -> Dict[int, List]:
+        """Group keys (or (key, value) pairs) by stripe index."""
+        groups: Dict[int, List] = {}
+        for item in keys:
+            key = item[0] if isinstance(item, tuple) else item
+            groups.setdefault(hash(key) % self.num_shards, []).append(item)
+        return groups
+
+    def put(self, key: str, value: str, expire_at_ms: Optional[int] = None,
+            version: Optional[Version] = None) -> bool:
+        """
+        Save key-value pair to its stripe.
+
+        Args:
+            key: Key to save
+            value: Value to save
+            expire_at_ms: Absolute expiry time in ms (None = never expires)
+            version: (timestamp_ms, node_id) of the write (None = unversioned)
+
+        Returns:
+            True if saved, False if rejected as older than the stored version
+        """
+        return self._shard_for(key).put(key, value, expire_at_ms, version)
+
+    def get(self, key: str) -> Tuple[Optional[str], bool]:
+        """
+        Retrieve value by key from its stripe.
+
+        Args:
+            key: Key to retrieve
+
+        Returns:
+            Tuple of (value, found)
+        """
+        return self._shard_for(key).get(key)
+
+    def get_with_version(self, key: str) -> Tuple[Optional[str], bool, Optional[Version]]:
+        """Retrieve value and version of `key` from its stripe (see StorageEngine)."""
+        return self._shard_for(key).get_with_version(key)
+
+    def get_version(self, key: str) -> Optional[Version]:
+        """Version of the last write (put or tombstoned delete) of `key`, if any."""
+        return self._shard_for(key).get_version(key)
+
+    def delete(self, key: str, version: Optional[Version] = None) -> bool:
+        """
+        Delete key from its stripe (idempotent).
+
+        Args:
+            key: Key to delete
+            version: (timestamp_ms, node_id) of the delete (None = unversioned)
+
+        Returns:
+            True if key was found and deleted, False if key didn't exist
+            or the delete is older than the stored version
+        """
+        return self._shard_for(key).delete(key, version)
+
+    def put_many(self, items: Iterable[Tuple[str, str]],
+                 expiry: Optional[Dict[str, int]] = None,
+                 versions: Optional[Dict[str, Version]] = None) -> int:
+        """
+        Save many key-value pairs atomically across stripes.
+
+        The touched stripes are locked together once; the WAL records of
+        the whole batch share one durability wait.
+
+        Args:
+            items: Iterable of (key, value) pairs (or a dict)
+            expiry: Optional {key: expire_at_ms} for keys that expire
+            versions: Optional {key: version}; stale pairs are skipped
+
+        Returns:
+            Number of pairs written
+        """
+        try:
+            pairs = list(items.items()) if isinstance(items, dict) else list(items)
+            groups = self._group_by_shard(pairs)
+            lsn = 0
+            evicted = []
+            written = 0
+            with self._lock_shards(groups):
+                for index, group in groups.items():
+                    shard_lsn, shard_evicted, shard_written = self.shards[index]._put_many_locked(
+                        group, expiry, versions)
+                    lsn = max(lsn, shard_lsn)
+                    evicted.extend(shard_evicted)
+                    written += shard_written
+            if lsn:
+                self.wal.wait_durable(lsn)
+            listener = self.shards[0].eviction_listener
+            if evicted and listener is not None:
+                listener(evicted)
+            return written
+        except Exception as e:
+            raise Exception(f"PUT_MANY failed: {str(e)}")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Retrieve many keys as one consistent read across stripes.
+
+        Args:
+            keys: Keys to retrieve
+
+        Returns:
+            Dict {key: value} for the keys that exist
+        """
+        try:
+            groups = self._group_by_shard(keys)
+            result = {}
+            with self._lock_shards(groups):
+                for index, group in groups.items():
+                    result.update(self.shards[index]._get_many_locked(group))
+            return result
+        except Exception as e:
+            raise Exception(f"GET_MANY failed: {str(e)}")
+
+    def delete_many(self, keys: Iterable[str],
+                    versions: Optional[Dict[str, Version]] = None) -> int:
+        """
+        Delete many keys atomically across stripes.
+
+        Args:
+            keys: Keys to delete
+            versions: Optional {key: version}; stale deletes are skipped
+
+        Returns:
+            Number of keys that existed and were deleted
+        """
+        try:
+            groups = self._group_by_shard(keys)
+            lsn = 0
+            deleted = 0
+            with self._lock_shards(groups):
+                for index, group in groups.items():
+                    shard_lsn, shard_deleted = self.shards[index]._delete_many_locked(group, versions)
+                    lsn = max(lsn, shard_lsn)
+                    deleted += shard_deleted
+            if lsn:
+                self.wal.wait_durable(lsn)
+            return deleted
+        except Exception as e:
+            raise Exception(f"DELETE_MANY failed: {str(e)}")
+
+    def list_keys(self) -> List[str]:
+        """
+        Get list of all keys across all stripes.
+
+        All stripe locks are held while collecting, so the result is a
+        point-in-time view (no key is missed or duplicated by a concurrent
+        write racing between stripes).
+
+        Returns:
+            List of all keys
+        """
+        try:
+            with self._lock_all():
+                keys = []
+                for shard in self.shards:
+                    keys.extend(shard.list_keys())
+                return keys
+        except Exception as e:
+            raise Exception(f"LISTKEYS failed: {str(e)}")
+
+    def scan(self, prefix: Optional[str] = None, start: Optional[str] = None,
+             end: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        Ordered range / prefix scan across all stripes.
+
+        Each stripe returns at most `limit` pairs in key order; the sorted
+        runs are merged and cut to `limit`.
+
+        Args:
+            prefix: Only keys starting with this prefix
+            start: Inclusive lower bound
+            end: Exclusive upper bound
+            limit: Maximum number of pairs to return
+
+        Returns:
+            List of (key, value) in key order
+        """
+        with self._lock_all():
+            runs = [shard.scan(prefix, start, end, limit) for shard in self.shards]
+        return list(islice(heapq.merge(*runs), limit or None))
+
+    def size(self) -> int:
+        """Get total number of keys across all stripes (consistent)."""
+        with self._lock_all():
+            return sum(shard.size() for shard in self.shards)
+
+    def expire_keys(self, now: Optional[int] = None) -> List[str]:
+        """
+        Remove expired keys from every stripe (call periodically).
+
+        Each stripe advances its own timer wheel under its own lock, so
+        expiry never blocks writers on other stripes.
+
+        Returns:
+            Keys that were expired (to replicate as deletes)
+        """
+        expired = []
+        for shard in self.shards:
+            expired.extend(shard.expire_keys(now))
+        return expired
+
+    def apply_logged(self, op: int, key: str, value: str) -> None:
+        """Apply a WAL record to its stripe without logging it again."""
+        self._shard_for(key).apply_logged(op, key, value)
+
+    def replay_wal(self, from_lsn: int = 0) -> int:
+        """
+        Rebuild in-memory state from the shared WAL (call once at startup).
+
+        Args:
+            from_lsn: Skip records already covered by a checkpoint
+
+        Returns:
+            Number of records replayed
+        """
+        if self.wal is None:
+            return 0
+        return self.wal.replay(self.apply_logged, from_lsn=from_lsn)
+
+    def copy_state(self) -> Tuple[List[Dict[str, str]], int, Dict[str, int]]:
+        """
+        Take a consistent copy of every stripe for a checkpoint.
+
+        All stripe locks are held only while the dicts are copied (a C-level
+        copy, far shorter than serializing them). Records are appended to
+        the WAL under the stripe lock, so with every lock held the WAL's
+        last LSN is exactly the state captured.
+
+        Returns:
+            Tuple of (one dict copy per stripe, last WAL LSN included,
+            merged copy of the stripes' expiry maps)
+        """
+        with self._lock_all():
+            lsn = self.wal.last_lsn if self.wal is not None else 0
+            expiry = {}
+            for shard in self.shards:
+                expiry.update(shard.expiry)
+            return [dict(shard.storage) for shard in self.shards], lsn, expiry
+
+    def snapshot(self) -> ShardedSnapshot:
+        """
+        Take a consistent point-in-time snapshot of every stripe.
+
+        All stripe locks are held only while each stripe freezes its dicts
+        (O(1) per stripe); iterating the snapshot takes no lock.
+
+        Returns:
+            ShardedSnapshot (also a context manager)
+        """
+        with self._lock_all():
+            lsn = self.wal.last_lsn if self.wal is not None else 0
+            taken_at_ms = now_ms()
+            return ShardedSnapshot([shard._snapshot_locked(taken_at_ms, lsn) for shard in self.shards], lsn)
+
+    @property
+    def open_snapshots(self) -> int:
+        """Number of snapshots not yet closed."""
+        return self.shards[0].open_snapshots
+
+    def get_versions(self, keys: Iterable[str]) -> Dict[str, Version]:
+        """Versions of the given keys (keys without a version are skipped)."""
+        versions = {}
+        for index, group in self._group_by_shard(keys).items():
+            versions.update(self.shards[index].get_versions(group))
+        return versions
+
+    def load_items(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Bulk-insert key-value pairs without logging them (checkpoint restore).
+
+        Pairs are grouped per stripe first so each stripe lock is taken once.
+
+        Args:
+            items: Iterable of (key, value) pairs
+        """
+        groups = [[] for _ in range(self.num_shards)]
+        num_shards = self.num_shards
+        for key, value in items:
+            groups[hash(key) % num_shards].append((key, value))
+        for shard, group in zip(self.shards, groups):
+            if group:
+                shard.load_items(group)
+
+    def get_tombstone(self, key: str) -> Optional[int]:
+        """Deletion time (ms) if `key` was deleted and not re-written, else None."""
+        return self._shard_for(key).get_tombstone(key)
+
+    @property
+    def tombstone_count(self) -> int:
+        """Number of tombstones waiting for GC across all stripes."""
+        return sum(shard.tombstone_count for shard in self.shards)
+
+    def gc_tombstones(self, grace_ms: int, max_batch: int = 1000, now: Optional[int] = None) -> int:
+        """
+        Purge up to `max_batch` expired tombstones, stripe by stripe.
+
+        Each stripe is collected under its own lock only, so GC never holds
+        more than one stripe lock (and at most `max_batch` pops) at a time.
+
+        Args:
+            grace_ms: Minimum tombstone age before it may be purged
+            max_batch: Maximum tombstones purged in this call
+            now: Current time in ms (default: wall clock)
+
+        Returns:
+            Number of tombstones purged
+        """
+        purged = 0
+        for shard in self.shards:
+            if purged >= max_batch:
+                break
+            purged += shard.gc_tombstones(grace_ms, max_batch - purged, now)
+        return purged
+
+    def copy_tombstones(self) -> List[Tuple[str, int]]:
+        """Consistent copy of every stripe's tombstones, oldest first."""
+        with self._lock_all():
+            items = []
+            for shard in self.shards:
+                items.extend(shard.tombstones.items())
+        items.sort(key=lambda item: item[1])
+        return items
+
+    def load_tombstones(self, items: Iterable[Tuple[str, int]]) -> None:
+        """Restore tombstones into their stripes (checkpoint / snapshot restore)."""
+        groups = self._group_by_shard(list(items))
+        for index, group in groups.items():
+            self.shards[index].load_tombstones(group)
+
+    def copy_watermarks(self) -> List[Tuple[str, int]]:
+        """Consistent copy of every stripe's version watermarks, oldest first."""
+        with self._lock_all():
+            items = []
+            for shard in self.shards:
+                items.extend(shard.watermarks.items())
+        items.sort(key=lambda item: item[1])
+        return items
+
+    def load_watermarks(self, items: Iterable[Tuple[str, int]]) -> None:
+        """Restore version watermarks into their stripes (checkpoint restore)."""
+        groups = self._group_by_shard(list(items))
+        for index, group in groups.items():
+            self.shards[index].load_watermarks(group)
+
+    def copy_versions(self) -> Dict[str, Version]:
+        """Consistent copy of every stripe's version map."""
+        with self._lock_all():
+            versions = {}
+            for shard in self.shards:
+                versions.update(shard.versions)
+            return versions
+
+    def load_versions(self, items: Iterable[Tuple[str, Version]]) -> None:
+        """Restore versions into their stripes (checkpoint / snapshot restore)."""
+        groups = self._group_by_shard(list(items))
+        for index, group in groups.items():
+            self.shards[index].load_versions(group)
+
+    def set_eviction_listener(self, listener: Optional[Callable[[List[str]], None]]) -> None:
+        """Report keys evicted by any stripe to `listener` (called outside locks)."""
+        for shard in self.shards:
+            shard.eviction_listener = listener
+
+    @property
+    def used_bytes(self) -> int:
+        """Approximate memory held by entries (tracked only when bounded)."""
+        return sum(shard.used_bytes for shard in self.shards)
+
+    @property
+    def evictions(self) -> int:
+        """Number of keys evicted to stay under the memory budget."""
+        return sum(shard.evictions for shard in self.shards)
+
+    @property
+    def bytes_freed(self) -> int:
+        """Bytes freed by evictions."""
+        return sum(shard.bytes_freed for shard in self.shards)
+
+    def load_expiry(self, items: Iterable[Tuple[str, int]]) -> None:
+        """Restore expiry times into their stripes (checkpoint restore)."""
+        for key, expire_at_ms in items:
+            self._shard_for(key).load_expiry([(key, expire_at_ms)])
+
+    def clear(self) -> None:
+        """Clear all stripes (for testing)."""
+        with self._lock_all():
+            for shard in self.shards:
+                shard.clear()
@@ -0,0 +1,142 @@
+"""
+Sorted Key Index - Ordered secondary index for prefix and range scans
+"""
+
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Optional
+
+
+class SortedKeyIndex:
+    """
+    Set of keys kept in sorted order as a list of sorted blocks.
+
+    Each block holds at most 2 * `load` keys and `_maxes` holds the last
+    key of every block, so:
+
+    - add() / discard(): bisect over `_maxes`, then bisect + list
+      insert/delete inside one block (O(log n + load))
+    - irange(): bisect to the first block, then walk blocks in order
+      (O(log n + keys returned))
+
+    This is the layout used by sortedcontainers.SortedList, trimmed to
+    what the engines need. Not thread-safe: the owning engine guards it
+    with its own lock.
+    """
+
+    def __init__(self, load: int = 512):
+        """
+        Initialize an empty index.
+
+        Args:
+            load: Target block size (blocks split at 2 * load keys)
+        """
+        self._load = load
+        self._blocks: List[List[str]] = []
+        self._maxes: List[str] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, key: str) -> bool:
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        return j < len(block) and block[j] == key
+
+    def add(self, key: str) -> None:
+        """Insert `key` (no-op if already present)."""
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            return
+
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            # Larger than every key: append to the last block
+            i -= 1
+            block = self._blocks[i]
+            block.append(key)
+            self._maxes[i] = key
+        else:
+            block = self._blocks[i]
+            j = bisect_left(block, key)
+            if block[j] == key:
+                return
+            block.insert(j, key)
+        self._len += 1
+
+        if len(block) > 2 * self._load:
+            self._blocks[i:i + 1] = [block[:self._load], block[self._load:]]
+            self._maxes[i:i + 1] = [block[self._load - 1], block[-1]]
+
+    def discard(self, key: str) -> None:
+        """Remove `key` (no-op if absent)."""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        if j == len(block) or block[j] != key:
+            return
+        del block[j]
+        self._len -= 1
+
+        if not block:
+            del self._blocks[i]
+            del self._maxes[i]
+            return
+        self._maxes[i] = block[-1]
+        if len(block) < self._load // 4 and len(self._blocks) > 1:
+            # Fold a shrunken block into its neighbour to keep blocks dense
+            if i == len(self._blocks) - 1:
+                i -= 1
+            merged = self._blocks[i] + self._blocks[i + 1]
+            if len(merged) > 2 * self._load:
+                half = len(merged) // 2
+                self._blocks[i:i + 2] = [merged[:half], merged[half:]]
+                self._maxes[i:i + 2] = [merged[half - 1], merged[-1]]
+            else:
+                self._blocks[i:i + 2] = [merged]
+                self._maxes[i:i + 2] = [merged[-1]]
+
+    def update(self, keys: Iterable[str]) -> None:
+        """Bulk-insert keys (one sort instead of one insert per key)."""
+        merged = sorted(set(self.irange()).union(keys))
+        load = self._load
+        self._blocks = [merged[i:i + load] for i in range(0, len(merged), load)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(merged)
+
+    def irange(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[str]:
+        """
+        Iterate keys in sorted order over [start, end).
+
+        Args:
+            start: Inclusive lower bound (None = first key)
+            end: Exclusive upper bound (None = last key)
+        """
+        if start is None:
+            i, j = 0, 0
+        else:
+            i = bisect_left(self._maxes, start)
+            if i == len(self._maxes):
+                return
+            j = bisect_left(self._blocks[i], start)
+
+        for block in self._blocks[i:]:
+            for pos in range(j, len(block)):
+                key = block[pos]
+                if end is not None and key >= end:
+                    return
+                yield key
+            j = 0
+
+    def clear(self) -> None:
+        """Remove every key."""
+        self._blocks = []
+        self._maxes = []
+        self._len = 0
@@ -2,44 +2,501 @@
 Storage Engine - In-memory key-value store with thread safety
 """
 
+import time
 import threading
-from typing import Tuple, List, Optional
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Tuple, List, Optional
 
+from src.storage.wal import WriteAheadLog, OP_PUT, OP_DELETE, OP_EXPIRE, OP_PUT_EXPIRE, OP_VERSION
+from src.storage.timer_wheel import TimerWheel
+from src.storage.eviction import EvictionPolicy, entry_size
+from src.storage.sorted_index import SortedKeyIndex
+from src.storage.versioning import Version, encode_version, decode_version
+from src.storage.mvcc import LayeredDict, StorageSnapshot, collapse_step
+from src.storage.changefeed import ChangeFeed
+from src.storage.backend import StorageBackend
 
-class StorageEngine:
+
+def now_ms() -> int:
+    """Current wall-clock time in ms (expiry deadlines are absolute)."""
+    return int(time.time() * 1000)
+
+
+class StorageEngine(StorageBackend):
     """
     Thread-safe in-memory storage using dict + RLock.
     
     Supports:
-    - PUT: Save key-value pair
+    - PUT: Save key-value pair (optionally with an absolute expiry time)
     - GET: Retrieve value by key
     - DELETE: Remove key
     - LIST: Get all keys
+    - SCAN: Ordered prefix / range scan
+    - PUT_MANY / GET_MANY / DELETE_MANY: Apply a whole batch under a
+      single lock acquisition (and a single WAL group-commit wait)
+    
+    If a WriteAheadLog is given, every PUT/DELETE is logged before it is
+    applied and the call returns only once the record is durable
+    (according to the log's fsync policy).
+    
+    Expiry: keys with a TTL are tracked in `expiry` and scheduled on a
+    TimerWheel. Reads and list_keys() hide expired keys immediately;
+    expire_keys() (driven by a background thread) removes them in
+    O(expired keys) and returns them so the owner can replicate deletes.
+    
+    Memory budget: with max_memory_bytes > 0 the engine tracks the
+    approximate size of every entry and, after a write pushes it over
+    budget, evicts keys chosen by `eviction_policy` (LRU / LFU / random).
+    Evicted keys are logged as deletes and reported to
+    `eviction_listener` (called outside the lock). With
+    evict_on_write=False the budget is only tracked: the owner reclaims
+    memory itself with demote() (TieredStorageEngine moves the returned
+    entries to disk instead of dropping them).
+    
+    Tombstones: with keep_tombstones=True an explicit delete leaves
+    `tombstones[key] = deleted_at_ms` (hidden from get/list_keys, cleared
+    by a later put), so replicas and snapshot recovery can tell "deleted"
+    from "never seen". Tombstones are kept in deletion order, so
+    gc_tombstones() purges the oldest ones in O(batch) without scanning.
+    Expiry and eviction do not leave tombstones.
+    
+    Versions: writes may carry a (timestamp_ms, node_id) version set by
+    the owner. It is stored in `versions` (for tombstoned keys too) and a
+    write whose version is not newer than the stored one is rejected, so
+    replicas converge on last-write-wins even when replication requests
+    arrive out of order. Writes without a version are applied
+    unconditionally and clear the key's version. With keep_tombstones=False
+    a versioned delete still keeps its version as a hidden watermark
+    (`watermarks[key] = deleted_at_ms`, collected by gc_tombstones() like a
+    tombstone), so a late older PUT cannot bring the key back.
+    
+    Ordered scans: with ordered_index=True a SortedKeyIndex is maintained
+    next to the dict (every insert/remove goes through _store/_discard),
+    so scan() costs O(log n + keys returned). Without it, scan() falls
+    back to sorting all keys.
+    
+    Snapshots: snapshot() freezes `storage`, `expiry` and `versions` in
+    O(1) and lets writers continue on LayeredDict overlays, so a dump can
+    iterate the frozen dicts without the lock. Once the last snapshot is
+    released the overlays are folded back a few entries per write.
+    
+    Change feed: with a ChangeFeed every applied put and delete (explicit,
+    expired or evicted) is appended to its ring buffer under the lock,
+    so watchers see writes in apply order without ever blocking writers.
+    WAL replay and checkpoint restore are not reported.
     """
     
-    def __init__(self):
-        """Initialize storage with empty dict and RLock."""
+    supports_ttl = True
+    supports_scan = True
+    supports_snapshot = True
+    supports_versions = True
+    supports_tombstones = True
+    
+    # Overlay entries folded back on snapshot release / on each write
+    SNAPSHOT_FOLD_BATCH = 1024
+    WRITE_FOLD_BATCH = 8
+    
+    def __init__(self, wal: Optional[WriteAheadLog] = None, expiry_tick_ms: int = 100,
+                 max_memory_bytes: int = 0, eviction_policy: Optional[EvictionPolicy] = None,
+                 ordered_index: bool = False, keep_tombstones: bool = False,
+                 change_feed: Optional[ChangeFeed] = None, evict_on_write: bool = True):
+        """
+        Initialize storage with empty dict and RLock.
+        
+        Args:
+            wal: Optional WriteAheadLog for durability (may be shared
+                 between several engines, e.g. the stripes of a
+                 ShardedStorageEngine)
+            expiry_tick_ms: Resolution of the expiry timer wheel
+            max_memory_bytes: Memory budget (0 = unbounded)
+            eviction_policy: Policy picking victims (required if bounded)
+            ordered_index: Maintain a sorted key index for scan()
+            keep_tombstones: Record a tombstone for every explicit delete
+            change_feed: Optional ChangeFeed receiving every applied write
+                         (may be shared between several engines)
+            evict_on_write: Evict as soon as a write exceeds the budget
+                            (False = track usage only, see demote())
+        """
+        if max_memory_bytes and eviction_policy is None:
+            raise ValueError("eviction_policy is required when max_memory_bytes is set")
         self.storage = {}  # key -> value mapping
+        self.expiry = {}  # key -> expire_at_ms (only keys with a TTL)
         self.lock = threading.RLock()  # Reentrant lock for thread safety
+        self.wal = wal
+        self.timer_wheel = TimerWheel(tick_ms=expiry_tick_ms, start_ms=now_ms())
+        self.key_index = SortedKeyIndex() if ordered_index else None
+        self.keep_tombstones = keep_tombstones
+        self.tombstones: OrderedDict = OrderedDict()  # key -> deleted_at_ms, oldest first
+        self.versions: Dict[str, Version] = {}  # key -> version of its last write
+        # Deleted keys whose version is kept without a tombstone: key -> deleted_at_ms, oldest first
+        self.watermarks: OrderedDict = OrderedDict()
+        self._snapshots = 0  # Open snapshots (overlays must not be folded)
+        self._overlays = False  # storage/expiry/versions are LayeredDicts
+        self.change_feed = change_feed
+        
+        self.max_memory_bytes = max_memory_bytes
+        self.eviction_policy = eviction_policy if max_memory_bytes else None
+        self.evict_on_write = evict_on_write
+        self.eviction_listener: Optional[Callable[[List[str]], None]] = None
+        self.used_bytes = 0  # Only tracked when bounded
+        self.evictions = 0
+        self.bytes_freed = 0
+    
+    def set_eviction_listener(self, listener: Optional[Callable[[List[str]], None]]) -> None:
+        """Report evicted keys to `listener` (called outside the lock)."""
+        self.eviction_listener = listener
+    
+    def _store(self, key: str, value: str) -> None:
+        """Insert/overwrite `key` with memory accounting. Caller holds the lock."""
+        if self._overlays and not self._snapshots:
+            self._fold_overlays(self.WRITE_FOLD_BATCH)
+        if self.eviction_policy is not None:
+            old = self.storage.get(key)
+            self.used_bytes += entry_size(key, value) - (entry_size(key, old) if old is not None else 0)
+            self.eviction_policy.on_write(key)
+        if self.key_index is not None and key not in self.storage:
+            self.key_index.add(key)
+        if self.tombstones:
+            self.tombstones.pop(key, None)
+        if self.watermarks:
+            self.watermarks.pop(key, None)
+        self.storage[key] = value
+    
+    def _discard(self, key: str) -> Optional[str]:
+        """Remove `key` (and its TTL and version) with memory accounting. Caller holds the lock."""
+        if self._overlays and not self._snapshots:
+            self._fold_overlays(self.WRITE_FOLD_BATCH)
+        if self.versions:
+            self.versions.pop(key, None)
+        value = self.storage.pop(key, None)
+        if value is not None:
+            self._set_expiry(key, None)
+            if self.key_index is not None:
+                self.key_index.discard(key)
+            if self.eviction_policy is not None:
+                self.used_bytes -= entry_size(key, value)
+                self.eviction_policy.on_remove(key)
+        return value
+    
+    def _evict_locked(self, keep_key: str) -> Tuple[List[str], int]:
+        """
+        Evict keys until the engine is back under budget. Caller holds the lock.
+        
+        Args:
+            keep_key: Key just written (never evicted by its own write)
+        
+        Returns:
+            Tuple of (evicted keys, last WAL LSN of their delete records)
+        """
+        evicted = []
+        lsn = 0
+        while self.used_bytes > self.max_memory_bytes:
+            victim = self.eviction_policy.victim(exclude=keep_key)
+            if victim is None:
+                break
+            if self.wal is not None:
+                lsn = self.wal.append(OP_DELETE, victim)
+            value = self._discard(victim)
+            if self.change_feed is not None:
+                self.change_feed.append(OP_DELETE, victim)
+            self.evictions += 1
+            self.bytes_freed += entry_size(victim, value)
+            evicted.append(victim)
+        return evicted, lsn
     
-    def put(self, key: str, value: str) -> bool:
+    def _over_budget(self) -> bool:
+        """True if a write must evict before returning. Caller holds the lock."""
+        return (self.evict_on_write and self.eviction_policy is not None
+                and self.used_bytes > self.max_memory_bytes)
+    
+    def demote(self, target_bytes: int, max_keys: int) -> List[Tuple[str, str]]:
+        """
+        Remove up to `max_keys` entries picked by the eviction policy until
+        used_bytes <= target_bytes, and return them.
+        
+        Unlike eviction nothing is logged or reported to the change feed:
+        the entries still exist, the caller stores them elsewhere. Their
+        TTL and version are dropped.
+        
+        Args:
+            target_bytes: Stop once memory usage is at or below this
+            max_keys: Maximum entries removed in this call
+        
+        Returns:
+            List of (key, value) pairs removed, coldest first
+        """
+        demoted = []
+        with self.lock:
+            if self.eviction_policy is None:
+                return demoted
+            while self.used_bytes > target_bytes and len(demoted) < max_keys:
+                victim = self.eviction_policy.victim()
+                if victim is None:
+                    break
+                demoted.append((victim, self._discard(victim)))
+        return demoted
+    
+    def _is_stale(self, key: str, version: Optional[Version]) -> bool:
+        """True if a write with `version` is not newer than the last write of `key`. Caller holds the lock."""
+        if version is None or not self.versions:
+            return False
+        current = self.versions.get(key)
+        return current is not None and current >= version
+    
+    def _set_version(self, key: str, version: Optional[Version]) -> None:
+        """Track (or clear) the version of `key`. Caller holds the lock."""
+        if version is not None:
+            self.versions[key] = version
+        elif self.versions:
+            self.versions.pop(key, None)
+    
+    def _put_locked(self, key: str, value: str, expire_at_ms: Optional[int],
+                    version: Optional[Version]) -> int:
+        """
+        Log and apply one PUT. Caller holds the lock and has checked the version.
+        
+        Returns:
+            WAL LSN of the last record written (0 without WAL)
+        """
+        lsn = 0
+        if self.wal is not None:
+            # Log under the lock so log order == apply order. The expiry
+            # goes in the PUT record itself: a crash can never replay the
+            # value without it
+            if expire_at_ms:
+                lsn = self.wal.append(OP_PUT_EXPIRE, key, f"{expire_at_ms}:{value}")
+            else:
+                lsn = self.wal.append(OP_PUT, key, value)
+            if version is not None:
+                lsn = self.wal.append(OP_VERSION, key, encode_version(version))
+        self._store(key, value)
+        self._set_expiry(key, expire_at_ms)
+        self._set_version(key, version)
+        if self.change_feed is not None:
+            self.change_feed.append(OP_PUT, key, value, version)
+        return lsn
+    
+    def _delete_locked(self, key: str, deleted_at_ms: int, version: Optional[Version] = None) -> int:
+        """
+        Log and apply an explicit delete, leaving a tombstone if enabled.
+        Caller holds the lock and has checked the key is live (or that
+        `version` must be remembered for a key not seen yet).
+        
+        Returns:
+            WAL LSN of the last record written (0 without WAL)
+        """
+        lsn = 0
+        if self.wal is not None:
+            remember = self.keep_tombstones or version is not None
+            lsn = self.wal.append(OP_DELETE, key, str(deleted_at_ms) if remember else "")
+            if version is not None:
+                lsn = self.wal.append(OP_VERSION, key, encode_version(version))
+        self._discard(key)
+        if self.keep_tombstones:
+            self._set_tombstone(key, deleted_at_ms)
+            self._set_version(key, version)
+        elif version is not None:
+            # No tombstone, but keep the version so late older writes stay stale
+            self._set_watermark(key, deleted_at_ms)
+            self._set_version(key, version)
+        if self.change_feed is not None:
+            self.change_feed.append(OP_DELETE, key, "", version)
+        return lsn
+    
+    def _set_watermark(self, key: str, deleted_at_ms: int) -> None:
+        """Record a version watermark, keeping the dict in deletion order. Caller holds the lock."""
+        self.watermarks.pop(key, None)
+        self.watermarks[key] = deleted_at_ms
+    
+    def _set_tombstone(self, key: str, deleted_at_ms: int) -> None:
+        """Record a tombstone, keeping the dict in deletion order. Caller holds the lock."""
+        self.tombstones.pop(key, None)
+        self.tombstones[key] = deleted_at_ms
+    
+    def _set_expiry(self, key: str, expire_at_ms: Optional[int]) -> None:
+        """Track (or clear) the expiry of `key`. Caller holds the lock."""
+        if expire_at_ms:
+            self.expiry[key] = expire_at_ms
+            self.timer_wheel.schedule(key, expire_at_ms)
+        elif self.expiry:
+            self.expiry.pop(key, None)
+    
+    def _is_live(self, key: str, now: int) -> bool:
+        """True if `key` exists and has not expired. Caller holds the lock."""
+        if key not in self.storage:
+            return False
+        expire_at_ms = self.expiry.get(key)
+        return expire_at_ms is None or expire_at_ms > now
+    
+    def put(self, key: str, value: str, expire_at_ms: Optional[int] = None,
+            version: Optional[Version] = None) -> bool:
         """
         Save key-value pair to storage.
         
         Args:
             key: Key to save
             value: Value to save
+            expire_at_ms: Absolute expiry time in ms (None = never expires;
+                          overwriting a key without it removes its TTL)
+            version: (timestamp_ms, node_id) of the write (None = unversioned)
         
         Returns:
-            True if saved successfully
+            True if saved, False if rejected as older than the stored version
         """
         try:
+            evicted = None
             with self.lock:
-                self.storage[key] = value
+                if self._is_stale(key, version):
+                    return False
+                lsn = self._put_locked(key, value, expire_at_ms, version)
+                if self._over_budget():
+                    evicted, evict_lsn = self._evict_locked(key)
+                    lsn = evict_lsn or lsn
+            if lsn:
+                # Group commit: wait outside the lock
+                self.wal.wait_durable(lsn)
+            if evicted and self.eviction_listener is not None:
+                self.eviction_listener(evicted)
             return True
         except Exception as e:
             raise Exception(f"PUT failed: {str(e)}")
     
+    def _put_many_locked(self, pairs: List[Tuple[str, str]], expiry: Optional[Dict[str, int]],
+                         versions: Optional[Dict[str, Version]] = None) -> Tuple[int, List[str], int]:
+        """
+        Log and apply a batch of PUTs, skipping stale versions. Caller holds the lock.
+        
+        Returns:
+            Tuple of (last WAL LSN, evicted keys, number of pairs written)
+        """
+        lsn = 0
+        written = 0
+        for key, value in pairs:
+            version = versions.get(key) if versions else None
+            if self._is_stale(key, version):
+                continue
+            lsn = self._put_locked(key, value, expiry.get(key) if expiry else None, version) or lsn
+            written += 1
+        evicted = []
+        if written and self._over_budget():
+            evicted, evict_lsn = self._evict_locked(pairs[-1][0])
+            lsn = evict_lsn or lsn
+        return lsn, evicted, written
+    
+    def _delete_one_locked(self, key: str, now: int, version: Optional[Version]) -> Tuple[int, bool]:
+        """
+        Apply a (possibly versioned) DELETE. Caller holds the lock.
+        
+        A versioned delete of a key that is not here yet (replication
+        reordered it before the PUT it overrides) still leaves a tombstone
+        (or a watermark) carrying its version, so the late PUT is rejected
+        as stale.
+        
+        Returns:
+            Tuple of (WAL LSN, True if a live key was deleted)
+        """
+        if self._is_stale(key, version):
+            return 0, False
+        if self._is_live(key, now if self.expiry else 0):
+            return self._delete_locked(key, now, version), True
+        if version is not None:
+            return self._delete_locked(key, now, version), False
+        return 0, False
+    
+    def _delete_many_locked(self, keys: Iterable[str],
+                            versions: Optional[Dict[str, Version]] = None) -> Tuple[int, int]:
+        """
+        Log and apply a batch of DELETEs. Caller holds the lock.
+        
+        Returns:
+            Tuple of (last WAL LSN, number of keys deleted)
+        """
+        lsn = 0
+        deleted = 0
+        now = now_ms()
+        for key in keys:
+            key_lsn, found = self._delete_one_locked(key, now, versions.get(key) if versions else None)
+            lsn = key_lsn or lsn
+            deleted += found
+        return lsn, deleted
+    
+    def _get_many_locked(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Look up a batch of keys (live ones only). Caller holds the lock."""
+        result = {}
+        now = now_ms() if self.expiry else 0
+        for key in keys:
+            if key in self.storage and (not now or self._is_live(key, now)):
+                if self.eviction_policy is not None:
+                    self.eviction_policy.on_read(key)
+                result[key] = self.storage[key]
+        return result
+    
+    def put_many(self, items: Iterable[Tuple[str, str]],
+                 expiry: Optional[Dict[str, int]] = None,
+                 versions: Optional[Dict[str, Version]] = None) -> int:
+        """
+        Save many key-value pairs under one lock acquisition.
+        
+        Either the whole batch is visible to readers or none of it; the
+        WAL records are group-committed with a single durability wait.
+        
+        Args:
+            items: Iterable of (key, value) pairs (or a dict)
+            expiry: Optional {key: expire_at_ms} for keys that expire
+            versions: Optional {key: version}; stale pairs are skipped
+        
+        Returns:
+            Number of pairs written
+        """
+        try:
+            pairs = list(items.items()) if isinstance(items, dict) else list(items)
+            with self.lock:
+                lsn, evicted, written = self._put_many_locked(pairs, expiry, versions)
+            if lsn:
+                self.wal.wait_durable(lsn)
+            if evicted and self.eviction_listener is not None:
+                self.eviction_listener(evicted)
+            return written
+        except Exception as e:
+            raise Exception(f"PUT_MANY failed: {str(e)}")
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Retrieve many keys under one lock acquisition.
+        
+        Args:
+            keys: Keys to retrieve
+        
+        Returns:
+            Dict {key: value} for the keys that exist
+        """
+        try:
+            with self.lock:
+                return self._get_many_locked(keys)
+        except Exception as e:
+            raise Exception(f"GET_MANY failed: {str(e)}")
+    
+    def delete_many(self, keys: Iterable[str],
+                    versions: Optional[Dict[str, Version]] = None) -> int:
+        """
+        Delete many keys under one lock acquisition.
+        
+        Args:
+            keys: Keys to delete
+            versions: Optional {key: version}; stale deletes are skipped
+        
+        Returns:
+            Number of keys that existed and were deleted
+        """
+        try:
+            with self.lock:
+                lsn, deleted = self._delete_many_locked(keys, versions)
+            if lsn:
+                self.wal.wait_durable(lsn)
+            return deleted
+        except Exception as e:
+            raise Exception(f"DELETE_MANY failed: {str(e)}")
+    
     def get(self, key: str) -> Tuple[Optional[str], bool]:
         """
         Retrieve value from storage by key.
@@ -55,32 +512,88 @@ class StorageEngine:
         try:
             with self.lock:
                 if key in self.storage:
+                    if self.expiry and not self._is_live(key, now_ms()):
+                        return None, False  # Expired, not swept yet
+                    if self.eviction_policy is not None:
+                        self.eviction_policy.on_read(key)
                     return self.storage[key], True
                 else:
                     return None, False
         except Exception as e:
             raise Exception(f"GET failed: {str(e)}")
     
-    def delete(self, key: str) -> bool:
+    def get_with_version(self, key: str) -> Tuple[Optional[str], bool, Optional[Version]]:
+        """
+        Retrieve value and version of `key` in one consistent read.
+        
+        Returns:
+            Tuple of (value, found, version); version is None for keys
+            written without one
+        """
+        try:
+            with self.lock:
+                value, found = self.get(key)
+                return value, found, self.versions.get(key) if found else None
+        except Exception as e:
+            raise Exception(f"GET failed: {str(e)}")
+    
+    def get_version(self, key: str) -> Optional[Version]:
+        """Version of the last write (put or tombstoned delete) of `key`, if any."""
+        with self.lock:
+            return self.versions.get(key)
+    
+    def delete(self, key: str, version: Optional[Version] = None) -> bool:
         """
         Delete key from storage (idempotent).
         
         Args:
             key: Key to delete
+            version: (timestamp_ms, node_id) of the delete (None = unversioned)
         
         Returns:
             True if key was found and deleted, False if key didn't exist
+            or the delete is older than the stored version
         """
         try:
             with self.lock:
-                if key in self.storage:
-                    del self.storage[key]
-                    return True
-                else:
-                    return False
+                lsn, deleted = self._delete_one_locked(key, now_ms(), version)
+            if lsn:
+                self.wal.wait_durable(lsn)
+            return deleted
         except Exception as e:
             raise Exception(f"DELETE failed: {str(e)}")
     
+    def expire_keys(self, now: Optional[int] = None) -> List[str]:
+        """
+        Remove keys whose TTL has passed (call periodically).
+        
+        Only timers that fired are visited, so the cost is O(expired keys)
+        rather than a scan of the whole dict.
+        
+        Args:
+            now: Current time in ms (default: wall clock)
+        
+        Returns:
+            Keys that were expired (to replicate as deletes)
+        """
+        now = now_ms() if now is None else now
+        expired = []
+        lsn = 0
+        with self.lock:
+            for key, expire_at_ms in self.timer_wheel.advance(now):
+                # Skip stale timers (key overwritten, deleted or re-expired)
+                if self.expiry.get(key) != expire_at_ms:
+                    continue
+                if self.wal is not None:
+                    lsn = self.wal.append(OP_DELETE, key)
+                self._discard(key)
+                if self.change_feed is not None:
+                    self.change_feed.append(OP_DELETE, key)
+                expired.append(key)
+        if lsn:
+            self.wal.wait_durable(lsn)
+        return expired
+    
     def list_keys(self) -> List[str]:
         """
         Get list of all keys in storage.
@@ -90,16 +603,308 @@ class StorageEngine:
         """
         try:
             with self.lock:
-                return list(self.storage.keys())
+                if not self.expiry:
+                    return list(self.storage.keys())
+                now = now_ms()
+                expiry = self.expiry
+                return [key for key in self.storage
+                        if key not in expiry or expiry[key] > now]
         except Exception as e:
             raise Exception(f"LISTKEYS failed: {str(e)}")
     
+    def scan(self, prefix: Optional[str] = None, start: Optional[str] = None,
+             end: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        Ordered range / prefix scan.
+        
+        Args:
+            prefix: Only keys starting with this prefix
+            start: Inclusive lower bound
+            end: Exclusive upper bound
+            limit: Maximum number of pairs to return
+        
+        Returns:
+            List of (key, value) in key order
+        """
+        if prefix:
+            start = max(start, prefix) if start is not None else prefix
+        try:
+            with self.lock:
+                if self.key_index is not None:
+                    keys = self.key_index.irange(start, end)
+                else:
+                    keys = sorted(key for key in self.storage
+                                  if (start is None or key >= start) and (end is None or key < end))
+                now = now_ms() if self.expiry else 0
+                result = []
+                for key in keys:
+                    if prefix and not key.startswith(prefix):
+                        break
+                    if now and not self._is_live(key, now):
+                        continue
+                    result.append((key, self.storage[key]))
+                    if limit and len(result) >= limit:
+                        break
+                return result
+        except Exception as e:
+            raise Exception(f"SCAN failed: {str(e)}")
+    
     def size(self) -> int:
         """Get total number of keys in storage."""
         with self.lock:
-            return len(self.storage)
+            if not self.expiry:
+                return len(self.storage)
+            now = now_ms()
+            return len(self.storage) - sum(1 for t in self.expiry.values() if t <= now)
+    
+    def apply_logged(self, op: int, key: str, value: str) -> None:
+        """
+        Apply a WAL record without logging it again (used by replay).
+        
+        Args:
+            op: OP_PUT, OP_DELETE, OP_EXPIRE, OP_PUT_EXPIRE or OP_VERSION
+            key: Key
+            value: Value (deletion ms or empty for OP_DELETE, expiry ms for OP_EXPIRE,
+                   "<expiry ms>:<value>" for OP_PUT_EXPIRE, encoded version for OP_VERSION)
+        """
+        with self.lock:
+            if op == OP_PUT:
+                self._store(key, value)
+                self._set_expiry(key, None)
+                self._set_version(key, None)
+            elif op == OP_PUT_EXPIRE:
+                expire_at_ms, _, value = value.partition(':')
+                self._store(key, value)
+                self._set_expiry(key, int(expire_at_ms))
+                self._set_version(key, None)
+            elif op == OP_DELETE:
+                self._discard(key)
+                if value and self.keep_tombstones:
+                    self._set_tombstone(key, int(value))
+                elif value:
+                    self._set_watermark(key, int(value))
+            elif op == OP_EXPIRE:
+                self._set_expiry(key, int(value))
+            elif op == OP_VERSION:
+                if key in self.storage or key in self.tombstones or key in self.watermarks:
+                    self._set_version(key, decode_version(value))
+    
+    def replay_wal(self, from_lsn: int = 0) -> int:
+        """
+        Rebuild in-memory state from the WAL (call once at startup).
+        
+        Args:
+            from_lsn: Skip records already covered by a checkpoint
+        
+        Returns:
+            Number of records replayed
+        """
+        if self.wal is None:
+            return 0
+        return self.wal.replay(self.apply_logged, from_lsn=from_lsn)
+    
+    def copy_state(self) -> Tuple[List[Dict[str, str]], int, Dict[str, int]]:
+        """
+        Take a consistent copy of the data for a checkpoint.
+        
+        The lock is only held for the dict copy; serializing the copy
+        happens without blocking writers.
+        
+        Returns:
+            Tuple of ([copy of the data], last WAL LSN included in the copy,
+            copy of the expiry map)
+        """
+        with self.lock:
+            lsn = self.wal.last_lsn if self.wal is not None else 0
+            return [dict(self.storage)], lsn, dict(self.expiry)
+    
+    def snapshot(self) -> StorageSnapshot:
+        """
+        Take a point-in-time snapshot of values, expiry and versions in O(1).
+        
+        The current dicts are frozen (handed to the snapshot) and writers
+        continue on fresh overlays, so iterating the snapshot needs no lock
+        and never blocks writers. Close the snapshot when done.
+        
+        Returns:
+            StorageSnapshot (also a context manager)
+        """
+        with self.lock:
+            lsn = self.wal.last_lsn if self.wal is not None else 0
+            return self._snapshot_locked(now_ms(), lsn)
+    
+    def _snapshot_locked(self, taken_at_ms: int, lsn: int) -> StorageSnapshot:
+        """Freeze the dicts into a snapshot. Caller holds the lock."""
+        snapshot = StorageSnapshot(self, self.storage, self.expiry, self.versions, taken_at_ms, lsn)
+        self.storage = LayeredDict(self.storage)
+        self.expiry = LayeredDict(self.expiry)
+        self.versions = LayeredDict(self.versions)
+        self._snapshots += 1
+        self._overlays = True
+        return snapshot
+    
+    def _release_snapshot(self) -> None:
+        """Called by StorageSnapshot.close()."""
+        with self.lock:
+            self._snapshots -= 1
+            if not self._snapshots:
+                self._fold_overlays(self.SNAPSHOT_FOLD_BATCH)
+    
+    def _fold_overlays(self, budget: int) -> None:
+        """
+        Fold up to `budget` overlay entries back into the plain dicts.
+        Caller holds the lock and no snapshot is open.
+        """
+        self.storage, moved = collapse_step(self.storage, budget)
+        self.expiry, moved_expiry = collapse_step(self.expiry, budget - moved)
+        self.versions, _ = collapse_step(self.versions, budget - moved - moved_expiry)
+        self._overlays = (isinstance(self.storage, LayeredDict) or isinstance(self.expiry, LayeredDict)
+                          or isinstance(self.versions, LayeredDict))
+    
+    @property
+    def open_snapshots(self) -> int:
+        """Number of snapshots not yet closed."""
+        return self._snapshots
+    
+    def get_versions(self, keys: Iterable[str]) -> Dict[str, Version]:
+        """Versions of the given keys (keys without a version are skipped)."""
+        with self.lock:
+            return {key: self.versions[key] for key in keys if key in self.versions}
+    
+    def load_items(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Bulk-insert key-value pairs without logging them (checkpoint restore).
+        
+        Args:
+            items: Iterable of (key, value) pairs
+        """
+        with self.lock:
+            if self.key_index is not None:
+                items = list(items)
+                self.key_index.update(key for key, _ in items)
+            if self.eviction_policy is None:
+                self.storage.update(items)
+            else:
+                for key, value in items:
+                    self._store(key, value)
+    
+    def load_expiry(self, items: Iterable[Tuple[str, int]]) -> None:
+        """
+        Restore expiry times without logging them (checkpoint restore).
+        
+        Args:
+            items: Iterable of (key, expire_at_ms) pairs
+        """
+        with self.lock:
+            for key, expire_at_ms in items:
+                if key in self.storage:
+                    self._set_expiry(key, expire_at_ms)
+    
+    def get_tombstone(self, key: str) -> Optional[int]:
+        """Deletion time (ms) if `key` was deleted and not re-written, else None."""
+        with self.lock:
+            return self.tombstones.get(key)
+    
+    @property
+    def tombstone_count(self) -> int:
+        """Number of tombstones waiting for GC."""
+        return len(self.tombstones)
+    
+    def gc_tombstones(self, grace_ms: int, max_batch: int = 1000, now: Optional[int] = None) -> int:
+        """
+        Purge up to `max_batch` tombstones (and version watermarks) older
+        than `grace_ms`.
+        
+        Tombstones are in deletion order, so this pops from the front and
+        stops at the first one still inside the grace period; the lock is
+        held for at most `max_batch` pops. Purges are not logged: a
+        replayed delete just recreates an already-expired tombstone.
+        
+        Args:
+            grace_ms: Minimum tombstone age before it may be purged
+            max_batch: Maximum tombstones purged in this call
+            now: Current time in ms (default: wall clock)
+        
+        Returns:
+            Number of tombstones purged
+        """
+        cutoff = (now_ms() if now is None else now) - grace_ms
+        purged = 0
+        with self.lock:
+            for tombstones in (self.tombstones, self.watermarks):
+                while tombstones and purged < max_batch:
+                    if next(iter(tombstones.values())) > cutoff:
+                        break
+                    key, _ = tombstones.popitem(last=False)
+                    if self.versions:
+                        self.versions.pop(key, None)
+                    purged += 1
+        return purged
+    
+    def copy_tombstones(self) -> List[Tuple[str, int]]:
+        """Copy of the tombstones in deletion order (for checkpoints and snapshots)."""
+        with self.lock:
+            return list(self.tombstones.items())
+    
+    def load_tombstones(self, items: Iterable[Tuple[str, int]]) -> None:
+        """
+        Restore tombstones without logging them (checkpoint / snapshot restore).
+        
+        Args:
+            items: Iterable of (key, deleted_at_ms) pairs, oldest first
+        """
+        with self.lock:
+            for key, deleted_at_ms in items:
+                if key not in self.storage:
+                    self._set_tombstone(key, deleted_at_ms)
+    
+    def copy_watermarks(self) -> List[Tuple[str, int]]:
+        """Copy of the version watermarks in deletion order (for checkpoints)."""
+        with self.lock:
+            return list(self.watermarks.items())
+    
+    def load_watermarks(self, items: Iterable[Tuple[str, int]]) -> None:
+        """
+        Restore version watermarks without logging them (checkpoint restore).
+        
+        Args:
+            items: Iterable of (key, deleted_at_ms) pairs, oldest first
+        """
+        with self.lock:
+            for key, deleted_at_ms in items:
+                if key not in self.storage and key not in self.tombstones:
+                    self._set_watermark(key, deleted_at_ms)
+    
+    def copy_versions(self) -> Dict[str, Version]:
+        """Copy of the version map (for checkpoints and snapshots)."""
+        with self.lock:
+            return dict(self.versions)
+    
+    def load_versions(self, items: Iterable[Tuple[str, Version]]) -> None:
+        """
+        Restore versions without logging them (checkpoint / snapshot restore).
+        Call after load_items() / load_tombstones() / load_watermarks(): only
+        known keys keep a version.
+        
+        Args:
+            items: Iterable of (key, version) pairs
+        """
+        with self.lock:
+            for key, version in items:
+                if key in self.storage or key in self.tombstones or key in self.watermarks:
+                    self.versions[key] = version
     
     def clear(self) -> None:
         """Clear all storage (for testing)."""
         with self.lock:
             self.storage.clear()
+            self.expiry.clear()
+            self.tombstones.clear()
+            self.watermarks.clear()
+            self.versions.clear()
+            self.timer_wheel.clear()
+            if self.key_index is not None:
+                self.key_index.clear()
+            if self.eviction_policy is not None:
+                self.eviction_policy.clear()
+                self.used_bytes = 0
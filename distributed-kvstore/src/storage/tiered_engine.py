@@ -0,0 +1,313 @@
+"""
+Tiered Storage Engine - Hot keys in memory, cold keys spilled to a disk log
+"""
+
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.storage.storage_engine import StorageEngine
+from src.storage.bitcask_engine import BitcaskStorageEngine
+from src.storage.eviction import create_eviction_policy
+from src.storage.backend import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class TieredStorageEngine(StorageBackend):
+    """
+    Two-tier storage for working sets much smaller than the data.
+
+    - Hot tier: a StorageEngine bounded by `hot_memory_bytes` whose
+      eviction policy (LRU / LFU) ranks entries by recent use. A GET of a
+      hot key is the StorageEngine dict lookup; it never touches disk or
+      the tier lock.
+    - Cold tier: a BitcaskStorageEngine in `data_dir` (in-memory keydir,
+      one read per GET), so total capacity is bounded by disk.
+
+    The cold tier holds every key: writes go through to the disk log and
+    then to the hot tier, so a crash loses nothing the disk log accepted
+    (the hot tier has no WAL of its own). The hot tier holds the recently
+    used subset; a GET that misses it reads the cold tier and promotes the
+    entry. The hot tier does not evict on write: once it is over budget a
+    background thread demotes the coldest entries (drops them from memory,
+    their disk copy is current) in batches until usage is back under
+    `hot_memory_bytes * demote_target_ratio`. If writers outrun it and the
+    hot tier reaches `hot_memory_bytes * BACKPRESSURE_RATIO`, the writer
+    demotes inline.
+
+    Writes, promotions and demotions happen under `lock`, so the hot tier
+    never holds a value older than the disk log. A restart starts with an
+    empty hot tier and promotes entries on access. No TTL, scan or versions.
+    """
+
+    BACKPRESSURE_RATIO = 2.0
+
+    def __init__(self, data_dir: str, hot_memory_bytes: int, eviction_policy: str = "lru",
+                 eviction_options: Optional[dict] = None, demote_target_ratio: float = 0.9,
+                 demote_batch: int = 256, max_segment_bytes: int = 64 * 1024 * 1024,
+                 sync_writes: bool = False):
+        """
+        Open (or create) a tiered store with its cold tier in `data_dir`.
+
+        Args:
+            data_dir: Directory of the cold tier (Bitcask segments)
+            hot_memory_bytes: Hot tier memory budget
+            eviction_policy: Policy ranking hot entries ("lru", "lfu", "random")
+            eviction_options: Policy-specific options
+            demote_target_ratio: Demote down to this fraction of the budget
+            demote_batch: Entries moved to disk per lock acquisition
+            max_segment_bytes: Cold tier segment size
+            sync_writes: fsync every cold tier write
+        """
+        if hot_memory_bytes <= 0:
+            raise ValueError("hot_memory_bytes must be positive")
+        self.hot_memory_bytes = hot_memory_bytes
+        self.demote_target_bytes = int(hot_memory_bytes * demote_target_ratio)
+        self.demote_batch = demote_batch
+
+        self.hot = StorageEngine(
+            max_memory_bytes=hot_memory_bytes,
+            eviction_policy=create_eviction_policy(eviction_policy, **(eviction_options or {})),
+            evict_on_write=False
+        )
+        self.cold = BitcaskStorageEngine(data_dir, max_segment_bytes=max_segment_bytes,
+                                         sync_writes=sync_writes)
+
+        self.lock = threading.RLock()
+        self._cond = threading.Condition(self.lock)
+        self._closed = False
+
+        # Stats
+        self.demotions = 0
+        self.promotions = 0
+
+        self._worker = threading.Thread(target=self._demote_loop, daemon=True)
+        self._worker.start()
+
+    # ------------------------------------------------------------------
+    # Tier movement
+    # ------------------------------------------------------------------
+
+    def _demote(self, target_bytes: int) -> int:
+        """Drop the coldest hot entries until usage <= target_bytes. Caller holds the lock."""
+        moved = 0
+        while self.hot.used_bytes > target_bytes:
+            pairs = self.hot.demote(target_bytes, self.demote_batch)
+            if not pairs:
+                break
+            moved += len(pairs)
+        self.demotions += moved
+        return moved
+
+    def _after_write(self) -> None:
+        """Wake the demotion thread, or demote inline past the backpressure limit. Caller holds the lock."""
+        if self.hot.used_bytes <= self.hot_memory_bytes:
+            return
+        if self.hot.used_bytes > self.hot_memory_bytes * self.BACKPRESSURE_RATIO:
+            self._demote(self.demote_target_bytes)
+        else:
+            self._cond.notify_all()
+
+    def _demote_loop(self) -> None:
+        limit = self.hot_memory_bytes
+        while True:
+            with self.lock:
+                while not self._closed and self.hot.used_bytes <= limit:
+                    limit = self.hot_memory_bytes
+                    self._cond.wait(timeout=1.0)
+                if self._closed:
+                    return
+                # Once over budget keep going down to the target, one batch
+                # per lock acquisition so writers and promotions interleave
+                limit = self.demote_target_bytes
+                pairs = self.hot.demote(self.demote_target_bytes, self.demote_batch)
+                self.demotions += len(pairs)
+                if not pairs:
+                    # No victim left to demote: wait for the next write
+                    # instead of spinning on the lock
+                    logger.warning(f"Tiered demotion stalled at {self.hot.used_bytes} bytes")
+                    limit = self.hot_memory_bytes
+                    self._cond.wait(timeout=1.0)
+
+    def _promote_locked(self, key: str) -> Tuple[Optional[str], bool]:
+        """Read `key` from the cold tier and move it to the hot tier. Caller holds the lock."""
+        value, found = self.hot.get(key)
+        if found:
+            return value, True
+        value, found = self.cold.get(key)
+        if not found:
+            return None, False
+        self.hot.put(key, value)
+        self.promotions += 1
+        self._after_write()
+        return value, True
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def put(self, key: str, value: str) -> bool:
+        """
+        Save key-value pair to the disk log, then to the hot tier.
+
+        Args:
+            key: Key to save
+            value: Value to save
+
+        Returns:
+            True if saved successfully
+        """
+        try:
+            with self.lock:
+                self.cold.put(key, value)
+                self.hot.put(key, value)
+                self._after_write()
+            return True
+        except Exception as e:
+            raise Exception(f"PUT failed: {str(e)}")
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete key from both tiers.
+
+        Args:
+            key: Key to delete
+
+        Returns:
+            True if key was found and deleted, False if key didn't exist
+        """
+        try:
+            with self.lock:
+                self.hot.delete(key)
+                return self.cold.delete(key)
+        except Exception as e:
+            raise Exception(f"DELETE failed: {str(e)}")
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> int:
+        """
+        Save many key-value pairs to the disk log and the hot tier under one
+        lock acquisition.
+
+        Args:
+            items: Iterable of (key, value) pairs (or a dict)
+
+        Returns:
+            Number of pairs written
+        """
+        try:
+            pairs = list(items.items()) if isinstance(items, dict) else list(items)
+            with self.lock:
+                written = self.cold.put_many(pairs)
+                self.hot.put_many(pairs)
+                self._after_write()
+            return written
+        except Exception as e:
+            raise Exception(f"PUT_MANY failed: {str(e)}")
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Delete many keys from both tiers under one lock acquisition.
+
+        Args:
+            keys: Keys to delete
+
+        Returns:
+            Number of keys that existed and were deleted
+        """
+        try:
+            keys = list(keys)
+            with self.lock:
+                self.hot.delete_many(keys)
+                return self.cold.delete_many(keys)
+        except Exception as e:
+            raise Exception(f"DELETE_MANY failed: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Tuple[Optional[str], bool]:
+        """
+        Retrieve value by key, promoting it if it was cold.
+
+        Args:
+            key: Key to retrieve
+
+        Returns:
+            Tuple of (value, found)
+        """
+        try:
+            value, found = self.hot.get(key)
+            if found:
+                return value, True
+            with self.lock:
+                return self._promote_locked(key)
+        except Exception as e:
+            raise Exception(f"GET failed: {str(e)}")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up many keys; cold hits are promoted under one lock acquisition.
+
+        Args:
+            keys: Keys to look up
+
+        Returns:
+            Dict of found keys to values (missing keys are skipped)
+        """
+        try:
+            keys = list(keys)
+            result = self.hot.get_many(keys)
+            missing = [key for key in keys if key not in result]
+            if missing:
+                with self.lock:
+                    for key in missing:
+                        value, found = self._promote_locked(key)
+                        if found:
+                            result[key] = value
+            return result
+        except Exception as e:
+            raise Exception(f"GET_MANY failed: {str(e)}")
+
+    def list_keys(self) -> List[str]:
+        """Get all keys (the cold tier holds every key)."""
+        return self.cold.list_keys()
+
+    def size(self) -> int:
+        """Get total number of keys (the cold tier holds every key)."""
+        return self.cold.size()
+
+    def hot_size(self) -> int:
+        """Number of keys currently in memory."""
+        return self.hot.size()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """
+        Demote every hot entry (their disk copies are already current).
+
+        Returns:
+            Number of entries demoted
+        """
+        with self.lock:
+            return self._demote(-1)
+
+    def clear(self) -> None:
+        """Delete all data in both tiers (for testing)."""
+        with self.lock:
+            self.hot.clear()
+            self.cold.clear()
+
+    def close(self) -> None:
+        """Stop the demotion thread and close the disk log."""
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout=5.0)
+        self.cold.close()
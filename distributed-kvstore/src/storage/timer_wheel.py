@@ -0,0 +1,128 @@
+"""
+Timer Wheel - Hierarchical timing wheel for key expiry
+"""
+
+from typing import List, Tuple
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel (Varghese & Lauck) over millisecond deadlines.
+
+    Level 0 has `wheel_size` slots of `tick_ms` each; every higher level
+    covers `wheel_size` times the span of the one below. A timer is placed
+    in the lowest level whose span still reaches its deadline and is
+    cascaded down one level each time the lower wheel wraps, so:
+
+    - schedule() is O(1)
+    - advance() costs O(ticks elapsed + timers fired/cascaded), never a
+      scan of all pending timers
+
+    Timers cannot be cancelled; callers re-check the deadline of what
+    fires (a key overwritten or deleted since scheduling is just skipped).
+    Not thread-safe: the owner guards it with its own lock.
+    """
+
+    def __init__(self, tick_ms: int = 100, wheel_size: int = 64, levels: int = 4,
+                 start_ms: int = 0):
+        """
+        Initialize an empty wheel.
+
+        Args:
+            tick_ms: Resolution of level 0 (expiry fires at most one tick late)
+            wheel_size: Slots per level (power of two)
+            levels: Number of levels; deadlines beyond the top span are
+                    parked in the top level and re-cascaded
+            start_ms: Current time in ms
+        """
+        if wheel_size & (wheel_size - 1):
+            raise ValueError("wheel_size must be a power of two")
+        self.tick_ms = tick_ms
+        self.wheel_size = wheel_size
+        self.levels = levels
+        self._bits = wheel_size.bit_length() - 1
+        self._mask = wheel_size - 1
+        self._wheels = [[[] for _ in range(wheel_size)] for _ in range(levels)]
+        self._current_tick = start_ms // tick_ms
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Number of pending timers (including stale ones)."""
+        return self._count
+
+    def _place(self, expire_tick: int, entry: Tuple[int, str], earliest_tick: int) -> None:
+        if expire_tick < earliest_tick:
+            # Already due: fire on the earliest tick not yet processed
+            expire_tick = earliest_tick
+        delta = expire_tick - self._current_tick
+        level = 0
+        while level < self.levels - 1 and delta >= 1 << (self._bits * (level + 1)):
+            level += 1
+        slot = (expire_tick >> (self._bits * level)) & self._mask
+        self._wheels[level][slot].append(entry)
+
+    def schedule(self, key: str, expire_at_ms: int) -> None:
+        """
+        Schedule `key` to fire at `expire_at_ms`.
+
+        Args:
+            key: Key to report when the timer fires
+            expire_at_ms: Absolute deadline (ms)
+        """
+        # Round up so a timer never fires before its deadline
+        self._place(-(-expire_at_ms // self.tick_ms), (expire_at_ms, key), self._current_tick + 1)
+        self._count += 1
+
+    def _cascade(self, level: int) -> None:
+        """Move the current slot of `level` down to the lower levels."""
+        slot = (self._current_tick >> (self._bits * level)) & self._mask
+        entries = self._wheels[level][slot]
+        if not entries:
+            return
+        self._wheels[level][slot] = []
+        for expire_at_ms, key in entries:
+            # The current level-0 slot is processed right after cascading
+            self._place(-(-expire_at_ms // self.tick_ms), (expire_at_ms, key), self._current_tick)
+
+    def advance(self, now_ms: int) -> List[Tuple[str, int]]:
+        """
+        Move the wheel forward to `now_ms` and collect due timers.
+
+        Args:
+            now_ms: Current time in ms
+
+        Returns:
+            List of (key, expire_at_ms) for every timer that fired
+        """
+        target_tick = now_ms // self.tick_ms
+        fired = []
+        while self._current_tick < target_tick:
+            if self._count == 0:
+                # Nothing pending: jump instead of walking empty ticks
+                self._current_tick = target_tick
+                break
+            self._current_tick += 1
+            # Cascade higher levels when the level below wraps around
+            for level in range(1, self.levels):
+                if self._current_tick & ((1 << (self._bits * level)) - 1):
+                    break
+                self._cascade(level)
+
+            slot = self._current_tick & self._mask
+            entries = self._wheels[0][slot]
+            if entries:
+                self._wheels[0][slot] = []
+                for expire_at_ms, key in entries:
+                    if expire_at_ms <= now_ms:
+                        fired.append((key, expire_at_ms))
+                        self._count -= 1
+                    else:
+                        # Parked beyond the top span: not due yet
+                        self._place(-(-expire_at_ms // self.tick_ms), (expire_at_ms, key),
+                                    self._current_tick + 1)
+        return fired
+
+    def clear(self) -> None:
+        """Drop every pending timer."""
+        self._wheels = [[[] for _ in range(self.wheel_size)] for _ in range(self.levels)]
+        self._count = 0
@@ -0,0 +1,78 @@
+"""
+Versioning - Per-key (ms timestamp, node_id) versions for last-write-wins
+"""
+
+import threading
+import time
+from typing import Optional, Tuple
+
+# A version is (timestamp_ms, node_id). Tuples compare field by field, so
+# the newer timestamp wins and equal timestamps from different nodes are
+# ordered by node_id: every node picks the same winner without talking.
+Version = Tuple[int, str]
+
+
+class VersionClock:
+    """
+    Issues versions for writes accepted by this node (as owner).
+
+    Timestamps come from the wall clock but never go backwards and never
+    repeat: each version is at least 1 ms after the previous one, and
+    observe() pulls the clock forward past versions seen from other nodes
+    (replication, recovery). A node that becomes owner of a key after a
+    failover therefore still issues versions newer than the ones its
+    replicas already hold, even if its wall clock is slightly behind.
+    """
+
+    def __init__(self, node_id: str):
+        """
+        Initialize the clock.
+
+        Args:
+            node_id: This node's ID (tie-breaker of every version it issues)
+        """
+        self.node_id = node_id
+        self._last_ms = 0
+        self._lock = threading.Lock()
+
+    def next(self, timestamp_ms: int = 0) -> Version:
+        """
+        Issue a new version.
+
+        Args:
+            timestamp_ms: Client-supplied write time (0 = use the clock);
+                          moved past the last issued version if not newer
+
+        Returns:
+            (timestamp_ms, node_id)
+        """
+        with self._lock:
+            self._last_ms = max(timestamp_ms or int(time.time() * 1000), self._last_ms + 1)
+            return self._last_ms, self.node_id
+
+    def observe(self, version: Optional[Version]) -> None:
+        """Move the clock past a version received from another node."""
+        if version is not None:
+            with self._lock:
+                self._last_ms = max(self._last_ms, version[0])
+
+
+def encode_version(version: Version) -> str:
+    """Encode a version as "<timestamp_ms>:<node_id>" (WAL / checkpoint records)."""
+    return f"{version[0]}:{version[1]}"
+
+
+def decode_version(encoded: str) -> Version:
+    """Inverse of encode_version()."""
+    timestamp_ms, _, node_id = encoded.partition(":")
+    return int(timestamp_ms), node_id
+
+
+def version_fields(version: Optional[Version]) -> Tuple[int, str]:
+    """Split a version into (timestamp, version_node) proto fields ((0, "") = none)."""
+    return version if version is not None else (0, "")
+
+
+def version_from_fields(timestamp_ms: int, node_id: str) -> Optional[Version]:
+    """Inverse of version_fields(): None if the message carries no version."""
+    return (timestamp_ms, node_id) if node_id else None
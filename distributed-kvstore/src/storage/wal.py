@@ -0,0 +1,382 @@
+"""
+Write-Ahead Log - Append-only durability log for the storage engine
+"""
+
+import os
+import struct
+import threading
+import logging
+import zlib
+from typing import Callable, List, Tuple
+
+from src.storage.compression import to_disk, from_disk
+
+logger = logging.getLogger(__name__)
+
+# Operation codes stored in each record
+OP_PUT = 1
+OP_DELETE = 2  # value = deletion time in ms if a tombstone is kept, else empty
+OP_EXPIRE = 3  # value = absolute expiry time in ms (decimal string); logs written before OP_PUT_EXPIRE
+OP_PUT_EXPIRE = 4  # value = "<expiry ms>:<value>", a PUT and its expiry in one record
+OP_VERSION = 5  # value = "<ms>:<node_id>" version of the preceding PUT / DELETE
+
+# Record layout: [crc32 u32][body_len u32] + body
+# Body layout:   [lsn u64][op u8][key_len u32][key bytes][value bytes]
+_HEADER = struct.Struct('<II')
+_BODY_HEAD = struct.Struct('<QBI')
+
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+
+
+class WriteAheadLog:
+    """
+    Segmented append-only log with group commit.
+
+    Writers call append() while holding their storage lock (cheap: the
+    record is only encoded into an in-memory buffer and given the next
+    LSN), then wait_durable() after releasing it. The first waiter becomes
+    the flush leader and writes + fsyncs every buffered record in one
+    batch; writers arriving meanwhile wait for the next batch. Concurrent
+    writers therefore share a single fsync.
+
+    Fsync policies:
+    - "always":   wait_durable() returns after the record is fsynced
+    - "interval": a background thread writes + fsyncs every
+                  `fsync_interval_ms`; wait_durable() does not block
+                  (up to one interval of writes may be lost on crash)
+    - "os":       wait_durable() returns once the record is written to
+                  the OS page cache; fsync is left to the OS
+    """
+
+    FSYNC_ALWAYS = "always"
+    FSYNC_INTERVAL = "interval"
+    FSYNC_OS = "os"
+
+    def __init__(self, wal_dir: str, fsync_policy: str = FSYNC_INTERVAL,
+                 fsync_interval_ms: int = 10,
+                 max_segment_bytes: int = 64 * 1024 * 1024):
+        """
+        Open (or create) the log in `wal_dir`.
+
+        Args:
+            wal_dir: Directory holding the log segments
+            fsync_policy: "always", "interval" or "os"
+            fsync_interval_ms: Flush period for the "interval" policy
+            max_segment_bytes: Roll over to a new segment past this size
+        """
+        if fsync_policy not in (self.FSYNC_ALWAYS, self.FSYNC_INTERVAL, self.FSYNC_OS):
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+
+        self.wal_dir = wal_dir
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.max_segment_bytes = max_segment_bytes
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._buffer: List[bytes] = []  # Encoded records not yet written
+        self._flushing = False  # True while a leader is writing a batch
+        self._error = None  # Set if a batch write failed
+        self._closed = False
+
+        # Stats (group commit effectiveness)
+        self.fsync_count = 0
+        self.records_written = 0
+
+        os.makedirs(wal_dir, exist_ok=True)
+        last_lsn = self._recover_tail()
+        self._next_lsn = last_lsn + 1
+        self._durable_lsn = last_lsn
+
+        self._flusher = None
+        if fsync_policy == self.FSYNC_INTERVAL:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    # ------------------------------------------------------------------
+    # Segment helpers
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, first_lsn: int) -> str:
+        return os.path.join(self.wal_dir, f"{SEGMENT_PREFIX}{first_lsn:020d}{SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> List[Tuple[int, str]]:
+        """Return [(first_lsn, path)] sorted by first_lsn."""
+        segments = []
+        for name in os.listdir(self.wal_dir):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                first_lsn = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+                segments.append((first_lsn, os.path.join(self.wal_dir, name)))
+        return sorted(segments)
+
+    @staticmethod
+    def _read_records(path: str):
+        """
+        Yield (lsn, op, key, value, end_offset) for every valid record.
+
+        Stops silently at the first truncated or corrupt record (torn write).
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            crc, body_len = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            end = start + body_len
+            if body_len < _BODY_HEAD.size or end > len(data):
+                return
+            body = data[start:end]
+            if zlib.crc32(body) != crc:
+                return
+            lsn, op, key_len = _BODY_HEAD.unpack_from(body, 0)
+            key_end = _BODY_HEAD.size + key_len
+            key = body[_BODY_HEAD.size:key_end].decode('utf-8')
+            value = from_disk(body[key_end:])
+            yield lsn, op, key, value, end
+            offset = end
+
+    def _recover_tail(self) -> int:
+        """
+        Open the newest segment for appending, truncating any torn tail.
+
+        Returns:
+            Last valid LSN in the log (0 if empty)
+        """
+        segments = self._list_segments()
+        if not segments:
+            self._open_segment(1)
+            return 0
+
+        first_lsn, path = segments[-1]
+        last_lsn = first_lsn - 1
+        valid_end = 0
+        for lsn, _, _, _, end in self._read_records(path):
+            last_lsn = lsn
+            valid_end = end
+
+        if valid_end < os.path.getsize(path):
+            logger.warning(
+                f"WAL: truncating torn tail of {os.path.basename(path)} "
+                f"({os.path.getsize(path) - valid_end} bytes)"
+            )
+            with open(path, 'r+b') as f:
+                f.truncate(valid_end)
+
+        self._segment_first_lsn = first_lsn
+        self._file = open(path, 'ab', buffering=0)
+        self._segment_size = valid_end
+        return last_lsn
+
+    def _open_segment(self, first_lsn: int) -> None:
+        self._segment_first_lsn = first_lsn
+        self._file = open(self._segment_path(first_lsn), 'ab', buffering=0)
+        self._segment_size = 0
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def append(self, op: int, key: str, value: str = "") -> int:
+        """
+        Buffer a record and assign it the next LSN.
+
+        Call while holding the storage lock so LSN order matches the
+        order in which writes are applied in memory.
+
+        Args:
+            op: OP_PUT, OP_DELETE, OP_EXPIRE, OP_PUT_EXPIRE or OP_VERSION
+            key: Key
+            value: Value (deletion ms or empty for OP_DELETE, expiry ms for OP_EXPIRE,
+                   "<expiry ms>:<value>" for OP_PUT_EXPIRE, encoded version for OP_VERSION)
+
+        Returns:
+            LSN of the record (pass to wait_durable())
+        """
+        key_bytes = key.encode('utf-8')
+        with self._lock:
+            if self._closed:
+                raise IOError("WAL is closed")
+            lsn = self._next_lsn
+            self._next_lsn += 1
+            body = _BODY_HEAD.pack(lsn, op, len(key_bytes)) + key_bytes + to_disk(value)
+            self._buffer.append(_HEADER.pack(zlib.crc32(body), len(body)) + body)
+            return lsn
+
+    def wait_durable(self, lsn: int) -> None:
+        """
+        Block until record `lsn` is durable according to the fsync policy.
+
+        Args:
+            lsn: LSN returned by append()
+        """
+        if self.fsync_policy == self.FSYNC_INTERVAL:
+            return
+
+        with self._lock:
+            while self._durable_lsn < lsn:
+                if self._error is not None:
+                    raise IOError(f"WAL write failed: {self._error}")
+                if self._flushing:
+                    # Another writer is leading a batch - wait for it
+                    self._cond.wait()
+                else:
+                    self._flush_locked(sync=self.fsync_policy == self.FSYNC_ALWAYS)
+
+    def flush(self, sync: bool = True) -> None:
+        """Write (and optionally fsync) every buffered record now."""
+        with self._lock:
+            while self._flushing:
+                self._cond.wait()
+            self._flush_locked(sync=sync)
+
+    def _flush_locked(self, sync: bool) -> None:
+        """
+        Write the current buffer as one batch. Caller holds self._lock;
+        the lock is released during I/O so new records keep buffering.
+        """
+        if not self._buffer:
+            return
+
+        batch = self._buffer
+        self._buffer = []
+        batch_last_lsn = self._next_lsn - 1
+        self._flushing = True
+        self._lock.release()
+        try:
+            self._write_batch(batch, batch_last_lsn, sync)
+        except Exception as e:
+            self._error = e
+            logger.error(f"WAL batch write failed: {e}")
+            raise
+        finally:
+            self._lock.acquire()
+            self._flushing = False
+            self._cond.notify_all()
+
+        self._durable_lsn = batch_last_lsn
+
+    def _write_batch(self, batch: List[bytes], batch_last_lsn: int, sync: bool) -> None:
+        data = b"".join(batch)
+        self._file.write(data)
+        self._segment_size += len(data)
+        self.records_written += len(batch)
+        if sync:
+            os.fsync(self._file.fileno())
+            self.fsync_count += 1
+
+        if self._segment_size >= self.max_segment_bytes:
+            # Roll over: next segment starts after this batch
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._open_segment(batch_last_lsn + 1)
+
+    def _flush_loop(self) -> None:
+        """Background flusher for the "interval" policy."""
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                self._cond.wait(self.fsync_interval)
+                if self._closed:
+                    return
+                if self._flushing or not self._buffer:
+                    continue
+                try:
+                    self._flush_locked(sync=True)
+                except Exception:
+                    pass  # Already logged; writers see self._error
+
+    # ------------------------------------------------------------------
+    # Truncation
+    # ------------------------------------------------------------------
+
+    def rotate(self) -> int:
+        """
+        Flush buffered records and start a new segment.
+
+        Returns:
+            Last LSN in the sealed segment (pass to purge() once the data
+            up to that LSN is persisted elsewhere)
+        """
+        with self._lock:
+            while self._flushing:
+                self._cond.wait()
+            self._flush_locked(sync=True)
+            last_lsn = self._next_lsn - 1
+            if self._segment_size > 0:
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._open_segment(self._next_lsn)
+            return last_lsn
+
+    def purge(self, upto_lsn: int) -> int:
+        """
+        Delete sealed segments whose records all have LSN <= upto_lsn.
+
+        Args:
+            upto_lsn: Records up to this LSN are no longer needed
+
+        Returns:
+            Number of segments deleted
+        """
+        with self._lock:
+            segments = self._list_segments()
+            active_first_lsn = self._segment_first_lsn
+
+        removed = 0
+        # A segment is fully covered if the next segment starts at or before upto_lsn + 1
+        for (first_lsn, path), (next_first_lsn, _) in zip(segments, segments[1:]):
+            if first_lsn >= active_first_lsn or next_first_lsn > upto_lsn + 1:
+                break
+            os.remove(path)
+            removed += 1
+        return removed
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def replay(self, apply_fn: Callable[[int, str, str], None], from_lsn: int = 0) -> int:
+        """
+        Re-apply every durable record with LSN > from_lsn, in LSN order.
+
+        Args:
+            apply_fn: Called as apply_fn(op, key, value) for each record
+            from_lsn: Skip records up to and including this LSN
+
+        Returns:
+            Number of records applied
+        """
+        self.flush(sync=self.fsync_policy != self.FSYNC_OS)
+
+        count = 0
+        for _, path in self._list_segments():
+            for lsn, op, key, value, _ in self._read_records(path):
+                if lsn > from_lsn:
+                    apply_fn(op, key, value)
+                    count += 1
+        return count
+
+    @property
+    def last_lsn(self) -> int:
+        """LSN of the most recently appended record."""
+        with self._lock:
+            return self._next_lsn - 1
+
+    def close(self) -> None:
+        """Flush buffered records, fsync and close the active segment."""
+        with self._lock:
+            if self._closed:
+                return
+            while self._flushing:
+                self._cond.wait()
+            self._flush_locked(sync=True)
+            self._closed = True
+            self._cond.notify_all()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+        if self._flusher is not None:
+            self._flusher.join(timeout=1.0)
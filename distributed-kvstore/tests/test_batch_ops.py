@@ -0,0 +1,181 @@
+"""
+Unit Tests cho batch storage API (put_many / get_many / delete_many) + ReplicateBatch
+"""
+
+import sys
+import os
+import tempfile
+import threading
+from concurrent import futures
+
+import grpc
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.proto import kvstore_pb2, kvstore_pb2_grpc
+from src.storage.storage_engine import StorageEngine, now_ms
+from src.storage.sharded_engine import ShardedStorageEngine
+from src.storage.compact_engine import CompactStorageEngine
+from src.storage.bitcask_engine import BitcaskStorageEngine
+from src.storage.lsm_engine import LSMStorageEngine
+from src.storage.wal import WriteAheadLog
+from src.membership_manager import Node
+from src.server import NodeServicer, recover_from_peers
+
+
+class _StaticMembership:
+    """Membership cố định: mọi key có replicas = tất cả nodes (node đầu là owner)."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def get_all_nodes(self):
+        return self.nodes
+
+    def get_all_replicas(self, key):
+        return self.nodes
+
+
+def test_batch_ops_with_wal():
+    """Test put_many/get_many/delete_many on the memory engine survive WAL replay."""
+    print("\n=== Test 1: Batch Ops + WAL ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = ShardedStorageEngine(num_shards=4, wal=wal)
+        deadline = now_ms() + 60000
+        assert storage.put_many({f"k{i}": f"v{i}" for i in range(100)}, expiry={"k0": deadline}) == 100
+        assert storage.delete_many(["k1", "k2", "missing"]) == 2
+        assert storage.get_many(["k0", "k1", "k3", "missing"]) == {"k0": "v0", "k3": "v3"}
+        assert storage.shards[hash("k0") % 4].expiry["k0"] == deadline
+        print("✅ 100 puts, 2 deletes, lookups skip missing keys")
+        wal.close()
+
+        wal = WriteAheadLog(wal_dir)
+        restored = StorageEngine(wal=wal)
+        restored.replay_wal()
+        assert restored.size() == 98
+        assert restored.expiry == {"k0": deadline}
+        wal.close()
+        print("✅ WAL replay restores the batch (including expiry)")
+
+
+def test_sharded_batch_is_atomic():
+    """Test readers never observe half of a put_many across stripes."""
+    print("\n=== Test 2: Atomic Batches ===")
+
+    storage = ShardedStorageEngine(num_shards=8)
+    keys = [f"key:{i}" for i in range(64)]
+    storage.put_many([(key, "0") for key in keys])
+    stop = threading.Event()
+
+    def writer():
+        version = 0
+        while not stop.is_set():
+            version += 1
+            storage.put_many([(key, str(version)) for key in keys])
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(500):
+            assert len(set(storage.get_many(keys).values())) == 1
+    finally:
+        stop.set()
+        thread.join()
+    print("✅ 500 concurrent get_many saw a single version each time")
+
+
+def test_batch_ops_all_engines():
+    """Test every local engine implements the same batch semantics."""
+    print("\n=== Test 3: Engine Parity ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        engines = {
+            "memory": StorageEngine(),
+            "compact": CompactStorageEngine(),
+            "bitcask": BitcaskStorageEngine(os.path.join(data_dir, "bitcask")),
+            "lsm": LSMStorageEngine(os.path.join(data_dir, "lsm")),
+        }
+        for name, storage in engines.items():
+            assert storage.put_many([("a", "1"), ("b", "2"), ("c", "3"), ("a", "4")]) == 4
+            assert storage.delete_many(["b", "zzz"]) == 1
+            assert storage.get_many(["a", "b", "c"]) == {"a": "4", "c": "3"}
+            assert sorted(storage.list_keys()) == ["a", "c"]
+            if hasattr(storage, "close"):
+                storage.close()
+            print(f"✅ {name}: last write wins, deletes counted, missing keys skipped")
+
+
+def test_replicate_batch_and_snapshot_recovery():
+    """Test ReplicateBatch applies ops in order and recovery loads peer snapshots."""
+    print("\n=== Test 4: ReplicateBatch & Recovery ===")
+
+    peer_storage = StorageEngine()
+    peer = NodeServicer("node2", 0, peer_storage)
+    ops = [
+        kvstore_pb2.ReplicateRequest(key="a", value="1", operation=kvstore_pb2.PUT),
+        kvstore_pb2.ReplicateRequest(key="b", value="2", operation=kvstore_pb2.PUT),
+        kvstore_pb2.ReplicateRequest(key="a", operation=kvstore_pb2.DELETE),
+        kvstore_pb2.ReplicateRequest(key="c", value="3", operation=kvstore_pb2.PUT,
+                                     expire_at_ms=now_ms() + 60000),
+    ]
+    response = peer.ReplicateBatch(kvstore_pb2.ReplicateBatchRequest(ops=ops, primary_node="node1"), None)
+    assert response.success and response.applied == 4
+    assert peer_storage.get_many(["a", "b", "c"]) == {"b": "2", "c": "3"}
+    assert "c" in peer_storage.expiry
+    print("✅ PUT/DELETE runs applied in order with TTL")
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    kvstore_pb2_grpc.add_NodeServiceServicer_to_server(peer, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        membership = _StaticMembership([Node("node2", "127.0.0.1", port), Node("node1", "127.0.0.1", 1)])
+        storage = ShardedStorageEngine(num_shards=2)
+        assert recover_from_peers("node1", storage, membership, batch_size=1) == 2
+        assert storage.get_many(["b", "c"]) == {"b": "2", "c": "3"}
+        print("✅ Empty node recovered 2 keys from a peer snapshot")
+    finally:
+        server.stop(None)
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Batch Ops Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_batch_ops_with_wal,
+        test_sharded_batch_is_atomic,
+        test_batch_ops_all_engines,
+        test_replicate_batch_and_snapshot_recovery,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
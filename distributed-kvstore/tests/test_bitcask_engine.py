@@ -0,0 +1,162 @@
+"""
+Unit Tests cho BitcaskStorageEngine (segments, hint files, merge)
+"""
+
+import sys
+import os
+import tempfile
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.bitcask_engine import BitcaskStorageEngine, DATA_SUFFIX, HINT_SUFFIX
+
+
+def _files(data_dir, suffix):
+    return sorted(name for name in os.listdir(data_dir) if name.endswith(suffix))
+
+
+def test_bitcask_basic_operations():
+    """Test PUT/GET/DELETE/LIST on Bitcask engine."""
+    print("\n=== Test 1: Bitcask Basic Operations ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = BitcaskStorageEngine(data_dir)
+        assert storage.put("user:1", "Alice") is True
+        assert storage.put("user:2", "Bình") is True
+        assert storage.get("user:1") == ("Alice", True)
+        assert storage.get("user:2") == ("Bình", True)
+        assert storage.get("notexist") == (None, False)
+        print("✅ PUT/GET work (including non-ASCII values)")
+
+        storage.put("user:1", "Alice v2")
+        assert storage.get("user:1") == ("Alice v2", True)
+        assert storage.delete("user:2") is True
+        assert storage.delete("user:2") is False
+        assert sorted(storage.list_keys()) == ["user:1"]
+        assert storage.size() == 1
+        storage.close()
+        print("✅ Overwrite and DELETE work")
+
+
+def test_bitcask_restart_uses_hint_files():
+    """Test keydir is rebuilt after restart, from hints where available."""
+    print("\n=== Test 2: Restart With Hint Files ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = BitcaskStorageEngine(data_dir, max_segment_bytes=512)
+        for i in range(100):
+            storage.put(f"key:{i}", f"value:{i}")
+        for i in range(0, 100, 2):
+            storage.delete(f"key:{i}")
+        storage.close()
+
+        segments = _files(data_dir, DATA_SUFFIX)
+        assert len(segments) > 1
+        assert len(_files(data_dir, HINT_SUFFIX)) == len(segments)
+        print(f"✅ {len(segments)} segments, each sealed with a hint file")
+
+        restored = BitcaskStorageEngine(data_dir, max_segment_bytes=512)
+        assert restored.size() == 50
+        assert restored.get("key:1") == ("value:1", True)
+        assert restored.get("key:2") == (None, False)
+        restored.close()
+        print("✅ 50 live keys restored, deleted keys stay deleted")
+
+
+def test_bitcask_recovers_unsealed_segment():
+    """Test a segment without hint (crash) is scanned and torn tail dropped."""
+    print("\n=== Test 3: Crash Recovery ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = BitcaskStorageEngine(data_dir)
+        storage.put("a", "1")
+        storage.put("b", "2")
+        # Simulate crash: no close(), active segment has no hint
+        segment = os.path.join(data_dir, _files(data_dir, DATA_SUFFIX)[-1])
+        storage._active_file.close()
+        with open(segment, 'r+b') as f:
+            f.truncate(os.path.getsize(segment) - 1)
+
+        restored = BitcaskStorageEngine(data_dir)
+        assert restored.get("a") == ("1", True)
+        assert restored.get("b") == (None, False)
+        restored.put("c", "3")
+        assert restored.get("c") == ("3", True)
+        restored.close()
+        print("✅ Valid prefix recovered, torn record dropped")
+
+
+def test_bitcask_merge_reclaims_space():
+    """Test merge keeps only live values and deletes old segments."""
+    print("\n=== Test 4: Merge ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = BitcaskStorageEngine(data_dir, max_segment_bytes=1024)
+        for round_num in range(5):
+            for i in range(50):
+                storage.put(f"key:{i}", f"value:{i}:{round_num}")
+        for i in range(10):
+            storage.delete(f"key:{i}")
+
+        size_before = sum(os.path.getsize(os.path.join(data_dir, n))
+                          for n in _files(data_dir, DATA_SUFFIX))
+        reclaimed = storage.merge()
+        size_after = sum(os.path.getsize(os.path.join(data_dir, n))
+                         for n in _files(data_dir, DATA_SUFFIX))
+
+        assert reclaimed > 0
+        assert size_after < size_before
+        assert storage.size() == 40
+        assert storage.get("key:20") == ("value:20:4", True)
+        assert storage.get("key:5") == (None, False)
+        print(f"✅ Reclaimed {reclaimed} segments: {size_before}B -> {size_after}B")
+
+        storage.put("key:20", "after-merge")
+        storage.close()
+        restored = BitcaskStorageEngine(data_dir, max_segment_bytes=1024)
+        assert restored.size() == 40
+        assert restored.get("key:20") == ("after-merge", True)
+        assert restored.get("key:5") == (None, False)
+        restored.close()
+        print("✅ Merged store reloads correctly")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running BitcaskStorageEngine Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_bitcask_basic_operations,
+        test_bitcask_restart_uses_hint_files,
+        test_bitcask_recovers_unsealed_segment,
+        test_bitcask_merge_reclaims_space,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
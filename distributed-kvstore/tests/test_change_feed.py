@@ -0,0 +1,213 @@
+"""
+Unit Tests cho change feed (ring buffer) + Watch RPC
+"""
+
+import sys
+import os
+import threading
+from concurrent import futures
+
+import grpc
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.proto import kvstore_pb2, kvstore_pb2_grpc
+from src.storage.storage_engine import StorageEngine, now_ms
+from src.storage.sharded_engine import ShardedStorageEngine
+from src.storage.changefeed import ChangeFeed
+from src.storage.eviction import create_eviction_policy
+from src.storage.wal import OP_PUT, OP_DELETE
+from src.server import KeyValueStoreServicer
+
+
+def _start_watch_server(storage, watch_config=None):
+    """Chạy KeyValueStoreServicer trong process, trả về (server, channel, stub)."""
+    servicer = KeyValueStoreServicer("node1", 0, storage, None, None,
+                                     watch_config=watch_config or {"poll_ms": 50})
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    kvstore_pb2_grpc.add_KeyValueStoreServicer_to_server(servicer, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    return server, channel, kvstore_pb2_grpc.KeyValueStoreStub(channel)
+
+
+def test_ring_buffer_semantics():
+    """Test sequence numbers, resume, overwrite of old events and lag detection."""
+    print("\n=== Test 1: Ring Buffer ===")
+
+    feed = ChangeFeed(capacity=4)
+    for i in range(3):
+        feed.append(OP_PUT, f"k{i}", "v")
+    events, next_seq, lagged = feed.read(2)
+    assert [e.seq for e in events] == [2, 3] and next_seq == 4 and not lagged
+    assert feed.read(4) == ([], 4, False)
+    print("✅ Resume from a sequence returns the events after it")
+
+    for i in range(3, 10):
+        feed.append(OP_DELETE, f"k{i}")
+    assert (feed.first_seq, feed.last_seq) == (7, 10)
+    events, next_seq, lagged = feed.read(2, max_events=2)
+    assert lagged and [e.key for e in events] == ["k6", "k7"] and next_seq == 9
+    events, next_seq, lagged = feed.read(100)
+    assert lagged and events == [] and next_seq == 11
+    print("✅ Overwritten and future (previous run) sequences are reported as lagged")
+
+
+def test_engine_reports_every_write():
+    """Test puts, deletes, expiry and eviction reach the feed in apply order."""
+    print("\n=== Test 2: Engine Events ===")
+
+    feed = ChangeFeed()
+    storage = ShardedStorageEngine(num_shards=4, change_feed=feed, keep_tombstones=True)
+    storage.put("a", "1", version=(100, "node1"))
+    assert not storage.put("a", "stale", version=(50, "node1"))
+    storage.put_many([("b", "2"), ("c", "3")])
+    storage.delete("b")
+    storage.delete_many(["c", "missing"])
+    storage.put("ttl", "t", expire_at_ms=now_ms() - 1)
+    storage.expire_keys(now=now_ms() + 1000)
+
+    events, _, _ = feed.read(1)
+    assert [(e.op, e.key, e.value, e.version) for e in events] == [
+        (OP_PUT, "a", "1", (100, "node1")),
+        (OP_PUT, "b", "2", None),
+        (OP_PUT, "c", "3", None),
+        (OP_DELETE, "b", "", None),
+        (OP_DELETE, "c", "", None),
+        (OP_PUT, "ttl", "t", None),
+        (OP_DELETE, "ttl", "", None),
+    ]
+    print("✅ Stripes share one feed; stale writes and missing keys are not reported")
+
+    bounded = StorageEngine(max_memory_bytes=600, eviction_policy=create_eviction_policy("lru"),
+                            change_feed=ChangeFeed())
+    for i in range(20):
+        bounded.put(f"key{i}", "x" * 50)
+    ops = [e.op for e in bounded.change_feed.read(1)[0]]
+    assert ops.count(OP_DELETE) == bounded.evictions > 0
+    print(f"✅ {bounded.evictions} evictions reported as deletes")
+
+
+def test_watch_stream():
+    """Test Watch streams new writes, filters by prefix and resumes from a sequence."""
+    print("\n=== Test 3: Watch RPC ===")
+
+    storage = StorageEngine(change_feed=ChangeFeed(capacity=1000))
+    storage.put("user:1", "old")
+    server, channel, stub = _start_watch_server(storage)
+    try:
+        stream = stub.Watch(kvstore_pb2.WatchRequest(prefix="user:"), timeout=10)
+        received = []
+        ready = threading.Event()
+
+        def consume():
+            ready.set()
+            for event in stream:
+                received.append(event)
+                if len(received) == 2:
+                    break
+            stream.cancel()
+
+        thread = threading.Thread(target=consume)
+        thread.start()
+        ready.wait()
+        # Stream chỉ nhận events sau khi bắt đầu: ghi lặp lại đến khi thread nhận đủ
+        while thread.is_alive():
+            storage.put("order:1", "x")
+            storage.put("user:2", "u")
+            storage.delete("user:2")
+            thread.join(timeout=0.05)
+        assert [(e.key, e.operation) for e in received[:2]] in (
+            [("user:2", kvstore_pb2.PUT), ("user:2", kvstore_pb2.DELETE)],
+            [("user:2", kvstore_pb2.DELETE), ("user:2", kvstore_pb2.PUT)],
+        )
+        assert all(e.node_id == "node1" and not e.lagged for e in received)
+        print("✅ Live stream delivers only keys under the prefix")
+
+        replay = stub.Watch(kvstore_pb2.WatchRequest(from_seq=1), timeout=10)
+        first = next(replay)
+        replay.cancel()
+        assert (first.seq, first.key, first.value, first.lagged) == (1, "user:1", "old", False)
+        print("✅ from_seq resumes from the feed history")
+    finally:
+        channel.close()
+        server.stop(None)
+
+
+def test_slow_watcher_and_limits():
+    """Test a watcher that fell behind is flagged as lagged and limits are enforced."""
+    print("\n=== Test 4: Lagged Watchers & Limits ===")
+
+    storage = StorageEngine(change_feed=ChangeFeed(capacity=10))
+    for i in range(25):
+        storage.put(f"k{i}", str(i))
+    server, channel, stub = _start_watch_server(storage, {"poll_ms": 50, "max_watchers": 1})
+    try:
+        stream = stub.Watch(kvstore_pb2.WatchRequest(from_seq=3), timeout=10)
+        first, second = next(stream), next(stream)
+        assert (first.seq, first.lagged) == (16, True) and (second.seq, second.lagged) == (17, False)
+        print("✅ Watcher 13 events behind resumes at the oldest retained event, flagged lagged")
+
+        try:
+            next(stub.Watch(kvstore_pb2.WatchRequest(), timeout=10))
+            assert False, "second watcher should be rejected"
+        except grpc.RpcError as e:
+            assert e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+        stream.cancel()
+        print("✅ Watchers beyond max_watchers rejected")
+    finally:
+        channel.close()
+        server.stop(None)
+
+    server, channel, stub = _start_watch_server(StorageEngine())
+    try:
+        next(stub.Watch(kvstore_pb2.WatchRequest(), timeout=10))
+        assert False, "watch without a change feed should fail"
+    except grpc.RpcError as e:
+        assert e.code() == grpc.StatusCode.FAILED_PRECONDITION
+        print("✅ Watch rejected when the change feed is disabled")
+    finally:
+        channel.close()
+        server.stop(None)
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Change Feed Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_ring_buffer_semantics,
+        test_engine_reports_every_write,
+        test_watch_stream,
+        test_slow_watcher_and_limits,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,187 @@
+"""
+Unit Tests cho CheckpointStore (write/restore, WAL tail, corruption fallback)
+"""
+
+import sys
+import os
+import tempfile
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.checkpoint import CheckpointStore
+from src.storage.sharded_engine import ShardedStorageEngine
+from src.storage.wal import WriteAheadLog
+from src.server import create_storage, create_checkpoint_store
+
+
+def test_checkpoint_round_trip():
+    """Test a checkpoint restores every key, with and without compression."""
+    print("\n=== Test 1: Checkpoint Round-trip ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for level in (0, 6):
+            store = CheckpointStore(os.path.join(data_dir, f"level{level}"), compress_level=level)
+            storage = ShardedStorageEngine(num_shards=8)
+            for i in range(1000):
+                storage.put(f"key:{i}", f"value:{i}" * 5)
+            storage.put("unicode:ключ", "giá trị")
+
+            info = store.checkpoint(storage)
+            assert info.num_keys == 1001
+            assert os.path.exists(info.path)
+
+            restored = ShardedStorageEngine(num_shards=4)
+            restored_info = store.restore(restored)
+            assert restored_info.num_keys == 1001
+            assert restored.size() == 1001
+            assert restored.get("key:999") == ("value:999" * 5, True)
+            assert restored.get("unicode:ключ") == ("giá trị", True)
+            print(f"✅ compress_level={level}: {info.size_bytes} bytes, all keys restored")
+
+
+def test_checkpoint_with_wal_tail():
+    """Test restart = checkpoint + replay of WAL records written after it."""
+    print("\n=== Test 2: Checkpoint + WAL Tail ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        wal_dir = os.path.join(data_dir, "wal")
+        store = CheckpointStore(os.path.join(data_dir, "checkpoints"))
+
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = ShardedStorageEngine(num_shards=4, wal=wal)
+        for i in range(100):
+            storage.put(f"key:{i}", "old")
+        info = store.checkpoint(storage)
+        assert info.lsn == 100
+
+        storage.put("key:0", "new")
+        storage.delete("key:1")
+        storage.put("after", "checkpoint")
+        wal.close()
+
+        wal = WriteAheadLog(wal_dir)
+        restored = ShardedStorageEngine(num_shards=4, wal=wal)
+        info = store.restore(restored)
+        assert restored.replay_wal(from_lsn=info.lsn) == 3
+        assert restored.get("key:0") == ("new", True)
+        assert restored.get("key:1") == (None, False)
+        assert restored.get("after") == ("checkpoint", True)
+        assert restored.size() == 100
+        wal.close()
+        print("✅ Only the 3 records after the checkpoint were replayed")
+
+
+def test_checkpoint_purges_wal_and_prunes_files():
+    """Test old checkpoints are pruned and covered WAL segments purged."""
+    print("\n=== Test 3: Prune & WAL Purge ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        wal_dir = os.path.join(data_dir, "wal")
+        store = CheckpointStore(os.path.join(data_dir, "checkpoints"), keep=2)
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = ShardedStorageEngine(num_shards=4, wal=wal)
+
+        for round_num in range(4):
+            for i in range(50):
+                storage.put(f"key:{i}", str(round_num))
+            store.checkpoint(storage)
+
+        assert [lsn for lsn, _ in store.list_checkpoints()] == [200, 150]
+        records = []
+        wal.replay(lambda op, k, v: records.append(k))
+        assert len(records) == 50  # Only what the older kept checkpoint still needs
+        wal.close()
+        print("✅ 2 checkpoints kept, WAL truncated to the oldest one")
+
+
+def test_checkpoint_corruption_fallback():
+    """Test a corrupt newest checkpoint falls back to the previous one."""
+    print("\n=== Test 4: Corruption Fallback ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = CheckpointStore(data_dir, keep=2)
+        storage = ShardedStorageEngine(num_shards=4)
+        storage.put("a", "1")
+        store.checkpoint(storage)
+        storage.put("b", "2")
+        sections, _, _ = storage.copy_state()
+        newest = store.write(sections, lsn=1)
+
+        with open(newest.path, 'r+b') as f:
+            f.seek(-2, os.SEEK_END)
+            f.write(b"\xff\xff")
+
+        restored = ShardedStorageEngine(num_shards=4)
+        info = store.restore(restored)
+        assert info.lsn == 0
+        assert restored.list_keys() == ["a"]
+        print("✅ Checksum mismatch detected, previous checkpoint used")
+
+        assert CheckpointStore(os.path.join(data_dir, "empty")).restore(restored) is None
+        print("✅ No checkpoint -> restore() returns None")
+
+
+def test_create_storage_shares_checkpoint_store():
+    """Test the memory backend restores from the CheckpointStore it is given."""
+    print("\n=== Test 5: Shared CheckpointStore ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        config = {"engine": "memory", "data_dir": data_dir, "num_shards": 4,
+                  "checkpoint": {"enabled": True}}
+        store = create_checkpoint_store("node1", config)
+        assert store is not None
+        assert create_checkpoint_store("node1", dict(config, engine="bitcask")) is None
+
+        source = ShardedStorageEngine(num_shards=4)
+        source.put("key", "value")
+        store.checkpoint(source)
+
+        restore_calls = []
+        original = store.restore
+        store.restore = lambda storage: restore_calls.append(storage) or original(storage)
+        storage = create_storage("node1", config, checkpoint_store=store)
+        assert restore_calls == [storage]
+        assert storage.get("key") == ("value", True)
+        print("✅ create_storage() restores through the store serve() checkpoints with")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running CheckpointStore Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_checkpoint_round_trip,
+        test_checkpoint_with_wal_tail,
+        test_checkpoint_purges_wal_and_prunes_files,
+        test_checkpoint_corruption_fallback,
+        test_create_storage_shares_checkpoint_store,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
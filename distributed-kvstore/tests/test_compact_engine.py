@@ -0,0 +1,183 @@
+"""
+Unit Tests cho CompactStorageEngine (arena + array-backed index)
+"""
+
+import sys
+import os
+import tempfile
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.compact_engine import CompactStorageEngine
+from src.storage.wal import WriteAheadLog
+from src.storage.checkpoint import CheckpointStore
+
+
+def test_basic_operations():
+    """Test PUT/GET/DELETE/LIST with unicode keys and values."""
+    print("\n=== Test 1: Basic Operations ===")
+
+    storage = CompactStorageEngine()
+    storage.put("user:1", "Alice")
+    storage.put("khóa:2", "giá trị 🚀")
+    storage.put("empty", "")
+
+    assert storage.get("user:1") == ("Alice", True)
+    assert storage.get("khóa:2") == ("giá trị 🚀", True)
+    assert storage.get("empty") == ("", True)
+    assert storage.get("missing") == (None, False)
+    print("✅ PUT/GET round-trip UTF-8 keys and values")
+
+    assert sorted(storage.list_keys()) == ["empty", "khóa:2", "user:1"]
+    assert storage.delete("user:1") is True
+    assert storage.delete("user:1") is False
+    assert storage.get("user:1") == (None, False)
+    assert storage.size() == 2
+    print("✅ DELETE is idempotent, size tracks live keys")
+
+
+def test_compaction_reclaims_dead_bytes():
+    """Test overwrites/deletes leave dead records that compaction reclaims."""
+    print("\n=== Test 2: Compaction ===")
+
+    storage = CompactStorageEngine(segment_bytes=4096)
+    for round_num in range(20):
+        for i in range(100):
+            storage.put(f"key:{i}", f"value-{round_num}-" + "x" * 40)
+    for i in range(50):
+        storage.delete(f"key:{i}")
+
+    assert storage.compaction_count > 0
+    print(f"✅ Auto-compaction ran {storage.compaction_count} times")
+
+    before = storage.memory_usage()
+    reclaimed = storage.compact()
+    assert reclaimed > 0
+    assert storage.memory_usage() < before
+    assert storage.size() == 50
+    for i in range(50, 100):
+        assert storage.get(f"key:{i}") == ("value-19-" + "x" * 40, True)
+    print(f"✅ compact() reclaimed {reclaimed} bytes, live values intact")
+
+
+def test_index_resize_many_keys():
+    """Test the index grows and keeps every key reachable."""
+    print("\n=== Test 3: Index Resize ===")
+
+    storage = CompactStorageEngine(initial_capacity=8)
+    for i in range(20000):
+        storage.put(f"k{i}", str(i))
+    for i in range(0, 20000, 2):
+        storage.delete(f"k{i}")
+    for i in range(20000, 25000):
+        storage.put(f"k{i}", str(i))
+
+    assert storage.size() == 15000
+    for i in range(25000):
+        expected = (None, False) if i < 20000 and i % 2 == 0 else (str(i), True)
+        assert storage.get(f"k{i}") == expected
+    print("✅ 15000 live keys reachable after resizes and tombstone purges")
+
+
+def test_wal_recovery():
+    """Test the arena is rebuilt from the WAL after restart."""
+    print("\n=== Test 4: WAL Recovery ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = CompactStorageEngine(wal=wal)
+        storage.put("a", "1")
+        storage.put("b", "2")
+        storage.put("a", "3")
+        storage.delete("b")
+        storage.put("c", "ç")
+        wal.close()
+
+        wal = WriteAheadLog(wal_dir)
+        restored = CompactStorageEngine(wal=wal)
+        assert restored.replay_wal() == 5
+        assert sorted(restored.list_keys()) == ["a", "c"]
+        assert restored.get("a") == ("3", True)
+        assert restored.get("c") == ("ç", True)
+        wal.close()
+        print("✅ Replayed 5 WAL records into the compact engine")
+
+
+def test_checkpoint_truncates_wal():
+    """Test a checkpoint purges the WAL and restart = checkpoint + WAL tail."""
+    print("\n=== Test 5: Checkpoint + WAL Truncation ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        wal_dir = os.path.join(data_dir, "wal")
+        store = CheckpointStore(os.path.join(data_dir, "checkpoints"), keep=1)
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = CompactStorageEngine(wal=wal)
+        for i in range(500):
+            storage.put(f"key:{i}", f"value-{i}")
+        for i in range(100):
+            storage.delete(f"key:{i}")
+
+        info = store.checkpoint(storage)
+        assert info.num_keys == 400
+        store.checkpoint(storage)
+        assert len(wal._list_segments()) == 1
+        assert wal.replay(lambda op, key, value: None, from_lsn=0) == 0
+        print("✅ WAL segments covered by the checkpoint were purged")
+
+        storage.put("key:0", "after")
+        storage.put("khóa", "ç")
+        wal.close()
+
+        wal = WriteAheadLog(wal_dir)
+        restored = CompactStorageEngine(wal=wal)
+        info = store.restore(restored)
+        assert restored.replay_wal(from_lsn=info.lsn) == 2
+        assert restored.size() == 402
+        assert restored.get("key:0") == ("after", True)
+        assert restored.get("key:50") == (None, False)
+        assert restored.get("key:499") == ("value-499", True)
+        assert restored.get("khóa") == ("ç", True)
+        wal.close()
+        print("✅ Restart restores the checkpoint and replays only the WAL tail")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Compact Engine Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_basic_operations,
+        test_compaction_reclaims_dead_bytes,
+        test_index_resize_many_keys,
+        test_wal_recovery,
+        test_checkpoint_truncates_wal,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,209 @@
+"""
+Unit Tests cho value compression (ValueCodec + replication/snapshot path)
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+
+import pytest
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.proto import kvstore_pb2
+from src.storage.compression import (ValueCodec, build_dictionary, is_compressed, to_wire, from_wire,
+                                     to_disk, from_disk)
+from src.storage.storage_engine import StorageEngine
+from src.storage.bitcask_engine import BitcaskStorageEngine
+from src.storage.checkpoint import CheckpointStore
+from src.storage.wal import WriteAheadLog
+from src.server import NodeServicer
+
+
+def _document(i: int, rng: random.Random) -> str:
+    """JSON document giống dữ liệu thật (field lặp lại, giá trị khác nhau)."""
+    return json.dumps({
+        "id": i,
+        "name": f"user-{i}",
+        "email": f"user{i}@example.com",
+        "tags": ["premium", "beta"] if i % 2 else ["free"],
+        "events": [{"type": "login", "ts": 1700000000 + rng.randrange(10 ** 6)} for _ in range(5)],
+    })
+
+
+def test_threshold_and_round_trip():
+    """Test values above threshold are compressed and decode back exactly."""
+    print("\n=== Test 1: Threshold & Round Trip ===")
+
+    rng = random.Random(1)
+    large = json.dumps([_document(i, rng) for i in range(20)])
+    for algorithm in ("zlib", "lzma"):
+        codec = ValueCodec(algorithm=algorithm, threshold_bytes=1024)
+        stored = codec.encode(large)
+        assert is_compressed(stored)
+        assert len(stored) < len(large) / 2
+        assert codec.decode(stored) == large
+        print(f"✅ {algorithm}: {len(large)} -> {len(stored)} bytes")
+
+    codec = ValueCodec(threshold_bytes=1024)
+    assert codec.encode("small") == "small"
+    noise = "".join(chr(rng.randrange(0x20, 0x7f)) for _ in range(2000))
+    assert codec.decode(codec.encode(noise)) == noise
+    unicode_value = "giá trị 🚀 " * 200
+    assert codec.decode(codec.encode(unicode_value)) == unicode_value
+    print("✅ Small values kept raw, unicode and incompressible values round-trip")
+
+
+def test_marker_escaping():
+    """Test raw values that look like an envelope are escaped, even when disabled."""
+    print("\n=== Test 2: Marker Escaping ===")
+
+    for codec in (ValueCodec(algorithm="none"), ValueCodec()):
+        for value in ("\x00z not compressed", "\x00", "\x00r"):
+            stored = codec.encode(value)
+            assert not is_compressed(stored)
+            assert codec.decode(stored) == value
+    print("✅ Values starting with the marker round-trip unchanged")
+
+
+def test_dictionary_for_small_values():
+    """Test a preset dictionary compresses small similar values; wrong dictionary fails."""
+    print("\n=== Test 3: Preset Dictionary ===")
+
+    rng = random.Random(2)
+    dictionary = build_dictionary(_document(i, rng) for i in range(50))
+    value = _document(1000, rng)
+
+    plain = ValueCodec(threshold_bytes=64)
+    with_dict = ValueCodec(dictionary=dictionary, dictionary_min_bytes=64)
+    stored = with_dict.encode(value)
+    assert len(stored) < len(plain.encode(value))
+    assert with_dict.decode(stored) == value
+    print(f"✅ {len(value)}-byte value: {len(plain.encode(value))} bytes plain, "
+          f"{len(stored)} bytes with dictionary")
+
+    other = ValueCodec(dictionary=b"something else entirely")
+    with pytest.raises(ValueError):
+        other.decode(stored)
+    print("✅ Decoding with a different dictionary is rejected")
+
+
+def test_compressed_through_replication_and_snapshot():
+    """Test owner compresses once; replicas and snapshots keep the compressed form."""
+    print("\n=== Test 4: Replication & Snapshot ===")
+
+    codec = ValueCodec(threshold_bytes=256)
+    value = json.dumps([_document(i, random.Random(3)) for i in range(10)])
+
+    owner_storage = StorageEngine()
+    owner = NodeServicer("node1", 0, owner_storage, codec=codec)
+    owner.ForwardPut(kvstore_pb2.ForwardPutRequest(key="doc", value=value), None)
+    stored, _ = owner_storage.get("doc")
+    assert is_compressed(stored)
+    assert owner.ForwardGet(kvstore_pb2.ForwardGetRequest(key="doc"), None).value == value
+    print(f"✅ Owner stores {len(stored)} bytes for a {len(value)}-byte value")
+
+    wire_value, compressed_value = to_wire(stored)
+    request = kvstore_pb2.ReplicateRequest(key="doc", value=wire_value, operation=kvstore_pb2.PUT,
+                                           compressed_value=compressed_value)
+    assert request.ByteSize() < len(value) / 2
+    replica_storage = StorageEngine()
+    replica = NodeServicer("node2", 0, replica_storage, codec=codec)
+    assert replica.Replicate(request, None).success
+    assert replica_storage.get("doc") == (stored, True)
+    assert replica.ForwardGet(kvstore_pb2.ForwardGetRequest(key="doc"), None).value == value
+    print(f"✅ ReplicateRequest is {request.ByteSize()} bytes, replica keeps compressed form")
+
+    snapshot = owner.GetSnapshot(kvstore_pb2.SnapshotRequest(), None)
+    pair = snapshot.data[0]
+    assert pair.value == "" and from_wire(pair.value, pair.compressed_value) == stored
+    print("✅ Snapshot ships the compressed bytes")
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def test_compressed_size_on_disk():
+    """Test WAL, checkpoint and Bitcask files hold ~1 byte per compressed byte."""
+    print("\n=== Test 5: Size on Disk ===")
+
+    codec = ValueCodec(threshold_bytes=256)
+    value = json.dumps([_document(i, random.Random(5)) for i in range(20)])
+    stored = codec.encode(value)
+    assert is_compressed(stored)
+    assert len(stored.encode('utf-8')) > len(stored) * 1.3  # what plain UTF-8 would cost
+    assert from_disk(to_disk(stored)) == stored
+    assert from_disk("giá trị 🚀".encode('utf-8')) == "giá trị 🚀"  # files written before to_disk()
+    # Budget: compressed bytes + record headers, far below UTF-8's ~1.5x
+    budget = len(stored) + 128
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        wal_dir = os.path.join(data_dir, "wal")
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = StorageEngine(wal=wal)
+        storage.put("doc", stored)
+        wal.flush()
+        assert _dir_bytes(wal_dir) <= budget
+        print(f"✅ WAL: {_dir_bytes(wal_dir)} bytes for a {len(stored)}-char envelope")
+
+        checkpoint_dir = os.path.join(data_dir, "checkpoints")
+        info = CheckpointStore(checkpoint_dir, compress_level=0).checkpoint(storage)
+        assert info.size_bytes <= budget
+        restored = StorageEngine()
+        CheckpointStore(checkpoint_dir).restore(restored)
+        assert restored.get("doc") == (stored, True)
+        wal.close()
+        print(f"✅ Checkpoint: {info.size_bytes} bytes")
+
+        bitcask_dir = os.path.join(data_dir, "bitcask")
+        bitcask = BitcaskStorageEngine(bitcask_dir)
+        bitcask.put("doc", stored)
+        assert bitcask.get("doc") == (stored, True)
+        bitcask.close()
+        assert _dir_bytes(bitcask_dir) <= budget
+        print(f"✅ Bitcask: {_dir_bytes(bitcask_dir)} bytes (raw value is {len(value)} bytes)")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Compression Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_threshold_and_round_trip,
+        test_marker_escaping,
+        test_dictionary_for_small_values,
+        test_compressed_through_replication_and_snapshot,
+        test_compressed_size_on_disk,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
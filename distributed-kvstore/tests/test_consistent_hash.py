@@ -4,12 +4,19 @@ Unit Tests cho ConsistentHash và MembershipManager
 
 import sys
 import os
+import hashlib
+import bisect
+import json
+import tempfile
+
+import pytest
 
 # Fix import path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-from src.consistent_hash import ConsistentHash
+import src.consistent_hash as consistent_hash
+from src.consistent_hash import ConsistentHash, SlotMap, create_placement_strategy, PLACEMENT_STRATEGIES
 from src.membership_manager import MembershipManager, Node
 
 
@@ -263,6 +270,341 @@ def test_hash_distribution_uniformity():
     print("✅ Hash distribution is uniform (within ±15% of average)")
 
 
+def test_ring_hash_functions():
+    """Test md5 compat placements, 64-bit rings and hash function validation."""
+    print("\n=== Test 11: Ring Hash Functions ===")
+    
+    nodes = ["node1", "node2", "node3"]
+    compat = ConsistentHash(nodes=nodes, virtual_nodes=150)
+    for i in range(1000):
+        key = f"user:{i}"
+        legacy = int(hashlib.md5(key.encode('utf-8')).hexdigest()[:8], 16)
+        assert compat._hash(key) == legacy
+    assert compat.hash_function == "md5" and compat.ring_bits == 32
+    print("✅ Default md5 hash matches the hexdigest hash (placements unchanged)")
+    
+    ring = ConsistentHash(nodes=nodes, virtual_nodes=150, hash_function="blake2b")
+    assert ring.ring_bits == 64 and max(ring.sorted_keys) >= 1 << 32
+    assert len(ring.hash_ring) == 3 * 150
+    counts = {node: 0 for node in nodes}
+    for i in range(3000):
+        counts[ring.get_node(f"key:{i}")] += 1
+    assert all(700 <= count <= 1300 for count in counts.values()), counts
+    print(f"✅ blake2b ring uses 64-bit hashes, 3000 keys: {counts}")
+    
+    try:
+        ConsistentHash(nodes=nodes, hash_function="sha999")
+        assert False, "unknown hash function should raise"
+    except ValueError as e:
+        assert "md5" in str(e)
+    print("✅ Unknown hash function rejected")
+
+
+def test_incremental_ring_updates():
+    """Test add/remove keep the array ring identical to a ring built from scratch."""
+    print("\n=== Test 12: Incremental Ring Updates ===")
+    
+    ch = ConsistentHash(nodes=[f"node{i}" for i in range(10)], virtual_nodes=100)
+    assert ch.sorted_keys.typecode == 'Q'
+    for i in range(0, 10, 2):
+        ch.remove_node(f"node{i}")
+    ch.add_node("node20")
+    ch.add_node("node0")
+    ch.remove_node("missing")
+    
+    fresh = ConsistentHash(nodes=sorted(ch.get_all_nodes()), virtual_nodes=100)
+    assert list(ch.sorted_keys) == list(fresh.sorted_keys)
+    assert ch.hash_ring == fresh.hash_ring
+    assert ch.get_distribution() == fresh.get_distribution()
+    assert all(ch.get_nodes(f"key:{i}", 3) == fresh.get_nodes(f"key:{i}", 3) for i in range(500))
+    print("✅ Ring after churn matches a freshly built ring")
+    
+    assert ch.get_node_key_count("node2") == 0 and ch.get_node_key_count("node1") == 100
+    assert len(ch._node_names) == 10
+    print("✅ Removed node's tokens gone, owner slots reused")
+
+
+def test_preference_lists():
+    """Test precomputed preference lists match walking the ring and rebuild lazily."""
+    print("\n=== Test 13: Preference Lists ===")
+    
+    ch = ConsistentHash(nodes=[f"node{i}" for i in range(6)], virtual_nodes=50, preference_length=3)
+    
+    def walk(key, count):
+        tokens, owners = ch._ring
+        idx = bisect.bisect_right(tokens, ch._hash(key))
+        result = []
+        for i in range(len(tokens)):
+            name = ch._node_names[owners[(idx + i) % len(tokens)]]
+            if name not in result:
+                result.append(name)
+                if len(result) == count:
+                    break
+        return result
+    
+    keys = [f"key:{i}" for i in range(2000)]
+    assert all(ch.get_nodes(key, count) == walk(key, count) for key in keys for count in (1, 2, 3, 5))
+    assert ch.preference_builds == 1
+    print("✅ Lookups match a ring walk (count > preference_length falls back to the walk)")
+    
+    for i in range(6, 10):
+        ch.add_node(f"node{i}")
+    ch.remove_node("node0")
+    assert ch.preference_builds == 1
+    assert all(ch.get_nodes(key, 3) == walk(key, 3) for key in keys)
+    assert ch.preference_builds == 2
+    print("✅ Topology changes rebuild the lists once, on the next lookup")
+    
+    single = ConsistentHash(nodes=["node1"], virtual_nodes=10)
+    assert single.get_nodes("key", 3) == ["node1"]
+    print("✅ Ring with fewer nodes than preference_length")
+
+
+def test_placement_strategies():
+    """Test jump / rendezvous / slot-map strategies and selecting them from config."""
+    print("\n=== Test 14: Placement Strategies ===")
+    
+    nodes = [f"node{i}" for i in range(8)]
+    keys = [f"key:{i}" for i in range(4000)]
+    for name in PLACEMENT_STRATEGIES:
+        strategy = create_placement_strategy(name)
+        assert strategy.get_node("key") is None and strategy.get_nodes("key", 2) == []
+        for node in nodes:
+            strategy.add_node(node)
+        for key in keys[:500]:
+            replicas = strategy.get_nodes(key, 3)
+            assert len(set(replicas)) == 3 and set(replicas) <= set(nodes)
+            assert replicas[0] == strategy.get_node(key)
+        assert strategy.get_nodes("key", 20) and len(strategy.get_nodes("key", 20)) == 8
+        
+        before = {key: strategy.get_node(key) for key in keys}
+        strategy.add_node("node8")
+        moved = [key for key in keys if strategy.get_node(key) != before[key]]
+        assert all(strategy.get_node(key) == "node8" for key in moved)
+        assert 0.05 < len(moved) / len(keys) < 0.18, f"{name} moved {len(moved)} keys"
+        strategy.remove_node("node8")
+        strategy.remove_node("missing")
+        assert "node8" not in {strategy.get_node(key) for key in keys}
+        assert strategy.get_all_nodes() == nodes
+    print(f"✅ {', '.join(PLACEMENT_STRATEGIES)}: distinct replicas, ~1/(N+1) keys move to a new node")
+    
+    slots = SlotMap(nodes=["a", "b", "c"])
+    assert slots.slot_of("foo") == 12182 and slots.slot_of("bar") == 5061
+    assert sum(slots.get_distribution().values()) == 16384
+    slots.remove_node("b")
+    assert sorted(slots.get_distribution().values()) == [8192, 8192]
+    print("✅ Slot map uses Redis Cluster key slots and hands out freed slots evenly")
+    
+    for name in ("rendezvous", "slots"):
+        strategy = create_placement_strategy(name)
+        strategy.add_node("big", weight=3)
+        strategy.add_node("small", weight=1)
+        share = sum(strategy.get_node(key) == "big" for key in keys) / len(keys)
+        assert 0.7 < share < 0.8, f"{name} weighted share {share}"
+    print("✅ Rendezvous and slot map split keys by weight")
+    
+    try:
+        create_placement_strategy("modulo")
+        assert False, "Unknown strategy should raise"
+    except ValueError as e:
+        assert "ring" in str(e)
+    print("✅ Unknown strategy raises ValueError")
+    
+    config = {
+        "nodes": [{"id": f"node{i}", "host": "localhost", "port": 8000 + i, "weight": i}
+                  for i in range(1, 4)],
+        "replication": {"replication_factor": 2},
+        "consistent_hashing": {"strategy": "slots", "num_slots": 1024},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "cluster.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+        mm = MembershipManager(config_path)
+    assert isinstance(mm.consistent_hash, SlotMap) and mm.consistent_hash.num_slots == 1024
+    assert mm.get_hash_distribution() == {"node1": 171, "node2": 341, "node3": 512}
+    assert len(mm.get_all_replicas("user:1")) == 2
+    mm.add_node("node4", "localhost", 8004)
+    assert sum(mm.get_hash_distribution().values()) == 1024
+    print("✅ MembershipManager builds the configured strategy with node weights")
+
+
+def test_weighted_virtual_nodes():
+    """Test node weights scale vnode counts and the expected vs actual share report."""
+    print("\n=== Test 15: Weighted Virtual Nodes ===")
+    
+    plain = ConsistentHash(nodes=["node1", "node2"], virtual_nodes=100)
+    ch = ConsistentHash(virtual_nodes=100)
+    ch.add_node("node1")
+    ch.add_node("node2", weight=1.0)
+    ch.add_node("big", weight=2.0)
+    ch.add_node("tiny", weight=0.001)
+    assert ch.get_distribution() == {"node1": 100, "node2": 100, "big": 200, "tiny": 1}
+    assert set(plain.sorted_keys) <= set(ch.sorted_keys)
+    print("✅ vnodes = virtual_nodes * weight (at least 1), weight 1 keeps the old tokens")
+    
+    ch.remove_node("tiny")
+    ownership = ch.get_ownership()
+    assert abs(sum(ownership.values()) - 1.0) < 1e-9
+    keys = [f"key:{i}" for i in range(20000)]
+    report = ch.get_distribution_report(keys)
+    assert set(report) == {"big", "node1", "node2"}
+    assert report["big"]["weight"] == 2.0 and report["big"]["expected"] == 0.5
+    for node, share in report.items():
+        assert abs(share["actual"] - ownership[node]) < 0.02
+        assert 0.8 < share["ratio"] < 1.2, f"{node} got {share['actual']:.1%}"
+    print(f"✅ big node owns {ownership['big']:.1%} of the hash space (expected 50%)")
+    
+    try:
+        ch.add_node("zero", weight=0)
+        assert False, "Non-positive weight should raise"
+    except ValueError:
+        pass
+    print("✅ Non-positive weight raises ValueError")
+    
+    for name in PLACEMENT_STRATEGIES:
+        strategy = create_placement_strategy(name)
+        strategy.add_node("a", weight=3)
+        strategy.add_node("b")
+        report = strategy.get_distribution_report()
+        assert abs(sum(share["actual"] for share in report.values()) - 1.0) < 1e-9
+        if name == "jump":
+            assert report["a"]["expected"] == 0.5  # Jump hash bỏ qua weight
+        else:
+            assert report["a"]["expected"] == 0.75 and 0.65 < report["a"]["actual"] < 0.85
+    print("✅ Every strategy reports expected vs actual share")
+    
+    config = {
+        "nodes": [{"id": "node1", "host": "localhost", "port": 8001},
+                  {"id": "node2", "host": "localhost", "port": 8002, "weight": 2}],
+        "consistent_hashing": {"virtual_nodes": 50},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "cluster.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+        mm = MembershipManager(config_path)
+    mm.add_node("node3", "localhost", 8003, weight=0.5)
+    assert mm.get_hash_distribution() == {"node1": 50, "node2": 100, "node3": 25}
+    report = mm.get_distribution_report()
+    assert abs(report["node2"]["expected"] - 2 / 3.5) < 1e-9
+    assert report["node2"]["actual"] > report["node1"]["actual"] > report["node3"]["actual"]
+    print("✅ MembershipManager reads node weights from config and add_node()")
+
+
+def test_reweight_existing_node():
+    """Test add_node() on an existing node changes its weight in every weighted strategy."""
+    print("\n=== Test 16: Re-weight Existing Node ===")
+    
+    keys = [f"key:{i}" for i in range(3000)]
+    ch = ConsistentHash(nodes=["a", "b", "c"], virtual_nodes=50)
+    before = {key: ch.get_node(key) for key in keys}
+    ring = ch._ring
+    ch.add_node("b", weight=1.0)
+    assert ch._ring is ring
+    ch.add_node("b", weight=2.0)
+    assert ch.get_distribution() == {"a": 50, "b": 100, "c": 50}
+    fresh = ConsistentHash(virtual_nodes=50)
+    for node, weight in (("a", 1.0), ("b", 2.0), ("c", 1.0)):
+        fresh.add_node(node, weight=weight)
+    assert ch.hash_ring == fresh.hash_ring
+    moved = [key for key in keys if ch.get_node(key) != before[key]]
+    assert moved and all(ch.get_node(key) == "b" for key in moved)
+    ch.add_node("b", weight=0.5)
+    assert ch.get_distribution()["b"] == 25 and len(ch.hash_ring) == 125
+    print(f"✅ Ring rebuilds only b's vnodes ({len(moved)} keys moved to b, none elsewhere)")
+    
+    slots = SlotMap(nodes=["a", "b"])
+    before = {slot: owner for slot, owner in enumerate(slots._table[1])}
+    names = slots._table[0]
+    slots.add_node("b", weight=3.0)
+    assert slots.get_distribution() == {"a": 4096, "b": 12288}
+    moved = [slot for slot in range(slots.num_slots) if slots._table[1][slot] != before[slot]]
+    assert len(moved) == 4096 and all(names[before[slot]] == "a" for slot in moved)
+    slots.add_node("b", weight=1.0)
+    assert slots.get_distribution() == {"a": 8192, "b": 8192}
+    print("✅ Slot map moves only the slots needed for the new weight")
+    
+    for name in PLACEMENT_STRATEGIES:
+        strategy = create_placement_strategy(name, nodes=["a", "b"])
+        strategy.add_node("a", weight=3)
+        report = strategy.get_distribution_report()
+        if name == "jump":
+            assert report["a"]["expected"] == 0.5  # Jump hash bỏ qua weight
+        else:
+            assert report["a"]["expected"] == 0.75 and 0.65 < report["a"]["actual"] < 0.85
+    print("✅ Every strategy treats add_node() of an existing node the same way")
+
+
+def test_route_many():
+    """Test bulk routing groups keys by the same owner get_node() returns."""
+    print("\n=== Test 17: Bulk Key Routing ===")
+    
+    keys = [f"key:{i}" for i in range(3000)]
+    numpy_modes = [None] + ([consistent_hash.np] if consistent_hash.np is not None else [])
+    for hash_function in ("md5", "blake2b"):
+        ch = ConsistentHash(nodes=[f"node{i}" for i in range(5)], virtual_nodes=50,
+                            hash_function=hash_function)
+        ch.remove_node("node2")  # Owner index đã free: names có None
+        expected = {}
+        for key in keys:
+            expected.setdefault(ch.get_node(key), []).append(key)
+        original = consistent_hash.np
+        try:
+            for mode in numpy_modes:
+                consistent_hash.np = mode
+                assert ch.route_many(keys) == expected
+                assert ch.route_many(iter(keys[:10])) == ch.route_many(keys[:10])
+        finally:
+            consistent_hash.np = original
+    print(f"✅ route_many() matches get_node() ({'numpy and ' if len(numpy_modes) > 1 else ''}bisect fallback)")
+    
+    assert ConsistentHash().route_many(keys) == {} and ch.route_many([]) == {}
+    for name in PLACEMENT_STRATEGIES:
+        strategy = create_placement_strategy(name, nodes=["a", "b", "c"])
+        groups = strategy.route_many(keys)
+        assert sorted(k for group in groups.values() for k in group) == sorted(keys)
+        assert all(strategy.get_node(key) == node for node, group in groups.items() for key in group)
+    print("✅ Every strategy supports route_many()")
+    
+    config_path = os.path.join(project_root, "config", "cluster.json")
+    mm = MembershipManager(config_path)
+    groups = mm.group_by_owner(keys)
+    assert set(groups) == {"node1", "node2", "node3"}
+    assert all(mm.get_owner_node(key).node_id == node_id for node_id, group in groups.items() for key in group)
+    assert MembershipManager().group_by_owner(keys) == {}
+    print("✅ MembershipManager.group_by_owner() groups by node id")
+
+
+def test_route_many_numpy_matches_bisect():
+    """Test the numpy route_many() path returns the same owners as the bisect fallback."""
+    print("\n=== Test 18: route_many() numpy vs bisect ===")
+    
+    if consistent_hash.np is None:
+        reason = "numpy not installed (pip install -r requirements-optional.txt)"
+        print(f"⏭️  SKIPPED: {reason}")
+        pytest.skip(reason)
+    
+    keys = [f"user:{i}:profile" for i in range(20000)]
+    ch = ConsistentHash(virtual_nodes=100, hash_function="blake2b")
+    for i in range(8):
+        ch.add_node(f"node{i}", weight=1 + i % 3)
+    ch.remove_node("node3")  # Owner index đã free: names có None
+    for hash_function, ring in (("md5", ConsistentHash(nodes=["a", "b", "c"], virtual_nodes=50)), ("blake2b", ch)):
+        assert len(keys) >= ring.VECTORIZE_MIN_KEYS
+        original = consistent_hash.np
+        try:
+            vectorized = ring.route_many(keys)
+            consistent_hash.np = None
+            fallback = ring.route_many(keys)
+        finally:
+            consistent_hash.np = original
+        assert vectorized == fallback
+        assert {key: node for node, group in vectorized.items() for key in group} == \
+            {key: ring.get_node(key) for key in keys}
+        print(f"✅ {hash_function}: numpy and bisect agree on {len(keys)} owners")
+
+
 def run_all_tests():
     """Run all tests."""
     print("\n" + "=" * 60)
@@ -280,6 +622,14 @@ def run_all_tests():
         test_membership_manager_node_status,
         test_membership_manager_dynamic_nodes,
         test_hash_distribution_uniformity,
+        test_ring_hash_functions,
+        test_incremental_ring_updates,
+        test_preference_lists,
+        test_placement_strategies,
+        test_weighted_virtual_nodes,
+        test_reweight_existing_node,
+        test_route_many,
+        test_route_many_numpy_matches_bisect,
     ]
     
     passed = 0
@@ -289,6 +639,8 @@ def run_all_tests():
         try:
             test_func()
             passed += 1
+        except pytest.skip.Exception:
+            pass
         except AssertionError as e:
             print(f"❌ FAILED: {e}")
             failed += 1
@@ -0,0 +1,180 @@
+"""
+Unit Tests cho memory budget + eviction policies (LRU, LFU, random)
+"""
+
+import sys
+import os
+import random
+import tempfile
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.eviction import EvictionPolicy, LRUPolicy, LFUPolicy, RandomPolicy, entry_size
+from src.storage.storage_engine import StorageEngine
+from src.storage.sharded_engine import ShardedStorageEngine
+from src.storage.wal import WriteAheadLog
+
+
+def test_lru_policy_order():
+    """Test LRU evicts the least recently used key, reads refresh recency."""
+    print("\n=== Test 1: LRU Policy ===")
+
+    policy = LRUPolicy()
+    for key in ("a", "b", "c"):
+        policy.on_write(key)
+    policy.on_read("a")
+    assert policy.victim() == "b"
+    policy.on_remove("b")
+    assert policy.victim() == "c"
+    assert policy.victim(exclude="c") == "a"
+    print("✅ Victim is the least recently used key")
+
+
+def test_lfu_policy_keeps_hot_keys():
+    """Test approximate LFU evicts cold keys rather than frequently read ones."""
+    print("\n=== Test 2: LFU Policy ===")
+
+    policy = LFUPolicy(samples=10, log_factor=1, rng=random.Random(7))
+    for i in range(100):
+        policy.on_write(f"key:{i}")
+    for _ in range(200):
+        for i in range(10):
+            policy.on_read(f"key:{i}")
+
+    assert policy.counter("key:0") > policy.counter("key:50")
+    victims = []
+    for _ in range(50):
+        victim = policy.victim()
+        victims.append(victim)
+        policy.on_remove(victim)
+    assert not any(victim in {f"key:{i}" for i in range(10)} for victim in victims)
+    print("✅ 50 evictions never picked one of the 10 hot keys")
+
+
+def test_random_policy_sampling():
+    """Test random policy covers all keys and respects exclude."""
+    print("\n=== Test 3: Random Policy ===")
+
+    policy = RandomPolicy(rng=random.Random(1))
+    for key in ("a", "b", "c"):
+        policy.on_write(key)
+    policy.on_remove("b")
+    seen = {policy.victim() for _ in range(100)}
+    assert seen == {"a", "c"}
+    assert policy.victim(exclude="a") == "c"
+    policy.on_remove("c")
+    assert policy.victim(exclude="a") is None
+    print("✅ O(1) swap-remove sampler stays consistent")
+
+
+def test_engine_stays_under_budget():
+    """Test bounded engine evicts to stay under budget and counts it."""
+    print("\n=== Test 4: Memory Budget ===")
+
+    value = "x" * 100
+    budget = entry_size("key:000", value) * 50
+    for policy in ("lru", "lfu", "random"):
+        storage = ShardedStorageEngine(num_shards=1, max_memory_bytes=budget,
+                                       eviction_policy=policy)
+        for i in range(200):
+            storage.put(f"key:{i:03d}", value)
+            assert storage.used_bytes <= budget
+
+        assert storage.size() <= 50
+        assert storage.evictions == 200 - storage.size()
+        assert storage.bytes_freed == storage.evictions * entry_size("key:000", value)
+        assert storage.get("key:199") == (value, True)  # Just-written key survives
+        print(f"✅ {policy}: {storage.size()} keys kept, {storage.evictions} evicted")
+
+    storage = ShardedStorageEngine(num_shards=1, max_memory_bytes=budget)
+    for i in range(50):
+        storage.put(f"key:{i:03d}", value)
+    storage.get("key:000")
+    storage.put("key:new", value)
+    assert storage.get("key:000") == (value, True)
+    assert storage.get("key:001") == (None, False)
+    print("✅ LRU: recently read key kept, oldest untouched key evicted")
+
+
+def test_evictions_logged_and_reported():
+    """Test evictions are WAL-logged as deletes and sent to the listener."""
+    print("\n=== Test 5: Eviction Listener & WAL ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        budget = entry_size("key:0", "v") * 3
+        storage = ShardedStorageEngine(num_shards=1, wal=wal, max_memory_bytes=budget)
+        reported = []
+        storage.set_eviction_listener(reported.extend)
+
+        for i in range(10):
+            storage.put(f"key:{i}", "v")
+        storage.delete("key:9")
+        assert reported == [f"key:{i}" for i in range(7)]
+        wal.close()
+
+        wal = WriteAheadLog(wal_dir)
+        restored = StorageEngine(wal=wal)
+        restored.replay_wal()
+        assert sorted(restored.list_keys()) == ["key:7", "key:8"]
+        wal.close()
+        print("✅ Evicted keys reported once and replayed as deletes")
+
+
+def test_incomplete_policy_rejected():
+    """Test a policy missing required methods fails when instantiated."""
+    print("\n=== Test 6: Incomplete Policy ===")
+
+    class WriteOnlyPolicy(EvictionPolicy):
+        def on_write(self, key):
+            pass
+
+    try:
+        WriteOnlyPolicy()
+        assert False, "incomplete policy should not instantiate"
+    except TypeError:
+        pass
+    print("✅ Missing hooks are caught at construction, not at the first eviction")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Eviction Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_lru_policy_order,
+        test_lfu_policy_keeps_hot_keys,
+        test_random_policy_sampling,
+        test_engine_stays_under_budget,
+        test_evictions_logged_and_reported,
+        test_incomplete_policy_rejected,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,280 @@
+"""
+Unit Tests cho TTL / key expiry (TimerWheel, StorageEngine, persistence)
+"""
+
+import sys
+import os
+import random
+import tempfile
+from concurrent import futures
+
+import grpc
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.timer_wheel import TimerWheel
+from src.storage.storage_engine import now_ms
+from src.storage.sharded_engine import ShardedStorageEngine
+from src.storage.checkpoint import CheckpointStore
+from src.storage.wal import WriteAheadLog, OP_PUT, OP_EXPIRE, OP_PUT_EXPIRE
+from src.storage.bitcask_engine import BitcaskStorageEngine
+from src.proto import kvstore_pb2, kvstore_pb2_grpc
+from src.membership_manager import Node
+from src.server import put_local, KeyValueStoreServicer, NodeServicer
+
+
+def test_timer_wheel_fires_in_order():
+    """Test timers fire no earlier than their deadline, across all levels."""
+    print("\n=== Test 1: Timer Wheel ===")
+
+    wheel = TimerWheel(tick_ms=10, wheel_size=8, levels=3, start_ms=0)
+    rng = random.Random(42)
+    deadlines = {f"key:{i}": rng.randint(1, 20000) for i in range(500)}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+    assert len(wheel) == 500
+
+    fired = {}
+    for now in range(0, 21000, 37):
+        for key, expire_at_ms in wheel.advance(now):
+            assert expire_at_ms <= now
+            assert now - expire_at_ms < 37 + 10  # At most one step + one tick late
+            fired[key] = expire_at_ms
+    assert fired == deadlines
+    assert len(wheel) == 0
+    print("✅ 500 timers (some beyond the top level span) fired on time")
+
+    assert wheel.advance(10 ** 9) == []
+    print("✅ Idle wheel jumps forward without walking empty ticks")
+
+
+def test_ttl_get_and_list_keys():
+    """Test expired keys are hidden immediately, before the sweeper runs."""
+    print("\n=== Test 2: TTL Visibility ===")
+
+    storage = ShardedStorageEngine(num_shards=4)
+    past = now_ms() - 1
+    storage.put("session:old", "x", expire_at_ms=past)
+    storage.put("session:new", "y", expire_at_ms=now_ms() + 60000)
+    storage.put("permanent", "z")
+
+    assert storage.get("session:old") == (None, False)
+    assert storage.get("session:new") == ("y", True)
+    assert sorted(storage.list_keys()) == ["permanent", "session:new"]
+    assert storage.size() == 2
+    assert storage.delete("session:old") is False
+    print("✅ GET / ListKeys / size hide expired keys")
+
+    storage.put("session:new", "y2")
+    assert storage.expire_keys(now_ms() + 120000) == ["session:old"]
+    assert storage.get("session:new") == ("y2", True)
+    print("✅ Overwrite without TTL makes the key permanent")
+
+
+def test_expire_keys_only_visits_due_timers():
+    """Test expire_keys removes exactly the due keys and skips stale timers."""
+    print("\n=== Test 3: Sweeper ===")
+
+    storage = ShardedStorageEngine(num_shards=4, expiry_tick_ms=10)
+    base = now_ms()
+    for i in range(100):
+        storage.put(f"short:{i}", "v", expire_at_ms=base + 50)
+        storage.put(f"long:{i}", "v", expire_at_ms=base + 60000)
+    storage.put("short:0", "v", expire_at_ms=base + 60000)  # TTL extended
+    storage.delete("short:1")
+
+    expired = storage.expire_keys(base + 100)
+    assert sorted(expired) == sorted(f"short:{i}" for i in range(2, 100))
+    assert storage.size() == 101
+    assert storage.expire_keys(base + 200) == []
+    print("✅ 98 due keys expired; extended and deleted keys skipped")
+
+
+def test_ttl_survives_restart():
+    """Test TTLs are restored from the WAL and from checkpoints."""
+    print("\n=== Test 4: TTL Persistence ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        wal_dir = os.path.join(data_dir, "wal")
+        store = CheckpointStore(os.path.join(data_dir, "checkpoints"))
+        deadline = now_ms() + 60000
+
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = ShardedStorageEngine(num_shards=4, wal=wal)
+        storage.put("in-checkpoint", "a", expire_at_ms=deadline)
+        store.checkpoint(storage)
+        storage.put("in-wal", "b", expire_at_ms=deadline)
+        wal.close()
+
+        wal = WriteAheadLog(wal_dir)
+        restored = ShardedStorageEngine(num_shards=4, wal=wal)
+        info = store.restore(restored)
+        restored.replay_wal(from_lsn=info.lsn)
+        assert restored.get("in-checkpoint") == ("a", True)
+        assert sorted(restored.expire_keys(deadline + 100)) == ["in-checkpoint", "in-wal"]
+        assert restored.size() == 0
+        wal.close()
+        print("✅ Expiry times restored from checkpoint + WAL tail")
+
+
+def test_ttl_on_engine_without_ttl():
+    """Test a TTL PUT on an engine without TTL support is refused, not stored forever."""
+    print("\n=== Test 5: Engine Without TTL ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = BitcaskStorageEngine(data_dir)
+        try:
+            try:
+                put_local(storage, "key", "value", ttl_ms=1000)
+                assert False, "TTL PUT should be refused"
+            except ValueError:
+                pass
+            assert storage.get("key") == (None, False)
+            assert put_local(storage, "key", "value") == 0
+            assert storage.get("key") == ("value", True)
+            print("✅ TTL PUT refused, plain PUT stored")
+        finally:
+            storage.close()
+
+    storage = ShardedStorageEngine(num_shards=2)
+    assert put_local(storage, "key", "value", ttl_ms=60000) > now_ms()
+    assert storage.expire_keys(now_ms() + 120000) == ["key"]
+    print("✅ Engines with supports_ttl keep the expiry")
+
+
+def test_ttl_put_is_one_wal_record():
+    """Test a PUT with TTL is logged as one record, and old two-record logs still replay."""
+    print("\n=== Test 6: TTL in the PUT Record ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        deadline = now_ms() + 60000
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = ShardedStorageEngine(num_shards=2, wal=wal)
+        storage.put("session", "a:b", expire_at_ms=deadline)
+        storage.put("plain", "c")
+        records = []
+        wal.replay(lambda op, key, value: records.append((op, key, value)))
+        assert records == [(OP_PUT_EXPIRE, "session", f"{deadline}:a:b"), (OP_PUT, "plain", "c")]
+        print("✅ Value and expiry share one record: a crash cannot keep one without the other")
+
+        # Log của version trước: OP_PUT rồi OP_EXPIRE riêng
+        wal.append(OP_PUT, "legacy", "d")
+        wal.append(OP_EXPIRE, "legacy", str(deadline))
+        wal.close()
+
+        wal = WriteAheadLog(wal_dir)
+        restored = ShardedStorageEngine(num_shards=2, wal=wal)
+        assert restored.replay_wal() == 4
+        assert restored.get("session") == ("a:b", True)
+        assert sorted(restored.expire_keys(deadline + 100)) == ["legacy", "session"]
+        assert restored.get("plain") == ("c", True)
+        wal.close()
+        print("✅ Replay restores the expiry (and still reads OP_EXPIRE records)")
+
+
+class _ForwardingMembership:
+    """Membership cố định cho test: mọi key thuộc về `owner`."""
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def get_owner_node(self, key):
+        return self.owner
+
+
+def test_forwarded_put_keeps_ttl():
+    """Test a TTL PUT received by a non-owner keeps its TTL on the owner."""
+    print("\n=== Test 7: Forwarded PUT with TTL ===")
+
+    owner_storage = ShardedStorageEngine(num_shards=2)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    kvstore_pb2_grpc.add_NodeServiceServicer_to_server(NodeServicer("node2", 0, owner_storage), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        membership = _ForwardingMembership(Node("node2", "127.0.0.1", port))
+        servicer = KeyValueStoreServicer("node1", 1, ShardedStorageEngine(num_shards=2), membership, None)
+        before = now_ms()
+        response = servicer.Put(kvstore_pb2.PutRequest(key="session", value="v", ttl_ms=5000), None)
+        assert response.success and response.node_id == "node2"
+        assert owner_storage.get("session") == ("v", True)
+        assert owner_storage.expire_keys(before + 4000) == []
+        assert owner_storage.expire_keys(now_ms() + 6000) == ["session"]
+        assert owner_storage.get("session") == (None, False)
+        print("✅ Owner stored the forwarded key with its TTL and expired it")
+    finally:
+        server.stop(0)
+
+
+def test_ttl_put_refused_by_owner_without_ttl():
+    """Test a TTL PUT whose owner has no TTL support fails, locally and when forwarded."""
+    print("\n=== Test 8: TTL PUT to Owner Without TTL ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        owner_storage = BitcaskStorageEngine(data_dir)
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+        kvstore_pb2_grpc.add_NodeServiceServicer_to_server(NodeServicer("node2", 0, owner_storage), server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        try:
+            owner = Node("node2", "127.0.0.1", port)
+            local = KeyValueStoreServicer("node2", port, owner_storage, _ForwardingMembership(owner), None)
+            response = local.Put(kvstore_pb2.PutRequest(key="session", value="v", ttl_ms=5000), None)
+            assert not response.success and "TTL" in response.message
+            assert owner_storage.get("session") == (None, False)
+            print("✅ Owner refused the TTL PUT")
+
+            remote = KeyValueStoreServicer("node1", 1, ShardedStorageEngine(num_shards=2),
+                                           _ForwardingMembership(owner), None)
+            response = remote.Put(kvstore_pb2.PutRequest(key="session", value="v", ttl_ms=5000), None)
+            assert not response.success and "TTL" in response.message
+            assert owner_storage.get("session") == (None, False)
+            print("✅ Forwarded TTL PUT refused by the owner")
+        finally:
+            server.stop(0)
+            owner_storage.close()
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Expiry Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_timer_wheel_fires_in_order,
+        test_ttl_get_and_list_keys,
+        test_expire_keys_only_visits_due_timers,
+        test_ttl_survives_restart,
+        test_ttl_on_engine_without_ttl,
+        test_ttl_put_is_one_wal_record,
+        test_forwarded_put_keeps_ttl,
+        test_ttl_put_refused_by_owner_without_ttl,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
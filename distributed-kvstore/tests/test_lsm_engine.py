@@ -0,0 +1,221 @@
+"""
+Unit Tests cho LSMStorageEngine (memtable, SSTables, compaction, scans)
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.lsm_engine import LSMStorageEngine
+from src.storage.bloom_filter import BloomFilter
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_bloom_filter():
+    """Test Bloom filter has no false negatives and survives serialization."""
+    print("\n=== Test 1: Bloom Filter ===")
+
+    bloom = BloomFilter(capacity=1000, false_positive_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"key:{i}")
+
+    assert all(bloom.might_contain(f"key:{i}") for i in range(1000))
+    false_positives = sum(bloom.might_contain(f"other:{i}") for i in range(10000))
+    assert false_positives < 300
+    print(f"✅ No false negatives, {false_positives}/10000 false positives")
+
+    restored = BloomFilter.from_bytes(bloom.to_bytes())
+    assert all(f"key:{i}" in restored for i in range(1000))
+    print("✅ Serialization round-trip works")
+
+
+def test_lsm_basic_operations():
+    """Test PUT/GET/DELETE through memtable and SSTables."""
+    print("\n=== Test 2: LSM Basic Operations ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = LSMStorageEngine(data_dir, memtable_bytes=2048, compaction_min_tables=100)
+        for i in range(200):
+            storage.put(f"key:{i:03d}", f"value:{i}")
+        storage.flush()
+
+        assert storage.flush_count > 1
+        assert storage.get("key:007") == ("value:7", True)
+        assert storage.get("notexist") == (None, False)
+        print(f"✅ {len(storage.tables)} SSTables flushed, reads hit them")
+
+        storage.put("key:007", "new")
+        assert storage.delete("key:008") is True
+        assert storage.delete("key:008") is False
+        assert storage.get("key:007") == ("new", True)
+        assert storage.get("key:008") == (None, False)
+        assert storage.size() == 199
+        storage.close()
+        print("✅ Memtable overrides and tombstones hide SSTable values")
+
+
+def test_lsm_restart_recovery():
+    """Test flushed tables and WAL-only writes survive a restart."""
+    print("\n=== Test 3: Restart Recovery ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = LSMStorageEngine(data_dir, memtable_bytes=2048)
+        for i in range(100):
+            storage.put(f"key:{i:03d}", f"value:{i}")
+        storage.flush()
+        storage.put("unflushed", "in-wal")
+        storage.delete("key:000")
+        storage.close()
+
+        restored = LSMStorageEngine(data_dir, memtable_bytes=2048)
+        assert restored.get("unflushed") == ("in-wal", True)
+        assert restored.get("key:000") == (None, False)
+        assert restored.get("key:050") == ("value:50", True)
+        assert restored.size() == 100
+        restored.close()
+        print("✅ SSTables from MANIFEST + WAL tail restored")
+
+
+def test_lsm_compaction():
+    """Test background compaction merges tables and keeps newest versions."""
+    print("\n=== Test 4: Compaction ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = LSMStorageEngine(data_dir, memtable_bytes=1024, compaction_min_tables=4)
+        for round_num in range(6):
+            for i in range(40):
+                storage.put(f"key:{i:03d}", f"value:{i}:{round_num}")
+            storage.flush()
+        storage.delete("key:001")
+        storage.flush()
+
+        assert _wait_for(lambda: storage.compaction_count > 0)
+        assert _wait_for(lambda: len(storage.tables) < storage.compaction_min_tables)
+        assert storage.get("key:010") == ("value:10:5", True)
+        assert storage.get("key:001") == (None, False)
+        assert storage.size() == 39
+        print(f"✅ {storage.compaction_count} compactions, {len(storage.tables)} tables left")
+
+        live_files = [n for n in os.listdir(data_dir) if n.endswith(".sst")]
+        assert len(live_files) == len(storage.tables)
+        storage.close()
+        print("✅ Obsolete SSTable files deleted")
+
+
+def test_lsm_ordered_scans():
+    """Test ordered iteration, prefix and range scans across all levels."""
+    print("\n=== Test 5: Ordered Scans ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = LSMStorageEngine(data_dir, memtable_bytes=512, compaction_min_tables=100)
+        for i in range(30):
+            storage.put(f"user:{i:02d}", f"u{i}")
+            storage.put(f"order:{i:02d}", f"o{i}")
+        storage.delete("user:05")
+
+        keys = storage.list_keys()
+        assert keys == sorted(keys)
+        print("✅ list_keys() is in key order")
+
+        users = storage.scan(prefix="user:")
+        assert len(users) == 29
+        assert all(key.startswith("user:") for key, _ in users)
+        assert ("user:05", "u5") not in users
+        print("✅ Prefix scan returns only live 'user:' keys")
+
+        page = storage.scan(start="order:10", end="order:20")
+        assert [key for key, _ in page] == [f"order:{i}" for i in range(10, 20)]
+        assert len(storage.scan(prefix="order:", limit=5)) == 5
+        storage.close()
+        print("✅ Range scan [start, end) and limit work")
+
+
+def test_lsm_negative_lookups():
+    """Test misses are answered by key ranges / Bloom filters without reading blocks."""
+    print("\n=== Test 6: Negative Lookups ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = LSMStorageEngine(data_dir, memtable_bytes=1024, compaction_min_tables=100)
+        for i in range(300):
+            storage.put(f"key:{i:03d}", f"value:{i}")
+        storage.flush()
+        storage.close()
+
+        storage = LSMStorageEngine(data_dir, memtable_bytes=1024, compaction_min_tables=100)
+        tables = len(storage.tables)
+        assert tables > 3
+        block_reads = []
+        for table in storage.tables:
+            original = table._read_block
+            table._read_block = lambda idx, original=original: block_reads.append(idx) or original(idx)
+
+        assert storage.get("zzz") == (None, False) and storage.get("aaa") == (None, False)
+        assert block_reads == [] and storage.bloom_skips == 2 * tables
+        print(f"✅ Out-of-range misses skipped all {tables} tables (reloaded filters)")
+
+        assert storage.get_many([f"key:{i:03d}x" for i in range(200)]) == {}
+        assert len(block_reads) == storage.bloom_false_positives < 40
+        print(f"✅ 200 in-range misses: {storage.bloom_skips} table reads avoided, "
+              f"{storage.bloom_false_positives} false positives")
+
+        assert storage.get("key:150") == ("value:150", True)
+        hashes = BloomFilter.hash_key("key:150")
+        assert sum(t.may_contain("key:150", hashes) for t in storage.tables) >= 1
+        assert all(t.may_contain("key:150", hashes) == ("key:150" in t.bloom
+                   and t.first_keys[0] <= "key:150" <= t.last_key) for t in storage.tables)
+        storage.close()
+        print("✅ Key hashed once and reused across tables")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running LSMStorageEngine Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_bloom_filter,
+        test_lsm_basic_operations,
+        test_lsm_restart_recovery,
+        test_lsm_compaction,
+        test_lsm_ordered_scans,
+        test_lsm_negative_lookups,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
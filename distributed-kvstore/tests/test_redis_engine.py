@@ -0,0 +1,229 @@
+"""
+Unit Tests cho RedisStorageEngine (chạy với RESP server giả lập in-process,
+không cần Redis thật)
+"""
+
+import sys
+import os
+import fnmatch
+import threading
+import socketserver
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pytest
+
+pytest.importorskip("redis")
+
+from src.storage.redis_engine import RedisStorageEngine
+
+
+class _RESPHandler(socketserver.StreamRequestHandler):
+    """Minimal RESP2 server: đủ lệnh mà RedisStorageEngine dùng."""
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        assert line[:1] == b'*', line
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode('utf-8'))
+        return args
+
+    def _write(self, value):
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, bool):
+            self.wfile.write(b"+OK\r\n")
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif isinstance(value, list):
+            self.wfile.write(b"*%d\r\n" % len(value))
+            for item in value:
+                self._write(item)
+        else:
+            data = value.encode('utf-8')
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(data), data))
+
+    def handle(self):
+        server = self.server
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            command, args = args[0].upper(), args[1:]
+            with server.lock:
+                server.commands.append(command)
+                data = server.data
+                if command == "SET":
+                    data[args[0]] = args[1]
+                    reply = True
+                elif command == "GET":
+                    reply = data.get(args[0])
+                elif command == "DEL":
+                    reply = sum(data.pop(key, None) is not None for key in args)
+                elif command == "MSET":
+                    data.update(zip(args[0::2], args[1::2]))
+                    reply = True
+                elif command == "MGET":
+                    reply = [data.get(key) for key in args]
+                elif command == "DBSIZE":
+                    reply = len(data)
+                elif command == "SCAN":
+                    cursor = int(args[0])
+                    options = dict(zip([a.upper() for a in args[1::2]], args[2::2]))
+                    count = int(options.get("COUNT", 10))
+                    keys = sorted(data)
+                    page = keys[cursor:cursor + count]
+                    next_cursor = cursor + count if cursor + count < len(keys) else 0
+                    pattern = options.get("MATCH", "*")
+                    reply = [str(next_cursor),
+                             [key for key in page if fnmatch.fnmatchcase(key, pattern)]]
+                else:  # PING, CLIENT SETINFO, SELECT, ...
+                    reply = True
+            self._write(reply)
+            self.wfile.flush()
+
+
+def _start_resp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RESPHandler)
+    server.daemon_threads = True
+    server.data = {}
+    server.commands = []
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _stop_resp_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def resp_server():
+    server = _start_resp_server()
+    yield server
+    _stop_resp_server(server)
+
+
+def _engine(server, **kwargs):
+    host, port = server.server_address
+    return RedisStorageEngine(host=host, port=port, **kwargs)
+
+
+def test_redis_basic_operations(resp_server):
+    """Test PUT/GET/DELETE với key namespace."""
+    print("\n=== Test 1: Redis Basic Operations ===")
+
+    storage = _engine(resp_server)
+    assert storage.put("user:1", "Alice") is True
+    assert storage.get("user:1") == ("Alice", True)
+    assert storage.get("notexist") == (None, False)
+    assert resp_server.data == {"kv:user:1": "Alice"}
+    print("✅ Keys stored under the 'kv:' namespace")
+
+    assert storage.delete("user:1") is True
+    assert storage.delete("user:1") is False
+    assert storage.get("user:1") == (None, False)
+    print("✅ DELETE is idempotent")
+
+
+def test_redis_shared_connection_pool(resp_server):
+    """Test engines tới cùng host/port/db dùng chung connection pool."""
+    print("\n=== Test 2: Shared Connection Pool ===")
+
+    first = _engine(resp_server, key_prefix="a:")
+    second = _engine(resp_server, key_prefix="b:")
+    other_db = _engine(resp_server, db=1)
+    assert first.pool is second.pool
+    assert first.pool is not other_db.pool
+    print("✅ One pool per (host, port, db)")
+
+
+def test_redis_pipelined_batches(resp_server):
+    """Test put_many/get_many/delete_many gom thành ít lệnh MSET/MGET/DEL."""
+    print("\n=== Test 3: Pipelined Batches ===")
+
+    storage = _engine(resp_server, batch_size=100)
+    items = {f"key:{i:03d}": f"value:{i}" for i in range(250)}
+    assert storage.put_many(items) == 250
+    assert resp_server.commands.count("MSET") == 3
+    assert resp_server.commands.count("SET") == 0
+    print("✅ 250 writes sent as 3 MSET commands")
+
+    found = storage.get_many(["key:000", "key:249", "notexist"])
+    assert found == {"key:000": "value:0", "key:249": "value:249"}
+    print("✅ get_many returns only existing keys")
+
+    assert storage.delete_many(["key:000", "key:001", "notexist"]) == 2
+    assert storage.get("key:000") == (None, False)
+    assert storage.size() == 248
+    print("✅ delete_many returns number of deleted keys")
+
+
+def test_redis_scan_list_keys(resp_server):
+    """Test list_keys/size/clear dùng SCAN và chỉ thấy key của namespace mình."""
+    print("\n=== Test 4: SCAN-based list_keys ===")
+
+    storage = _engine(resp_server, key_prefix="node1:", scan_count=7)
+    neighbour = _engine(resp_server, key_prefix="node2:")
+    storage.put_many((f"key:{i}", str(i)) for i in range(30))
+    neighbour.put("key:x", "other")
+
+    assert sorted(storage.list_keys()) == sorted(f"key:{i}" for i in range(30))
+    assert storage.size() == 30
+    assert "KEYS" not in resp_server.commands
+    assert resp_server.commands.count("SCAN") > 1
+    print("✅ list_keys iterates SCAN cursors, never KEYS")
+
+    storage.clear()
+    assert storage.size() == 0
+    assert neighbour.get("key:x") == ("other", True)
+    print("✅ clear() only removes our namespace")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running RedisStorageEngine Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_redis_basic_operations,
+        test_redis_shared_connection_pool,
+        test_redis_pipelined_batches,
+        test_redis_scan_list_keys,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        server = _start_resp_server()
+        try:
+            test_func(server)
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+        finally:
+            _stop_resp_server(server)
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,180 @@
+"""
+Unit Tests cho sorted key index + Scan (prefix / range, cluster-wide)
+"""
+
+import sys
+import os
+import random
+from concurrent import futures
+
+import grpc
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.proto import kvstore_pb2, kvstore_pb2_grpc
+from src.storage.sorted_index import SortedKeyIndex
+from src.storage.storage_engine import StorageEngine, now_ms
+from src.storage.sharded_engine import ShardedStorageEngine
+from src.membership_manager import Node
+from src.server import KeyValueStoreServicer, NodeServicer
+
+
+class _StaticMembership:
+    """Membership cố định cho test: owner = node1 với keys chẵn, node2 với keys lẻ."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def get_alive_nodes(self):
+        return self.nodes
+
+    def get_owner_node(self, key):
+        return self.nodes[int(key.split(":")[1]) % 2]
+
+
+def test_sorted_index_matches_sorted_set():
+    """Test random adds/discards keep the index equal to a sorted set."""
+    print("\n=== Test 1: SortedKeyIndex ===")
+
+    rng = random.Random(3)
+    index = SortedKeyIndex(load=8)
+    expected = set()
+    for _ in range(5000):
+        key = f"k{rng.randrange(1000):04d}"
+        if rng.random() < 0.6:
+            index.add(key)
+            expected.add(key)
+        else:
+            index.discard(key)
+            expected.discard(key)
+
+    assert len(index) == len(expected)
+    assert list(index.irange()) == sorted(expected)
+    assert list(index.irange("k0100", "k0200")) == sorted(k for k in expected if "k0100" <= k < "k0200")
+    assert ("k0500" in index) == ("k0500" in expected)
+    print(f"✅ {len(index)} keys in order after 5000 random ops")
+
+    index.update(f"k{i:04d}" for i in range(2000, 2100))
+    assert list(index.irange("k1999"))[:2] == ["k2000", "k2001"]
+    print("✅ Bulk update merges keys in order")
+
+
+def test_engine_prefix_and_range_scan():
+    """Test StorageEngine scan by prefix, range and limit (with and without index)."""
+    print("\n=== Test 2: Engine Scan ===")
+
+    for ordered_index in (True, False):
+        storage = StorageEngine(ordered_index=ordered_index)
+        for i in range(20):
+            storage.put(f"user:{i:02d}", f"u{i}")
+            storage.put(f"order:{i:02d}", f"o{i}")
+        storage.delete("user:05")
+        storage.put("user:06", "expired", expire_at_ms=now_ms() - 1)
+
+        users = storage.scan(prefix="user:")
+        assert [key for key, _ in users] == [f"user:{i:02d}" for i in range(20) if i not in (5, 6)]
+        assert users[0] == ("user:00", "u0")
+        assert storage.scan(start="order:18", end="user:01") == [
+            ("order:18", "o18"), ("order:19", "o19"), ("user:00", "u0")
+        ]
+        assert [key for key, _ in storage.scan(prefix="user:", start="user:10", limit=3)] == [
+            "user:10", "user:11", "user:12"
+        ]
+        print(f"✅ ordered_index={ordered_index}: prefix, range and limit scans")
+
+
+def test_sharded_scan_merges_stripes():
+    """Test ShardedStorageEngine merges per-stripe scans in key order."""
+    print("\n=== Test 3: Sharded Scan ===")
+
+    storage = ShardedStorageEngine(num_shards=8, ordered_index=True)
+    keys = [f"item:{i:04d}" for i in range(1000)]
+    for key in random.Random(1).sample(keys, len(keys)):
+        storage.put(key, key.upper())
+
+    assert [key for key, _ in storage.scan(prefix="item:")] == keys
+    page = storage.scan(start="item:0500", limit=10)
+    assert page == [(key, key.upper()) for key in keys[500:510]]
+    print("✅ 8 stripes merged into one ordered result")
+
+
+def test_cluster_scan_pages_and_dedupes():
+    """Test Scan RPC merges nodes, drops replica duplicates and pages by cursor."""
+    print("\n=== Test 4: Cluster-wide Scan ===")
+
+    remote_storage = StorageEngine(ordered_index=True)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    kvstore_pb2_grpc.add_NodeServiceServicer_to_server(
+        NodeServicer("node2", 0, remote_storage), server
+    )
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        membership = _StaticMembership([Node("node1", "127.0.0.1", 1), Node("node2", "127.0.0.1", port)])
+        local_storage = StorageEngine(ordered_index=True)
+        servicer = KeyValueStoreServicer("node1", 1, local_storage, membership, None)
+
+        # node1 giữ key chẵn + replica (cũ) của vài key lẻ; node2 ngược lại
+        for i in range(10):
+            owner = local_storage if i % 2 == 0 else remote_storage
+            owner.put(f"key:{i}", f"v{i}")
+        local_storage.put("key:3", "stale")
+        remote_storage.put("key:4", "stale")
+        remote_storage.put("other:1", "x")
+
+        collected = []
+        cursor = ""
+        pages = 0
+        while True:
+            response = servicer.Scan(kvstore_pb2.ScanRequest(prefix="key:", limit=3, cursor=cursor), None)
+            collected.extend((item.key, item.value) for item in response.items)
+            pages += 1
+            if not response.has_more:
+                break
+            cursor = response.next_cursor
+
+        assert collected == [(f"key:{i}", f"v{i}") for i in range(10)]
+        print(f"✅ 10 unique keys in {pages} pages, owner copy preferred over replicas")
+    finally:
+        server.stop(None)
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Scan Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_sorted_index_matches_sorted_set,
+        test_engine_prefix_and_range_scan,
+        test_sharded_scan_merges_stripes,
+        test_cluster_scan_pages_and_dedupes,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,267 @@
+"""
+Unit Tests cho storage backend registry + capability flags
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.proto import kvstore_pb2
+from src.storage.backend import (StorageBackend, capabilities, register_backend, get_backend, backend_names,
+                                 backend_capabilities)
+from src.storage.storage_engine import StorageEngine, now_ms
+from src.storage.sharded_engine import ShardedStorageEngine
+from src.storage.compact_engine import CompactStorageEngine
+from src.storage.bitcask_engine import BitcaskStorageEngine
+from src.storage.lsm_engine import LSMStorageEngine
+from src.storage.redis_engine import RedisStorageEngine
+from src.membership_manager import Node
+from src.server import (create_storage, load_storage_config, apply_replicate_ops, scan_local,
+                        KeyValueStoreServicer, NodeServicer)
+
+
+class _DictBackend(StorageBackend):
+    """Backend tối thiểu: chỉ implement các thao tác bắt buộc."""
+
+    def __init__(self):
+        self.data = {}
+
+    def put(self, key, value):
+        self.data[key] = value
+        return True
+
+    def get(self, key):
+        return self.data.get(key), key in self.data
+
+    def delete(self, key):
+        return self.data.pop(key, None) is not None
+
+    def list_keys(self):
+        return list(self.data)
+
+    def size(self):
+        return len(self.data)
+
+    def clear(self):
+        self.data.clear()
+
+
+def test_engines_declare_capabilities():
+    """Test every engine implements StorageBackend and declares what it supports."""
+    print("\n=== Test 1: Capability Flags ===")
+
+    assert capabilities(ShardedStorageEngine) == {
+        "supports_ttl": True, "supports_scan": True, "supports_snapshot": True,
+        "supports_versions": True, "supports_tombstones": True,
+    }
+    assert capabilities(StorageEngine) == capabilities(ShardedStorageEngine)
+    assert capabilities(LSMStorageEngine)["supports_scan"] and not capabilities(LSMStorageEngine)["supports_ttl"]
+    assert capabilities(RedisStorageEngine)["supports_ttl"] and not capabilities(RedisStorageEngine)["supports_scan"]
+    assert not any(capabilities(BitcaskStorageEngine).values())
+    assert not any(capabilities(CompactStorageEngine).values())
+    for engine in (StorageEngine, ShardedStorageEngine, CompactStorageEngine,
+                   BitcaskStorageEngine, LSMStorageEngine, RedisStorageEngine):
+        assert issubclass(engine, StorageBackend)
+    print("✅ 6 engines implement StorageBackend with the expected flags")
+
+    backend = _DictBackend()
+    assert backend.put_many([("a", "1"), ("b", "2")]) == 2
+    assert backend.get_many(["a", "b", "c"]) == {"a": "1", "b": "2"}
+    assert backend.delete_many(["a", "c"]) == 1
+    try:
+        type("Incomplete", (StorageBackend,), {})()
+        assert False, "abstract backend should not be instantiable"
+    except TypeError:
+        pass
+    print("✅ Batch fallbacks for minimal backends; missing core methods rejected")
+
+    assert backend.wal is None and backend.change_feed is None and backend.max_memory_bytes == 0
+    assert backend.expire_keys() == []
+    backend.close()
+    print("✅ Optional components default to absent (no WAL / change feed / budget)")
+
+
+def test_registry():
+    """Test built-in backends are registered and unknown / duplicate names are rejected."""
+    print("\n=== Test 2: Backend Registry ===")
+
+    assert {"memory", "bitcask", "lsm", "redis", "compact"} <= set(backend_names())
+    try:
+        get_backend("floppy")
+        assert False, "unknown engine should raise"
+    except ValueError as e:
+        assert "floppy" in str(e) and "memory" in str(e)
+    try:
+        register_backend("memory")(lambda node_id, storage_config, node=None: None)
+        assert False, "duplicate registration should raise"
+    except ValueError:
+        pass
+    print(f"✅ Registered: {', '.join(backend_names())}")
+
+    if "test-dict" not in backend_names():
+        register_backend("test-dict")(lambda node_id, storage_config, node=None: _DictBackend())
+    storage = create_storage("node1", {"engine": "test-dict"})
+    assert isinstance(storage, _DictBackend)
+    print("✅ create_storage builds a custom registered backend")
+
+    assert backend_capabilities("memory") == capabilities(ShardedStorageEngine)
+    assert not backend_capabilities("bitcask")["supports_ttl"]
+    assert not any(backend_capabilities("test-dict").values())
+    print("✅ Capabilities of a backend known without building it")
+
+
+def test_engine_chosen_per_node():
+    """Test each node gets the engine and tuning parameters from its own config override."""
+    print("\n=== Test 3: Per-Node Engines ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        config = {
+            "storage": {
+                "engine": "memory", "num_shards": 4, "data_dir": data_dir,
+                "wal": {"enabled": False}, "checkpoint": {"enabled": False},
+                "lsm": {"memtable_mb": 1},
+            },
+            "nodes": [
+                {"id": "cache1"},
+                {"id": "durable1", "storage": {"engine": "lsm", "lsm": {"block_size": 1024}}},
+            ],
+        }
+        config_path = os.path.join(data_dir, "cluster.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+
+        cache = create_storage("cache1", load_storage_config(config_path, "cache1"))
+        assert isinstance(cache, ShardedStorageEngine) and cache.num_shards == 4
+        durable_config = load_storage_config(config_path, "durable1")
+        durable = create_storage("durable1", durable_config)
+        try:
+            assert isinstance(durable, LSMStorageEngine)
+            assert durable_config["lsm"] == {"memtable_mb": 1, "block_size": 1024}
+            assert os.path.isdir(os.path.join(data_dir, "durable1", "lsm"))
+        finally:
+            durable.close()
+        print("✅ cache1 → memory (4 stripes), durable1 → lsm with merged tuning")
+
+
+def test_mixed_cluster_writes():
+    """Test replicated TTL writes and scans work on engines without TTL / scan support."""
+    print("\n=== Test 4: Mixed Engines ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = BitcaskStorageEngine(os.path.join(data_dir, "bitcask"))
+        try:
+            ops = [
+                kvstore_pb2.ReplicateRequest(key="user:2", value="b", operation=kvstore_pb2.PUT,
+                                             expire_at_ms=now_ms() + 60000),
+                kvstore_pb2.ReplicateRequest(key="user:1", value="a", operation=kvstore_pb2.PUT),
+            ]
+            assert apply_replicate_ops(storage, ops) == 2
+            assert storage.get_many(["user:1", "user:2"]) == {"user:1": "a", "user:2": "b"}
+            print("✅ Replica without TTL support stores TTL writes (owner replicates the expiry delete)")
+
+            servicer = NodeServicer("node2", 0, storage)
+            batch = kvstore_pb2.ReplicateBatchRequest(primary_node="node1", ops=ops)
+            assert servicer.ReplicateBatch(batch, None).success
+            assert servicer.Replicate(ops[0], None).success
+            assert servicer.ttl_dropped == 2
+            print("✅ TTL writes stored without expiry are counted")
+
+            items = scan_local(storage, kvstore_pb2.ScanRequest(prefix="user:"), limit=10)
+            assert items == [("user:1", "a"), ("user:2", "b")]
+            print("✅ Scan falls back to sorting keys on engines without supports_scan")
+        finally:
+            storage.close()
+
+
+class _Replicas:
+    """ReplicationManager giả: cố định replicas, ghi lại các PUT được replicate."""
+
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self.replicated = []
+
+    def get_replica_nodes(self, key):
+        return self.replicas
+
+    def replicate_put(self, key, value, version=None, expire_at_ms=0):
+        self.replicated.append((key, expire_at_ms))
+        return len(self.replicas)
+
+
+class _LocalMembership:
+    """Membership cố định: mọi key thuộc về `owner`."""
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def get_owner_node(self, key):
+        return self.owner
+
+
+def test_ttl_refused_when_replica_has_no_ttl():
+    """Test the owner refuses a TTL PUT when a replica's engine cannot expire keys."""
+    print("\n=== Test 5: TTL With Replicas Without TTL ===")
+
+    owner = Node("node1", "127.0.0.1", 1)
+    replica = Node("node2", "127.0.0.1", 2)
+    replica.supports_ttl = False
+    storage = ShardedStorageEngine(num_shards=2)
+    replication = _Replicas([replica])
+    servicer = KeyValueStoreServicer("node1", 1, storage, _LocalMembership(owner), replication)
+
+    response = servicer.Put(kvstore_pb2.PutRequest(key="session", value="v", ttl_ms=5000), None)
+    assert not response.success and "node2" in response.message
+    assert storage.get("session") == (None, False) and replication.replicated == []
+    print("✅ TTL PUT refused: replica node2 cannot expire keys")
+
+    response = servicer.Put(kvstore_pb2.PutRequest(key="plain", value="v"), None)
+    assert response.success and replication.replicated == [("plain", 0)]
+    replica.supports_ttl = True
+    response = servicer.Put(kvstore_pb2.PutRequest(key="session", value="v", ttl_ms=5000), None)
+    assert response.success and replication.replicated[-1][0] == "session"
+    print("✅ PUT without TTL, and TTL PUT to TTL-capable replicas, still succeed")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Storage Backend Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_engines_declare_capabilities,
+        test_registry,
+        test_engine_chosen_per_node,
+        test_mixed_cluster_writes,
+        test_ttl_refused_when_replica_has_no_ttl,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,123 @@
+"""
+Unit Tests cho StorageEngine và ShardedStorageEngine
+"""
+
+import sys
+import os
+import threading
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.storage_engine import StorageEngine
+from src.storage.sharded_engine import ShardedStorageEngine
+
+
+def test_sharded_basic_operations():
+    """Test PUT/GET/DELETE on ShardedStorageEngine."""
+    print("\n=== Test 1: ShardedStorageEngine Basic Operations ===")
+
+    storage = ShardedStorageEngine(num_shards=8)
+
+    assert storage.put("user:1", "Alice") is True
+    assert storage.get("user:1") == ("Alice", True)
+    assert storage.get("notexist") == (None, False)
+    print("✅ PUT/GET work")
+
+    assert storage.delete("user:1") is True
+    assert storage.delete("user:1") is False
+    assert storage.get("user:1") == (None, False)
+    print("✅ DELETE is idempotent")
+
+
+def test_sharded_keys_spread_across_shards():
+    """Test keys are routed to a stable stripe and spread over all stripes."""
+    print("\n=== Test 2: Keys Spread Across Stripes ===")
+
+    storage = ShardedStorageEngine(num_shards=8)
+    for i in range(1000):
+        storage.put(f"key:{i}", str(i))
+
+    assert storage.size() == 1000
+    assert sorted(storage.list_keys()) == sorted(f"key:{i}" for i in range(1000))
+    assert all(len(shard.storage) > 0 for shard in storage.shards)
+    assert storage._shard_for("key:1") is storage._shard_for("key:1")
+    print(f"✅ Stripe sizes: {[len(s.storage) for s in storage.shards]}")
+
+    storage.clear()
+    assert storage.size() == 0
+    print("✅ clear() empties every stripe")
+
+
+def test_sharded_concurrent_writers():
+    """Test concurrent writers on different stripes do not lose updates."""
+    print("\n=== Test 3: Concurrent Writers ===")
+
+    storage = ShardedStorageEngine(num_shards=4)
+
+    def writer(worker_id):
+        for i in range(500):
+            storage.put(f"w{worker_id}:{i}", str(i))
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert storage.size() == 5000
+    assert len(storage.list_keys()) == 5000
+    print("✅ 10 writers x 500 keys all present")
+
+
+def test_engines_have_same_api():
+    """Test ShardedStorageEngine is a drop-in replacement for StorageEngine."""
+    print("\n=== Test 4: Same API ===")
+
+    for storage in (StorageEngine(), ShardedStorageEngine()):
+        storage.put("a", "1")
+        storage.put("b", "2")
+        storage.delete("a")
+        assert storage.list_keys() == ["b"]
+        assert storage.size() == 1
+    print("✅ Both engines behave the same")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running StorageEngine Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_sharded_basic_operations,
+        test_sharded_keys_spread_across_shards,
+        test_sharded_concurrent_writers,
+        test_engines_have_same_api,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
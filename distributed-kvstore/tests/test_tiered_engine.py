@@ -0,0 +1,224 @@
+"""
+Unit Tests cho TieredStorageEngine (hot keys trong RAM, cold keys trên disk log)
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.storage_engine import StorageEngine
+from src.storage.tiered_engine import TieredStorageEngine
+from src.storage.eviction import create_eviction_policy
+from src.server import create_storage
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_demote_without_evicting():
+    """Test StorageEngine with evict_on_write=False only tracks the budget until demote() is called."""
+    print("\n=== Test 1: StorageEngine.demote() ===")
+
+    storage = StorageEngine(max_memory_bytes=1000, eviction_policy=create_eviction_policy("lru"),
+                            evict_on_write=False)
+    for i in range(30):
+        storage.put(f"key{i}", "x" * 50)
+    assert storage.size() == 30 and storage.evictions == 0
+    assert storage.used_bytes > storage.max_memory_bytes
+    print("✅ Over-budget writes keep every key")
+
+    storage.get("key0")
+    demoted = storage.demote(target_bytes=900, max_keys=1000)
+    assert storage.used_bytes <= 900
+    assert demoted[0] == ("key1", "x" * 50) and ("key0", "x" * 50) not in demoted
+    assert storage.size() == 30 - len(demoted) and storage.evictions == 0
+    assert len(storage.demote(target_bytes=0, max_keys=3)) == 3
+    print(f"✅ demote() returned {len(demoted)} least recently used entries, recently read key kept")
+
+
+def test_hot_and_cold_tiers():
+    """Test cold keys are demoted in the background and promoted on access."""
+    print("\n=== Test 2: Demotion & Promotion ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = TieredStorageEngine(data_dir, hot_memory_bytes=20000)
+        try:
+            for i in range(500):
+                storage.put(f"key:{i:03d}", f"value:{i}")
+            assert _wait_for(lambda: storage.hot.used_bytes <= storage.hot_memory_bytes)
+            assert storage.size() == 500 and 0 < storage.hot_size() < 500
+            assert storage.demotions == 500 - storage.hot_size() and storage.cold.size() == 500
+            print(f"✅ {storage.hot_size()} keys hot, {storage.demotions} demoted (all 500 on disk)")
+
+            cold_reads = []
+            original = storage.cold.get
+            storage.cold.get = lambda key: cold_reads.append(key) or original(key)
+            assert storage.get("key:499") == ("value:499", True)
+            assert cold_reads == []
+            print("✅ Hot key served from memory without touching the cold tier")
+
+            assert storage.get("key:000") == ("value:0", True)
+            assert cold_reads == ["key:000"] and storage.promotions == 1
+            assert storage.get("key:000") == ("value:0", True) and cold_reads == ["key:000"]
+            assert storage.get("missing") == (None, False)
+            print("✅ Cold key promoted on first access, hot afterwards")
+
+            assert storage.get_many([f"key:{i:03d}" for i in range(0, 500, 50)]) == {
+                f"key:{i:03d}": f"value:{i}" for i in range(0, 500, 50)
+            }
+            assert storage.size() == 500 and len(set(storage.list_keys())) == 500
+            assert set(storage.hot.list_keys()) <= set(storage.list_keys())
+            print("✅ Disk log holds every key, hot tier a subset")
+        finally:
+            storage.close()
+
+
+def test_writes_and_restart():
+    """Test overwrites / deletes of demoted keys reach the disk log and survive restart."""
+    print("\n=== Test 3: Writes & Restart ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = TieredStorageEngine(data_dir, hot_memory_bytes=1 << 20)
+        storage.put_many([(f"key:{i}", f"v{i}") for i in range(100)])
+        assert storage.flush() == 100 and storage.hot_size() == 0
+
+        storage.put("key:1", "new")
+        assert storage.delete("key:2") and not storage.delete("key:2")
+        assert storage.delete_many(["key:3", "key:4", "missing"]) == 2
+        assert storage.get("key:1") == ("new", True) and storage.get("key:2") == (None, False)
+        assert storage.size() == 97 and storage.cold.size() == 97
+        assert storage.cold.get("key:1") == ("new", True)
+        print("✅ Overwrites and deletes are written through to the cold tier")
+
+        storage.close()
+        storage = TieredStorageEngine(data_dir, hot_memory_bytes=1 << 20)
+        try:
+            assert storage.size() == 97 and storage.hot_size() == 0
+            assert storage.get("key:1") == ("new", True) and storage.get("key:3") == (None, False)
+            print("✅ Restart starts with an empty hot tier and promotes lazily")
+        finally:
+            storage.close()
+
+
+def test_backpressure_and_factory():
+    """Test writers demote inline past the backpressure limit and the 'tiered' backend is registered."""
+    print("\n=== Test 4: Backpressure & Config ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = TieredStorageEngine(data_dir, hot_memory_bytes=5000)
+        try:
+            storage.put_many([(f"key:{i}", "x" * 100) for i in range(1000)])
+            assert storage.hot.used_bytes <= storage.demote_target_bytes
+            assert storage.size() == 1000
+            print("✅ A batch far over budget is demoted by the writer before returning")
+        finally:
+            storage.close()
+
+        storage = create_storage("node1", {
+            "engine": "tiered", "data_dir": data_dir,
+            "tiered": {"max_memory_mb": 1, "demote_batch": 64},
+        })
+        try:
+            assert isinstance(storage, TieredStorageEngine)
+            assert storage.hot_memory_bytes == 1024 * 1024 and storage.demote_batch == 64
+            assert os.path.isdir(os.path.join(data_dir, "node1", "tiered"))
+            print("✅ create_storage builds the tiered engine from the 'tiered' config section")
+        finally:
+            storage.close()
+
+
+def test_crash_keeps_written_values():
+    """Test a crash (no close()) keeps every write, including overwrites of demoted keys."""
+    print("\n=== Test 5: Crash Safety ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = TieredStorageEngine(data_dir, hot_memory_bytes=1 << 20)
+        storage.put_many([(f"key:{i}", f"v{i}") for i in range(10)])
+        storage.flush()
+        storage.put("key:1", "new")
+        storage.put("key:42", "hot only")
+        # Crash: dừng thread, đóng file mà không flush / ghi hint
+        with storage.lock:
+            storage._closed = True
+            storage._cond.notify_all()
+        storage._worker.join(timeout=5.0)
+        storage.cold._close_files()
+
+        storage = TieredStorageEngine(data_dir, hot_memory_bytes=1 << 20)
+        try:
+            assert storage.size() == 11
+            assert storage.get("key:1") == ("new", True)
+            assert storage.get("key:42") == ("hot only", True)
+            print("✅ Overwritten demoted key and hot-only key survive the crash")
+        finally:
+            storage.close()
+
+
+def test_demotion_stall_does_not_spin():
+    """Test the demotion thread waits when nothing can be demoted while over budget."""
+    print("\n=== Test 6: Demotion Stall ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = TieredStorageEngine(data_dir, hot_memory_bytes=1000)
+        try:
+            calls = []
+            storage.hot.demote = lambda target_bytes, max_keys: calls.append(target_bytes) or []
+            storage.put_many([(f"key:{i}", "x" * 50) for i in range(12)])
+            time.sleep(0.3)
+            assert storage.hot.used_bytes > storage.hot_memory_bytes
+            assert 1 <= len(calls) <= 3
+            print(f"✅ {len(calls)} demote() call(s) in 300 ms while stalled")
+        finally:
+            storage.close()
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running TieredStorageEngine Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_demote_without_evicting,
+        test_hot_and_cold_tiers,
+        test_writes_and_restart,
+        test_backpressure_and_factory,
+        test_crash_keeps_written_values,
+        test_demotion_stall_does_not_spin,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
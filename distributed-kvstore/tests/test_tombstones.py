@@ -0,0 +1,193 @@
+"""
+Unit Tests cho delete tombstones + tombstone GC
+"""
+
+import sys
+import os
+import tempfile
+from concurrent import futures
+
+import grpc
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.proto import kvstore_pb2, kvstore_pb2_grpc
+from src.storage.storage_engine import StorageEngine, now_ms
+from src.storage.sharded_engine import ShardedStorageEngine
+from src.storage.checkpoint import CheckpointStore
+from src.storage.wal import WriteAheadLog
+from src.membership_manager import Node
+from src.server import NodeServicer, TombstoneGCManager, recover_from_peers
+
+
+class _StaticMembership:
+    """Membership cố định: mọi key có replicas = tất cả nodes (node đầu là owner)."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def get_all_nodes(self):
+        return self.nodes
+
+    def get_all_replicas(self, key):
+        return self.nodes
+
+
+def test_delete_leaves_hidden_tombstone():
+    """Test deletes leave tombstones hidden from reads; a later put clears them."""
+    print("\n=== Test 1: Tombstone Semantics ===")
+
+    storage = ShardedStorageEngine(num_shards=4, keep_tombstones=True)
+    storage.put_many([(f"k{i}", f"v{i}") for i in range(10)])
+    before = now_ms()
+    assert storage.delete("k1")
+    assert storage.delete_many(["k2", "k3", "missing"]) == 2
+
+    assert storage.get("k1") == (None, False)
+    assert sorted(storage.list_keys()) == sorted(f"k{i}" for i in range(10) if i not in (1, 2, 3))
+    assert storage.get_many(["k1", "k2", "k4"]) == {"k4": "v4"}
+    assert storage.get_tombstone("k1") >= before
+    assert storage.get_tombstone("missing") is None
+    assert storage.tombstone_count == 3
+    print("✅ 3 tombstones, invisible to get/get_many/list_keys")
+
+    storage.put("k1", "again")
+    assert storage.get("k1") == ("again", True)
+    assert storage.get_tombstone("k1") is None and storage.tombstone_count == 2
+    print("✅ Re-writing a key removes its tombstone")
+
+    plain = StorageEngine()
+    plain.put("a", "1")
+    plain.delete("a")
+    assert plain.tombstone_count == 0
+    print("✅ Tombstones are off by default")
+
+
+def test_gc_respects_grace_and_batch():
+    """Test GC only purges tombstones past the grace period, at most max_batch per call."""
+    print("\n=== Test 2: Incremental GC ===")
+
+    storage = ShardedStorageEngine(num_shards=4, keep_tombstones=True)
+    now = now_ms()
+    storage.load_tombstones([(f"old{i}", now - 10000 - i) for i in range(25)])
+    storage.load_tombstones([(f"new{i}", now) for i in range(5)])
+
+    assert storage.gc_tombstones(grace_ms=5000, max_batch=10, now=now) == 10
+    assert storage.gc_tombstones(grace_ms=5000, max_batch=10, now=now) == 10
+    assert storage.gc_tombstones(grace_ms=5000, max_batch=10, now=now) == 5
+    assert storage.gc_tombstones(grace_ms=5000, max_batch=10, now=now) == 0
+    assert storage.tombstone_count == 5
+    print("✅ 25 expired tombstones purged in batches of 10, 5 recent ones kept")
+
+    backlog = StorageEngine(keep_tombstones=True)
+    backlog.load_tombstones([(f"x{i}", 0) for i in range(2500)])
+    manager = TombstoneGCManager(backlog, grace_period=1, batch_size=1000)
+    assert manager.collect_now() == 2500
+    assert backlog.tombstone_count == 0
+    print("✅ GC manager drains a backlog batch by batch")
+
+
+def test_tombstones_survive_wal_and_checkpoint():
+    """Test tombstones are restored by WAL replay and by checkpoint restore."""
+    print("\n=== Test 3: WAL & Checkpoint ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        wal = WriteAheadLog(os.path.join(data_dir, "wal"), fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = ShardedStorageEngine(num_shards=4, wal=wal, keep_tombstones=True)
+        storage.put_many([("a", "1"), ("b", "2"), ("c", "3")])
+        storage.delete("a")
+        deleted_at = storage.get_tombstone("a")
+        store = CheckpointStore(os.path.join(data_dir, "checkpoints"))
+        store.checkpoint(storage)
+        storage.delete("b")
+        wal.close()
+
+        wal = WriteAheadLog(os.path.join(data_dir, "wal"))
+        restored = ShardedStorageEngine(num_shards=2, wal=wal, keep_tombstones=True)
+        info = store.restore(restored)
+        restored.replay_wal(from_lsn=info.lsn)
+        assert restored.list_keys() == ["c"]
+        assert restored.get_tombstone("a") == deleted_at
+        assert restored.get_tombstone("b") is not None
+        wal.close()
+        print("✅ Tombstone from checkpoint + tombstone from WAL tail restored")
+
+
+def test_snapshot_recovery_does_not_resurrect():
+    """Test a stale replica value does not beat another node's tombstone during recovery."""
+    print("\n=== Test 4: Snapshot Recovery ===")
+
+    deleted_storage = StorageEngine(keep_tombstones=True)
+    deleted_storage.put("gone", "v")
+    deleted_storage.put("kept", "k")
+    deleted_storage.delete("gone")
+    stale_storage = StorageEngine()
+    stale_storage.put("gone", "v")
+    stale_storage.put("kept", "k")
+
+    servers = []
+    nodes = []
+    try:
+        for node_id, storage in (("node2", deleted_storage), ("node3", stale_storage)):
+            server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+            kvstore_pb2_grpc.add_NodeServiceServicer_to_server(NodeServicer(node_id, 0, storage), server)
+            port = server.add_insecure_port("127.0.0.1:0")
+            server.start()
+            servers.append(server)
+            nodes.append(Node(node_id, "127.0.0.1", port))
+
+        snapshot = NodeServicer("node2", 0, deleted_storage).GetSnapshot(kvstore_pb2.SnapshotRequest(), None)
+        assert snapshot.total_keys == 1
+        assert [pair.key for pair in snapshot.data if pair.deleted_at_ms] == ["gone"]
+
+        # node1 là owner nên không peer nào thắng nhờ owner; node3 (stale) trả lời trước
+        membership = _StaticMembership([Node("node1", "127.0.0.1", 1), nodes[1], nodes[0]])
+        storage = ShardedStorageEngine(num_shards=2, keep_tombstones=True)
+        assert recover_from_peers("node1", storage, membership) == 1
+        assert storage.list_keys() == ["kept"]
+        assert storage.get_tombstone("gone") == deleted_storage.get_tombstone("gone")
+        print("✅ Deleted key stays deleted and its tombstone is recovered")
+    finally:
+        for server in servers:
+            server.stop(None)
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Tombstone Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_delete_leaves_hidden_tombstone,
+        test_gc_respects_grace_and_batch,
+        test_tombstones_survive_wal_and_checkpoint,
+        test_snapshot_recovery_does_not_resurrect,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,246 @@
+"""
+Unit Tests cho per-key versions (timestamp ms, node_id) + last-write-wins
+"""
+
+import sys
+import os
+import tempfile
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.proto import kvstore_pb2
+from src.storage.storage_engine import StorageEngine, now_ms
+from src.storage.sharded_engine import ShardedStorageEngine
+from src.storage.checkpoint import CheckpointStore
+from src.storage.wal import WriteAheadLog
+from src.storage.versioning import VersionClock, encode_version, decode_version
+from src.membership_manager import Node
+from src.server import KeyValueStoreServicer, NodeServicer
+
+
+class _LocalOwnerMembership:
+    """Membership cho test: node này là owner của mọi key."""
+
+    def __init__(self, node):
+        self.node = node
+
+    def get_owner_node(self, key):
+        return self.node
+
+
+class _RecordingReplication:
+    """ReplicationManager giả: ghi lại các version được replicate."""
+
+    def __init__(self):
+        self.sent = []
+
+    def replicate_put(self, key, value, version, expire_at_ms=0):
+        self.sent.append(("PUT", key, version))
+        return 0
+
+    def replicate_delete(self, key, version):
+        self.sent.append(("DELETE", key, version))
+        return 0
+
+
+def test_clock_is_monotonic():
+    """Test versions never repeat or go backwards, and observe() pulls the clock forward."""
+    print("\n=== Test 1: VersionClock ===")
+
+    clock = VersionClock("node1")
+    versions = [clock.next() for _ in range(1000)]
+    assert all(a < b for a, b in zip(versions, versions[1:]))
+    print("✅ 1000 versions strictly increasing")
+
+    future = (versions[-1][0] + 60000, "node2")
+    clock.observe(future)
+    assert clock.next() > future
+    ahead = future[0] + 60000
+    assert clock.next(timestamp_ms=ahead) == (ahead, "node1")
+    assert clock.next(timestamp_ms=ahead) == (ahead + 1, "node1")
+    assert clock.next(timestamp_ms=42) == (ahead + 2, "node1")
+    assert decode_version(encode_version((123, "node:3"))) == (123, "node:3")
+    print("✅ Clock moves past observed versions; client timestamps used but never repeated")
+
+
+def test_engine_rejects_stale_writes():
+    """Test reordered puts and deletes converge on the newest version."""
+    print("\n=== Test 2: Last-Write-Wins ===")
+
+    storage = ShardedStorageEngine(num_shards=4, keep_tombstones=True)
+    assert storage.put("k", "new", version=(200, "node1"))
+    assert not storage.put("k", "old", version=(100, "node1"))
+    assert not storage.put("k", "same", version=(200, "node1"))
+    assert storage.put("k", "tie", version=(200, "node2"))
+    assert storage.get_with_version("k") == ("tie", True, (200, "node2"))
+    print("✅ Older and equal versions rejected, node_id breaks timestamp ties")
+
+    # DELETE đến trước PUT mà nó ghi đè → tombstone giữ version, PUT cũ bị bỏ
+    assert not storage.delete("late", version=(300, "node1"))
+    assert not storage.put("late", "resurrected", version=(250, "node1"))
+    assert storage.get("late") == (None, False)
+    assert not storage.delete("k", version=(150, "node1"))
+    assert storage.get("k") == ("tie", True)
+    print("✅ Delete reordered before its put wins; stale delete ignored")
+
+    assert storage.put_many([("a", "1"), ("b", "2"), ("k", "x")],
+                            versions={"a": (10, "n"), "b": (10, "n"), "k": (1, "n")}) == 2
+    assert storage.delete_many(["a", "b"], versions={"a": (5, "n"), "b": (20, "n")}) == 1
+    assert storage.get_many(["a", "b", "k"]) == {"a": "1", "k": "tie"}
+    print("✅ put_many / delete_many skip stale entries")
+
+
+def test_versions_survive_wal_and_checkpoint():
+    """Test versions (of values and tombstones) are restored after restart."""
+    print("\n=== Test 3: WAL & Checkpoint ===")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        wal = WriteAheadLog(os.path.join(data_dir, "wal"), fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = ShardedStorageEngine(num_shards=4, wal=wal, keep_tombstones=True)
+        storage.put("a", "1", version=(100, "node1"))
+        storage.put("b", "2", version=(100, "node1"))
+        storage.delete("b", version=(110, "node1"))
+        store = CheckpointStore(os.path.join(data_dir, "checkpoints"))
+        store.checkpoint(storage)
+        storage.put("c", "3", version=(120, "node2"))
+        storage.put("a", "plain")
+        wal.close()
+
+        wal = WriteAheadLog(os.path.join(data_dir, "wal"))
+        restored = StorageEngine(wal=wal, keep_tombstones=True)
+        info = store.restore(restored)
+        restored.replay_wal(from_lsn=info.lsn)
+        assert restored.versions == {"b": (110, "node1"), "c": (120, "node2")}
+        assert restored.get("a") == ("plain", True)
+        assert not restored.put("b", "stale", version=(105, "node1"))
+        wal.close()
+        print("✅ Versions from checkpoint + WAL tail restored, unversioned put clears version")
+
+
+def test_owner_sets_version_and_replicas_reject_stale():
+    """Test the owner versions writes, Get reports them and replicas apply LWW."""
+    print("\n=== Test 4: Owner & Replicas ===")
+
+    replication = _RecordingReplication()
+    owner_storage = StorageEngine(keep_tombstones=True)
+    owner = KeyValueStoreServicer("node1", 1, owner_storage,
+                                  _LocalOwnerMembership(Node("node1", "127.0.0.1", 1)), replication)
+    assert owner.Put(kvstore_pb2.PutRequest(key="k", value="v1"), None).success
+    assert owner.Put(kvstore_pb2.PutRequest(key="k", value="v2"), None).success
+    response = owner.Get(kvstore_pb2.GetRequest(key="k"), None)
+    first, second = replication.sent[0][2], replication.sent[1][2]
+    assert first < second and (response.timestamp, response.version_node) == second
+    print(f"✅ Get returns the write version {second}")
+
+    # 2 writes cùng client timestamp trên 1 node → 2 versions khác nhau, write sau thắng
+    ahead = second[0] + 60000
+    assert owner.Put(kvstore_pb2.PutRequest(key="k", value="v3", timestamp=ahead), None).success
+    assert owner.Put(kvstore_pb2.PutRequest(key="k", value="v4", timestamp=ahead), None).success
+    third, fourth = replication.sent[2][2], replication.sent[3][2]
+    assert third == (ahead, "node1") and fourth == (ahead + 1, "node1")
+    assert owner.Get(kvstore_pb2.GetRequest(key="k"), None).value == "v4"
+    print("✅ Equal client timestamps get distinct versions, the later write wins")
+
+    replica_storage = StorageEngine(keep_tombstones=True)
+    replica = NodeServicer("node2", 0, replica_storage)
+    ops = [
+        kvstore_pb2.ReplicateRequest(key="k", value="v2", operation=kvstore_pb2.PUT,
+                                     timestamp=second[0], version_node=second[1]),
+        kvstore_pb2.ReplicateRequest(key="k", value="v1", operation=kvstore_pb2.PUT,
+                                     timestamp=first[0], version_node=first[1]),
+    ]
+    assert replica.ReplicateBatch(kvstore_pb2.ReplicateBatchRequest(ops=ops), None).success
+    assert replica.Replicate(ops[1], None).success
+    assert replica_storage.get_with_version("k") == ("v2", True, second)
+    assert replica.clock.next() > second
+    print("✅ Replica keeps v2 when v1 arrives late; replica clock moved past owner's version")
+
+
+def test_delete_keeps_version_without_tombstones():
+    """Test a delete keeps its version watermark when tombstones are off."""
+    print("\n=== Test 5: Delete Watermark Without Tombstones ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        storage = ShardedStorageEngine(num_shards=4, wal=wal)
+        assert storage.put("k", "v1", version=(200, "node1"))
+        assert storage.delete("k", version=(300, "node1"))
+        assert not storage.put("k", "resurrected", version=(250, "node1"))
+        assert storage.get("k") == (None, False)
+        assert storage.get_tombstone("k") is None and storage.tombstone_count == 0
+        # DELETE đến trước PUT mà nó ghi đè
+        assert not storage.delete("late", version=(300, "node1"))
+        assert not storage.put("late", "old", version=(100, "node1"))
+        print("✅ Late older PUT rejected after delete, no tombstone kept")
+        wal.close()
+
+        wal = WriteAheadLog(wal_dir)
+        restored = ShardedStorageEngine(num_shards=4, wal=wal)
+        restored.replay_wal()
+        assert not restored.put("k", "resurrected", version=(250, "node1"))
+        assert restored.put("k", "v2", version=(400, "node1"))
+        assert restored.get_with_version("k") == ("v2", True, (400, "node1"))
+        print("✅ Watermark survives WAL replay, newer PUT still wins")
+
+        assert restored.gc_tombstones(grace_ms=0, now=now_ms() + 1000) == 1
+        assert restored.get_version("late") is None
+        assert restored.put("late", "old", version=(100, "node1"))
+        wal.close()
+        print("✅ Watermarks are collected by gc_tombstones()")
+
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        storage = ShardedStorageEngine(num_shards=4)
+        assert storage.put("k", "v1", version=(200, "node1"))
+        assert storage.delete("k", version=(300, "node1"))
+        store = CheckpointStore(checkpoint_dir)
+        store.checkpoint(storage)
+
+        restored = ShardedStorageEngine(num_shards=4)
+        assert store.restore(restored) is not None
+        assert restored.get_version("k") == (300, "node1")
+        assert not restored.put("k", "resurrected", version=(250, "node1"))
+        assert restored.get("k") == (None, False)
+        assert restored.gc_tombstones(grace_ms=0, now=now_ms() + 1000) == 1
+        print("✅ Watermark survives checkpoint restore")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running Versioning Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_clock_is_monotonic,
+        test_engine_rejects_stale_writes,
+        test_versions_survive_wal_and_checkpoint,
+        test_owner_sets_version_and_replicas_reject_stale,
+        test_delete_keeps_version_without_tombstones,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
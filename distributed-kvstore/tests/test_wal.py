@@ -0,0 +1,206 @@
+"""
+Unit Tests cho WriteAheadLog (group commit, replay, torn tail recovery)
+"""
+
+import sys
+import os
+import tempfile
+import threading
+
+# Fix import path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.storage.wal import WriteAheadLog, OP_PUT, OP_DELETE
+from src.storage.storage_engine import StorageEngine
+from src.storage.sharded_engine import ShardedStorageEngine
+
+
+def test_wal_append_and_replay():
+    """Test records are replayed in LSN order after reopen."""
+    print("\n=== Test 1: Append & Replay ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_ALWAYS)
+        lsn1 = wal.append(OP_PUT, "user:1", "Alice")
+        lsn2 = wal.append(OP_DELETE, "user:1")
+        lsn3 = wal.append(OP_PUT, "user:2", "Bob")
+        wal.wait_durable(lsn3)
+        wal.close()
+        assert (lsn1, lsn2, lsn3) == (1, 2, 3)
+
+        wal = WriteAheadLog(wal_dir)
+        records = []
+        wal.replay(lambda op, k, v: records.append((op, k, v)))
+        assert records == [(OP_PUT, "user:1", "Alice"), (OP_DELETE, "user:1", ""),
+                           (OP_PUT, "user:2", "Bob")]
+        assert wal.last_lsn == 3
+        print("✅ Records replayed in order, LSN continues after reopen")
+
+        records = []
+        wal.replay(lambda op, k, v: records.append(k), from_lsn=2)
+        assert records == ["user:2"]
+        wal.close()
+        print("✅ replay(from_lsn) skips older records")
+
+
+def test_wal_group_commit():
+    """Test concurrent writers share fsyncs (group commit)."""
+    print("\n=== Test 2: Group Commit ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_ALWAYS)
+        storage = ShardedStorageEngine(num_shards=8, wal=wal)
+
+        def writer(worker_id):
+            for i in range(100):
+                storage.put(f"w{worker_id}:{i}", str(i))
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert wal.records_written == 800
+        assert wal.fsync_count <= 800
+        print(f"✅ 800 durable writes used {wal.fsync_count} fsyncs")
+        wal.close()
+
+
+def test_wal_truncates_torn_tail():
+    """Test a partially written record at the tail is discarded."""
+    print("\n=== Test 3: Torn Tail ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        wal.wait_durable(wal.append(OP_PUT, "a", "1"))
+        wal.wait_durable(wal.append(OP_PUT, "b", "2"))
+        wal.close()
+
+        segment = os.path.join(wal_dir, sorted(os.listdir(wal_dir))[-1])
+        with open(segment, 'r+b') as f:
+            f.truncate(os.path.getsize(segment) - 3)
+
+        wal = WriteAheadLog(wal_dir)
+        keys = []
+        wal.replay(lambda op, k, v: keys.append(k))
+        assert keys == ["a"]
+        assert wal.last_lsn == 1
+        print("✅ Torn record dropped, valid prefix kept")
+
+        wal.wait_durable(wal.append(OP_PUT, "c", "3"))
+        wal.close()
+        wal = WriteAheadLog(wal_dir)
+        keys = []
+        wal.replay(lambda op, k, v: keys.append(k))
+        assert keys == ["a", "c"]
+        wal.close()
+        print("✅ New writes append after the truncated tail")
+
+
+def test_engine_recovers_from_wal():
+    """Test StorageEngine state survives a restart through WAL replay."""
+    print("\n=== Test 4: Engine Recovery ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        for policy in (WriteAheadLog.FSYNC_ALWAYS, WriteAheadLog.FSYNC_INTERVAL,
+                       WriteAheadLog.FSYNC_OS):
+            wal = WriteAheadLog(os.path.join(wal_dir, policy), fsync_policy=policy)
+            storage = StorageEngine(wal=wal)
+            storage.put("user:1", "Alice")
+            storage.put("user:2", "Bob")
+            storage.delete("user:1")
+            storage.delete("notexist")
+            wal.close()
+
+            wal = WriteAheadLog(os.path.join(wal_dir, policy), fsync_policy=policy)
+            restored = StorageEngine(wal=wal)
+            assert restored.replay_wal() == 3
+            assert restored.get("user:2") == ("Bob", True)
+            assert restored.get("user:1") == (None, False)
+            wal.close()
+            print(f"✅ fsync_policy={policy}: state restored")
+
+
+def test_wal_segment_rollover():
+    """Test log rolls over to new segments and replays across them."""
+    print("\n=== Test 5: Segment Rollover ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS,
+                            max_segment_bytes=256)
+        for i in range(50):
+            wal.wait_durable(wal.append(OP_PUT, f"key:{i}", "x" * 20))
+        wal.close()
+
+        assert len(os.listdir(wal_dir)) > 1
+        wal = WriteAheadLog(wal_dir)
+        keys = []
+        wal.replay(lambda op, k, v: keys.append(k))
+        assert keys == [f"key:{i}" for i in range(50)]
+        assert wal.last_lsn == 50
+        wal.close()
+        print(f"✅ {len(os.listdir(wal_dir))} segments replayed in order")
+
+
+def test_wal_rotate_and_purge():
+    """Test purge() drops only segments fully covered by the given LSN."""
+    print("\n=== Test 6: Rotate & Purge ===")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal = WriteAheadLog(wal_dir, fsync_policy=WriteAheadLog.FSYNC_OS)
+        wal.append(OP_PUT, "a", "1")
+        wal.append(OP_PUT, "b", "2")
+        sealed_lsn = wal.rotate()
+        wal.wait_durable(wal.append(OP_PUT, "c", "3"))
+        assert sealed_lsn == 2
+
+        assert wal.purge(sealed_lsn - 1) == 0
+        assert wal.purge(sealed_lsn) == 1
+        keys = []
+        wal.replay(lambda op, k, v: keys.append(k))
+        assert keys == ["c"]
+        wal.close()
+        print("✅ Sealed segment purged, active segment kept")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("Running WriteAheadLog Unit Tests")
+    print("=" * 60)
+
+    tests = [
+        test_wal_append_and_replay,
+        test_wal_group_commit,
+        test_wal_truncates_torn_tail,
+        test_engine_recovers_from_wal,
+        test_wal_segment_rollover,
+        test_wal_rotate_and_purge,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAILED: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)